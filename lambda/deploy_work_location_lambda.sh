@@ -372,6 +372,29 @@ aws events put-targets \
     --targets "Id"="1","Arn"="arn:aws:lambda:$REGION:$ACCOUNT_ID:function:$FUNCTION_NAME" \
     --region $REGION >/dev/null
 
+# Step 10: Hourly archive compaction (same function, compact_archive action)
+echo "🗜️ Setting up hourly EventBridge schedule for archive compaction..."
+aws events put-rule \
+    --name pudu-robot-work-location-compaction-hourly \
+    --schedule-expression "rate(1 hour)" \
+    --description "Compact Pudu robot work location archive partitions every hour" \
+    --state ENABLED \
+    --region $REGION >/dev/null
+
+aws lambda add-permission \
+    --function-name $FUNCTION_NAME \
+    --statement-id pudu-robot-work-location-compaction-permission \
+    --action lambda:InvokeFunction \
+    --principal events.amazonaws.com \
+    --source-arn arn:aws:events:$REGION:$ACCOUNT_ID:rule/pudu-robot-work-location-compaction-hourly \
+    --region $REGION \
+    >/dev/null 2>&1 || echo "Permission already exists"
+
+aws events put-targets \
+    --rule pudu-robot-work-location-compaction-hourly \
+    --targets '[{"Id":"1","Arn":"arn:aws:lambda:'"$REGION"':'"$ACCOUNT_ID"':function:'"$FUNCTION_NAME"'","Input":"{\"action\": \"compact_archive\"}"}]' \
+    --region $REGION >/dev/null
+
 echo ""
 echo "✅ Work Location Lambda deployment completed successfully!"
 echo ""
@@ -381,7 +404,7 @@ echo "   Region: $REGION"
 echo "   Package Type: Image"
 echo "   Image URI: $ECR_URI"
 echo "   Memory: 1024 MB"
-echo "   Schedule: Every 1 minute"
+echo "   Schedule: Every 1 minute (archive compaction hourly)"
 echo "   Logs: /aws/lambda/$FUNCTION_NAME"
 echo "   Retention: 30 days per robot"
 echo ""
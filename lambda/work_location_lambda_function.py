@@ -93,6 +93,22 @@ def lambda_handler(event, context):
 
         work_location_service = WorkLocationService(config, s3_config, run_backfill=run_backfill)
 
+        # Hourly schedule: merge small archive files instead of running updates
+        if event.get('action') == 'compact_archive':
+            logger.info("🗜️ Starting work location archive compaction...")
+            compacted = work_location_service.compact_archive()
+            execution_time = (datetime.now() - start_time).total_seconds()
+            return {
+                'statusCode': 200,
+                'body': json.dumps({
+                    'message': f'Compacted {compacted} archive partitions',
+                    'execution_time_seconds': execution_time,
+                    'success': True,
+                    'timestamp': datetime.now().isoformat(),
+                    'service': 'work_location'
+                })
+            }
+
         # Run the work location service
         logger.info("▶️ Starting work location service execution...")
         success = work_location_service.run_work_location_updates()
@@ -0,0 +1,188 @@
+# asgi.py
+"""
+ASGI entry point for the webhook API, alongside the Flask app in main.py:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+
+Serves the same endpoints with the same shared handlers, writer and notification pipeline as
+main.py. JSON parsing, brand detection, verification and field mapping run on the event loop;
+the blocking database write (MySQL via pymysql) and change notification run in a bounded thread
+pool, so one process keeps many callbacks in flight. In ack-fast mode (WEBHOOK_ASYNC_WRITES) the
+callback is queued from the event loop and never touches the pool.
+"""
+import asyncio
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+import main as webhook
+from config import Config
+from models import CallbackResponse, CallbackStatus
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_PATHS = {"/api/webhook", "/api/pudu/webhook", "/api/gas/webhook"}
+
+
+class AsgiWebhookApp:
+    """Plain ASGI application (HTTP + lifespan) for the webhook endpoints"""
+
+    def __init__(self, io_threads: int = None, max_in_flight: int = None):
+        self.io_threads = io_threads or Config.ASGI_IO_THREADS
+        self.max_in_flight = max_in_flight or Config.ASGI_MAX_IN_FLIGHT
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {'requests': 0, 'queued': 0, 'written': 0, 'rejected': 0, 'errors': 0, 'max_in_flight_seen': 0}
+
+    async def __call__(self, scope: Dict[str, Any], receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        method = scope["method"]
+        path = scope["path"].rstrip("/") or "/"
+        parts = path.split("/")
+
+        if path in WEBHOOK_PATHS:
+            if method != "POST":
+                status_code, body = 405, {"status": "error", "message": "Method not allowed"}
+            else:
+                if path != "/api/webhook":
+                    logger.info(f"📍 Called via {parts[2].capitalize()}-specific endpoint")
+                status_code, body = await self._handle_webhook(scope, receive)
+        elif method == "GET" and path == "/api/webhook/health":
+            body = webhook.get_health_status()
+            body["asgi"] = self.get_stats()
+            status_code = 200
+        elif method == "GET" and len(parts) == 5 and parts[1] == "api" and parts[3:] == ["webhook", "health"]:
+            body, status_code = webhook.get_brand_health_status(parts[2])
+        else:
+            status_code, body = 404, {"status": "error", "message": f"Not found: {path}"}
+
+        await self._send_json(send, status_code, body)
+
+    async def _handle_webhook(self, scope: Dict[str, Any], receive) -> Tuple[int, Dict[str, Any]]:
+        """Same flow as main.unified_webhook_handler, with the database write off the event loop"""
+        self._stats['requests'] += 1
+        try:
+            client = scope.get("client") or ("unknown",)
+            logger.info(f"Received webhook callback from {client[0]}")
+
+            headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+            body = await self._read_body(receive)
+
+            # Validate request is JSON
+            content_type = headers.get("content-type", "").split(";")[0].strip()
+            if not (content_type == "application/json" or content_type.endswith("+json")):
+                logger.error("Request is not JSON")
+                return 400, CallbackResponse(status=CallbackStatus.ERROR, message="Request must be JSON").to_dict()
+
+            # Parse JSON body
+            try:
+                data = json.loads(body)
+            except ValueError:
+                logger.error("Malformed JSON received")
+                return 400, CallbackResponse(status=CallbackStatus.ERROR, message="Malformed JSON").to_dict()
+
+            logger.info(f"Callback data: {json.dumps(data, indent=2)}")
+
+            callback_handler, brand, response, status_code = webhook.accept_callback(data, headers)
+            if callback_handler is None:
+                return status_code, response.to_dict()
+
+            # Ack-fast mode: queue from the event loop; otherwise write in the I/O pool
+            if webhook.enqueue_callback(callback_handler, brand, data, response):
+                self._stats['queued'] += 1
+                return status_code, response.to_dict()
+
+            if self._in_flight >= self.max_in_flight:
+                self._stats['rejected'] += 1
+                logger.warning(f"⚠️ {self._in_flight} callbacks in flight, rejecting callback")
+                return 503, CallbackResponse(status=CallbackStatus.ERROR, message="Server busy, retry later").to_dict()
+
+            self._in_flight += 1
+            self._stats['max_in_flight_seen'] = max(self._stats['max_in_flight_seen'], self._in_flight)
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    self._get_executor(), webhook.write_callback, callback_handler, data
+                )
+                self._stats['written'] += 1
+            finally:
+                self._in_flight -= 1
+
+            return status_code, response.to_dict()
+
+        except Exception as e:
+            self._stats['errors'] += 1
+            logger.error(f"Error processing callback: {str(e)}", exc_info=True)
+            return 500, CallbackResponse(status=CallbackStatus.ERROR, message=f"Internal server error: {str(e)}").to_dict()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Request counters, callbacks currently waiting on the I/O pool and its size"""
+        stats = dict(self._stats)
+        stats['in_flight'] = self._in_flight
+        stats['io_threads'] = self.io_threads
+        return stats
+
+    def close(self):
+        """Wait for in-flight writes; shared resources are closed by main's atexit hook"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.io_threads, thread_name_prefix="webhook-io")
+        return self._executor
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                logger.info(f"🚀 ASGI webhook app started ({self.io_threads} I/O threads, "
+                            f"write queue {'enabled' if webhook.callback_queue else 'disabled'})")
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await asyncio.get_running_loop().run_in_executor(None, self.close)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    @staticmethod
+    async def _send_json(send, status_code: int, body: Dict[str, Any]):
+        payload = json.dumps(body, default=str).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())],
+        })
+        await send({"type": "http.response.body", "body": payload})
+
+
+app = AsgiWebhookApp()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host=Config.HOST, port=Config.PORT, log_level=Config.LOG_LEVEL.lower())
@@ -1,11 +1,12 @@
 # callback_handler.py
 import json
 import logging
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import time
 
 from models import CallbackResponse, CallbackStatus
 from database_writer import DatabaseWriter
+from state_write_coalescer import STATE_WRITER_RECORD_TYPES, StateWriteCoalescer
 from core.brand_config import BrandConfig, FieldMapper
 from core.services.verification_service import VerificationService
 
@@ -18,13 +19,16 @@ class CallbackHandler:
     Handles verification, type mapping, field mapping, and database writing
     """
 
-    def __init__(self, database_config_path: str = "configs/database_config.yaml", brand: str = "pudu"):
+    def __init__(self, database_config_path: str = "configs/database_config.yaml", brand: str = "pudu",
+                 database_writer: DatabaseWriter = None, state_writer: StateWriteCoalescer = None):
         """
         Initialize callback handler with brand configuration
 
         Args:
             database_config_path: Path to database configuration YAML
             brand: Brand name (e.g., 'pudu', 'gas')
+            database_writer: Shared long-lived DatabaseWriter; a private one is created (and closed by close()) if omitted
+            state_writer: Optional coalescer that takes pose/power records and writes them in periodic batches
         """
         self.brand = brand
 
@@ -34,7 +38,9 @@ class CallbackHandler:
         self.verification_service = VerificationService(self.brand_config)
 
         # Initialize enhanced database writer
-        self.database_writer = DatabaseWriter(database_config_path)
+        self._owns_database_writer = database_writer is None
+        self.database_writer = database_writer or DatabaseWriter(database_config_path)
+        self.state_writer = state_writer
 
         logger.info(f"CallbackHandler initialized for brand: {brand}")
 
@@ -67,6 +73,14 @@ class CallbackHandler:
             message=f"Callback received: {abstract_type}"
         )
 
+    def extract_robot_sn(self, data: Dict[str, Any]) -> str:
+        """Robot serial number of a callback (empty if it cannot be mapped), used to partition the write queue"""
+        abstract_type = self.brand_config.map_callback_type(data)
+        if not abstract_type:
+            return ""
+        mapped_data = self.field_mapper.map_fields(abstract_type, self._extract_callback_data(data))
+        return str((mapped_data or {}).get("robot_sn", "") or "")
+
     def _extract_callback_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Extract callback data payload based on brand format
@@ -103,130 +117,201 @@ class CallbackHandler:
             tuple: (database_names, table_names, changes_detected)
         """
         try:
-            # Map to abstract type
-            abstract_type = self.brand_config.map_callback_type(raw_data)
-
-            if not abstract_type:
-                logger.warning("Cannot write to database: unknown callback type")
+            prepared = self.prepare_record(raw_data)
+            if not prepared:
                 return [], [], {}
 
-            # Extract callback data
-            callback_data = self._extract_callback_data(raw_data)
+            abstract_type, record_type, robot_sn, record = prepared
+            if self._submit_to_state_writer(abstract_type, record_type, robot_sn, record):
+                # Written (and notified) by the coalescer's next flush
+                return [], [], {}
 
-            # Map fields using brand-specific field mapper
-            mapped_data = self.field_mapper.map_fields(abstract_type, callback_data)
+            write_method = {
+                "status": self.database_writer.write_robot_status,
+                "pose": self.database_writer.write_robot_pose,
+                "power": self.database_writer.write_robot_power,
+                "event": self.database_writer.write_robot_event,
+                "task": self.database_writer.write_robot_task,
+            }[record_type]
+            return write_method(robot_sn, record)
 
-            if not mapped_data:
-                logger.warning(f"No data after field mapping for {abstract_type}")
-                return [], [], {}
+        except Exception as e:
+            logger.error(f"Error writing callback to database: {str(e)}", exc_info=True)
+            return [], [], {}
 
-            # Drop brand-specific fields
-            cleaned_data = self.field_mapper.drop_fields(abstract_type, mapped_data)
+    def write_batch_to_database_with_change_detection(
+        self,
+        raw_items: List[Dict[str, Any]]
+    ) -> Dict[str, Tuple[list, list, dict]]:
+        """
+        Write many callbacks at once: records are grouped by callback type and each group is written
+        with one change-detection query and one upsert per table (see DatabaseWriter.write_batch)
 
-            logger.info(f"Cleaned data: {cleaned_data}")
+        Args:
+            raw_items: Raw callback data from brand, in arrival order
 
-            # Extract robot_sn for database routing
-            robot_sn = cleaned_data.get("robot_sn", "")
+        Returns:
+            Dict mapping abstract callback type to (database_names, table_names, changes_detected)
+        """
+        groups: Dict[Tuple[str, str], List[Tuple[str, Dict[str, Any]]]] = {}
+        for raw_data in raw_items:
+            try:
+                prepared = self.prepare_record(raw_data)
+            except Exception as e:
+                logger.error(f"Error preparing callback for batch write: {str(e)}", exc_info=True)
+                continue
+            if prepared:
+                abstract_type, record_type, robot_sn, record = prepared
+                if self._submit_to_state_writer(abstract_type, record_type, robot_sn, record):
+                    continue
+                groups.setdefault((abstract_type, record_type), []).append((robot_sn, record))
+
+        results = {}
+        for (abstract_type, record_type), records in groups.items():
+            try:
+                results[abstract_type] = self.database_writer.write_batch(record_type, records)
+            except Exception as e:
+                logger.error(f"Error writing {len(records)} {abstract_type} callbacks to database: {str(e)}", exc_info=True)
+                results[abstract_type] = ([], [], {})
+        return results
+
+    def _submit_to_state_writer(self, abstract_type: str, record_type: str, robot_sn: str, record: Dict[str, Any]) -> bool:
+        """Hand a pose/power record to the batching state writer; False if it must be written directly"""
+        if not self.state_writer or record_type not in STATE_WRITER_RECORD_TYPES:
+            return False
+        return self.state_writer.submit(abstract_type, record_type, robot_sn, record)
+
+    def prepare_record(self, raw_data: Dict[str, Any]) -> Optional[Tuple[str, str, str, Dict[str, Any]]]:
+        """
+        Map a raw callback to the record handed to the database writer
 
-            if not robot_sn:
-                logger.warning("No robot_sn found after field mapping")
-                return [], [], {}
+        Args:
+            raw_data: Raw callback data from brand
 
-            # Route to appropriate database writer method based on abstract type
-            if abstract_type == "status_event":
-                return self.database_writer.write_robot_status(robot_sn, cleaned_data)
-
-            elif abstract_type == 'work_status_event':
-                # is_charging is 1 for charging, -1 for not charging
-                is_charging = (
-                    cleaned_data.get("is_charging") in (1, "1")
-                    or (cleaned_data.get("charge_stage") or "").lower() == "charging"
-                )
-
-                # is working
-                is_working = (
-                    (cleaned_data.get("run_state") or "").lower() == "busy"
-                )
-
-                # is stuck
-                is_stuck = (
-                    (cleaned_data.get("move_state") or "").lower() == "stuck"
-                )
-
-                # is offline
-                is_offline = (
-                    (cleaned_data.get("run_state") or "").lower() == "offline"
-                )
-
-                # final status (priority logic)
-                if is_stuck:
-                    status = "Stuck"
-                elif is_working:
-                    status = "Working"
-                elif is_charging:
-                    status = "Charging"
-                elif is_offline:
-                    status = "Offline"
-                else:
-                    status = "Online"
-
-                work_status_data = {
-                    "robot_sn": cleaned_data.get("robot_sn", robot_sn),
-                    "status": status,
-                    "timestamp": cleaned_data.get("timestamp", int(time.time())),
-                }
-                return self.database_writer.write_robot_status(robot_sn, work_status_data)
-
-            elif abstract_type == "pose_event":
-                return self.database_writer.write_robot_pose(robot_sn, cleaned_data)
-
-            elif abstract_type == "power_event":
-                return self.database_writer.write_robot_power(robot_sn, cleaned_data)
-
-            elif abstract_type in ["error_event", "error_notice"]:
-                # Ensure required fields for error events
-                extra_fields = cleaned_data.get("extra_fields", {})
-                extra_fields = json.dumps(extra_fields, ensure_ascii=False)
-                error_data = {
-                    "robot_sn": cleaned_data.get("robot_sn", robot_sn),
-                    "event_id": cleaned_data.get("error_id", ""),
-                    "error_id": cleaned_data.get("error_id", cleaned_data.get("event_id", "")),
-                    "event_level": cleaned_data.get("event_level", ""),
-                    "event_type": cleaned_data.get("event_type", ""),
-                    "event_detail": cleaned_data.get("event_detail", ""),
-                    "task_time": cleaned_data.get("task_time", int(time.time())),
-                    "upload_time": int(time.time()),
-                    "extra_fields": extra_fields,  # JSON string
-                }
-                return self.database_writer.write_robot_event(robot_sn, error_data)
-
-            elif abstract_type == "report_event":
-                task_data = {
-                    "robot_sn": cleaned_data.get("robot_sn", robot_sn),
-                    "robot_type": cleaned_data.get("robot_type", ""),
-                    "task_id": cleaned_data.get("task_id", ""),
-                    "task_name": cleaned_data.get("task_name", ""),
-                    "map_name": cleaned_data.get("map_name", ""),
-                    "start_time": cleaned_data.get("start_time"),
-                    "end_time": cleaned_data.get("end_time"),
-                    "progress": cleaned_data.get("progress"),
-                    "duration": cleaned_data.get("duration"),
-                    "actual_area": cleaned_data.get("actual_area"),
-                    "plan_area": cleaned_data.get("plan_area"),
-                    "efficiency": cleaned_data.get("efficiency"),
-                    "water_consumption": cleaned_data.get("water_consumption"),
-                    "mode": cleaned_data.get("mode", ""),
-                    "status": cleaned_data.get("status"),
-                    "map_url": cleaned_data.get("map_url", ""),
-                    "battery_usage": cleaned_data.get("battery_usage"),
-                    "extra_fields": cleaned_data.get("extra_fields"),  # JSON string
-                }
-                return self.database_writer.write_robot_task(robot_sn, task_data)
-            return [], [], {}
+        Returns:
+            tuple: (abstract_type, record_type, robot_sn, record) where record_type is one of
+            'status', 'pose', 'power', 'event', 'task'; None if there is nothing to write
+        """
+        # Map to abstract type
+        abstract_type = self.brand_config.map_callback_type(raw_data)
 
-        except Exception as e:
-            logger.error(f"Error writing callback to database: {str(e)}", exc_info=True)
-            return [], [], {}
+        if not abstract_type:
+            logger.warning("Cannot write to database: unknown callback type")
+            return None
+
+        # Extract callback data
+        callback_data = self._extract_callback_data(raw_data)
+
+        # Map fields using brand-specific field mapper
+        mapped_data = self.field_mapper.map_fields(abstract_type, callback_data)
+
+        if not mapped_data:
+            logger.warning(f"No data after field mapping for {abstract_type}")
+            return None
+
+        # Drop brand-specific fields
+        cleaned_data = self.field_mapper.drop_fields(abstract_type, mapped_data)
+
+        logger.info(f"Cleaned data: {cleaned_data}")
+
+        # Extract robot_sn for database routing
+        robot_sn = cleaned_data.get("robot_sn", "")
+
+        if not robot_sn:
+            logger.warning("No robot_sn found after field mapping")
+            return None
+
+        # Route to the appropriate database record based on abstract type
+        if abstract_type == "status_event":
+            return abstract_type, "status", robot_sn, cleaned_data
+
+        elif abstract_type == 'work_status_event':
+            # is_charging is 1 for charging, -1 for not charging
+            is_charging = (
+                cleaned_data.get("is_charging") in (1, "1")
+                or (cleaned_data.get("charge_stage") or "").lower() == "charging"
+            )
+
+            # is working
+            is_working = (
+                (cleaned_data.get("run_state") or "").lower() == "busy"
+            )
+
+            # is stuck
+            is_stuck = (
+                (cleaned_data.get("move_state") or "").lower() == "stuck"
+            )
+
+            # is offline
+            is_offline = (
+                (cleaned_data.get("run_state") or "").lower() == "offline"
+            )
+
+            # final status (priority logic)
+            if is_stuck:
+                status = "Stuck"
+            elif is_working:
+                status = "Working"
+            elif is_charging:
+                status = "Charging"
+            elif is_offline:
+                status = "Offline"
+            else:
+                status = "Online"
+
+            work_status_data = {
+                "robot_sn": cleaned_data.get("robot_sn", robot_sn),
+                "status": status,
+                "timestamp": cleaned_data.get("timestamp", int(time.time())),
+            }
+            return abstract_type, "status", robot_sn, work_status_data
+
+        elif abstract_type == "pose_event":
+            return abstract_type, "pose", robot_sn, cleaned_data
+
+        elif abstract_type == "power_event":
+            return abstract_type, "power", robot_sn, cleaned_data
+
+        elif abstract_type in ["error_event", "error_notice"]:
+            # Ensure required fields for error events
+            extra_fields = cleaned_data.get("extra_fields", {})
+            extra_fields = json.dumps(extra_fields, ensure_ascii=False)
+            error_data = {
+                "robot_sn": cleaned_data.get("robot_sn", robot_sn),
+                "event_id": cleaned_data.get("error_id", ""),
+                "error_id": cleaned_data.get("error_id", cleaned_data.get("event_id", "")),
+                "event_level": cleaned_data.get("event_level", ""),
+                "event_type": cleaned_data.get("event_type", ""),
+                "event_detail": cleaned_data.get("event_detail", ""),
+                "task_time": cleaned_data.get("task_time", int(time.time())),
+                "upload_time": int(time.time()),
+                "extra_fields": extra_fields,  # JSON string
+            }
+            return abstract_type, "event", robot_sn, error_data
+
+        elif abstract_type == "report_event":
+            task_data = {
+                "robot_sn": cleaned_data.get("robot_sn", robot_sn),
+                "robot_type": cleaned_data.get("robot_type", ""),
+                "task_id": cleaned_data.get("task_id", ""),
+                "task_name": cleaned_data.get("task_name", ""),
+                "map_name": cleaned_data.get("map_name", ""),
+                "start_time": cleaned_data.get("start_time"),
+                "end_time": cleaned_data.get("end_time"),
+                "progress": cleaned_data.get("progress"),
+                "duration": cleaned_data.get("duration"),
+                "actual_area": cleaned_data.get("actual_area"),
+                "plan_area": cleaned_data.get("plan_area"),
+                "efficiency": cleaned_data.get("efficiency"),
+                "water_consumption": cleaned_data.get("water_consumption"),
+                "mode": cleaned_data.get("mode", ""),
+                "status": cleaned_data.get("status"),
+                "map_url": cleaned_data.get("map_url", ""),
+                "battery_usage": cleaned_data.get("battery_usage"),
+                "extra_fields": cleaned_data.get("extra_fields"),  # JSON string
+            }
+            return abstract_type, "task", robot_sn, task_data
+        return None
 
     def get_handler_info(self) -> Dict[str, Any]:
         """
@@ -244,7 +329,9 @@ class CallbackHandler:
         }
 
     def close(self):
-        """Close database connections"""
+        """Close database connections (a shared DatabaseWriter is left to its owner)"""
+        if not self._owns_database_writer:
+            return
         try:
             self.database_writer.close_all_connections()
         except Exception as e:
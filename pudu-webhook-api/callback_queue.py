@@ -0,0 +1,232 @@
+# callback_queue.py
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryQueueBackend:
+    """
+    Default in-process queue backend (one per worker partition).
+
+    A backend only has to provide put / get_batch / task_done / depth / oldest_enqueued_at, so an
+    external broker (SQS, Redis streams, ...) can be registered with register_queue_backend().
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self._queue = queue.Queue(maxsize=max_size)
+        self._enqueued_at = []  # enqueue times of pending items, oldest first
+        self._lock = threading.Lock()
+
+    def put(self, item: Dict[str, Any]) -> bool:
+        """Add an item; returns False when the queue is full"""
+        with self._lock:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                return False
+            self._enqueued_at.append(item['enqueued_at'])
+        return True
+
+    def get_batch(self, max_items: int, timeout: float, linger: float) -> List[Dict[str, Any]]:
+        """
+        Block up to timeout for the first item, then keep collecting for up to linger seconds
+        (or until max_items) so bursts are handed to the writer together
+        """
+        try:
+            batch = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + linger
+        while len(batch) < max_items:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        with self._lock:
+            del self._enqueued_at[:len(batch)]
+        return batch
+
+    def task_done(self, count: int = 1):
+        for _ in range(count):
+            self._queue.task_done()
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def oldest_enqueued_at(self) -> Optional[float]:
+        with self._lock:
+            return self._enqueued_at[0] if self._enqueued_at else None
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every item has been processed; returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+
+QUEUE_BACKENDS: Dict[str, Callable[..., Any]] = {
+    'memory': InMemoryQueueBackend,
+}
+
+
+def register_queue_backend(name: str, factory: Callable[..., Any]):
+    """Register a queue backend factory selectable with WEBHOOK_QUEUE_BACKEND"""
+    QUEUE_BACKENDS[name] = factory
+
+
+class CallbackQueue:
+    """
+    Write queue between the webhook request handler and the database writer.
+
+    The request thread only verifies and enqueues the callback; num_workers background workers
+    drain the queue and hand process_batch up to batch_size callbacks at a time (waiting at most
+    batch_linger seconds to fill a batch). Callbacks are partitioned by robot so a robot's
+    callbacks are always processed in order by the same worker.
+
+    get_metrics() reports queue depth and lag (age of the oldest pending callback, and the
+    enqueue-to-processing delay of processed ones).
+    """
+
+    def __init__(self, process_batch: Callable[[List[Dict[str, Any]]], None], backend: str = None,
+                 num_workers: int = None, batch_size: int = None, batch_linger: float = None,
+                 max_size: int = None):
+        self.process_batch = process_batch
+        self.backend_name = backend or os.getenv('WEBHOOK_QUEUE_BACKEND', 'memory')
+        self.num_workers = num_workers or int(os.getenv('WEBHOOK_QUEUE_WORKERS', '4'))
+        self.batch_size = batch_size or int(os.getenv('WEBHOOK_QUEUE_BATCH_SIZE', '50'))
+        self.batch_linger = (batch_linger if batch_linger is not None
+                             else float(os.getenv('WEBHOOK_QUEUE_BATCH_LINGER_MS', '50')) / 1000)
+        max_size = max_size or int(os.getenv('WEBHOOK_QUEUE_MAX_SIZE', '10000'))
+
+        if self.backend_name not in QUEUE_BACKENDS:
+            raise ValueError(f"Unknown webhook queue backend: {self.backend_name}")
+        self._partitions = [QUEUE_BACKENDS[self.backend_name](max_size=max_size) for _ in range(self.num_workers)]
+
+        self._workers: List[threading.Thread] = []
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {'enqueued': 0, 'processed': 0, 'failed': 0, 'rejected': 0, 'batches': 0}
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+        self._last_lag = 0.0
+
+        atexit.register(self.close)
+
+    def enqueue(self, brand: str, data: Dict[str, Any], partition_key: str = "") -> bool:
+        """
+        Queue a verified callback for background processing.
+
+        Returns:
+            bool: True if queued, False if the queue is closed or full (caller should process inline)
+        """
+        if self._closed:
+            return False
+
+        self._ensure_workers()
+        item = {'brand': brand, 'data': data, 'enqueued_at': time.time()}
+        partition = self._partitions[zlib.crc32(partition_key.encode('utf-8')) % self.num_workers]
+        accepted = partition.put(item)
+        with self._lock:
+            self._stats['enqueued' if accepted else 'rejected'] += 1
+        if not accepted:
+            logger.warning(f"Webhook write queue full, processing {brand} callback inline")
+        return accepted
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued callback has been processed"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for partition in self._partitions:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not partition.join(remaining):
+                return False
+        return True
+
+    def close(self, timeout: Optional[float] = 30.0):
+        """Drain the queue and stop the workers (idempotent)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        if self._workers:
+            if not self.flush(timeout):
+                logger.warning(f"Webhook write queue closed with {self.get_metrics()['depth']} callbacks pending")
+            self._stop_event.set()
+            for worker in self._workers:
+                worker.join(timeout=5)
+
+        metrics = self.get_metrics()
+        logger.info(f"📥 Webhook write queue closed: {metrics['processed']} processed, {metrics['failed']} failed, "
+                    f"{metrics['rejected']} rejected")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth, lag and cumulative counters"""
+        now = time.time()
+        oldest = [t for t in (partition.oldest_enqueued_at() for partition in self._partitions) if t is not None]
+        with self._lock:
+            metrics = dict(self._stats)
+            processed = metrics['processed'] + metrics['failed']
+            metrics.update({
+                'backend': self.backend_name,
+                'workers': self.num_workers,
+                'depth': sum(partition.depth() for partition in self._partitions),
+                'oldest_pending_seconds': round(now - min(oldest), 3) if oldest else 0.0,
+                'last_lag_seconds': round(self._last_lag, 3),
+                'avg_lag_seconds': round(self._lag_total / processed, 3) if processed else 0.0,
+                'max_lag_seconds': round(self._lag_max, 3),
+            })
+        return metrics
+
+    def _ensure_workers(self):
+        """Start one worker per partition on first use"""
+        if self._workers:
+            return
+        with self._lock:
+            if self._workers:
+                return
+            for index, partition in enumerate(self._partitions):
+                worker = threading.Thread(target=self._worker_loop, args=(partition,),
+                                          name=f"webhook-writer-{index}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            logger.info(f"📥 Started {self.num_workers} webhook write workers ({self.backend_name} queue)")
+
+    def _worker_loop(self, partition):
+        while not self._stop_event.is_set():
+            batch = partition.get_batch(self.batch_size, timeout=0.5, linger=self.batch_linger)
+            if not batch:
+                continue
+
+            started = time.time()
+            lags = [started - item['enqueued_at'] for item in batch]
+            try:
+                self.process_batch(batch)
+                outcome = 'processed'
+            except Exception as e:
+                logger.error(f"❌ Error processing {len(batch)} queued callbacks: {e}", exc_info=True)
+                outcome = 'failed'
+            finally:
+                partition.task_done(len(batch))
+
+            with self._lock:
+                self._stats[outcome] += len(batch)
+                self._stats['batches'] += 1
+                self._lag_total += sum(lags)
+                self._lag_max = max(self._lag_max, max(lags))
+                self._last_lag = lags[-1]
@@ -23,6 +23,16 @@ class Config:
     # Legacy Pudu configuration (kept for backward compatibility)
     PUDU_API_KEY = os.getenv("PUDU_API_KEY", "")  # not used
 
+    # Acknowledge callbacks once verified and write them from a background queue (see callback_queue.py)
+    ASYNC_WRITES = os.getenv("WEBHOOK_ASYNC_WRITES", "False").lower() == "true"
+
+    # Write poses and the latest power per robot in periodic batches (see state_write_coalescer.py)
+    COALESCE_STATE_WRITES = os.getenv("WEBHOOK_COALESCE_STATE_WRITES", "False").lower() == "true"
+
+    # ASGI entry point (asgi.py): threads for blocking database writes, and callbacks in flight before answering 503
+    ASGI_IO_THREADS = int(os.getenv("WEBHOOK_ASGI_IO_THREADS", 16))
+    ASGI_MAX_IN_FLIGHT = int(os.getenv("WEBHOOK_ASGI_MAX_IN_FLIGHT", 1000))
+
     # Database configuration (if needed)
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///robot_callbacks.db")
 
@@ -1,5 +1,6 @@
 from typing import List, Dict
 from services.robot_database_resolver import RobotDatabaseResolver
+from services.robot_metadata_cache import RobotMetadataCache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,6 +13,7 @@ class DatabaseConfig:
         self.config = self._load_config()
         self.main_database_name = self.config.get('main_database', 'ry-vue')
         self.resolver = RobotDatabaseResolver(self.main_database_name)
+        self.metadata_cache = RobotMetadataCache(self.resolver, self.get_transform_supported_databases())
 
     def _load_config(self) -> dict:
         """Load configuration from YAML file"""
@@ -41,7 +43,9 @@ class DatabaseConfig:
         resolved_configs = []
 
         # Group robots by their target database
-        db_to_robots = self.resolver.group_robots_by_database(robot_sns)
+        db_to_robots = {}
+        for robot_sn, database_name in self.get_robot_database_mapping(robot_sns).items():
+            db_to_robots.setdefault(database_name, []).append(robot_sn)
 
         for base_config in base_configs:
             database_type = base_config['database']
@@ -63,6 +67,10 @@ class DatabaseConfig:
 
         return resolved_configs
 
+    def get_robot_database_mapping(self, robot_sns: List[str]) -> Dict[str, str]:
+        """Map robot_sn -> project database name (served from the robot metadata cache)"""
+        return self.metadata_cache.get_database_mapping(robot_sns)
+
     def get_transform_supported_databases(self) -> List[str]:
         """
         Get list of databases that support transformations (have floor plan mapping data).
@@ -83,7 +91,7 @@ class DatabaseConfig:
             tuple: (robots_with_transform_support, robots_without_transform_support)
         """
         # Get robot to database mapping
-        robot_to_db = self.resolver.get_robot_database_mapping(robot_sns)
+        robot_to_db = self.get_robot_database_mapping(robot_sns)
 
         # Get databases that support transformations
         supported_databases = self.get_transform_supported_databases()
@@ -129,7 +137,7 @@ class DatabaseConfig:
             if db_identifier == 'main':
                 resolved_databases.append(self.main_database_name)
             elif db_identifier == 'project':
-                resolved_databases.extend(self.resolver.get_all_project_databases())
+                resolved_databases.extend(self.metadata_cache.get_project_databases())
             else:
                 resolved_databases.append(db_identifier)
 
@@ -1,13 +1,43 @@
 # core/brand_config.py
+import functools
 import json
 import yaml
 import logging
 import re
-from typing import Any, Dict, List, Optional
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+_SYMBOL_PATTERN = re.compile(r'[^\w\s]')
+
+# Type conversions by conversion rule 'type'; ValueError/TypeError means the value is dropped
+_TYPE_CONVERSIONS = {
+    'lowercase': lambda value: str(value).lower(),
+    'uppercase': lambda value: str(value).upper(),
+    'int': int,
+    'float': float,
+    'timestamp_ms_to_s': lambda value: int(value) // 1000,
+    'multiply_by_1000': lambda value: float(value) * 1000,
+    'divide_by_1000': lambda value: float(value) / 1000,
+}
+
+
+def _multiply(values: List[float]) -> float:
+    result = values[0]
+    for v in values[1:]:
+        result *= v
+    return result
+
+
+_CALCULATIONS = {
+    'subtract': lambda values: values[0] - values[1],
+    'add': sum,
+    'multiply': _multiply,
+    'divide': lambda values: values[0] / values[1] if values[1] != 0 else None,
+}
+
 
 class BrandConfig:
     """Brand-specific configuration for callback handling"""
@@ -90,8 +120,23 @@ class BrandConfig:
         return 'report_event' in self.type_mappings.values()
 
 
+@dataclass(frozen=True)
+class CompiledFieldMapping:
+    """Field mapping of one abstract type, precompiled into callables by FieldMapper"""
+    direct_fields: Tuple[Tuple[str, Callable, Optional[Callable]], ...]
+    calculations: Tuple[Tuple[str, Callable], ...]
+    processors: Tuple[Tuple[str, Callable], ...]
+    extra_fields: Tuple[Tuple[str, Callable], ...]
+    drop_fields: FrozenSet[str]
+
+
 class FieldMapper:
-    """Handles field mapping and transformation between brand data and DB schema"""
+    """
+    Handles field mapping and transformation between brand data and DB schema
+
+    The brand's field mappings are compiled once when the mapper is created (see
+    _compile_mapping), so map_fields() only runs precompiled getters and converters.
+    """
 
     def __init__(self, brand_config: BrandConfig):
         self.config = brand_config
@@ -145,6 +190,12 @@ class FieldMapper:
             '瓷砖清洁': 'Tile Cleaning',
             '大理石清洁': 'Marble Cleaning'
         }
+        self._cleaning_mode_items = tuple(self.CLEANING_MODE_TRANSLATION.items())
+
+        self._compiled_mappings: Dict[str, CompiledFieldMapping] = {
+            abstract_type: self._compile_mapping(abstract_type)
+            for abstract_type in self.config.field_mappings
+        }
 
     def _translate_cleaning_mode(self, chinese_mode: str) -> str:
         """Translate Chinese cleaning mode to English and clean the text"""
@@ -155,7 +206,7 @@ class FieldMapper:
         cleaned_mode = chinese_mode.replace('_', ' ').replace('-', ' ').replace('__', ' ')
 
         # Remove any remaining non-alphanumeric characters except spaces
-        cleaned_mode = re.sub(r'[^\w\s]', '', cleaned_mode)
+        cleaned_mode = _SYMBOL_PATTERN.sub('', cleaned_mode)
 
         # Remove extra spaces
         cleaned_mode = ' '.join(cleaned_mode.split())
@@ -165,7 +216,7 @@ class FieldMapper:
             return self.CLEANING_MODE_TRANSLATION[cleaned_mode]
 
         # Try partial matches for combined modes
-        for chinese, english in self.CLEANING_MODE_TRANSLATION.items():
+        for chinese, english in self._cleaning_mode_items:
             if chinese in cleaned_mode:
                 # Replace the Chinese part with English
                 result = cleaned_mode.replace(chinese, english)
@@ -181,18 +232,15 @@ class FieldMapper:
 
         Example: 'payload.content.incidentId' -> data['payload']['content']['incidentId']
         """
-        keys = path.split('.')
-        value = data
+        return self._compile_path(path)(data)
 
-        for key in keys:
-            if isinstance(value, dict):
-                value = value.get(key)
-                if value is None:
-                    return None
-            else:
-                return None
-
-        return value
+    def get_compiled_mapping(self, abstract_type: str) -> CompiledFieldMapping:
+        """Compiled mapping for an abstract type (compiled on first use for types added later)"""
+        compiled = self._compiled_mappings.get(abstract_type)
+        if compiled is None:
+            compiled = self._compile_mapping(abstract_type)
+            self._compiled_mappings[abstract_type] = compiled
+        return compiled
 
     def drop_fields(self, abstract_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -205,8 +253,7 @@ class FieldMapper:
         Returns:
             Cleaned data without dropped fields
         """
-        field_mapping = self.config.get_field_mapping(abstract_type)
-        drop_fields = set(field_mapping.get('drop_fields', []))
+        drop_fields = self.get_compiled_mapping(abstract_type).drop_fields
 
         if not drop_fields:
             return data
@@ -218,70 +265,125 @@ class FieldMapper:
 
         return cleaned_data
 
-    def _convert_value(self, value: Any, conversion_rules: Dict[str, Any]) -> Any:
+    def _compile_mapping(self, abstract_type: str) -> CompiledFieldMapping:
+        """
+        Turn the YAML field mapping of an abstract type into getter/converter callables
+
+        Everything that only depends on the config (path splitting, conversion rule lookup,
+        calculation and processor dispatch) is resolved here once instead of on every callback.
         """
-        Apply conversion rules to a value
+        field_mapping = self.config.get_field_mapping(abstract_type)
+        conversions = field_mapping.get('conversions', {})
+
+        # 1. Direct fields: (db_field, getter, converter or None)
+        direct_fields = tuple(
+            (db_field, self._compile_path(source_path),
+             self._compile_conversion(conversions[db_field]) if db_field in conversions else None)
+            for source_path, db_field in field_mapping.get('source_to_db', {}).items()
+        )
+
+        # 2. Computed fields
+        calculations = []
+        for db_field, calculation in field_mapping.get('calculations', {}).items():
+            calculate = self._compile_calculation(calculation)
+            if calculate is not None:
+                calculations.append((db_field, calculate))
+
+        # 3. Complex field transformations
+        processors = []
+        for db_field, processor_config in field_mapping.get('field_processors', {}).items():
+            process = self._compile_processor(processor_config)
+            if process is not None:
+                processors.append((db_field, process))
+
+        # 4. Extra brand-specific fields, keyed by the last part of the path
+        extra_fields = tuple(
+            (field_path.split('.')[-1], self._compile_path(field_path))
+            for field_path in field_mapping.get('extra_fields', [])
+        )
+
+        return CompiledFieldMapping(
+            direct_fields=direct_fields,
+            calculations=tuple(calculations),
+            processors=tuple(processors),
+            extra_fields=extra_fields,
+            drop_fields=frozenset(field_mapping.get('drop_fields') or [])
+        )
+
+    @staticmethod
+    def _compile_path(path: str) -> Callable[[Dict[str, Any]], Any]:
+        """Getter for a dotted path ('payload.content.incidentId'); None if any level is missing"""
+        keys = tuple(path.split('.'))
+
+        if len(keys) == 1:
+            key = keys[0]
+
+            def get_value(data):
+                return data.get(key) if isinstance(data, dict) else None
+
+            return get_value
+
+        def get_nested_value(data):
+            value = data
+            for key in keys:
+                if not isinstance(value, dict):
+                    return None
+                value = value.get(key)
+                if value is None:
+                    return None
+            return value
+
+        return get_nested_value
+
+    def _compile_conversion(self, conversion_rules: Dict[str, Any]) -> Callable[[Any], Any]:
+        """
+        Converter for a conversion rule
 
         Conversions are applied in order:
         1. Type conversion (lowercase, int, etc.)
         2. Value mapping (H2 -> error, etc.)
         3. Special conversions (cleaning mode translation)
         """
-        if value is None:
-            return None
-
-        # Step 1: Apply type conversion first (but don't return yet!)
         value_type = conversion_rules.get('type')
-        if value_type == 'lowercase':
-            value = str(value).lower()
-        elif value_type == 'uppercase':
-            value = str(value).upper()
-        elif value_type == 'int':
-            try:
-                value = int(value)
-            except (ValueError, TypeError):
-                return None
-        elif value_type == 'float':
-            try:
-                value = float(value)
-            except (ValueError, TypeError):
-                return None
-        elif value_type == 'timestamp_ms_to_s':
-            try:
-                value = int(value) // 1000
-            except (ValueError, TypeError):
-                return None
-        elif value_type == 'multiply_by_1000':
-            try:
-                value = float(value) * 1000
-            except (ValueError, TypeError):
-                return None
-        elif value_type == 'divide_by_1000':
-            try:
-                value = float(value) / 1000
-            except (ValueError, TypeError):
-                return None
-        elif value_type == 'translate_cleaning_mode':
-            # Special conversion for cleaning mode translation
-            value = self._translate_cleaning_mode(str(value))
+        if value_type == 'translate_cleaning_mode':
+            translate = functools.lru_cache(maxsize=256)(self._translate_cleaning_mode)
+            convert_type = lambda value: translate(str(value))
+        else:
+            convert_type = _TYPE_CONVERSIONS.get(value_type)
 
-        # Step 2: Apply value mapping (after type conversion)
         mapping = conversion_rules.get('mapping')
-        if mapping and isinstance(mapping, dict):
-            # Support both string and integer keys
-            mapped_value = (
-                mapping.get(value)
-                or mapping.get(value.lower())
-                or mapping.get(value.upper())
-            )
-            if mapped_value is not None:
-                value = mapped_value
-
-        return value
-
-    def _calculate_field(self, source_data: Dict[str, Any], calculation: Dict[str, Any]) -> Any:
+        if not (mapping and isinstance(mapping, dict)):
+            mapping = None
+
+        def convert(value):
+            if value is None:
+                return None
+
+            # Step 1: Apply type conversion first (but don't return yet!)
+            if convert_type is not None:
+                try:
+                    value = convert_type(value)
+                except (ValueError, TypeError):
+                    return None
+
+            # Step 2: Apply value mapping (after type conversion)
+            if mapping is not None:
+                # Support both string and integer keys
+                mapped_value = (
+                    mapping.get(value)
+                    or mapping.get(value.lower())
+                    or mapping.get(value.upper())
+                )
+                if mapped_value is not None:
+                    value = mapped_value
+
+            return value
+
+        return convert
+
+    def _compile_calculation(self, calculation: Dict[str, Any]) -> Optional[Callable[[Dict[str, Any]], Any]]:
         """
-        Calculate field value using formula
+        Calculator for a computed field, or None if the calculation config is invalid
 
         Supported calculations:
         - operation: 'subtract', 'add', 'multiply', 'divide'
@@ -300,65 +402,52 @@ class FieldMapper:
             logger.warning(f"Invalid calculation config: {calculation}")
             return None
 
-        # Get values for all fields
-        values = []
-        for field_path in fields:
-            value = self._get_nested_value(source_data, field_path)
-            if value is None:
-                logger.debug(f"Missing value for calculation field: {field_path}")
-                return None
-            try:
-                values.append(float(value))
-            except (ValueError, TypeError):
-                logger.warning(f"Cannot convert to float for calculation: {field_path} = {value}")
-                return None
+        operate = _CALCULATIONS.get(operation)
+        if operate is None:
+            logger.warning(f"Unknown calculation operation: {operation}")
+            return None
 
-        # Perform calculation
-        try:
-            if operation == 'subtract':
-                result = values[0] - values[1]
-            elif operation == 'add':
-                result = sum(values)
-            elif operation == 'multiply':
-                result = values[0]
-                for v in values[1:]:
-                    result *= v
-            elif operation == 'divide':
-                result = values[0] / values[1] if values[1] != 0 else None
-            else:
-                logger.warning(f"Unknown calculation operation: {operation}")
-                return None
+        getters = tuple((field_path, self._compile_path(field_path)) for field_path in fields)
 
-            return result
-        except Exception as e:
-            logger.error(f"Calculation error: {e}")
-            return None
+        def calculate(source_data):
+            # Get values for all fields
+            values = []
+            for field_path, get_value in getters:
+                value = get_value(source_data)
+                if value is None:
+                    logger.debug(f"Missing value for calculation field: {field_path}")
+                    return None
+                try:
+                    values.append(float(value))
+                except (ValueError, TypeError):
+                    logger.warning(f"Cannot convert to float for calculation: {field_path} = {value}")
+                    return None
 
-    def _collect_extra_fields(
-        self,
-        source_data: Dict[str, Any],
-        extra_fields_config: List[str]
-    ) -> Dict[str, Any]:
-        """
-        Collect extra brand-specific fields into a JSON object
+            # Perform calculation
+            try:
+                return operate(values)
+            except Exception as e:
+                logger.error(f"Calculation error: {e}")
+                return None
 
-        Args:
-            source_data: Raw callback data
-            extra_fields_config: List of field paths to collect
+        return calculate
 
-        Returns:
-            Dictionary with collected fields
+    def _compile_processor(self, processor_config: Dict[str, Any]) -> Optional[Callable[[Dict[str, Any]], Any]]:
         """
-        extra_data = {}
-
-        for field_path in extra_fields_config:
-            value = self._get_nested_value(source_data, field_path)
-            if value is not None:
-                # Use the last part of the path as the key
-                key = field_path.split('.')[-1]
-                extra_data[key] = value
+        Processor for complex field transformations, or None for unknown processors
+        """
+        process = {
+            'extract_map_names': self._extract_map_names,  # source value is subtasks
+            'join_strings': self._join_strings,
+            'extract_unique_values': self._extract_unique_values,
+        }.get(processor_config.get('processor'))
+        if process is None:
+            return None
 
-        return extra_data
+        source_path = processor_config.get('source')
+        get_source = self._compile_path(source_path) if source_path else (lambda source_data: None)
+        config = processor_config.get('config', {})
+        return lambda source_data: process(get_source(source_data), config)
 
     def map_fields(self, abstract_type: str, source_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -371,66 +460,46 @@ class FieldMapper:
         Returns:
             Mapped data ready for database insertion
         """
-        field_mapping = self.config.get_field_mapping(abstract_type)
-        source_to_db = field_mapping.get('source_to_db', {})
-        conversions = field_mapping.get('conversions', {})
-        calculations = field_mapping.get('calculations', {})
-        field_processors = field_mapping.get('field_processors', {})
-        extra_fields = field_mapping.get('extra_fields', [])
+        compiled = self.get_compiled_mapping(abstract_type)
 
         mapped_data = {}
 
         # 1. Map direct fields
-        for source_path, db_field in source_to_db.items():
+        for db_field, get_value, convert in compiled.direct_fields:
             # Get value from source (supports nested paths)
-            value = self._get_nested_value(source_data, source_path)
+            value = get_value(source_data)
             # Apply conversions if defined
-            if db_field in conversions:
-                value = self._convert_value(value, conversions[db_field])
+            if convert is not None:
+                value = convert(value)
             # Set in mapped data
             if value is not None:
                 mapped_data[db_field] = value
 
         # 2. Calculate computed fields
-        for db_field, calculation in calculations.items():
-            calculated_value = self._calculate_field(source_data, calculation)
+        for db_field, calculate in compiled.calculations:
+            calculated_value = calculate(source_data)
             if calculated_value is not None:
                 mapped_data[db_field] = calculated_value
 
         # 3. Process complex field transformations
-        for db_field, processor_config in field_processors.items():
-            processed_value = self._process_field(source_data, processor_config)
+        for db_field, process in compiled.processors:
+            processed_value = process(source_data)
             if processed_value is not None:
                 mapped_data[db_field] = processed_value
 
         # 4. Collect extra brand-specific fields as JSON
-        if extra_fields:
-            extra_data = self._collect_extra_fields(source_data, extra_fields)
+        if compiled.extra_fields:
+            extra_data = {}
+            for key, get_value in compiled.extra_fields:
+                value = get_value(source_data)
+                if value is not None:
+                    extra_data[key] = value
             if extra_data:
                 mapped_data['extra_fields'] = json.dumps(extra_data)  # Store as JSON string
 
         logger.debug(f"Mapped {len(mapped_data)} fields for {abstract_type}")
         return mapped_data
 
-    def _process_field(self, source_data: Dict[str, Any], processor_config: Dict[str, Any]) -> Any:
-        """
-        Process fields using configured processors for complex transformations
-        """
-        processor_type = processor_config.get('processor')
-        source_path = processor_config.get('source')
-        config = processor_config.get('config', {})
-
-        # Get source value
-        source_value = self._get_nested_value(source_data, source_path)
-
-        if processor_type == 'extract_map_names':
-            return self._extract_map_names(source_value, config) # source_value is subtasks
-        elif processor_type == 'join_strings':
-            return self._join_strings(source_value, config)
-        elif processor_type == 'extract_unique_values':
-            return self._extract_unique_values(source_value, config)
-        return None
-
     def _extract_map_names(self, dataList: List[Dict], config: Dict[str, Any]) -> str:
         """
         Generic map name extraction that can be configured
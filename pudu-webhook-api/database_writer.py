@@ -1,93 +1,118 @@
 # pudu-webhook-api/database_writer.py
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 import logging
+import os
+import threading
 import time
 from typing import Any, Dict, List, Tuple
 
 from configs.database_config import DatabaseConfig
 from rds.rdsTable import RDSTable
-from notifications.change_detector import detect_data_changes
+from rds.utils import CONNECTION_ERRORS
+from notifications.change_detector import detect_changes_against_snapshot, detect_data_changes, record_key
 from services.transform_service import TransformService
 
 logger = logging.getLogger(__name__)
 
 GS_robot_battery_capacity = {'S': 0.96, '40': 1.44}
 
-class DatabaseWriter:
-    """Enhanced database writer with change detection and coordinate transformation"""
+# Primary key columns that identify a robot. Only tables keyed by these alone hold one current-state
+# row per robot; tables keyed by time (work location, operation history) get a new row per callback
+ROBOT_KEY_COLUMNS = {'robot_sn', 'sn'}
 
-    def __init__(self, config_path: str = "database_config.yaml"):
-        self.config = DatabaseConfig(config_path)
+class DatabaseWriter:
+    """
+    Enhanced database writer with change detection and coordinate transformation
+
+    Meant to live for the whole process and be shared by request threads: RDSTable instances
+    (one connection each) are cached and every use of a table holds that table's lock. A table idle
+    longer than connection_ping_idle_seconds is pinged before use, and a table whose use raised a
+    connection error is dropped, so the next use reconnects (after wait_timeout, failover, etc.).
+    """
+
+    def __init__(self, config_path: str = "database_config.yaml", config: DatabaseConfig = None):
+        # Share the caller's DatabaseConfig (and its resolver connection) when given
+        self._owns_config = config is None
+        self.config = config or DatabaseConfig(config_path)
         self.transform_service = TransformService(self.config)
         self.table_cache = {}  # Cache RDSTable instances
+        self._table_locks = {}
+        self._table_last_used: Dict[str, float] = {}
+        self.connection_ping_idle_seconds = float(os.getenv('WEBHOOK_DB_PING_IDLE_SECONDS', '30'))
+        self._table_columns_cache = {}
+        self._cache_lock = threading.Lock()
+        # Last written row per current-state table and primary key for write_batch(use_snapshot=True),
+        # oldest write first. Entries older than the TTL are evicted (and the row re-checked against the
+        # database in case another writer changed it); at most state_snapshot_max_rows per table are kept
+        self._state_snapshot: Dict[str, 'OrderedDict[tuple, Tuple[float, Dict[str, Any]]]'] = {}
+        self.state_snapshot_ttl = float(os.getenv('WEBHOOK_STATE_SNAPSHOT_TTL', '300'))
+        self.state_snapshot_max_rows = int(os.getenv('WEBHOOK_STATE_SNAPSHOT_MAX_ROWS', '10000'))
 
     def _get_table(self, database_name: str, table_name: str, fields: List[str], primary_keys: List[str]) -> RDSTable:
         """Get or create RDSTable instance"""
         table_key = f"{database_name}.{table_name}"
 
-        if table_key not in self.table_cache:
+        with self._cache_lock:
+            if table_key not in self.table_cache:
+                try:
+                    table = RDSTable(
+                        connection_config="credentials.yaml",
+                        database_name=database_name,
+                        table_name=table_name,
+                        fields=fields,
+                        primary_keys=primary_keys
+                    )
+                    self.table_cache[table_key] = table
+                    self._table_locks.setdefault(table_key, threading.RLock())
+                    self._table_last_used[table_key] = time.monotonic()
+                    logger.info(f"Created RDSTable instance for {database_name}.{table_name}")
+                except Exception as e:
+                    logger.error(f"Failed to create table instance for {database_name}.{table_name}: {e}")
+                    raise
+
+            return self.table_cache[table_key]
+
+    @contextmanager
+    def _locked_table(self, database_name: str, table_name: str, fields: List[str], primary_keys: List[str]):
+        """Yield the cached RDSTable while holding its lock (its connection is not thread-safe)"""
+        table_key = f"{database_name}.{table_name}"
+        table = self._get_table(database_name, table_name, fields, primary_keys)
+        with self._table_locks[table_key]:
+            if time.monotonic() - self._table_last_used.get(table_key, 0) >= self.connection_ping_idle_seconds:
+                try:
+                    table.db.ping(reconnect=False)
+                except Exception as e:
+                    logger.warning(f"Connection for {table_key} is gone ({e}), reconnecting")
+                    self._discard_table(table_key, table)
+                    table = self._get_table(database_name, table_name, fields, primary_keys)
             try:
-                table = RDSTable(
-                    connection_config="credentials.yaml",
-                    database_name=database_name,
-                    table_name=table_name,
-                    fields=fields,
-                    primary_keys=primary_keys
-                )
-                self.table_cache[table_key] = table
-                logger.info(f"Created RDSTable instance for {database_name}.{table_name}")
-            except Exception as e:
-                logger.error(f"Failed to create table instance for {database_name}.{table_name}: {e}")
+                yield table
+            except CONNECTION_ERRORS as e:
+                logger.warning(f"Dropping connection for {table_key} after error: {e}")
+                self._discard_table(table_key, table)
                 raise
-
-        return self.table_cache[table_key]
+            finally:
+                self._table_last_used[table_key] = time.monotonic()
+
+    def _discard_table(self, table_key: str, table: RDSTable):
+        """Remove a table with a broken connection from the cache (caller holds the table's lock)"""
+        with self._cache_lock:
+            if self.table_cache.get(table_key) is table:
+                del self.table_cache[table_key]
+        try:
+            table.close()
+        except Exception:
+            pass
 
     def _get_robot_name(self, robot_sn: str) -> str:
-        """Get robot name using table configs"""
+        """Get robot name from the robot metadata cache (falls back to robot_sn)"""
         try:
-            # Use the existing config system to get robot info table configs
-            robot_info_configs = self.config.get_table_configs_for_robots('robot_info', [robot_sn])
-
-            if not robot_info_configs:
-                logger.warning(f"No robot_info table config found for {robot_sn}")
-                return robot_sn
-
-            # Use the first config (should be the main database)
-            config = robot_info_configs[0]
-
-            # Get table instance using existing method
-            table = self._get_table(
-                database_name=config['database'],
-                table_name=config['table_name'],
-                fields=config.get('fields', []),
-                primary_keys=config['primary_keys']
-            )
-
-            query = f"SELECT robot_name FROM {config['table_name']} WHERE robot_sn = '{robot_sn}'"
-            result = table.query_data(query)
-
-            if result and len(result) > 0:
-                first_row = result[0]
-
-                # Handle different return types
-                if isinstance(first_row, (tuple, list)):
-                    robot_name = first_row[0] if len(first_row) > 0 else None
-                elif isinstance(first_row, dict):
-                    robot_name = first_row.get('robot_name')
-                else:
-                    robot_name = first_row
-
-                # Return robot_name if it exists and is not empty, otherwise fallback to robot_sn
-                if robot_name and str(robot_name).strip():
-                    logger.info(f"Found robot_name for {robot_sn}: {robot_name}")
-                    return str(robot_name).strip()
-
-            logger.debug(f"No robot_name found for {robot_sn}, using robot_sn as fallback")
-
+            return self.config.metadata_cache.get_robot_name(robot_sn)
         except Exception as e:
-            logger.warning(f"Could not retrieve robot_name for {robot_sn} using config: {e}")
-
-        return robot_sn  # Fallback to robot_sn if name not found
+            logger.warning(f"Could not retrieve robot_name for {robot_sn}: {e}")
+            return robot_sn
 
     def _transform_robot_status_data(self, robot_sn: str, status_data: Dict[str, Any]) -> Dict[str, Any]:
         """Transform callback status data to database format"""
@@ -114,9 +139,10 @@ class DatabaseWriter:
         if "yaw" in pose_data and db_data["z"] is None:
             db_data["z"] = pose_data["yaw"]
 
-        # Apply coordinate transformation
+        # Apply coordinate transformation; a map_name in the callback also updates the robot's current map
         try:
-            transformed_data = self.transform_service.transform_robot_coordinates_single(db_data)
+            transform_input = dict(db_data, map_name=pose_data["map_name"]) if pose_data.get("map_name") else db_data
+            transformed_data = self.transform_service.transform_robot_coordinates_single(transform_input)
 
             # Add transformed coordinates to database data
             db_data["new_x"] = transformed_data.get("new_x")
@@ -243,6 +269,8 @@ class DatabaseWriter:
             "extra_fields": task_data.get("extra_fields"),  # JSON string
         }
 
+        # The task's map is the robot's current map for coordinate transformation of later poses
+        self.config.metadata_cache.set_current_map(robot_sn, db_data["map_name"])
 
         # Remove None values
         return {k: v for k, v in db_data.items() if v is not None}
@@ -310,14 +338,181 @@ class DatabaseWriter:
             self._transform_robot_task_data
         )
 
+    def write_batch(self, record_type: str, records: List[Tuple[str, Dict[str, Any]]],
+                    use_snapshot: bool = False) -> Tuple[List[str], List[str], Dict]:
+        """
+        Write many records of one type with one change-detection query and one upsert per table
+
+        Args:
+            record_type: 'status', 'pose', 'power', 'event' or 'task' (same tables as write_robot_*)
+            records: (robot_sn, data) pairs in arrival order; for the same primary key the latest wins
+            use_snapshot: Detect changes against the in-memory snapshot of rows this writer last
+                wrote, querying the table only for rows it has not seen (or whose entry expired).
+                Applies to current-state tables only; tables keyed by time are always queried
+
+        Returns:
+            tuple: (database_names, table_names, changes_detected) as from the single-record writers
+        """
+        # (table_type, transform, transform-supported robots only, report changes); like write_robot_pose,
+        # pose updates to robot_status are written but not reported
+        routes = {
+            'status': [('robot_status', self._transform_robot_status_data, False, True)],
+            'pose': [('robot_status', self._transform_robot_pose_data, False, False),
+                     ('robot_work_location', self._transform_robot_pose_data, True, True)],
+            'power': [('robot_status', self._transform_robot_power_data, False, True)],
+            'event': [('robot_events', self._transform_robot_event_data, False, True)],
+            'task': [('robot_task', self._transform_robot_task_data, False, True)],
+        }[record_type]
+
+        database_names = []
+        table_names = []
+        all_changes = {}
+        transformed_cache = {}
+        robot_names = {}
+
+        for table_type, transform_func, transform_only, report in routes:
+            robot_sns = list(dict.fromkeys(robot_sn for robot_sn, _ in records))
+            if transform_only:
+                robot_sns = self.config.filter_robots_for_transform_support(robot_sns)[0]
+            allowed = set(robot_sns)
+
+            transformed = []
+            for index, (robot_sn, data) in enumerate(records):
+                if robot_sn not in allowed:
+                    continue
+                cache_key = (transform_func.__name__, index)
+                if cache_key not in transformed_cache:
+                    transformed_cache[cache_key] = transform_func(robot_sn, data)
+                if transformed_cache[cache_key]:
+                    transformed.append((robot_sn, transformed_cache[cache_key]))
+
+            if not transformed:
+                continue
+
+            for table_config in self.config.get_table_configs_for_robots(table_type, robot_sns):
+                try:
+                    target_robots = set(table_config.get('robot_sns') or robot_sns)
+                    with self._locked_table(
+                        database_name=table_config['database'],
+                        table_name=table_config['table_name'],
+                        fields=table_config.get('fields', []),
+                        primary_keys=table_config['primary_keys']
+                    ) as table:
+                        # Latest record per primary key, in arrival order
+                        latest = {}
+                        for robot_sn, data in transformed:
+                            if robot_sn not in target_robots:
+                                continue
+                            filtered_data = self._filter_data_for_table(data, table)
+                            if filtered_data:
+                                pk_values = tuple(str(filtered_data.get(pk, '')) for pk in table.primary_keys)
+                                latest.pop(pk_values, None)
+                                latest[pk_values] = filtered_data
+
+                        if not latest:
+                            continue
+
+                        snapshot_table = use_snapshot and self._is_current_state_table(table_config['primary_keys'])
+                        if snapshot_table:
+                            changes = self._detect_changes_with_snapshot(table, list(latest.values()), table_config['primary_keys'])
+                        else:
+                            changes = detect_data_changes(table, list(latest.values()), table_config['primary_keys'])
+                        if not changes:
+                            logger.debug(f"No changes detected for {table_config['database']}.{table_config['table_name']}")
+                            continue
+
+                        changed_records = [change_info['new_values'] for change_info in changes.values()]
+                        ids = table.batch_insert_with_ids(changed_records)
+
+                        pk_to_db_id = {}
+                        for original_data, db_id in ids:
+                            pk_values = tuple(str(original_data.get(pk, '')) for pk in table.primary_keys)
+                            pk_to_db_id[pk_values] = db_id
+                        for change_info in changes.values():
+                            pk_values = tuple(str(change_info['primary_key_values'].get(pk, '')) for pk in table.primary_keys)
+                            change_info['database_key'] = pk_to_db_id.get(pk_values)
+
+                        if snapshot_table:
+                            self._update_snapshot(table, changed_records, table_config['primary_keys'])
+
+                    logger.info(f"Batch updated {len(changed_records)} of {len(latest)} records in "
+                                f"{table_config['database']}.{table_config['table_name']}")
+
+                    if report:
+                        # Robot names are looked up after the table lock is released
+                        for change_info in changes.values():
+                            robot_sn = change_info['robot_sn']
+                            if robot_sn not in robot_names:
+                                robot_names[robot_sn] = self._get_robot_name(robot_sn)
+                            change_info['robot_name'] = robot_names[robot_sn]
+                        database_names.append(table_config['database'])
+                        table_names.append(table_config['table_name'])
+                        all_changes.setdefault((table_config['database'], table_config['table_name']), {}).update(changes)
+
+                except Exception as e:
+                    logger.error(f"Failed to batch write to {table_config['database']}.{table_config['table_name']}: {e}")
+
+        return database_names, table_names, all_changes
+
+    @staticmethod
+    def _is_current_state_table(primary_keys: List[str]) -> bool:
+        """True when the primary key identifies the robot alone, so each row is its current state"""
+        return bool(primary_keys) and set(primary_keys) <= ROBOT_KEY_COLUMNS
+
+    def _table_snapshot(self, table: RDSTable) -> 'OrderedDict[tuple, Tuple[float, Dict[str, Any]]]':
+        """The table's snapshot with expired and excess entries evicted (table lock held)"""
+        table_snapshot = self._state_snapshot.setdefault(f"{table.database_name}.{table.table_name}", OrderedDict())
+        expired_before = time.monotonic() - self.state_snapshot_ttl
+        while table_snapshot:
+            written_at = next(iter(table_snapshot.values()))[0]
+            if written_at >= expired_before and len(table_snapshot) <= self.state_snapshot_max_rows:
+                break
+            table_snapshot.popitem(last=False)
+        return table_snapshot
+
+    def _detect_changes_with_snapshot(self, table: RDSTable, data_list: List[Dict[str, Any]],
+                                      primary_keys: List[str]) -> Dict:
+        """Snapshot-based change detection, falling back to the database for unseen rows (table lock held)"""
+        table_snapshot = self._table_snapshot(table)
+        record_keys = {record_key(record, primary_keys) for record in data_list}
+        snapshot = {key: table_snapshot[key][1] for key in record_keys if key in table_snapshot}
+
+        changes, unknown_records = detect_changes_against_snapshot(snapshot, data_list, primary_keys)
+        if unknown_records:
+            changes.update(detect_data_changes(table, unknown_records, primary_keys))
+            # Unseen rows that turned out unchanged already match the database
+            changed_keys = {record_key(change_info['new_values'], primary_keys) for change_info in changes.values()}
+            self._update_snapshot(table, [record for record in unknown_records
+                                         if record_key(record, primary_keys) not in changed_keys], primary_keys)
+        return changes
+
+    def _update_snapshot(self, table: RDSTable, records: List[Dict[str, Any]], primary_keys: List[str]):
+        """Merge written rows into the snapshot (table lock held)"""
+        table_snapshot = self._table_snapshot(table)
+        now = time.monotonic()
+        for record in records:
+            if any(record.get(pk) is None for pk in primary_keys):
+                continue
+            key = record_key(record, primary_keys)
+            previous = table_snapshot.pop(key, (now, {}))[1]
+            table_snapshot[key] = (now, {**previous, **record})
+        while len(table_snapshot) > self.state_snapshot_max_rows:
+            table_snapshot.popitem(last=False)
+
     def _get_table_columns(self, table: RDSTable) -> List[str]:
-        """Get actual column names from database table"""
+        """Get actual column names from database table (cached for the writer's lifetime)"""
+        table_key = f"{table.database_name}.{table.table_name}"
+        if table_key in self._table_columns_cache:
+            return self._table_columns_cache[table_key]
+
         try:
             # Query table structure to get actual columns
             columns_query = f"DESCRIBE {table.table_name}"
             columns_result = table.query_data(columns_query)
             if columns_result:
-                return [col[0] for col in columns_result]
+                columns = [col[0] for col in columns_result]
+                self._table_columns_cache[table_key] = columns
+                return columns
         except Exception as e:
             logger.warning(f"Could not get columns for {table.table_name}: {e}")
 
@@ -372,63 +567,62 @@ class DatabaseWriter:
 
         for table_config in table_configs:
             try:
-                # Get actual RDSTable instance
-                table = self._get_table(
-                    database_name=table_config['database'],
-                    table_name=table_config['table_name'],
-                    fields=table_config.get('fields', []),
-                    primary_keys=table_config['primary_keys']
-                )
-
                 # Filter data for robots that belong to this database
                 target_robots = table_config.get('robot_sns', [])
                 if target_robots and robot_sn not in target_robots:
                     continue
 
-                # Filter transformed data to only include columns that exist in the table
-                filtered_data = self._filter_data_for_table(transformed_data, table)
-
-                if not filtered_data:
-                    logger.warning(f"No valid columns found for {table.table_name} after filtering")
-                    continue
-
-                # Detect changes using the filtered data
-                changes = detect_data_changes(
-                    table, [filtered_data], table_config['primary_keys']
-                )
-
-                if changes:
-                    # Extract changed records for database insertion
-                    changed_records = []
-                    for change_info in changes.values():
-                        changed_records.append(change_info['new_values'])
-
-                    # Use batch_insert_with_ids to get database keys
-                    ids = table.batch_insert_with_ids(changed_records)
-
-                    # Map database keys back to changes
-                    pk_to_db_id = {}
-                    for original_data, db_id in ids:
-                        pk_values = tuple(str(original_data.get(pk, '')) for pk in table.primary_keys)
-                        pk_to_db_id[pk_values] = db_id
-
-                    # Add database_key to changes dictionary
-                    for unique_id, change_info in changes.items():
-                        pk_values = tuple(str(change_info['primary_key_values'].get(pk, '')) for pk in table.primary_keys)
-                        db_id = pk_to_db_id.get(pk_values)
-                        changes[unique_id]['database_key'] = db_id
-                        changes[unique_id]['robot_name'] = robot_name
-
-                    database_names.append(table_config['database'])
-                    table_names.append(table_config['table_name'])
-
-                    # Store changes with table identifier
-                    table_key = (table.database_name, table.table_name)
-                    all_changes[table_key] = changes
-
-                    logger.info(f"Updated {len(changed_records)} records in {table_config['database']}.{table_config['table_name']}")
-                else:
-                    logger.debug(f"No changes detected for {table_config['database']}.{table_config['table_name']}")
+                # Hold the table's lock for the whole read-compare-write so concurrent callbacks don't interleave
+                with self._locked_table(
+                    database_name=table_config['database'],
+                    table_name=table_config['table_name'],
+                    fields=table_config.get('fields', []),
+                    primary_keys=table_config['primary_keys']
+                ) as table:
+                    # Filter transformed data to only include columns that exist in the table
+                    filtered_data = self._filter_data_for_table(transformed_data, table)
+
+                    if not filtered_data:
+                        logger.warning(f"No valid columns found for {table.table_name} after filtering")
+                        continue
+
+                    # Detect changes using the filtered data
+                    changes = detect_data_changes(
+                        table, [filtered_data], table_config['primary_keys']
+                    )
+
+                    if changes:
+                        # Extract changed records for database insertion
+                        changed_records = []
+                        for change_info in changes.values():
+                            changed_records.append(change_info['new_values'])
+
+                        # Use batch_insert_with_ids to get database keys
+                        ids = table.batch_insert_with_ids(changed_records)
+
+                        # Map database keys back to changes
+                        pk_to_db_id = {}
+                        for original_data, db_id in ids:
+                            pk_values = tuple(str(original_data.get(pk, '')) for pk in table.primary_keys)
+                            pk_to_db_id[pk_values] = db_id
+
+                        # Add database_key to changes dictionary
+                        for unique_id, change_info in changes.items():
+                            pk_values = tuple(str(change_info['primary_key_values'].get(pk, '')) for pk in table.primary_keys)
+                            db_id = pk_to_db_id.get(pk_values)
+                            changes[unique_id]['database_key'] = db_id
+                            changes[unique_id]['robot_name'] = robot_name
+
+                        database_names.append(table_config['database'])
+                        table_names.append(table_config['table_name'])
+
+                        # Store changes with table identifier
+                        table_key = (table.database_name, table.table_name)
+                        all_changes[table_key] = changes
+
+                        logger.info(f"Updated {len(changed_records)} records in {table_config['database']}.{table_config['table_name']}")
+                    else:
+                        logger.debug(f"No changes detected for {table_config['database']}.{table_config['table_name']}")
 
             except Exception as e:
                 logger.error(f"Failed to write to {table_config['database']}.{table_config['table_name']}: {e}")
@@ -437,15 +631,26 @@ class DatabaseWriter:
 
     def close_all_connections(self):
         """Close all table connections"""
-        for table_key, table in self.table_cache.items():
+        # Table locks are taken outside the cache lock (writers take them in the other order)
+        with self._cache_lock:
+            tables = list(self.table_cache.items())
+            self.table_cache.clear()
+        for table_key, table in tables:
             try:
-                table.close()
+                with self._table_locks[table_key]:
+                    table.close()
                 logger.info(f"Closed connection for table: {table_key}")
             except Exception as e:
                 logger.warning(f"Error closing table {table_key}: {e}")
 
-        self.table_cache.clear()
-        self.config.close()
+        with self._cache_lock:
+            self._table_locks.clear()
+            self._table_last_used.clear()
+            self._table_columns_cache.clear()
+            self._state_snapshot.clear()
+
+        if self._owns_config:
+            self.config.close()
 
         # Close transform service
         try:
@@ -1,17 +1,22 @@
 # main.py
+import atexit
 import json
 import logging
 from datetime import datetime
 import os
+import threading
 from flask import Flask, jsonify, request
 from werkzeug.exceptions import BadRequest
 
 from callback_handler import CallbackHandler
+from callback_queue import CallbackQueue
 from config import Config
 from configs.database_config import DatabaseConfig
+from database_writer import DatabaseWriter
 from models import CallbackResponse, CallbackStatus
-from notifications import NotificationService
+from notifications import NotificationCoalescer, NotificationDispatcher, NotificationService
 from notifications.notification_sender import send_change_based_notifications
+from state_write_coalescer import StateWriteCoalescer
 
 # Configure logging
 logging.basicConfig(
@@ -26,10 +31,16 @@ logger = logging.getLogger(__name__)
 # Initialize notification service
 try:
     notification_service = NotificationService()
+    # Deliver notifications in the background so they don't extend webhook latency
+    notification_dispatcher = NotificationDispatcher(notification_service)
+    # Coalesce bursts of callbacks per robot and rate limit before dispatch
+    notification_coalescer = NotificationCoalescer(notification_dispatcher)
     logger.info("Notification service initialized successfully")
 except Exception as e:
     logger.error(f"Failed to initialize notification service: {e}")
     notification_service = None
+    notification_dispatcher = None
+    notification_coalescer = None
 
 # Get configuration file path - try multiple locations
 config_paths = [
@@ -48,6 +59,124 @@ if not database_config_path:
     logger.error("Database configuration file not found!")
     database_config_path = 'configs/database_config.yaml'  # Use default path
 
+SUPPORTED_BRANDS = ["pudu", "gas"]
+
+# Shared for the life of the process: one DatabaseConfig (resolver connection), one DatabaseWriter
+# (RDSTable cache, table column cache, transform map cache) and one CallbackHandler per brand.
+try:
+    db_config = DatabaseConfig(database_config_path)
+    database_writer = DatabaseWriter(database_config_path, config=db_config)
+    logger.info("Dynamic database configuration initialized successfully")
+    # Load robot names, tenant databases and current maps up front so callbacks need no metadata queries
+    db_config.metadata_cache.warm_up()
+except Exception as e:
+    logger.error(f"Failed to initialize database configuration: {e}")
+    db_config = None
+    database_writer = None
+
+# Latest pose/power per robot, written in periodic batches; notifications are sent when it flushes
+state_write_coalescer = None
+if Config.COALESCE_STATE_WRITES and database_writer:
+    state_write_coalescer = StateWriteCoalescer(
+        database_writer,
+        on_changes=lambda callback_type, changes: send_notifications_for_changes(callback_type, changes)
+    )
+
+callback_handlers = {}
+_callback_handlers_lock = threading.Lock()
+
+
+def get_callback_handler(brand: str) -> CallbackHandler:
+    """Return the process-wide CallbackHandler for a brand, creating it on first use"""
+    handler = callback_handlers.get(brand)
+    if handler is None:
+        with _callback_handlers_lock:
+            handler = callback_handlers.get(brand)
+            if handler is None:
+                handler = CallbackHandler(database_config_path, brand=brand, database_writer=database_writer,
+                                          state_writer=state_write_coalescer)
+                callback_handlers[brand] = handler
+    return handler
+
+
+def close_shared_resources():
+    """Close the shared writer and configuration on shutdown"""
+    if state_write_coalescer:
+        state_write_coalescer.close()
+    for handler in callback_handlers.values():
+        handler.close()
+    if database_writer:
+        database_writer.close_all_connections()
+    if db_config:
+        db_config.close()
+
+
+for _brand in SUPPORTED_BRANDS:
+    try:
+        get_callback_handler(_brand)
+    except Exception as e:
+        logger.error(f"Failed to initialize {_brand} callback handler: {e}")
+
+atexit.register(close_shared_resources)
+
+
+def send_notifications_for_changes(callback_type: str, changes_detected: dict):
+    """Send change-based notifications for the databases that have notifications enabled"""
+    if not notification_service or not changes_detected or not db_config:
+        return
+
+    notification_databases = db_config.get_notification_databases()
+
+    total_successful_notifications = 0
+    total_failed_notifications = 0
+
+    for (database_name, table_name), changes in changes_detected.items():
+        try:
+            # Check if this database needs notifications
+            if database_name in notification_databases:
+                logger.info(
+                    f"Sending notifications for {len(changes)} changes in {database_name}.{table_name}"
+                )
+
+                successful, failed = send_change_based_notifications(
+                    notification_service=notification_coalescer,
+                    database_name=database_name,
+                    table_name=table_name,
+                    changes_dict=changes,
+                    callback_type=callback_type
+                )
+
+                total_successful_notifications += successful
+                total_failed_notifications += failed
+            else:
+                logger.info(f"Skipping notifications for {database_name} (not in notification list)")
+
+        except Exception as e:
+            logger.error(f"Failed to send notifications for {database_name}.{table_name}: {e}")
+            total_failed_notifications += len(changes)
+
+    logger.info(
+        f"📧 Total notifications: {total_successful_notifications} queued, "
+        f"{total_failed_notifications} failed"
+    )
+
+
+def process_queued_callbacks(items: list):
+    """Write a batch of queued callbacks (grouped by brand) and send notifications for the changes"""
+    callbacks_by_brand = {}
+    for item in items:
+        callbacks_by_brand.setdefault(item['brand'], []).append(item['data'])
+
+    for brand, callbacks in callbacks_by_brand.items():
+        results = get_callback_handler(brand).write_batch_to_database_with_change_detection(callbacks)
+        for callback_type, (_, _, changes_detected) in results.items():
+            logger.info(f"Queued {brand} {callback_type} batch written. Changes detected in {len(changes_detected)} tables.")
+            send_notifications_for_changes(callback_type, changes_detected)
+
+
+# Ack-fast mode: verified callbacks are acknowledged immediately and written by background workers
+callback_queue = CallbackQueue(process_queued_callbacks) if Config.ASYNC_WRITES else None
+
 
 def detect_brand_from_data(data: dict) -> str:
     """
@@ -86,6 +215,66 @@ def detect_brand_from_data(data: dict) -> str:
     return 'pudu'
 
 
+def accept_callback(data: dict, lower_headers: dict):
+    """
+    Detect the brand, verify and map a parsed callback (no I/O once the handlers are created)
+
+    Args:
+        data: Request JSON body
+        lower_headers: Request headers with lowercased names
+
+    Returns:
+        tuple: (callback_handler, brand, response, status_code); callback_handler is None if the
+        callback was rejected, in which case response/status_code are the reply to send
+    """
+    # Auto-detect brand from data structure
+    brand = detect_brand_from_data(data)
+    logger.info(f"🎯 Processing as {brand.upper()} callback")
+
+    # Reuse the long-lived brand-specific callback handler
+    callback_handler = get_callback_handler(brand)
+    logger.debug(f"Request headers (lowercased): {lower_headers}")
+
+    # Verify request using brand-specific verification
+    is_valid, error_message = callback_handler.verify_request(data, lower_headers)
+
+    if not is_valid:
+        logger.error(f"{brand.upper()} verification failed: {error_message}")
+        return None, brand, CallbackResponse(status=CallbackStatus.ERROR, message=error_message), 401
+
+    logger.info(f"{brand.upper()} verification passed ✅")
+
+    # Process the callback
+    response = callback_handler.process_callback(data)
+    return callback_handler, brand, response, 200 if response.status == CallbackStatus.SUCCESS else 400
+
+
+def enqueue_callback(callback_handler: CallbackHandler, brand: str, data: dict, response: CallbackResponse) -> bool:
+    """Ack-fast mode: hand the write to the queue; False if it must be written inline (disabled or full)"""
+    if callback_queue and response.status == CallbackStatus.SUCCESS:
+        return callback_queue.enqueue(brand, data, partition_key=callback_handler.extract_robot_sn(data))
+    return False
+
+
+def write_callback(callback_handler: CallbackHandler, data: dict):
+    """Write a callback to the database with change detection and send notifications for the changes"""
+    # Write to database with change detection and dynamic routing
+    try:
+        database_names, table_names, changes_detected = (
+            callback_handler.write_to_database_with_change_detection(data)
+        )
+        logger.info(f"Database write completed. Changes detected in {len(changes_detected)} tables.")
+    except Exception as e:
+        logger.error(f"Failed to write callback to database: {e}", exc_info=True)
+        database_names, table_names, changes_detected = [], [], {}
+
+    # Send notifications for detected changes
+    if changes_detected:
+        # Get abstract callback type for notification context
+        abstract_type = callback_handler.brand_config.map_callback_type(data)
+        send_notifications_for_changes(abstract_type or "unknown", changes_detected)
+
+
 def unified_webhook_handler():
     """
     Unified webhook endpoint that auto-detects brand and processes accordingly
@@ -112,99 +301,19 @@ def unified_webhook_handler():
 
         logger.info(f"Callback data: {json.dumps(data, indent=2)}")
 
-        # Auto-detect brand from data structure
-        brand = detect_brand_from_data(data)
-        logger.info(f"🎯 Processing as {brand.upper()} callback")
-
-        # Initialize brand-specific callback handler
-        callback_handler = CallbackHandler(database_config_path, brand=brand)
-
-        # Initialize database configuration for notifications
-        try:
-            db_config = DatabaseConfig(database_config_path)
-            logger.info("Dynamic database configuration initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize database configuration: {e}")
-            db_config = None
-
         # Lowercase all headers for consistent access
         lower_headers = {k.lower(): v for k, v in request.headers.items()}
-        logger.debug(f"Request headers (lowercased): {lower_headers}")
-
-        # Verify request using brand-specific verification
-        is_valid, error_message = callback_handler.verify_request(data, lower_headers)
-
-        if not is_valid:
-            logger.error(f"{brand.upper()} verification failed: {error_message}")
-            callback_handler.close()
-            if db_config:
-                db_config.close()
-            return jsonify(
-                CallbackResponse(status=CallbackStatus.ERROR, message=error_message).to_dict()
-            ), 401
 
-        logger.info(f"{brand.upper()} verification passed ✅")
+        callback_handler, brand, response, status_code = accept_callback(data, lower_headers)
+        if callback_handler is None:
+            return jsonify(response.to_dict()), status_code
 
-        # Process the callback
-        response = callback_handler.process_callback(data)
-
-        # Write to database with change detection and dynamic routing
-        try:
-            database_names, table_names, changes_detected = (
-                callback_handler.write_to_database_with_change_detection(data)
-            )
-            logger.info(f"Database write completed. Changes detected in {len(changes_detected)} tables.")
-        except Exception as e:
-            logger.error(f"Failed to write callback to database: {e}", exc_info=True)
-            database_names, table_names, changes_detected = [], [], {}
-
-        # Send notifications for detected changes
-        if notification_service and changes_detected and db_config:
-            # Get abstract callback type for notification context
-            abstract_type = callback_handler.brand_config.map_callback_type(data)
-            callback_type = abstract_type or "unknown"
-
-            notification_databases = db_config.get_notification_databases()
-
-            total_successful_notifications = 0
-            total_failed_notifications = 0
-
-            for (database_name, table_name), changes in changes_detected.items():
-                try:
-                    # Check if this database needs notifications
-                    if database_name in notification_databases:
-                        logger.info(
-                            f"Sending notifications for {len(changes)} changes in {database_name}.{table_name}"
-                        )
-
-                        successful, failed = send_change_based_notifications(
-                            notification_service=notification_service,
-                            database_name=database_name,
-                            table_name=table_name,
-                            changes_dict=changes,
-                            callback_type=callback_type
-                        )
-
-                        total_successful_notifications += successful
-                        total_failed_notifications += failed
-                    else:
-                        logger.info(f"Skipping notifications for {database_name} (not in notification list)")
-
-                except Exception as e:
-                    logger.error(f"Failed to send notifications for {database_name}.{table_name}: {e}")
-                    total_failed_notifications += len(changes)
-
-            logger.info(
-                f"📧 Total notifications: {total_successful_notifications} successful, "
-                f"{total_failed_notifications} failed"
-            )
-
-        callback_handler.close()
-        if db_config:
-            db_config.close()
+        # Ack-fast mode: hand the write to the queue (falls through to inline processing if it is full)
+        if not enqueue_callback(callback_handler, brand, data, response):
+            write_callback(callback_handler, data)
 
         # Return result
-        return jsonify(response.to_dict()), 200 if response.status == CallbackStatus.SUCCESS else 400
+        return jsonify(response.to_dict()), status_code
 
     except Exception as e:
         logger.error(f"Error processing callback: {str(e)}", exc_info=True)
@@ -241,79 +350,76 @@ def gas_webhook():
     return unified_webhook_handler()
 
 
-@app.route("/api/webhook/health", methods=["GET"])
-def health_check():
-    """Enhanced health check endpoint with multi-brand information"""
+def get_health_status() -> dict:
+    """Health payload with multi-brand information (shared by the Flask and ASGI apps)"""
 
     # Get handler info for both brands
     handler_info = {}
-    for brand in ['pudu', 'gas']:
+    for brand in SUPPORTED_BRANDS:
         try:
-            handler = CallbackHandler(database_config_path, brand=brand)
-            handler_info[brand] = handler.get_handler_info()
-            handler.close()
+            handler_info[brand] = get_callback_handler(brand).get_handler_info()
         except Exception as e:
             logger.error(f"Failed to get {brand} handler info: {e}")
             handler_info[brand] = {"error": str(e)}
 
     # Get database config info
     try:
-        db_config = DatabaseConfig(database_config_path)
+        if db_config is None:
+            raise RuntimeError("Database configuration not initialized")
         db_info = {
             "main_database": db_config.main_database_name,
             "notification_databases": len(db_config.get_notification_databases()),
         }
-        db_config.close()
     except Exception as e:
         logger.error(f"Failed to get database config: {e}")
         db_info = {"error": str(e)}
 
-    return jsonify(
-        {
-            "status": "healthy",
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "service": "robot-webhook-api",
-            "version": "2.0-unified",
-            "features": {
-                "auto_brand_detection": "enabled",
-                "multi_brand_support": "enabled",
-                "dynamic_database_routing": "enabled",
-                "change_detection": "enabled",
-                "notification_service": "enabled" if notification_service else "disabled",
-            },
-            "supported_brands": {
-                "pudu": handler_info.get('pudu', {}),
-                "gas": handler_info.get('gas', {})
-            },
-            "database_config": db_info,
-            "supported_endpoints": [
-                "/api/webhook (auto-detects brand)",
-                "/api/pudu/webhook (legacy)",
-                "/api/gas/webhook (legacy)"
-            ]
-        }
-    )
-
-
-@app.route("/api/<brand>/webhook/health", methods=["GET"])
-def brand_health_check(brand: str):
-    """Brand-specific health check endpoint"""
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "service": "robot-webhook-api",
+        "version": "2.0-unified",
+        "features": {
+            "auto_brand_detection": "enabled",
+            "multi_brand_support": "enabled",
+            "dynamic_database_routing": "enabled",
+            "change_detection": "enabled",
+            "notification_service": "enabled" if notification_service else "disabled",
+        },
+        "notification_dispatcher": notification_dispatcher.get_stats() if notification_dispatcher else {},
+        "notification_coalescer": notification_coalescer.get_stats() if notification_coalescer else {},
+        "write_queue": callback_queue.get_metrics() if callback_queue else {"mode": "synchronous"},
+        "state_write_coalescer": state_write_coalescer.get_stats() if state_write_coalescer else {},
+        "robot_metadata_cache": db_config.metadata_cache.get_stats() if db_config else {},
+        "map_transform_cache": database_writer.transform_service.get_stats() if database_writer else {},
+        "supported_brands": {
+            "pudu": handler_info.get('pudu', {}),
+            "gas": handler_info.get('gas', {})
+        },
+        "database_config": db_info,
+        "supported_endpoints": [
+            "/api/webhook (auto-detects brand)",
+            "/api/pudu/webhook (legacy)",
+            "/api/gas/webhook (legacy)"
+        ]
+    }
+
+
+def get_brand_health_status(brand: str):
+    """Brand-specific health payload and status code"""
 
     # Validate brand
-    supported_brands = ["pudu", "gas"]
-    if brand not in supported_brands:
-        return jsonify({
+    if brand not in SUPPORTED_BRANDS:
+        return {
             "status": "error",
             "message": f"Unsupported brand: {brand}",
-            "supported_brands": supported_brands
-        }), 400
+            "supported_brands": SUPPORTED_BRANDS
+        }, 400
 
     try:
-        handler = CallbackHandler(database_config_path, brand=brand)
-        handler_info = handler.get_handler_info()
-        handler.close()
+        handler_info = get_callback_handler(brand).get_handler_info()
 
-        return jsonify({
+        return {
             "status": "healthy",
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "brand": brand,
@@ -322,14 +428,27 @@ def brand_health_check(brand: str):
                 "/api/webhook (auto-detect)"
             ],
             "configuration": handler_info
-        })
+        }, 200
     except Exception as e:
         logger.error(f"Failed to get {brand} handler info: {e}")
-        return jsonify({
+        return {
             "status": "error",
             "brand": brand,
             "message": str(e)
-        }), 500
+        }, 500
+
+
+@app.route("/api/webhook/health", methods=["GET"])
+def health_check():
+    """Enhanced health check endpoint with multi-brand information"""
+    return jsonify(get_health_status())
+
+
+@app.route("/api/<brand>/webhook/health", methods=["GET"])
+def brand_health_check(brand: str):
+    """Brand-specific health check endpoint"""
+    health, status_code = get_brand_health_status(brand)
+    return jsonify(health), status_code
 
 
 if __name__ == "__main__":
@@ -338,6 +457,7 @@ if __name__ == "__main__":
     logger.info(f"🔄 Dynamic database routing: ✅ Enabled")
     logger.info(f"📧 Notification service: {'✅ Enabled' if notification_service else '❌ Disabled'}")
     logger.info(f"🔍 Change detection: ✅ Enabled")
+    logger.info(f"📥 Write queue: {'✅ Enabled' if callback_queue else '❌ Disabled (synchronous writes)'}")
     logger.info(f"🌐 Supported endpoints:")
     logger.info(f"   - POST /api/webhook (auto-detects brand) ⭐ PRIMARY")
     logger.info(f"   - POST /api/pudu/webhook (legacy)")
@@ -3,7 +3,9 @@ Notification Package for Webhook API
 """
 
 from .icon_manager import get_icon_manager
+from .notification_coalescer import NotificationCoalescer
+from .notification_dispatcher import NotificationDispatcher
 from .notification_sender import send_change_based_notifications
 from .notification_service import NotificationService
 
-__all__ = ["NotificationService", "send_change_based_notifications", "get_icon_manager"]
\ No newline at end of file
+__all__ = ["NotificationService", "NotificationDispatcher", "NotificationCoalescer", "send_change_based_notifications", "get_icon_manager"]
\ No newline at end of file
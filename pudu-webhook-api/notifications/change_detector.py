@@ -299,4 +299,49 @@ def values_are_equivalent(old_value, new_value, field_name: str = None) -> bool:
     except (ValueError, TypeError):
         pass
 
-    return False
\ No newline at end of file
+    return False
+
+def record_key(record: dict, primary_keys: list) -> tuple:
+    """Primary key tuple of a record, as used to match records in change detection"""
+    normalized_record = normalize_record_for_comparison({pk: record.get(pk) for pk in primary_keys})
+    return tuple(str(normalized_record[pk]) if normalized_record[pk] is not None else '' for pk in primary_keys)
+
+
+def detect_changes_against_snapshot(snapshot: Dict[tuple, dict], data_list: list, primary_keys: list) -> tuple:
+    """
+    Detect changes by comparing records with an in-memory snapshot of the last written rows
+    instead of querying the table. Produces change entries in the same format as detect_data_changes.
+
+    Returns:
+        tuple: (changes_detected, unknown_records) - unknown_records have no snapshot entry and
+        still need detect_data_changes against the database
+    """
+    changes_detected = {}
+    unknown_records = []
+
+    for record in data_list:
+        normalized_record = normalize_record_for_comparison(record)
+        pk_key = record_key(record, primary_keys)
+
+        existing = snapshot.get(pk_key)
+        if existing is None:
+            unknown_records.append(record)
+            continue
+
+        changed_fields = [
+            field for field, new_value in normalized_record.items()
+            if field not in primary_keys and field != 'robot_name'
+            and not values_are_equivalent(normalize_decimal_value(existing.get(field), field), new_value, field)
+        ]
+        if changed_fields:
+            robot_sn = normalized_record.get('robot_sn', normalized_record.get('sn', 'unknown'))
+            changes_detected["_".join(pk_key)] = {
+                'robot_sn': robot_sn,
+                'primary_key_values': {pk: normalized_record.get(pk) for pk in primary_keys},
+                'change_type': 'update',
+                'changed_fields': changed_fields,
+                'old_values': dict(existing),
+                'new_values': dict(record)
+            }
+
+    return changes_detected, unknown_records
@@ -0,0 +1,234 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Higher rank wins when several notifications are merged into one
+SEVERITY_RANK = {'neutral': 0, 'success': 1, 'event': 2, 'warning': 3, 'error': 4, 'fatal': 5}
+
+# related_biz_type values whose updates carry the full current state, so a newer one supersedes a pending one
+# (robot_status from the pipeline; status_event / power_event from the webhook callbacks)
+STATUS_UPDATE_BIZ_TYPES = {'robot_status', 'status_event', 'power_event'}
+
+# Severities that are never rate limited
+RATE_LIMIT_EXEMPT_SEVERITIES = {'fatal'}
+
+
+class NotificationCoalescer:
+    """
+    Coalescing and rate limiting layer in front of NotificationService / NotificationDispatcher.
+
+    Notifications are buffered per (robot_sn, notification_type) for window_seconds. When the
+    window closes the buffer is emitted as a single notification: a newer status update
+    supersedes a pending one of the same kind for the same robot, identical notifications are collapsed, and the
+    rest are merged (highest severity leads, contents are joined and the individual payloads are
+    kept under payload['coalesced_records']).
+
+    Emitted notifications then pass per-robot and global sliding-window rate limits (per
+    rate_period seconds, 0 disables a limit); fatal notifications are never rate limited.
+
+    Exposes send_notification() with the same signature as NotificationService. Call flush()
+    at the end of a pipeline run to emit everything still buffered.
+    """
+
+    def __init__(self, sender, window_seconds: float = None, per_robot_limit: int = None,
+                 global_limit: int = None, rate_period: float = 60.0):
+        self.sender = sender
+        self.window_seconds = float(window_seconds if window_seconds is not None
+                                    else os.getenv('NOTIFICATION_COALESCE_WINDOW', '10'))
+        self.per_robot_limit = int(per_robot_limit if per_robot_limit is not None
+                                   else os.getenv('NOTIFICATION_ROBOT_RATE_LIMIT', '20'))
+        self.global_limit = int(global_limit if global_limit is not None
+                                else os.getenv('NOTIFICATION_GLOBAL_RATE_LIMIT', '600'))
+        self.rate_period = rate_period
+
+        self._pending: Dict[Tuple[str, str], dict] = {}
+        self._robot_sent: Dict[str, deque] = {}
+        self._global_sent = deque()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = False
+        self._stats = {'received': 0, 'sent': 0, 'failed': 0, 'coalesced': 0, 'superseded': 0, 'rate_limited': 0}
+
+        atexit.register(self.close)
+
+    def send_notification(self, robot_sn: str, notification_type: str, title: str, content: str,
+                          severity: str, status: str, payload: dict) -> bool:
+        """
+        Buffer a notification for coalescing (or emit it directly when the window is 0).
+
+        Returns:
+            bool: True if the notification was accepted, False if it was rate limited or failed
+        """
+        notification = {
+            'robot_sn': robot_sn,
+            'notification_type': notification_type,
+            'title': title,
+            'content': content,
+            'severity': severity,
+            'status': status,
+            'payload': payload or {},
+        }
+
+        if self.window_seconds <= 0 or self._closed:
+            with self._lock:
+                self._stats['received'] += 1
+            return self._emit([notification])
+
+        self._ensure_flusher()
+        key = (robot_sn, notification_type)
+        with self._lock:
+            self._stats['received'] += 1
+            bucket = self._pending.get(key)
+            if bucket is None:
+                self._pending[key] = {'opened_at': time.monotonic(), 'notifications': [notification]}
+            else:
+                self._add_to_bucket(bucket['notifications'], notification)
+
+        self._flush_due()
+        return True
+
+    def flush(self):
+        """Emit every buffered notification regardless of its window"""
+        with self._lock:
+            buckets = list(self._pending.values())
+            self._pending.clear()
+        for bucket in buckets:
+            self._emit(bucket['notifications'])
+
+    def close(self):
+        """Stop the background flusher and emit buffered notifications (idempotent)"""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop_event.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+        self.flush()
+
+        stats = self.get_stats()
+        logger.info(f"📧 Notification coalescer closed: {stats['sent']} sent, {stats['suppressed']} suppressed "
+                    f"({stats['coalesced']} coalesced, {stats['superseded']} superseded, "
+                    f"{stats['rate_limited']} rate limited)")
+
+    def get_stats(self) -> Dict[str, int]:
+        """Cumulative counters: received, sent, failed, coalesced, superseded, rate_limited, suppressed, pending"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = sum(len(bucket['notifications']) for bucket in self._pending.values())
+        stats['suppressed'] = stats['coalesced'] + stats['superseded'] + stats['rate_limited']
+        return stats
+
+    def _add_to_bucket(self, notifications: List[dict], notification: dict):
+        """Add a notification to a pending bucket, dropping superseded status updates and duplicates (lock held)"""
+        if self._is_status_update(notification):
+            biz_type = notification['payload'].get('related_biz_type')
+            for index, pending in enumerate(notifications):
+                if self._is_status_update(pending) and pending['payload'].get('related_biz_type') == biz_type:
+                    notifications[index] = notification
+                    self._stats['superseded'] += 1
+                    return
+
+        for pending in notifications:
+            if pending['title'] == notification['title'] and pending['content'] == notification['content']:
+                self._stats['coalesced'] += 1
+                return
+
+        notifications.append(notification)
+
+    @staticmethod
+    def _is_status_update(notification: dict) -> bool:
+        payload = notification['payload']
+        return payload.get('related_biz_type') in STATUS_UPDATE_BIZ_TYPES and payload.get('change_type') == 'update'
+
+    def _flush_due(self):
+        """Emit buckets whose window has closed"""
+        now = time.monotonic()
+        with self._lock:
+            due_keys = [key for key, bucket in self._pending.items()
+                        if now - bucket['opened_at'] >= self.window_seconds]
+            buckets = [self._pending.pop(key) for key in due_keys]
+        for bucket in buckets:
+            self._emit(bucket['notifications'])
+
+    def _ensure_flusher(self):
+        """Start the background thread that emits buckets once their window closes"""
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flusher_loop, name="notification-coalescer", daemon=True)
+            self._flusher.start()
+
+    def _flusher_loop(self):
+        interval = min(1.0, self.window_seconds / 2)
+        while not self._stop_event.wait(interval):
+            try:
+                self._flush_due()
+            except Exception as e:
+                logger.error(f"❌ Error flushing coalesced notifications: {e}")
+
+    def _emit(self, notifications: List[dict]) -> bool:
+        """Merge a bucket into one notification, apply rate limits and forward it to the sender"""
+        merged = notifications[0] if len(notifications) == 1 else self._merge(notifications)
+        with self._lock:
+            if len(notifications) > 1:
+                self._stats['coalesced'] += len(notifications) - 1
+            if not self._acquire_rate_slot(merged['robot_sn'], merged['severity']):
+                self._stats['rate_limited'] += 1
+                logger.info(f"🚦 Rate limited notification for robot {merged['robot_sn']}: {merged['title']}")
+                return False
+
+        try:
+            sent = self.sender.send_notification(**merged)
+        except Exception as e:
+            logger.error(f"❌ Error forwarding notification for robot {merged['robot_sn']}: {e}")
+            sent = False
+
+        with self._lock:
+            self._stats['sent' if sent else 'failed'] += 1
+        return bool(sent)
+
+    @staticmethod
+    def _merge(notifications: List[dict]) -> dict:
+        """Merge several notifications for one robot and type; the highest severity (latest on ties) leads"""
+        lead = max(reversed(notifications), key=lambda n: SEVERITY_RANK.get(n['severity'], 0))
+        payload = dict(lead['payload'])
+        payload['coalesced_records'] = [n['payload'] for n in notifications]
+        return {
+            'robot_sn': lead['robot_sn'],
+            'notification_type': lead['notification_type'],
+            'title': f"{lead['title']} (+{len(notifications) - 1} more)",
+            'content': "\n".join(n['content'] for n in notifications),
+            'severity': lead['severity'],
+            'status': lead['status'],
+            'payload': payload,
+        }
+
+    def _acquire_rate_slot(self, robot_sn: str, severity: str) -> bool:
+        """Sliding-window per-robot and global rate limits (lock held)"""
+        if severity in RATE_LIMIT_EXEMPT_SEVERITIES:
+            return True
+
+        now = time.monotonic()
+        robot_sent = self._robot_sent.setdefault(robot_sn, deque())
+        for sent_times in (robot_sent, self._global_sent):
+            while sent_times and now - sent_times[0] >= self.rate_period:
+                sent_times.popleft()
+
+        if self.per_robot_limit > 0 and len(robot_sent) >= self.per_robot_limit:
+            return False
+        if self.global_limit > 0 and len(self._global_sent) >= self.global_limit:
+            return False
+
+        robot_sent.append(now)
+        self._global_sent.append(now)
+        return True
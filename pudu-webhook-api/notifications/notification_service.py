@@ -14,6 +14,8 @@ class NotificationService:
         # Load from environment variables (Lambda/production)
         self.api_host = os.getenv("NOTIFICATION_API_HOST", "")
         self.endpoint = os.getenv("NOTIFICATION_API_ENDPOINT", "")
+        self.batch_endpoint = os.getenv("NOTIFICATION_API_BATCH_ENDPOINT", "")
+        self.timeout = float(os.getenv("NOTIFICATION_API_TIMEOUT", "10"))
         logger.info("Using environment variables for notification settings")
 
         self.headers = {"Content-Type": "application/json"}
@@ -36,19 +38,12 @@ class NotificationService:
             status: Notification status tag (completed, failed, warning, in_progress, etc.)
         """
         try:
-            # Use HTTP connection (change to HTTPSConnection if you move to HTTPS)
-            conn = http.client.HTTPConnection(self.api_host)
+            conn = self.create_connection()
 
             # Build data - include status if provided
-            notification_data = {
-                "robotId": robot_sn,
-                "notificationType": notification_type,  # robotStatus, robot_status, robot_task, robotTask
-                "title": title,
-                "content": content,
-                "severity": severity,
-                "status": status,
-                "payload": payload # for identifying the record in the database
-            }
+            notification_data = self.build_notification_data(
+                robot_sn, notification_type, title, content, severity, status, payload
+            )
 
             notification_data_json = json.dumps(notification_data)
 
@@ -76,6 +71,26 @@ class NotificationService:
             except:
                 pass
 
+    def create_connection(self) -> http.client.HTTPConnection:
+        """Create a connection to the notification API (kept alive and reused by NotificationDispatcher)"""
+        # Use HTTP connection (change to HTTPSConnection if you move to HTTPS)
+        return http.client.HTTPConnection(self.api_host, timeout=self.timeout)
+
+    @staticmethod
+    def build_notification_data(
+        robot_sn: str, notification_type: str, title: str, content: str, severity: str, status: str, payload: dict
+    ) -> dict:
+        """Build the notification request body"""
+        return {
+            "robotId": robot_sn,
+            "notificationType": notification_type,  # robotStatus, robot_status, robot_task, robotTask
+            "title": title,
+            "content": content,
+            "severity": severity,
+            "status": status,
+            "payload": payload # for identifying the record in the database
+        }
+
     def test_connection(self) -> bool:
         """Test if the notification service is reachable"""
         try:
@@ -6,6 +6,10 @@ import boto3
 from botocore.exceptions import ClientError
 import json
 
+# Errors of a connection that is gone (server restart, wait_timeout, failover, network drop);
+# a new connection may succeed where this one failed
+CONNECTION_ERRORS = (pymysql.err.OperationalError, pymysql.err.InterfaceError)
+
 
 def connect_rds_instance(config_file="credentials.yaml"):
     base_dir = os.path.dirname(os.path.abspath(__file__))
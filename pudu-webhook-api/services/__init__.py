@@ -3,7 +3,14 @@ Robot Webhook API Package
 """
 
 from .robot_database_resolver import *
+from .robot_metadata_cache import RobotMetadata, RobotMetadataCache
+from .map_transform_cache import MapTransform, MapTransformCache, get_map_transform_cache
 
 __all__ = [
-    "RobotDatabaseResolver"
+    "RobotDatabaseResolver",
+    "MapTransform",
+    "MapTransformCache",
+    "get_map_transform_cache",
+    "RobotMetadata",
+    "RobotMetadataCache"
 ]
\ No newline at end of file
@@ -0,0 +1,147 @@
+# pudu-webhook-api/services/map_transform_cache.py
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MapTransform:
+    """Everything needed to place a robot pose on a floor plan, parsed once per map"""
+    map_name: str
+    resolution: float
+    origin: List[float]
+    robot_map_height: int
+    transform_robot_to_floor: np.ndarray
+
+    def to_floor(self, x: float, y: float) -> Tuple[float, float, float, float]:
+        """
+        Robot coordinates -> (robot map u, robot map v, floor plan u, floor plan v)
+        """
+        robot_map_u = int((x - self.origin[0]) / self.resolution)
+        robot_map_v = int(self.robot_map_height - (y - self.origin[1]) / self.resolution)
+
+        robot_position_on_floor = self.transform_robot_to_floor @ np.array([robot_map_u, robot_map_v, 1])
+        floor_plan_u = int(robot_position_on_floor[0])
+        floor_plan_v = int(robot_position_on_floor[1])
+
+        return float(robot_map_u), float(robot_map_v), float(floor_plan_u), float(floor_plan_v)
+
+
+class MapTransformCache:
+    """
+    Process-wide, bounded, thread-safe cache of MapTransform by map name.
+
+    get_or_load() returns the cached transform or calls loader(map_name) once, even when many
+    callbacks ask for the same new map at the same time. The least recently used map is evicted
+    once max_maps are cached. Maps the loader found no transform for (it returned None) are
+    remembered for negative_ttl seconds, so a robot on an unconfigured map does not trigger a query
+    for every pose; a loader that raised (e.g. a lost database connection) is retried next time.
+    """
+
+    def __init__(self, max_maps: int = None, negative_ttl: float = None):
+        self.max_maps = max_maps or int(os.getenv('MAP_TRANSFORM_CACHE_SIZE', '256'))
+        self.negative_ttl = float(negative_ttl if negative_ttl is not None
+                                  else os.getenv('MAP_TRANSFORM_NEGATIVE_TTL', '300'))
+
+        self._entries: "OrderedDict[str, MapTransform]" = OrderedDict()
+        self._missing: Dict[str, float] = {}
+        self._loading: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'negative_hits': 0, 'loads': 0, 'evictions': 0}
+
+    def get_or_load(self, map_name: str, loader: Callable[[str], Optional[MapTransform]]) -> Optional[MapTransform]:
+        """Cached transform for map_name, loading it with loader(map_name) on a miss"""
+        cached, found = self._lookup(map_name)
+        if found:
+            return cached
+
+        with self._lock:
+            load_lock = self._loading.setdefault(map_name, threading.Lock())
+
+        with load_lock:
+            # Another thread may have loaded the map while we waited
+            cached, found = self._lookup(map_name, count=False)
+            if found:
+                return cached
+
+            try:
+                transform = loader(map_name)
+            except Exception as e:
+                logger.warning(f"Could not load transform for map {map_name}: {e}")
+                with self._lock:
+                    self._stats['loads'] += 1
+                    self._loading.pop(map_name, None)
+                return None
+
+            with self._lock:
+                self._stats['loads'] += 1
+                self._loading.pop(map_name, None)
+                if transform is None:
+                    self._missing[map_name] = time.monotonic()
+                else:
+                    self._missing.pop(map_name, None)
+                    self._entries[map_name] = transform
+                    self._entries.move_to_end(map_name)
+                    while len(self._entries) > self.max_maps:
+                        self._entries.popitem(last=False)
+                        self._stats['evictions'] += 1
+            return transform
+
+    def invalidate(self, map_name: str = None):
+        """Drop one map, or every map if map_name is None"""
+        with self._lock:
+            if map_name is None:
+                self._entries.clear()
+                self._missing.clear()
+            else:
+                self._entries.pop(map_name, None)
+                self._missing.pop(map_name, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['missing'] = len(self._missing)
+        return stats
+
+    def _lookup(self, map_name: str, count: bool = True) -> Tuple[Optional[MapTransform], bool]:
+        """(transform, found); found is also True for maps recently found to be missing"""
+        with self._lock:
+            transform = self._entries.get(map_name)
+            if transform is not None:
+                self._entries.move_to_end(map_name)
+                if count:
+                    self._stats['hits'] += 1
+                return transform, True
+
+            missing_since = self._missing.get(map_name)
+            if missing_since is not None and time.monotonic() - missing_since < self.negative_ttl:
+                if count:
+                    self._stats['negative_hits'] += 1
+                return None, True
+
+            if count:
+                self._stats['misses'] += 1
+            return None, False
+
+
+_shared_cache: Optional[MapTransformCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_map_transform_cache() -> MapTransformCache:
+    """The MapTransformCache shared by every TransformService in this process"""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = MapTransformCache()
+    return _shared_cache
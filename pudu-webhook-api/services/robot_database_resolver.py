@@ -1,5 +1,6 @@
 import logging
 import sys
+import threading
 import traceback
 from typing import Dict, List, Optional
 from rds.rdsTable import RDSDatabase
@@ -28,10 +29,20 @@ def retry_db_operation(max_retries=3, base_delay=1, exponential_backoff=True):
         return wrapper
     return decorator
 
+def synchronized(func):
+    """Serialize calls that use the shared main database connection"""
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return func(self, *args, **kwargs)
+    return wrapper
+
 class RobotDatabaseResolver:
     def __init__(self, main_database_name: str):
         self.main_database_name = main_database_name
         self.main_db = None
+        # One pymysql connection is shared by every request thread
+        self._lock = threading.RLock()
         self._connection_pool = {}
         self._last_health_check = 0
         self._health_check_interval = 300  # 5 minutes
@@ -70,6 +81,7 @@ class RobotDatabaseResolver:
             return False
 
     @retry_db_operation(max_retries=3, base_delay=2)
+    @synchronized
     def get_robot_database_mapping(self, robot_sns: List[str] = None) -> Dict[str, str]:
         """
         Get mapping of robot_sn to database name with detailed logging.
@@ -301,6 +313,47 @@ class RobotDatabaseResolver:
         return db_to_robots
 
     @retry_db_operation(max_retries=3, base_delay=2)
+    @synchronized
+    def get_robot_metadata_rows(self, robot_sns: List[str] = None) -> List[tuple]:
+        """
+        Get (robot_sn, robot_name, database_name) for robots in one query on mnt_robots_management.
+        Unlike get_robot_database_mapping, robots without a tenant database are included (database_name None).
+
+        Args:
+            robot_sns: Robots to load. If None, loads all robots.
+        """
+        if not self.main_db:
+            logger.info("Initializing database connection...")
+            self._initialize_connection()
+
+        self._ensure_connection()
+
+        if not self.main_db:
+            logger.error("No database connection available")
+            return []
+
+        query = """
+            SELECT mrm.robot_sn, mrm.robot_name, st.database_name
+            FROM mnt_robots_management mrm
+            LEFT JOIN sys_tenant st ON mrm.tenant_id = st.tenant_id
+        """
+        if robot_sns:
+            robot_list = "', '".join(sn.strip().replace("'", "''") for sn in robot_sns if sn and sn.strip())
+            query += f" WHERE mrm.robot_sn IN ('{robot_list}')"
+
+        rows = []
+        for result in self.main_db.query_data(query) or []:
+            if isinstance(result, dict):
+                result = (result.get('robot_sn'), result.get('robot_name'), result.get('database_name'))
+            robot_sn, robot_name, database_name = result[0], result[1], result[2]
+            if not robot_sn:
+                continue
+            database_name = str(database_name).strip() if database_name and str(database_name).strip() else None
+            rows.append((str(robot_sn).strip(), robot_name, database_name))
+        return rows
+
+    @retry_db_operation(max_retries=3, base_delay=2)
+    @synchronized
     def get_all_project_databases(self) -> List[str]:
         """Get list of all project database names"""
         if not self.main_db:
@@ -331,6 +384,7 @@ class RobotDatabaseResolver:
             logger.error(f"Error getting project databases: {e}")
             return []
 
+    @synchronized
     def close(self):
         """Close database connection"""
         try:
@@ -0,0 +1,222 @@
+# pudu-webhook-api/services/robot_metadata_cache.py
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from rds.rdsTable import RDSTable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RobotMetadata:
+    """Cached per-robot metadata used to route and enrich callbacks"""
+    robot_sn: str
+    robot_name: str
+    database_name: Optional[str]
+    supports_transform: bool
+    current_map: Optional[str] = None
+    loaded_at: float = 0.0
+    current_map_at: float = 0.0
+
+
+class RobotMetadataCache:
+    """
+    Process-wide cache of robot name, tenant database, transform support and current map.
+
+    warm_up() loads every robot from mnt_robots_management in one query (and the latest map of
+    robots in transform-supported databases), after which callbacks for known robots need no
+    metadata queries. Entries expire after ttl_seconds; a lookup that finds expired or missing
+    robots reloads all of them with one query (the whole table once the last full load is older
+    than the TTL). Robots that are not in mnt_robots_management are cached too, so unknown robots
+    are not looked up on every callback. invalidate() drops entries explicitly.
+
+    A robot's current map expires on its own, shorter TTL (current_map_ttl_seconds): pose callbacks
+    carry no map, so after a floor change the map is only corrected by looking it up again.
+    """
+
+    def __init__(self, resolver, transform_supported_databases: List[str], ttl_seconds: float = None,
+                 current_map_ttl_seconds: float = None):
+        self.resolver = resolver
+        self.transform_supported_databases = set(transform_supported_databases or [])
+        self.ttl_seconds = float(ttl_seconds if ttl_seconds is not None
+                                 else os.getenv('ROBOT_METADATA_TTL', '600'))
+        self.current_map_ttl_seconds = float(current_map_ttl_seconds if current_map_ttl_seconds is not None
+                                             else os.getenv('ROBOT_CURRENT_MAP_TTL', '120'))
+
+        self._entries: Dict[str, RobotMetadata] = {}
+        self._project_databases: Optional[List[str]] = None
+        self._project_databases_loaded_at = 0.0
+        self._last_full_load = 0.0
+        self._lock = threading.RLock()
+        self._stats = {'hits': 0, 'misses': 0, 'loads': 0, 'full_loads': 0}
+
+    def warm_up(self) -> int:
+        """
+        Load all robots and the current maps of robots in transform-supported databases.
+
+        Returns:
+            int: Number of robots cached
+        """
+        self._load(None)
+        self._load_current_maps()
+        with self._lock:
+            count = len(self._entries)
+        logger.info(f"🤖 Robot metadata cache warmed up with {count} robots")
+        return count
+
+    def get_many(self, robot_sns: List[str]) -> Dict[str, RobotMetadata]:
+        """Metadata for robots, loading missing or expired ones in a single query"""
+        now = time.monotonic()
+        with self._lock:
+            stale = [sn for sn in dict.fromkeys(robot_sns)
+                     if sn not in self._entries or now - self._entries[sn].loaded_at >= self.ttl_seconds]
+            self._stats['hits'] += len(robot_sns) - len(stale)
+            self._stats['misses'] += len(stale)
+            full_reload = bool(stale) and now - self._last_full_load >= self.ttl_seconds and self._last_full_load > 0
+
+        if stale:
+            self._load(None if full_reload else stale)
+
+        with self._lock:
+            return {sn: self._entries[sn] for sn in robot_sns if sn in self._entries}
+
+    def get(self, robot_sn: str) -> Optional[RobotMetadata]:
+        return self.get_many([robot_sn]).get(robot_sn)
+
+    def get_database_mapping(self, robot_sns: List[str]) -> Dict[str, str]:
+        """robot_sn -> database_name for robots that have a tenant database"""
+        return {sn: entry.database_name for sn, entry in self.get_many(robot_sns).items() if entry.database_name}
+
+    def get_robot_name(self, robot_sn: str) -> str:
+        """Robot name, falling back to the serial number"""
+        entry = self.get(robot_sn)
+        if entry and entry.robot_name and str(entry.robot_name).strip():
+            return str(entry.robot_name).strip()
+        return robot_sn
+
+    def supports_transform(self, robot_sn: str) -> bool:
+        entry = self.get(robot_sn)
+        return bool(entry and entry.supports_transform)
+
+    def get_current_map(self, robot_sn: str, include_expired: bool = False) -> Optional[str]:
+        """The robot's current map; None once older than current_map_ttl_seconds unless include_expired"""
+        with self._lock:
+            entry = self._entries.get(robot_sn)
+            if not entry:
+                return None
+            if not include_expired and time.monotonic() - entry.current_map_at >= self.current_map_ttl_seconds:
+                return None
+            return entry.current_map
+
+    def set_current_map(self, robot_sn: str, map_name: Optional[str]):
+        """Record the robot's current map (e.g. from a callback or a work location lookup)"""
+        if not map_name:
+            return
+        with self._lock:
+            entry = self._entries.get(robot_sn)
+            if entry:
+                entry.current_map = map_name
+                entry.current_map_at = time.monotonic()
+
+    def get_project_databases(self) -> List[str]:
+        """All tenant databases (sys_tenant), refreshed once per TTL"""
+        now = time.monotonic()
+        with self._lock:
+            if self._project_databases is not None and now - self._project_databases_loaded_at < self.ttl_seconds:
+                return list(self._project_databases)
+
+        databases = self.resolver.get_all_project_databases()
+        with self._lock:
+            self._project_databases = databases
+            self._project_databases_loaded_at = now
+        return list(databases)
+
+    def invalidate(self, robot_sns: List[str] = None):
+        """Drop cached metadata for some robots, or everything if robot_sns is None"""
+        with self._lock:
+            if robot_sns is None:
+                self._entries.clear()
+                self._project_databases = None
+                self._last_full_load = 0.0
+            else:
+                for robot_sn in robot_sns:
+                    self._entries.pop(robot_sn, None)
+        logger.info(f"🤖 Robot metadata cache invalidated ({'all robots' if robot_sns is None else len(robot_sns)})")
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        return stats
+
+    def _load(self, robot_sns: Optional[List[str]]):
+        """Load metadata for robot_sns (all robots if None), keeping known current maps"""
+        try:
+            rows = self.resolver.get_robot_metadata_rows(robot_sns)
+        except Exception as e:
+            logger.warning(f"Could not load robot metadata: {e}")
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            self._stats['loads'] += 1
+            loaded = set()
+            for robot_sn, robot_name, database_name in rows:
+                previous = self._entries.get(robot_sn)
+                self._entries[robot_sn] = RobotMetadata(
+                    robot_sn=robot_sn,
+                    robot_name=robot_name or robot_sn,
+                    database_name=database_name,
+                    supports_transform=database_name in self.transform_supported_databases,
+                    current_map=previous.current_map if previous else None,
+                    loaded_at=now,
+                    current_map_at=previous.current_map_at if previous else 0.0,
+                )
+                loaded.add(robot_sn)
+
+            # Cache robots that do not exist (yet) so they are not queried on every callback
+            for robot_sn in robot_sns or []:
+                if robot_sn not in loaded:
+                    self._entries[robot_sn] = RobotMetadata(robot_sn, robot_sn, None, False, loaded_at=now)
+
+            if robot_sns is None:
+                self._stats['full_loads'] += 1
+                self._last_full_load = now
+                for robot_sn in set(self._entries) - loaded:
+                    self._entries[robot_sn].loaded_at = now
+
+    def _load_current_maps(self):
+        """Latest map of each robot in transform-supported databases, one query per database"""
+        for database_name in self.transform_supported_databases:
+            try:
+                table = RDSTable(
+                    connection_config="credentials.yaml",
+                    database_name=database_name,
+                    table_name="mnt_robots_work_location",
+                    fields=None,
+                    primary_keys=["robot_sn"]
+                )
+                try:
+                    result = table.query_data("""
+                        SELECT w.robot_sn, w.map_name
+                        FROM mnt_robots_work_location w
+                        JOIN (
+                            SELECT robot_sn, MAX(update_time) AS update_time
+                            FROM mnt_robots_work_location
+                            WHERE map_name IS NOT NULL AND map_name != ''
+                            GROUP BY robot_sn
+                        ) latest ON latest.robot_sn = w.robot_sn AND latest.update_time = w.update_time
+                        WHERE w.map_name IS NOT NULL AND w.map_name != ''
+                    """)
+                finally:
+                    table.close()
+
+                for row in result or []:
+                    robot_sn, map_name = (row[0], row[1]) if isinstance(row, tuple) else (row.get('robot_sn'), row.get('map_name'))
+                    self.set_current_map(robot_sn, str(map_name).strip())
+            except Exception as e:
+                logger.warning(f"Could not load current maps from {database_name}: {e}")
@@ -9,7 +9,10 @@ import io
 from PIL import Image
 from typing import Dict, List, Tuple, Optional, Any
 import threading
+import time
 from rds.rdsTable import RDSTable
+from rds.utils import CONNECTION_ERRORS
+from .map_transform_cache import MapTransform, get_map_transform_cache
 
 logger = logging.getLogger(__name__)
 
@@ -20,14 +23,26 @@ class TransformService:
     This service handles:
     1. Robot position transformation: x,y,z coordinates → floor plan coordinates (new_x, new_y)
     2. Map lookup for robots when map_name is not provided in callback
+
+    Map transforms live in the process-wide MapTransformCache and each robot's current map in the
+    robot metadata cache (updated from the callbacks themselves, and looked up again from
+    work_location once it expires), so once warm a pose callback is transformed without any
+    database or HTTP call.
     """
 
     def __init__(self, config):
         """Initialize transform service with database configuration"""
         self.config = config
         self.supported_databases = self._get_transform_supported_databases()
-        self._map_info_cache = {}
+        self.map_transform_cache = get_map_transform_cache()
+        self.map_lookup_retry = self.map_transform_cache.negative_ttl
+        self._map_lookup_misses: Dict[str, float] = {}
+        self._map_lookups: Dict[str, threading.Lock] = {}
         self._cache_lock = threading.Lock()
+        # Idle lookup connections per (database, table); a query checks one out, so lookups run concurrently
+        self._idle_tables: Dict[Tuple[str, str], List[RDSTable]] = {}
+        self._tables_lock = threading.Lock()
+        self.max_idle_connections = 4
 
     def _get_transform_supported_databases(self) -> List[str]:
         """Get list of databases that support transformations"""
@@ -81,8 +96,12 @@ class TransformService:
 
             # Get map name (either from data or lookup)
             map_name = robot_data.get('map_name')
+            if map_name:
+                self.config.metadata_cache.set_current_map(robot_sn, map_name)
+            else:
+                map_name = self.config.metadata_cache.get_current_map(robot_sn)
             if not map_name:
-                map_name = self._get_current_map_for_robot(robot_sn, database_name)
+                map_name = self._refresh_current_map(robot_sn, database_name)
 
             if not map_name:
                 logger.debug(f"No map_name found for robot {robot_sn}")
@@ -105,25 +124,47 @@ class TransformService:
 
         return result_data
 
+    def _refresh_current_map(self, robot_sn: str, database_name: str) -> Optional[str]:
+        """
+        Look up a robot's current map whose cached map is missing or expired, once per robot even when
+        several of its poses arrive together. Falls back to the expired map when the lookup finds none.
+        """
+        with self._cache_lock:
+            lookup_lock = self._map_lookups.setdefault(robot_sn, threading.Lock())
+
+        with lookup_lock:
+            # Another thread may have refreshed the map while we waited
+            map_name = self.config.metadata_cache.get_current_map(robot_sn)
+            if not map_name:
+                map_name = self._get_current_map_for_robot(robot_sn, database_name)
+                if map_name:
+                    self.config.metadata_cache.set_current_map(robot_sn, map_name)
+                else:
+                    map_name = self.config.metadata_cache.get_current_map(robot_sn, include_expired=True)
+            with self._cache_lock:
+                self._map_lookups.pop(robot_sn, None)
+            return map_name
+
     def _get_current_map_for_robot(self, robot_sn: str, database_name: str) -> Optional[str]:
         """
         Get current map for a robot from the work_location table
 
+        Used when the robot's map is not known (not in the callback, not warmed up and not seen in an
+        earlier callback) or has expired. Robots whose lookup found no map are not looked up again
+        for map_lookup_retry seconds (a failed query is retried on the next pose).
+
         Args:
             robot_sn: Robot serial number
 
         Returns:
             Current map name if found, None otherwise
         """
-        try:
-            table = RDSTable(
-                connection_config="credentials.yaml",
-                database_name=database_name,
-                table_name="mnt_robots_work_location",
-                fields=None,
-                primary_keys=["robot_sn"]
-            )
+        with self._cache_lock:
+            missed_at = self._map_lookup_misses.get(robot_sn)
+        if missed_at is not None and time.monotonic() - missed_at < self.map_lookup_retry:
+            return None
 
+        try:
             # Get the most recent work location record for this robot
             query = f"""
                 SELECT map_name FROM mnt_robots_work_location
@@ -134,26 +175,30 @@ class TransformService:
                 LIMIT 1
             """
 
-            result = table.query_data(query)
-            table.close()
+            result = self._query(database_name, "mnt_robots_work_location", ["robot_sn"], query)
 
             if result and len(result) > 0:
                 map_name = result[0][0] if isinstance(result[0], tuple) else result[0].get('map_name')
                 if map_name and str(map_name).strip():
                     logger.debug(f"Found map_name for robot {robot_sn}: {map_name}")
+                    with self._cache_lock:
+                        self._map_lookup_misses.pop(robot_sn, None)
                     return str(map_name).strip()
 
             logger.debug(f"No map_name found in work_location for robot {robot_sn}")
-            return None
 
         except Exception as e:
             logger.warning(f"Error getting current map for robot {robot_sn}: {e}")
             return None
 
+        with self._cache_lock:
+            self._map_lookup_misses[robot_sn] = time.monotonic()
+        return None
+
     def _get_database_for_robot(self, robot_sn: str) -> Optional[str]:
         """Get database name for a robot using the config resolver"""
         try:
-            robot_to_db = self.config.resolver.get_robot_database_mapping([robot_sn])
+            robot_to_db = self.config.get_robot_database_mapping([robot_sn])
             return robot_to_db.get(robot_sn)
         except Exception as e:
             logger.warning(f"Error getting database for robot {robot_sn}: {e}")
@@ -164,118 +209,156 @@ class TransformService:
         Transform robot position from robot coordinates to floor plan coordinates.
         """
         try:
-            # Get map info (cached)
-            map_info = self._get_map_info(map_name)
-            if not map_info:
+            # Map transforms are shared process-wide and loaded at most once per map
+            map_transform = self.map_transform_cache.get_or_load(map_name, self._load_map_transform)
+            if map_transform is None:
                 return None, None, None, None
 
-            # Get robot map and transform
-            robot_map_xml = map_info.get('robot_map_xml')
-            transform_robot_to_floor = map_info.get('transform_robot_to_floor')
+            return map_transform.to_floor(x, y)
 
-            if not robot_map_xml or transform_robot_to_floor is None:
-                return None, None, None, None
+        except Exception as e:
+            logger.debug(f"Error transforming position for map {map_name}: {e}")
+            return None, None, None, None
 
-            # Parse robot map XML to get resolution and origin
+    def _load_map_transform(self, map_name: str) -> Optional[MapTransform]:
+        """
+        Build the MapTransform for a map: floor transform, robot map resolution/origin and robot map height.
+        """
+        map_info = self._get_map_info(map_name)
+        if not map_info:
+            return None
+
+        # Get robot map and transform
+        robot_map_xml = map_info.get('robot_map_xml')
+        transform_robot_to_floor = map_info.get('transform_robot_to_floor')
+
+        if not robot_map_xml or transform_robot_to_floor is None:
+            return None
+
+        # Parse robot map XML to get resolution and origin (a malformed map is treated as missing)
+        try:
             root = ET.fromstring(robot_map_xml)
             resolution_element = root.find('resolution')
             origin_element = root.find('origin')
-
             if resolution_element is None or origin_element is None:
-                return None, None, None, None
-
+                return None
             resolution = float(resolution_element.text)
             origin = list(map(float, origin_element.text.split()))
+        except (ET.ParseError, TypeError, ValueError) as e:
+            logger.warning(f"Invalid robot map XML for map {map_name}: {e}")
+            return None
 
-            # Get robot map image to determine dimensions
-            robot_map_png_bytes = self._fetch_png_from_url(map_info['robot_map'])
-            if not robot_map_png_bytes:
-                return None, None, None, None
-
-            robot_map_rgb = np.array(Image.open(io.BytesIO(robot_map_png_bytes)).convert('RGB'))
-
-            # Transform robot position to robot map pixel coordinates
-            robot_map_u = int((x - origin[0]) / resolution)
-            robot_map_v = int(robot_map_rgb.shape[0] - (y - origin[1]) / resolution)
-
-            # Transform robot map coordinates to floor plan coordinates
-            robot_position_on_floor = transform_robot_to_floor @ np.array([robot_map_u, robot_map_v, 1])
-            floor_plan_u = int(robot_position_on_floor[0])
-            floor_plan_v = int(robot_position_on_floor[1])
+        # Get robot map image to determine dimensions (the header is enough for the size)
+        robot_map_png_bytes = self._fetch_png_from_url(map_info['robot_map'])
+        if not robot_map_png_bytes:
+            return None
 
-            return float(robot_map_u), float(robot_map_v), float(floor_plan_u), float(floor_plan_v)
+        with Image.open(io.BytesIO(robot_map_png_bytes)) as robot_map_image:
+            robot_map_height = robot_map_image.size[1]
 
-        except Exception as e:
-            logger.debug(f"Error transforming position for map {map_name}: {e}")
-            return None, None, None, None
+        logger.info(f"🗺️ Loaded transform for map {map_name}")
+        return MapTransform(
+            map_name=map_name,
+            resolution=resolution,
+            origin=origin,
+            robot_map_height=robot_map_height,
+            transform_robot_to_floor=transform_robot_to_floor
+        )
 
     def _get_map_info(self, map_name: str) -> Optional[Dict[str, Any]]:
         """
-        Get map information from database with caching.
-        """
-        with self._cache_lock:
-            if map_name in self._map_info_cache:
-                return self._map_info_cache[map_name]
+        Get map information from the transform-supported databases.
 
-        try:
-            # Query map info from transform-supported databases only
-            for db_name in self.supported_databases:
+        Returns None when no database has the map; raises when a database that could have it failed
+        to answer, so the map is not remembered as missing.
+        """
+        query_error = None
+        # Query map info from transform-supported databases only
+        for db_name in self.supported_databases:
+            query = f"""
+                SELECT transform_robot_to_floor, transform_task_to_floor, floor_map, robot_map, robot_map_xml
+                FROM pro_floor_info
+                WHERE robot_map_name = '{map_name}'
+            """
+            try:
+                result = self._query(db_name, "pro_floor_info", ["robot_map_name"], query)
+            except Exception as e:
+                logger.debug(f"Error querying map info from {db_name}: {e}")
+                query_error = e
+                continue
+
+            if not result:
+                continue
+            try:
+                row = result[0]
+                if isinstance(row, tuple):
+                    transform_robot_to_floor_str, transform_task_to_floor_str, floor_map, robot_map, robot_map_xml = row
+                else:
+                    transform_robot_to_floor_str = row.get('transform_robot_to_floor')
+                    transform_task_to_floor_str = row.get('transform_task_to_floor')
+                    floor_map = row.get('floor_map')
+                    robot_map = row.get('robot_map')
+                    robot_map_xml = row.get('robot_map_xml')
+
+                return {
+                    'transform_robot_to_floor': np.array(json.loads(transform_robot_to_floor_str)).reshape(3, 3) if transform_robot_to_floor_str else None,
+                    'transform_task_to_floor': np.array(json.loads(transform_task_to_floor_str)).reshape(3, 3) if transform_task_to_floor_str else None,
+                    'floor_map': floor_map,
+                    'robot_map': robot_map,
+                    'robot_map_xml': robot_map_xml
+                }
+            except Exception as e:
+                # A malformed row stays malformed; treat the map as not configured in this database
+                logger.debug(f"Invalid map info for {map_name} in {db_name}: {e}")
+
+        if query_error is not None:
+            raise query_error
+        return None
+
+    def _query(self, database_name: str, table_name: str, primary_keys: List[str], query: str):
+        """
+        Run a lookup query on an idle connection kept open for this service, or a new one when all are
+        in use (closed after errors). An idle connection that turns out to be gone (wait_timeout,
+        failover) is replaced and the query retried once. The lock is only held to check connections
+        out and in.
+        """
+        key = (database_name, table_name)
+        with self._tables_lock:
+            idle = self._idle_tables.get(key)
+            table = idle.pop() if idle else None
+        reused = table is not None
+
+        while True:
+            if table is None:
+                table = RDSTable(
+                    connection_config="credentials.yaml",
+                    database_name=database_name,
+                    table_name=table_name,
+                    fields=None,
+                    primary_keys=primary_keys
+                )
+            try:
+                result = table.query_data(query)
+                break
+            except Exception as e:
                 try:
-                    table = RDSTable(
-                        connection_config="credentials.yaml",
-                        database_name=db_name,
-                        table_name="pro_floor_info",
-                        fields=None,
-                        primary_keys=["robot_map_name"]
-                    )
-
-                    query = f"""
-                        SELECT transform_robot_to_floor, transform_task_to_floor, floor_map, robot_map, robot_map_xml
-                        FROM pro_floor_info
-                        WHERE robot_map_name = '{map_name}'
-                    """
-
-                    result = table.query_data(query)
                     table.close()
-
-                    if result:
-                        row = result[0]
-                        if isinstance(row, tuple):
-                            transform_robot_to_floor_str, transform_task_to_floor_str, floor_map, robot_map, robot_map_xml = row
-                        else:
-                            transform_robot_to_floor_str = row.get('transform_robot_to_floor')
-                            transform_task_to_floor_str = row.get('transform_task_to_floor')
-                            floor_map = row.get('floor_map')
-                            robot_map = row.get('robot_map')
-                            robot_map_xml = row.get('robot_map_xml')
-
-                        map_info = {
-                            'transform_robot_to_floor': np.array(json.loads(transform_robot_to_floor_str)).reshape(3, 3) if transform_robot_to_floor_str else None,
-                            'transform_task_to_floor': np.array(json.loads(transform_task_to_floor_str)).reshape(3, 3) if transform_task_to_floor_str else None,
-                            'floor_map': floor_map,
-                            'robot_map': robot_map,
-                            'robot_map_xml': robot_map_xml
-                        }
-
-                        # Cache the result
-                        with self._cache_lock:
-                            self._map_info_cache[map_name] = map_info
-
-                        return map_info
-
-                except Exception as e:
-                    logger.debug(f"Error querying map info from {db_name}: {e}")
-                    continue
-
-            # If not found in any supported database, cache None to avoid repeated queries
-            with self._cache_lock:
-                self._map_info_cache[map_name] = None
-
-            return None
-
-        except Exception as e:
-            logger.debug(f"Error getting map info for {map_name}: {e}")
-            return None
+                except Exception:
+                    pass
+                table = None
+                if not (reused and isinstance(e, CONNECTION_ERRORS)):
+                    raise
+                logger.info(f"Idle connection to {database_name}.{table_name} was lost ({e}), reconnecting")
+                reused = False
+
+        with self._tables_lock:
+            idle = self._idle_tables.setdefault(key, [])
+            if len(idle) < self.max_idle_connections:
+                idle.append(table)
+                table = None
+        if table is not None:
+            table.close()
+        return result
 
     def _fetch_png_from_url(self, url: str) -> Optional[bytes]:
         """Fetch PNG image from URL."""
@@ -290,6 +373,20 @@ class TransformService:
             logger.debug(f'Error fetching PNG from {url}: {e}')
             return None
 
+    def get_stats(self) -> Dict[str, Any]:
+        """Shared map transform cache counters plus robots waiting to retry a map lookup"""
+        stats = self.map_transform_cache.get_stats()
+        with self._cache_lock:
+            stats['robots_without_map'] = len(self._map_lookup_misses)
+        return stats
+
     def close(self):
-        """Close database connections and cleanup"""
-        pass  # Config is managed externally
\ No newline at end of file
+        """Close lookup connections (config and the shared map cache are managed externally)"""
+        with self._tables_lock:
+            tables = [table for idle in self._idle_tables.values() for table in idle]
+            self._idle_tables = {}
+        for table in tables:
+            try:
+                table.close()
+            except Exception as e:
+                logger.debug(f"Error closing transform lookup connection: {e}")
\ No newline at end of file
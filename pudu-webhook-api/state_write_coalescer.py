@@ -0,0 +1,148 @@
+# state_write_coalescer.py
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Record types buffered by the state writer and written in periodic batches
+STATE_WRITER_RECORD_TYPES = {'pose', 'power'}
+
+# Record types whose callbacks carry the robot's full current state, so only the latest one matters.
+# Poses are not coalesced: each one is a row of the time-keyed work location history
+COALESCED_RECORD_TYPES = {'power'}
+
+
+class StateWriteCoalescer:
+    """
+    Batching writer for high-frequency pose and power callbacks.
+
+    submit() keeps only the latest record per (record_type, robot_sn) for COALESCED_RECORD_TYPES and
+    every record for the others; a background thread hands everything pending to
+    DatabaseWriter.write_batch() every flush_interval_ms, or sooner once max_pending records are
+    waiting, as one batched upsert per table. Change detection for current-state tables runs against
+    the writer's in-memory snapshot of what it last wrote, so unchanged rows cost no query at all.
+
+    Detected changes are passed to on_changes(callback_type, changes_detected) for notifications.
+    The owner must call close() before closing the DatabaseWriter so pending records are written.
+    """
+
+    def __init__(self, database_writer, on_changes: Optional[Callable[[str, dict], None]] = None,
+                 flush_interval_ms: int = None, max_pending: int = None):
+        self.database_writer = database_writer
+        self.on_changes = on_changes
+        self.flush_interval = (flush_interval_ms if flush_interval_ms is not None
+                               else int(os.getenv('WEBHOOK_STATE_FLUSH_MS', '500'))) / 1000
+        self.max_pending = max_pending or int(os.getenv('WEBHOOK_STATE_FLUSH_RECORDS', '200'))
+
+        # (record_type, robot_sn) for coalesced types, (record_type, robot_sn, sequence) for the others
+        # -> (callback_type, data); insertion order is arrival order
+        self._pending: Dict[tuple, Tuple[str, Dict[str, Any]]] = {}
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = False
+        self._stats = {'submitted': 0, 'coalesced': 0, 'written': 0, 'flushes': 0, 'failed': 0}
+
+    def submit(self, callback_type: str, record_type: str, robot_sn: str, data: Dict[str, Any]) -> bool:
+        """
+        Buffer a record (replacing the robot's pending one for coalesced record types).
+
+        Returns:
+            bool: True if buffered, False if the coalescer is closed (caller should write directly)
+        """
+        if self._closed:
+            return False
+
+        self._ensure_flusher()
+        with self._lock:
+            self._stats['submitted'] += 1
+            if record_type in COALESCED_RECORD_TYPES:
+                key = (record_type, robot_sn)
+                if self._pending.pop(key, None) is not None:
+                    self._stats['coalesced'] += 1
+            else:
+                self._sequence += 1
+                key = (record_type, robot_sn, self._sequence)
+            self._pending[key] = (callback_type, data)
+            if len(self._pending) >= self.max_pending:
+                self._wakeup.set()
+        return True
+
+    def flush(self):
+        """Write everything pending as one batch per record type"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return
+
+            batches: Dict[Tuple[str, str], list] = {}
+            for (record_type, robot_sn, *_), (callback_type, data) in pending.items():
+                batches.setdefault((callback_type, record_type), []).append((robot_sn, data))
+
+            for (callback_type, record_type), records in batches.items():
+                try:
+                    _, _, changes_detected = self.database_writer.write_batch(record_type, records, use_snapshot=True)
+                    self._increment('written', len(records))
+                except Exception as e:
+                    logger.error(f"❌ Error writing {len(records)} coalesced {record_type} records: {e}")
+                    self._increment('failed', len(records))
+                    continue
+
+                if changes_detected and self.on_changes:
+                    try:
+                        self.on_changes(callback_type, changes_detected)
+                    except Exception as e:
+                        logger.error(f"❌ Error handling changes for coalesced {record_type} records: {e}")
+
+            self._increment('flushes')
+
+    def close(self):
+        """Stop the flusher and write pending records (idempotent)"""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+        self.flush()
+
+        stats = self.get_stats()
+        logger.info(f"📍 State write coalescer closed: {stats['submitted']} submitted, "
+                    f"{stats['coalesced']} coalesced, {stats['written']} written in {stats['flushes']} flushes")
+
+    def get_stats(self) -> Dict[str, int]:
+        """Cumulative counters: submitted, coalesced, written, flushes, failed, pending"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._pending)
+        return stats
+
+    def _increment(self, counter: str, amount: int = 1):
+        with self._lock:
+            self._stats[counter] += amount
+
+    def _ensure_flusher(self):
+        """Start the background flush thread on first use"""
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flusher_loop, name="state-write-coalescer", daemon=True)
+            self._flusher.start()
+
+    def _flusher_loop(self):
+        while not self._stop_event.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"❌ Error flushing coalesced state writes: {e}")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Load test: callbacks/sec of one Flask process (a single sync worker, i.e. one request at a time)
+vs one ASGI process (asgi.py under uvicorn) with many callbacks in flight.
+
+Each server runs in its own subprocess with the MySQL layer replaced by the in-memory stand-in from
+bench_handler_reuse.py, with every query sleeping --query-latency ms and robots spread over
+--databases project databases (none of them has notifications enabled). The load is sent with the
+test WebhookClient from --concurrency client threads:
+
+    python test/benchmarks/bench_asgi_concurrency.py --requests 400 --concurrency 32 --query-latency 5
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+WEBHOOK_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(WEBHOOK_ROOT))
+sys.path.insert(0, str(Path(__file__).parent))
+os.chdir(WEBHOOK_ROOT)
+
+from bench_handler_reuse import BenchConnection, BenchCursor, load_callbacks
+
+from test.utils.webhook_client import WebhookClient
+
+CALLBACK_CODE = "bench_callback_code"
+
+
+def serve(server, port, query_latency, databases):
+    """Run one webhook server with the in-memory MySQL stand-in (called in the server subprocess)"""
+    import rds.rdsTable as rds_table
+
+    class LatencyCursor(BenchCursor):
+        def execute(self, query):
+            time.sleep(query_latency)
+            super().execute(query)
+            if "mnt_robots_management mrm" in query and "IN (" in query:
+                self._rows = tuple((sn, name, f"bench_project_db_{zlib.crc32(sn.encode()) % databases}")
+                                   for sn, name, _ in self._rows)
+
+    class LatencyConnection(BenchConnection):
+        def cursor(self):
+            return LatencyCursor(self)
+
+    rds_table.connect_rds_instance = lambda config_file="credentials.yaml": LatencyConnection(0)
+    logging.disable(logging.CRITICAL)
+
+    if server == "flask":
+        import main as webhook_main
+        from werkzeug.serving import make_server
+
+        make_server("127.0.0.1", port, webhook_main.app, threaded=False).serve_forever()
+    else:
+        import uvicorn
+
+        import asgi
+
+        uvicorn.run(asgi.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_server(server, port, args):
+    env = dict(os.environ, PUDU_CALLBACK_CODE=CALLBACK_CODE, LOG_FILE=os.devnull)
+    process = subprocess.Popen(
+        [sys.executable, __file__, "--serve", server, "--port", str(port),
+         "--query-latency", str(args.query_latency), "--databases", str(args.databases)],
+        env=env,
+    )
+    client = WebhookClient(f"http://127.0.0.1:{port}", callback_code=CALLBACK_CODE)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        healthy, _ = client.check_health(timeout=1)
+        if healthy:
+            return process, client
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{server} server did not start on port {port}")
+
+
+def run_load(client, callbacks, requests_count, concurrency):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda index: client.send_callback(callbacks[index % len(callbacks)])[0],
+                                range(requests_count)))
+    elapsed = time.perf_counter() - start
+    return requests_count / elapsed, elapsed, sum(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--query-latency", type=float, default=5, help="simulated time per query in ms")
+    parser.add_argument("--databases", type=int, default=4, help="project databases the robots are spread over")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--serve", choices=["flask", "asgi"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.query_latency / 1000, args.databases)
+        return
+
+    logging.disable(logging.CRITICAL)
+    callbacks = load_callbacks()
+    print(f"Load test: {args.requests} pose callbacks from {args.concurrency} concurrent clients, "
+          f"{args.query_latency:.0f} ms per query, {args.databases} project databases")
+
+    results = {}
+    for offset, server in enumerate(("flask", "asgi")):
+        process, client = start_server(server, args.port + offset, args)
+        try:
+            run_load(client, callbacks, min(20, args.requests), args.concurrency)  # warm-up
+            rate, elapsed, succeeded = run_load(client, callbacks, args.requests, args.concurrency)
+            results[server] = rate
+            print(f"  {server:<8} {rate:8.1f} req/s  ({elapsed:.2f}s, {succeeded}/{args.requests} succeeded)")
+            if server == "asgi":
+                health = requests.get(f"{client.base_url}/api/webhook/health", timeout=5).json()
+                print(f"  asgi stats: {json.dumps(health.get('asgi', {}))}")
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+
+    print(f"  speedup  {results['asgi'] / results['flask']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
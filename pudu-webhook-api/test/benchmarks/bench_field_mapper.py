@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-callback cost of FieldMapper.map_fields() + drop_fields() with the compiled brand
+mappings, over every recorded Pudu callback in test/test_data plus Gas incident/task report samples
+(there are no recorded Gas callbacks, and the Gas report mapping is the one that uses calculations,
+field processors and cleaning mode translation).
+
+Pass --baseline-ref to also time the FieldMapper of an older commit (read with `git show`), e.g. the
+interpreting mapper from before mappings were compiled:
+
+    python test/benchmarks/bench_field_mapper.py --iterations 2000 --baseline-ref HEAD~1
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import types
+from pathlib import Path
+
+WEBHOOK_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(WEBHOOK_ROOT))
+os.chdir(WEBHOOK_ROOT)
+
+from core.brand_config import BrandConfig, FieldMapper
+
+GAS_CALLBACKS = [
+    {
+        "messageTypeId": 1,
+        "messageTimestamp": 1700000000123,
+        "traceId": "bench-trace",
+        "payload": {
+            "serialNumber": "GS_BENCH_001",
+            "content": {
+                "incidentId": "incident_001", "incidentCode": "E101", "incidentName": "LowBattery",
+                "incidentLevel": "H5", "incidentStatus": 1, "taskId": "task_001",
+                "startTime": 1700000000000, "endTime": 1700000300000,
+            },
+        },
+    },
+    {
+        "messageTypeId": 2,
+        "traceId": "bench-trace",
+        "payload": {
+            "serialNumber": "GS_BENCH_001",
+            "modelTypeCode": "S1",
+            "taskReport": {
+                "taskInstanceId": "task_001", "displayName": "Lobby", "startTime": 1700000000000,
+                "endTime": 1700003600000, "completionPercentage": 0.95, "durationSeconds": 3600,
+                "plannedCleaningAreaSquareMeter": 500, "actualCleaningAreaSquareMeter": 475.5,
+                "efficiencySquareMeterPerHour": 475.5, "waterConsumptionLiter": 12.5,
+                "cleaningMode": "强劲_清洗", "taskEndStatus": 0, "taskReportPngUri": "https://example.com/report.png",
+                "startBatteryPercentage": 95, "endBatteryPercentage": 60,
+                "subTasks": [{"mapName": "1F"}, {"mapName": "2F"}], "areaNameList": ["Lobby"], "operator": "bench",
+            },
+        },
+    },
+]
+
+
+def load_callbacks():
+    """(brand, raw callback) pairs: recorded Pudu callbacks plus the Gas samples"""
+    callbacks = []
+    for data_file in sorted((WEBHOOK_ROOT / "test" / "test_data").glob("*.json")):
+        with open(data_file) as file:
+            for cases in json.load(file).values():
+                for case in cases:
+                    if case.get("callback_type") and isinstance(case.get("data"), dict):
+                        callbacks.append(("pudu", {"callback_type": case["callback_type"], "data": case["data"]}))
+    callbacks.extend(("gas", callback) for callback in GAS_CALLBACKS)
+    return callbacks
+
+
+def load_baseline_field_mapper(ref):
+    """FieldMapper class from core/brand_config.py at a git ref"""
+    source = subprocess.run(["git", "show", f"{ref}:./core/brand_config.py"], capture_output=True,
+                            text=True, check=True).stdout
+    module = types.ModuleType(f"brand_config_{ref}")
+    exec(compile(source, f"{ref}:core/brand_config.py", "exec"), module.__dict__)
+    return module.FieldMapper
+
+
+def prepare(callbacks, field_mapper_class):
+    """(mapper, abstract_type, payload) for every callback with a mapped type"""
+    configs = {brand: BrandConfig(brand) for brand, _ in callbacks}
+    mappers = {brand: field_mapper_class(config) for brand, config in configs.items()}
+
+    prepared = []
+    for brand, callback in callbacks:
+        config, mapper = configs[brand], mappers[brand]
+        abstract_type = config.map_callback_type(callback)
+        if abstract_type:
+            payload = callback["data"] if "callback_type" in callback else callback
+            prepared.append((mapper, abstract_type, payload))
+    return prepared
+
+
+def run(prepared, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for mapper, abstract_type, payload in prepared:
+            try:
+                mapper.drop_fields(abstract_type, mapper.map_fields(abstract_type, payload))
+            except Exception:
+                # Malformed recorded edge cases fail the same way in every implementation
+                pass
+    elapsed = time.perf_counter() - start
+    return elapsed / (iterations * len(prepared)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--baseline-ref", help="git ref whose FieldMapper to time as a baseline")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    callbacks = load_callbacks()
+
+    implementations = [("compiled", FieldMapper)]
+    if args.baseline_ref:
+        implementations.insert(0, (args.baseline_ref, load_baseline_field_mapper(args.baseline_ref)))
+
+    print(f"Benchmarking map_fields + drop_fields over {len(callbacks)} callbacks x {args.iterations} iterations")
+    results = {}
+    for label, field_mapper_class in implementations:
+        prepared = prepare(callbacks, field_mapper_class)
+        run(prepared, min(10, args.iterations))  # warm-up
+        results[label] = run(prepared, args.iterations)
+        print(f"  {label:<12} {results[label]:8.2f} us/callback")
+
+    if args.baseline_ref:
+        print(f"  speedup      {results[args.baseline_ref] / results['compiled']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
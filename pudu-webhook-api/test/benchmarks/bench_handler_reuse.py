@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark: webhook requests/sec with a CallbackHandler + DatabaseConfig built per request (the old
+behaviour) vs the per-brand handlers and shared DatabaseConfig/DatabaseWriter created at process start.
+
+The MySQL layer is replaced by an in-memory stand-in whose connect() sleeps --connect-latency ms
+(TLS handshake + Secrets Manager lookup against RDS are typically 20-80 ms), so the numbers show
+what each request pays for connection and table setup rather than actual query time:
+
+    python test/benchmarks/bench_handler_reuse.py --requests 300 --connect-latency 30
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+WEBHOOK_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(WEBHOOK_ROOT))
+os.chdir(WEBHOOK_ROOT)
+
+import rds.rdsTable as rds_table
+
+BENCH_PROJECT_DATABASE = "bench_project_db"
+
+
+class BenchCursor:
+    """Answers the resolver lookup with one project database per robot and every SHOW ... LIKE check; other queries are empty"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._rows = ()
+
+    def execute(self, query):
+        self.connection.queries += 1
+        if "mnt_robots_management mrm" in query and "IN (" in query:
+            robot_list = query.rsplit("IN (", 1)[1].rsplit(")", 1)[0]
+            robot_sns = [sn.strip().strip("'") for sn in robot_list.split(",")]
+            self._rows = tuple((sn, sn, BENCH_PROJECT_DATABASE) for sn in robot_sns)
+        elif query.startswith(("SHOW DATABASES LIKE", "SHOW TABLES LIKE")):
+            self._rows = ((query.split("'")[1],),)
+        else:
+            self._rows = ()
+
+    def executemany(self, query, params):
+        self.connection.queries += 1
+
+    def fetchall(self):
+        return self._rows
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def close(self):
+        pass
+
+
+class BenchConnection:
+    connects = 0
+
+    def __init__(self, connect_latency):
+        time.sleep(connect_latency)
+        BenchConnection.connects += 1
+        self.queries = 0
+
+    def cursor(self):
+        return BenchCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def load_callbacks():
+    with open(WEBHOOK_ROOT / "test" / "test_data" / "robot_pose_data.json") as file:
+        pose_data = json.load(file)
+    return [{"callback_type": case["callback_type"], "data": case["data"]}
+            for cases in pose_data.values() for case in cases
+            if isinstance(case.get("data"), dict) and case["data"].get("sn")]
+
+
+def run(client, callbacks, requests_count):
+    statuses = {}
+    start = time.perf_counter()
+    for index in range(requests_count):
+        response = client.post("/api/pudu/webhook", json=callbacks[index % len(callbacks)],
+                               headers={"CallbackCode": os.environ["PUDU_CALLBACK_CODE"]})
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    elapsed = time.perf_counter() - start
+    return requests_count / elapsed, elapsed, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--connect-latency", type=float, default=30, help="simulated connect time in ms")
+    args = parser.parse_args()
+
+    os.environ.setdefault("PUDU_CALLBACK_CODE", "bench_callback_code")
+    logging.disable(logging.CRITICAL)
+    connect_latency = args.connect_latency / 1000
+    rds_table.connect_rds_instance = lambda config_file="credentials.yaml": BenchConnection(connect_latency)
+
+    import main as webhook_main
+    from callback_handler import CallbackHandler
+    from configs.database_config import DatabaseConfig
+
+    client = webhook_main.app.test_client()
+    callbacks = load_callbacks()
+    shared_get_callback_handler = webhook_main.get_callback_handler
+    shared_db_config = webhook_main.db_config
+
+    def per_request_handler(brand):
+        # What every request used to pay: a fresh handler (writer + config + resolver connection)
+        # and a fresh DatabaseConfig for notifications, both closed before returning
+        handler = CallbackHandler(webhook_main.database_config_path, brand=brand)
+        DatabaseConfig(webhook_main.database_config_path).close()
+        handler.close()
+        return handler
+
+    print(f"Benchmarking {args.requests} pose callbacks, simulated connect latency {args.connect_latency:.0f} ms")
+    results = {}
+    for label, factory in (("per-request", per_request_handler), ("shared", shared_get_callback_handler)):
+        webhook_main.get_callback_handler = factory
+        webhook_main.db_config = shared_db_config
+        run(client, callbacks, min(10, args.requests))  # warm-up
+        connects_before = BenchConnection.connects
+        rate, elapsed, statuses = run(client, callbacks, args.requests)
+        results[label] = rate
+        connects = BenchConnection.connects - connects_before
+        print(f"  {label:<12} {rate:8.1f} req/s  ({elapsed:.2f}s, {connects} connects, statuses {statuses})")
+
+    webhook_main.get_callback_handler = shared_get_callback_handler
+    print(f"  speedup      {results['shared'] / results['per-request']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,14 @@ import time
 
 from integration.test_complete_flow import run_complete_flow_tests
 from integration.test_webhook_endpoint import run_webhook_endpoint_tests
+from unit.test_callback_queue import run_callback_queue_tests
 from unit.test_database_writer import run_database_tests
+from unit.test_field_mapper import run_field_mapper_tests
 from unit.test_notification_sender import run_notification_tests
 from unit.test_processors import run_processor_tests
+from unit.test_robot_metadata_cache import run_robot_metadata_cache_tests
+from unit.test_state_write_coalescer import run_state_write_coalescer_tests
+from unit.test_transform_cache import run_transform_cache_tests
 from utils.test_helpers import setup_test_logging
 
 
@@ -33,6 +38,11 @@ class TestSuite:
             ("Processors", run_processor_tests),
             ("Database Writer", run_database_tests),
             ("Notification Sender", run_notification_tests),
+            ("Callback Queue", run_callback_queue_tests),
+            ("State Write Coalescer", run_state_write_coalescer_tests),
+            ("Robot Metadata Cache", run_robot_metadata_cache_tests),
+            ("Map Transform Cache", run_transform_cache_tests),
+            ("Field Mapper", run_field_mapper_tests),
         ]
 
         for test_name, test_function in unit_tests:
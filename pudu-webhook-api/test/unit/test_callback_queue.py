@@ -0,0 +1,174 @@
+"""
+Unit tests for the ack-fast webhook write queue
+"""
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Fix path resolution when running from test directory
+current_file = Path(__file__).resolve()
+unit_dir = current_file.parent      # test/unit/
+test_dir = unit_dir.parent          # test/
+root_dir = test_dir.parent          # pudu-webhook-api/
+
+# Add the root directory to Python path
+sys.path.insert(0, str(root_dir))
+
+# Change working directory to root so relative imports work
+os.chdir(root_dir)
+
+from test.utils.test_helpers import TestDataLoader
+
+from callback_queue import CallbackQueue, InMemoryQueueBackend, register_queue_backend
+
+
+class TestCallbackQueue:
+    """Test queueing, micro-batching, per-robot ordering and metrics"""
+
+    def setup_method(self):
+        """Setup for each test"""
+        self.test_data = TestDataLoader()
+        pose_data = self.test_data.load_test_data("robot_pose_data.json")
+        self.callbacks = [case for cases in pose_data.values() for case in cases
+                          if isinstance(case.get("data"), dict) and case["data"].get("sn")]
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def _record_batch(self, items):
+        with self.lock:
+            self.batches.append(items)
+
+    def test_callbacks_are_processed_in_batches(self):
+        """Test a burst of callbacks reaches process_batch in micro-batches"""
+        print("\n🧪 Testing micro-batched processing")
+
+        callback_queue = CallbackQueue(self._record_batch, num_workers=1, batch_size=10, batch_linger=0.2)
+        for callback in self.callbacks * 4:
+            assert callback_queue.enqueue("pudu", callback, partition_key=callback["data"]["sn"])
+        assert callback_queue.flush(timeout=10), "Queue should drain"
+
+        processed = [item["data"] for batch in self.batches for item in batch]
+        assert processed == self.callbacks * 4, "Every callback should be processed once, in order"
+        assert len(self.batches) < len(processed), "Callbacks should be grouped into batches"
+        assert max(len(batch) for batch in self.batches) <= 10
+        callback_queue.close()
+
+    def test_robot_callbacks_stay_in_order_across_workers(self):
+        """Test callbacks of one robot always go to the same worker, in arrival order"""
+        print("\n🧪 Testing per-robot ordering")
+
+        callback_queue = CallbackQueue(self._record_batch, num_workers=4, batch_size=5, batch_linger=0.01)
+        robot_sns = [callback["data"]["sn"] for callback in self.callbacks]
+        for sequence in range(20):
+            for robot_sn in robot_sns:
+                callback_queue.enqueue("pudu", {"sn": robot_sn, "sequence": sequence}, partition_key=robot_sn)
+        callback_queue.flush(timeout=10)
+
+        for robot_sn in robot_sns:
+            sequences = [item["data"]["sequence"] for batch in self.batches for item in batch
+                         if item["data"]["sn"] == robot_sn]
+            assert sequences == list(range(20)), f"Out of order callbacks for {robot_sn}: {sequences}"
+        callback_queue.close()
+
+    def test_metrics_report_depth_and_lag(self):
+        """Test queue depth and lag metrics while callbacks wait and after they are processed"""
+        print("\n🧪 Testing queue metrics")
+
+        release = threading.Event()
+
+        def slow_batch(items):
+            release.wait(5)
+
+        callback_queue = CallbackQueue(slow_batch, num_workers=1, batch_size=1, batch_linger=0)
+        for callback in self.callbacks[:3]:
+            callback_queue.enqueue("pudu", callback, partition_key=callback["data"]["sn"])
+        time.sleep(0.2)
+
+        metrics = callback_queue.get_metrics()
+        assert metrics["depth"] == 2, f"Two callbacks should wait behind the blocked one: {metrics}"
+        assert metrics["oldest_pending_seconds"] > 0
+
+        release.set()
+        callback_queue.flush(timeout=5)
+        metrics = callback_queue.get_metrics()
+        assert metrics["depth"] == 0 and metrics["processed"] == 3 and metrics["batches"] == 3, metrics
+        assert metrics["max_lag_seconds"] >= 0.2, metrics
+        callback_queue.close()
+
+    def test_full_or_closed_queue_rejects_callbacks(self):
+        """Test enqueue returns False so the handler can process the callback inline"""
+        print("\n🧪 Testing backpressure")
+
+        release = threading.Event()
+        callback_queue = CallbackQueue(lambda items: release.wait(5), num_workers=1, batch_size=1,
+                                       batch_linger=0, max_size=1)
+        callback = self.callbacks[0]
+        results = [callback_queue.enqueue("pudu", callback) for _ in range(4)]
+        assert results[0] and not all(results), f"A full queue should reject callbacks: {results}"
+        assert callback_queue.get_metrics()["rejected"] >= 1
+
+        release.set()
+        callback_queue.close()
+        assert not callback_queue.enqueue("pudu", callback), "A closed queue should reject callbacks"
+
+    def test_pluggable_backend(self):
+        """Test a registered backend is used for every partition"""
+        print("\n🧪 Testing pluggable backend")
+
+        created = []
+
+        class RecordingBackend(InMemoryQueueBackend):
+            def __init__(self, max_size=10000):
+                super().__init__(max_size)
+                created.append(self)
+
+        register_queue_backend("recording", RecordingBackend)
+        callback_queue = CallbackQueue(self._record_batch, backend="recording", num_workers=2)
+        callback_queue.enqueue("gas", self.callbacks[0])
+        callback_queue.flush(timeout=5)
+
+        assert len(created) == 2, "One backend per worker partition"
+        assert callback_queue.get_metrics()["backend"] == "recording"
+        assert self.batches[0][0]["brand"] == "gas"
+        callback_queue.close()
+
+
+def run_callback_queue_tests():
+    """Run all callback queue tests"""
+    print("=" * 60)
+    print("RUNNING CALLBACK QUEUE TESTS")
+    print("=" * 60)
+
+    test_instance = TestCallbackQueue()
+    test_methods = [method for method in dir(test_instance) if method.startswith("test_")]
+
+    total_tests = 0
+    passed_tests = 0
+
+    for method_name in test_methods:
+        total_tests += 1
+        try:
+            test_instance.setup_method()
+            method = getattr(test_instance, method_name)
+            method()
+            passed_tests += 1
+            print(f"✅ {method_name} - PASSED")
+        except Exception as e:
+            print(f"❌ {method_name} - FAILED: {e}")
+            import traceback
+
+            traceback.print_exc()
+
+    print(f"\n{'='*60}")
+    print("CALLBACK QUEUE TESTS SUMMARY")
+    print(f"{'='*60}")
+    print(f"Total tests: {total_tests}")
+    print(f"Passed: {passed_tests}")
+    print(f"Failed: {total_tests - passed_tests}")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    run_callback_queue_tests()
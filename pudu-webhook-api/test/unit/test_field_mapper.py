@@ -0,0 +1,147 @@
+"""
+Unit tests for compiled brand field mappings
+"""
+import json
+import os
+import sys
+from pathlib import Path
+
+# Fix path resolution when running from test directory
+current_file = Path(__file__).resolve()
+unit_dir = current_file.parent      # test/unit/
+test_dir = unit_dir.parent          # test/
+root_dir = test_dir.parent          # pudu-webhook-api/
+
+# Add the root directory to Python path
+sys.path.insert(0, str(root_dir))
+
+# Change working directory to root so relative imports work
+os.chdir(root_dir)
+
+from test.utils.test_helpers import TestDataLoader
+
+from core.brand_config import BrandConfig, FieldMapper
+
+GAS_TASK_REPORT = {
+    "messageTypeId": 2,
+    "traceId": "trace_001",
+    "payload": {
+        "serialNumber": "GS_TEST_001",
+        "modelTypeCode": "S1",
+        "taskReport": {
+            "taskInstanceId": "task_001",
+            "startTime": 1700000000000,
+            "completionPercentage": "0.5",
+            "durationSeconds": "not a number",
+            "waterConsumptionLiter": 1.5,
+            "cleaningMode": "强劲清洗",
+            "taskEndStatus": 0,
+            "startBatteryPercentage": 90,
+            "endBatteryPercentage": 70,
+            "subTasks": [{"mapName": "1F"}, {"mapName": "2F"}, {}],
+        },
+    },
+}
+
+
+class TestFieldMapper:
+    """Test that compiled mappings produce the mapped records the YAML describes"""
+
+    def setup_method(self):
+        """Setup for each test"""
+        self.test_data = TestDataLoader()
+        self.pudu_config = BrandConfig("pudu")
+        self.pudu_mapper = FieldMapper(self.pudu_config)
+        self.gas_mapper = FieldMapper(BrandConfig("gas"))
+
+    def test_mappings_are_compiled_at_load_time(self):
+        """Test every configured abstract type is compiled when the mapper is created"""
+        print("\n🧪 Testing compile step")
+
+        assert set(self.pudu_mapper._compiled_mappings) == set(self.pudu_config.field_mappings)
+        compiled = self.pudu_mapper.get_compiled_mapping("error_event")
+        assert [db_field for db_field, _, _ in compiled.direct_fields][:2] == ["robot_sn", "error_id"]
+        assert compiled.drop_fields == {"callback_type"}
+        assert self.pudu_mapper.get_compiled_mapping("unknown_event").direct_fields == ()
+
+    def test_pudu_callbacks_are_mapped(self):
+        """Test recorded Pudu status and error callbacks map to DB fields with conversions"""
+        print("\n🧪 Testing Pudu callbacks")
+
+        for case in self.test_data.get_robot_status_data()["valid_status_changes"]:
+            mapped = self.pudu_mapper.map_fields("status_event", case["data"])
+            assert mapped["robot_sn"] == case["data"]["sn"]
+            assert mapped["status"] == case["data"]["run_status"].lower()
+
+        case = self.test_data.get_robot_error_data()["navigation_errors"][0]
+        mapped = self.pudu_mapper.map_fields("error_event", case["data"])
+        assert mapped["event_level"] == case["data"]["error_level"].lower()
+        assert mapped["task_time"] == case["data"]["timestamp"]
+
+    def test_gas_report_calculations_processors_and_extras(self):
+        """Test the Gas task report mapping: conversions, calculations, processors and extra fields"""
+        print("\n🧪 Testing Gas task report")
+
+        mapped = self.gas_mapper.map_fields("report_event", GAS_TASK_REPORT)
+        assert mapped["robot_sn"] == "GS_TEST_001"
+        assert mapped["start_time"] == 1700000000
+        assert mapped["progress"] == 0.5
+        assert "duration" not in mapped, "Values that fail type conversion are dropped"
+        assert mapped["water_consumption"] == 1500.0
+        assert mapped["mode"] == "Strong Cleaning"
+        assert mapped["status"] == "Task Ended"
+        assert mapped["battery_usage"] == 20.0
+        assert mapped["map_name"] == "1F, 2F"
+        assert json.loads(mapped["extra_fields"])["modelTypeCode"] == "S1"
+
+    def test_gas_incident_level_mapping(self):
+        """Test value mappings are applied after type conversion"""
+        print("\n🧪 Testing Gas incident level mapping")
+
+        incident = {"messageTypeId": 1, "messageTimestamp": 1700000000123,
+                    "payload": {"serialNumber": "GS_TEST_001",
+                                "content": {"incidentName": "LowBattery", "incidentLevel": "h7"}}}
+        mapped = self.gas_mapper.map_fields("error_event", incident)
+        assert mapped["event_level"] == "fatal"
+        assert mapped["event_type"] == "lowbattery"
+        assert mapped["task_time"] == 1700000000
+        assert self.gas_mapper.drop_fields("error_event", dict(mapped, traceId="t")) == mapped
+
+
+def run_field_mapper_tests():
+    """Run all field mapper tests"""
+    print("=" * 60)
+    print("RUNNING FIELD MAPPER TESTS")
+    print("=" * 60)
+
+    test_instance = TestFieldMapper()
+    test_methods = [method for method in dir(test_instance) if method.startswith("test_")]
+
+    total_tests = 0
+    passed_tests = 0
+
+    for method_name in test_methods:
+        total_tests += 1
+        try:
+            test_instance.setup_method()
+            method = getattr(test_instance, method_name)
+            method()
+            passed_tests += 1
+            print(f"✅ {method_name} - PASSED")
+        except Exception as e:
+            print(f"❌ {method_name} - FAILED: {e}")
+            import traceback
+
+            traceback.print_exc()
+
+    print(f"\n{'='*60}")
+    print("FIELD MAPPER TESTS SUMMARY")
+    print(f"{'='*60}")
+    print(f"Total tests: {total_tests}")
+    print(f"Passed: {passed_tests}")
+    print(f"Failed: {total_tests - passed_tests}")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    run_field_mapper_tests()
@@ -0,0 +1,154 @@
+"""
+Unit tests for the robot metadata cache
+"""
+import os
+import sys
+from pathlib import Path
+
+# Fix path resolution when running from test directory
+current_file = Path(__file__).resolve()
+unit_dir = current_file.parent      # test/unit/
+test_dir = unit_dir.parent          # test/
+root_dir = test_dir.parent          # pudu-webhook-api/
+
+# Add the root directory to Python path
+sys.path.insert(0, str(root_dir))
+
+# Change working directory to root so relative imports work
+os.chdir(root_dir)
+
+from test.utils.test_helpers import TestDataLoader
+
+from services.robot_metadata_cache import RobotMetadataCache
+
+
+class FakeResolver:
+    """Serves mnt_robots_management rows from memory and counts queries"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def get_robot_metadata_rows(self, robot_sns=None):
+        self.queries.append(robot_sns)
+        return [row for row in self.rows if robot_sns is None or row[0] in robot_sns]
+
+    def get_all_project_databases(self):
+        self.queries.append("project_databases")
+        return sorted({row[2] for row in self.rows if row[2]})
+
+
+class TestRobotMetadataCache:
+    """Test warm-up, TTL reloads, negative caching and invalidation"""
+
+    def setup_method(self):
+        """Setup for each test"""
+        self.test_data = TestDataLoader()
+        pose_data = self.test_data.load_test_data("robot_pose_data.json")
+        robot_sns = sorted({case["data"]["sn"] for cases in pose_data.values() for case in cases
+                            if isinstance(case.get("data"), dict) and case["data"].get("sn")})
+        self.robot_sns = robot_sns[:3]
+        self.rows = [
+            (self.robot_sns[0], "Lobby Cleaner", "foxx_irvine_office"),
+            (self.robot_sns[1], None, "other_project"),
+            (self.robot_sns[2], "No Tenant", None),
+        ]
+        self.resolver = FakeResolver(self.rows)
+        self.cache = RobotMetadataCache(self.resolver, ["foxx_irvine_office"], ttl_seconds=600)
+
+    def test_warm_up_serves_callbacks_without_queries(self):
+        """Test every lookup after warm_up is answered from memory"""
+        print("\n🧪 Testing warm-up")
+
+        assert self.cache.warm_up() == 3
+        self.resolver.queries.clear()
+
+        robot_a, robot_b, robot_c = self.robot_sns
+        assert self.cache.get_robot_name(robot_a) == "Lobby Cleaner"
+        assert self.cache.get_robot_name(robot_b) == robot_b, "Missing names fall back to the serial number"
+        assert self.cache.get_database_mapping(self.robot_sns) == {
+            robot_a: "foxx_irvine_office", robot_b: "other_project"
+        }
+        assert self.cache.supports_transform(robot_a) and not self.cache.supports_transform(robot_b)
+        assert not self.cache.supports_transform(robot_c)
+        assert self.resolver.queries == [], f"Unexpected metadata queries: {self.resolver.queries}"
+
+    def test_unknown_robots_are_cached_negatively(self):
+        """Test a robot missing from mnt_robots_management is looked up once per TTL"""
+        print("\n🧪 Testing negative caching")
+
+        for _ in range(5):
+            assert self.cache.get_database_mapping(["UNKNOWN_ROBOT"]) == {}
+        assert self.resolver.queries == [["UNKNOWN_ROBOT"]]
+
+    def test_expired_entries_reload_in_one_query(self):
+        """Test expired robots are reloaded with one full query and keep their current map"""
+        print("\n🧪 Testing TTL expiry")
+
+        self.cache.warm_up()
+        self.cache.set_current_map(self.robot_sns[0], "1F")
+        self.cache.ttl_seconds = 0
+        self.resolver.queries.clear()
+
+        self.cache.get_many(self.robot_sns)
+        assert self.resolver.queries == [None], "A stale cache should reload with one full query"
+        assert self.cache.get_current_map(self.robot_sns[0]) == "1F"
+
+    def test_invalidate(self):
+        """Test invalidation forces the next lookup to query again"""
+        print("\n🧪 Testing invalidation")
+
+        self.cache.warm_up()
+        self.resolver.rows[0] = (self.robot_sns[0], "Renamed", "foxx_irvine_office")
+        assert self.cache.get_robot_name(self.robot_sns[0]) == "Lobby Cleaner"
+
+        self.cache.invalidate([self.robot_sns[0]])
+        assert self.cache.get_robot_name(self.robot_sns[0]) == "Renamed"
+        assert self.cache.get_stats()["entries"] == 3
+
+    def test_project_databases_are_cached(self):
+        """Test the tenant database list is loaded once per TTL"""
+        print("\n🧪 Testing project database list")
+
+        for _ in range(3):
+            assert self.cache.get_project_databases() == ["foxx_irvine_office", "other_project"]
+        assert self.resolver.queries.count("project_databases") == 1
+
+
+def run_robot_metadata_cache_tests():
+    """Run all robot metadata cache tests"""
+    print("=" * 60)
+    print("RUNNING ROBOT METADATA CACHE TESTS")
+    print("=" * 60)
+
+    test_instance = TestRobotMetadataCache()
+    test_methods = [method for method in dir(test_instance) if method.startswith("test_")]
+
+    total_tests = 0
+    passed_tests = 0
+
+    for method_name in test_methods:
+        total_tests += 1
+        try:
+            test_instance.setup_method()
+            method = getattr(test_instance, method_name)
+            method()
+            passed_tests += 1
+            print(f"✅ {method_name} - PASSED")
+        except Exception as e:
+            print(f"❌ {method_name} - FAILED: {e}")
+            import traceback
+
+            traceback.print_exc()
+
+    print(f"\n{'='*60}")
+    print("ROBOT METADATA CACHE TESTS SUMMARY")
+    print(f"{'='*60}")
+    print(f"Total tests: {total_tests}")
+    print(f"Passed: {passed_tests}")
+    print(f"Failed: {total_tests - passed_tests}")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    run_robot_metadata_cache_tests()
@@ -0,0 +1,316 @@
+"""
+Unit tests for batched pose/power writes and snapshot-based change detection
+"""
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Fix path resolution when running from test directory
+current_file = Path(__file__).resolve()
+unit_dir = current_file.parent      # test/unit/
+test_dir = unit_dir.parent          # test/
+root_dir = test_dir.parent          # pudu-webhook-api/
+
+# Add the root directory to Python path
+sys.path.insert(0, str(root_dir))
+
+# Change working directory to root so relative imports work
+os.chdir(root_dir)
+
+from test.utils.test_helpers import TestDataLoader
+
+import pymysql
+
+import database_writer
+from notifications.change_detector import detect_changes_against_snapshot, record_key
+from database_writer import DatabaseWriter
+from state_write_coalescer import StateWriteCoalescer
+
+
+class RecordingWriter:
+    """Stands in for DatabaseWriter.write_batch and reports every record as changed"""
+
+    def __init__(self):
+        self.batches = []
+
+    def write_batch(self, record_type, records, use_snapshot=False):
+        self.batches.append((record_type, list(records), use_snapshot))
+        changes = {robot_sn: {'robot_sn': robot_sn, 'new_values': data} for robot_sn, data in records}
+        return ['project_db'], ['table'], {('project_db', 'table'): changes}
+
+
+class TestStateWriteCoalescer:
+    """Test buffering (every pose, latest power), flush triggers and change callbacks"""
+
+    def setup_method(self):
+        """Setup for each test"""
+        self.test_data = TestDataLoader()
+        pose_data = self.test_data.load_test_data("robot_pose_data.json")
+        self.poses = [case["data"] for cases in pose_data.values() for case in cases
+                      if isinstance(case.get("data"), dict) and case["data"].get("sn")]
+        self.writer = RecordingWriter()
+        self.notified = []
+
+    def _on_changes(self, callback_type, changes):
+        self.notified.append((callback_type, changes))
+
+    def test_every_pose_and_latest_power_written(self):
+        """Test poses (work location history) are all written in order and only the latest power is"""
+        print("\n🧪 Testing pose batching and power coalescing")
+
+        coalescer = StateWriteCoalescer(self.writer, self._on_changes, flush_interval_ms=60000, max_pending=1000)
+        robot_sn = self.poses[0]["sn"]
+        for index, pose in enumerate(self.poses):
+            coalescer.submit("pose_event", "pose", robot_sn, dict(pose, sequence=index))
+        for power in (60, 70, 80):
+            coalescer.submit("power_event", "power", robot_sn, {"robot_sn": robot_sn, "power": power})
+        assert self.writer.batches == [], "Nothing should be written before a flush"
+
+        coalescer.flush()
+        batches = {record_type: records for record_type, records, _ in self.writer.batches}
+        assert batches["pose"] == [(robot_sn, dict(pose, sequence=index)) for index, pose in enumerate(self.poses)]
+        assert batches["power"] == [(robot_sn, {"robot_sn": robot_sn, "power": 80})]
+        assert all(use_snapshot for _, _, use_snapshot in self.writer.batches)
+        assert sorted(callback_type for callback_type, _ in self.notified) == ["pose_event", "power_event"]
+
+        stats = coalescer.get_stats()
+        assert stats["coalesced"] == 2 and stats["written"] == len(self.poses) + 1, stats
+        coalescer.close()
+
+    def test_max_pending_triggers_early_flush(self):
+        """Test the flusher writes as soon as max_pending records are waiting"""
+        print("\n🧪 Testing record-count flush trigger")
+
+        coalescer = StateWriteCoalescer(self.writer, flush_interval_ms=60000, max_pending=3)
+        for index in range(3):
+            coalescer.submit("pose_event", "pose", f"ROBOT_{index}", {"robot_sn": f"ROBOT_{index}", "x": index})
+
+        deadline = time.time() + 5
+        while not self.writer.batches and time.time() < deadline:
+            time.sleep(0.01)
+        assert self.writer.batches and len(self.writer.batches[0][1]) == 3, "Three robots should flush together"
+        coalescer.close()
+
+    def test_close_writes_pending_and_rejects_new_records(self):
+        """Test close() flushes pending records and later submits are refused"""
+        print("\n🧪 Testing close")
+
+        coalescer = StateWriteCoalescer(self.writer, flush_interval_ms=60000)
+        coalescer.submit("pose_event", "pose", "ROBOT_A", {"robot_sn": "ROBOT_A"})
+        coalescer.close()
+
+        assert len(self.writer.batches) == 1
+        assert not coalescer.submit("pose_event", "pose", "ROBOT_A", {"robot_sn": "ROBOT_A"})
+
+
+class FakeTable:
+    database_name = "project_db"
+
+    def __init__(self, table_name):
+        self.table_name = table_name
+
+
+class TestWriterSnapshot:
+    """Test the DatabaseWriter snapshot is limited to current-state tables and evicts in place"""
+
+    def setup_method(self):
+        """Setup for each test"""
+        # Only the snapshot state is needed; no database connections
+        self.writer = object.__new__(DatabaseWriter)
+        self.writer._state_snapshot = {}
+        self.writer.state_snapshot_ttl = 300
+        self.writer.state_snapshot_max_rows = 3
+        self.table = FakeTable("mnt_robots_state")
+
+    def test_only_tables_keyed_by_robot_are_snapshotted(self):
+        """Test history tables keyed by time never use the snapshot"""
+        print("\n🧪 Testing current-state table detection")
+
+        assert DatabaseWriter._is_current_state_table(["robot_sn"])
+        assert not DatabaseWriter._is_current_state_table(["robot_sn", "update_time"])
+        assert not DatabaseWriter._is_current_state_table(["robot_sn", "timestamp_utc"])
+        assert not DatabaseWriter._is_current_state_table([])
+
+    def test_expired_and_excess_entries_evicted(self):
+        """Test entries past the TTL or beyond max rows are removed from the stored snapshot"""
+        print("\n🧪 Testing snapshot eviction")
+
+        primary_keys = ["robot_sn"]
+        self.writer._update_snapshot(self.table, [{"robot_sn": f"ROBOT_{index}", "x": index} for index in range(5)],
+                                     primary_keys)
+        table_snapshot = self.writer._state_snapshot["project_db.mnt_robots_state"]
+        assert [key[0] for key in table_snapshot] == ["ROBOT_2", "ROBOT_3", "ROBOT_4"]
+
+        # Rewriting a row makes it the newest; expired rows are dropped on the next use
+        self.writer._update_snapshot(self.table, [{"robot_sn": "ROBOT_2", "x": 9}], primary_keys)
+        assert [key[0] for key in table_snapshot] == ["ROBOT_3", "ROBOT_4", "ROBOT_2"]
+        self.writer.state_snapshot_ttl = 0
+        assert len(self.writer._table_snapshot(self.table)) == 0 and len(table_snapshot) == 0
+
+
+class FakeConnection:
+    """pymysql connection double whose server can go away"""
+
+    def __init__(self):
+        self.alive = True
+        self.pings = 0
+
+    def ping(self, reconnect=True):
+        self.pings += 1
+        if not self.alive:
+            raise pymysql.err.OperationalError(2006, "MySQL server has gone away")
+
+
+class ConnectedTable(FakeTable):
+    """RDSTable double with its own connection, counting instances"""
+
+    created = []
+
+    def __init__(self, connection_config, database_name, table_name, fields, primary_keys=None):
+        super().__init__(table_name)
+        self.db = FakeConnection()
+        self.closed = False
+        ConnectedTable.created.append(self)
+
+    def close(self):
+        self.closed = True
+
+
+class TestWriterConnections:
+    """Test cached tables reconnect after idle timeouts and connection errors"""
+
+    def setup_method(self):
+        """Setup for each test"""
+        # Only the table cache is needed; RDSTable is replaced by a double
+        self.writer = object.__new__(DatabaseWriter)
+        self.writer.table_cache = {}
+        self.writer._table_locks = {}
+        self.writer._table_last_used = {}
+        self.writer._cache_lock = threading.Lock()
+        self.writer.connection_ping_idle_seconds = 30
+        ConnectedTable.created = []
+        self.original_table_class = database_writer.RDSTable
+        database_writer.RDSTable = ConnectedTable
+
+    def _use(self):
+        with self.writer._locked_table("project_db", "mnt_robot_events", None, ["robot_sn"]) as table:
+            return table
+
+    def test_idle_dead_connection_is_replaced(self):
+        """Test a table idle past the ping interval is pinged and replaced when its server went away"""
+        print("\n🧪 Testing idle connection ping")
+
+        try:
+            first = self._use()
+            assert self._use() is first and first.db.pings == 0, "Recently used tables are not pinged"
+
+            first.db.alive = False
+            self.writer._table_last_used["project_db.mnt_robot_events"] -= 60
+            second = self._use()
+            assert second is not first and first.closed and first.db.pings == 1
+            assert self.writer.table_cache["project_db.mnt_robot_events"] is second
+        finally:
+            database_writer.RDSTable = self.original_table_class
+
+    def test_connection_error_drops_cached_table(self):
+        """Test a write failing with a connection error makes the next write use a new connection"""
+        print("\n🧪 Testing connection error recovery")
+
+        try:
+            first = self._use()
+            try:
+                with self.writer._locked_table("project_db", "mnt_robot_events", None, ["robot_sn"]):
+                    raise pymysql.err.OperationalError(2013, "Lost connection to MySQL server during query")
+            except pymysql.err.OperationalError:
+                pass
+            assert first.closed and "project_db.mnt_robot_events" not in self.writer.table_cache
+
+            second = self._use()
+            assert second is not first and len(ConnectedTable.created) == 2
+
+            # Other errors (bad data, constraint violations) keep the connection
+            try:
+                with self.writer._locked_table("project_db", "mnt_robot_events", None, ["robot_sn"]):
+                    raise ValueError("bad row")
+            except ValueError:
+                pass
+            assert self._use() is second
+        finally:
+            database_writer.RDSTable = self.original_table_class
+
+
+class TestSnapshotChangeDetection:
+    """Test change detection against the last written rows"""
+
+    def setup_method(self):
+        """Setup for each test"""
+        self.primary_keys = ["robot_sn"]
+        self.snapshot = {
+            record_key({"robot_sn": "ROBOT_A"}, self.primary_keys): {"robot_sn": "ROBOT_A", "x": 1.0, "y": 2.0}
+        }
+
+    def test_unchanged_record_produces_no_change(self):
+        """Test a pose equal to the snapshot (within decimal precision) is not a change"""
+        print("\n🧪 Testing unchanged pose")
+
+        changes, unknown = detect_changes_against_snapshot(
+            self.snapshot, [{"robot_sn": "ROBOT_A", "x": 1.0000001, "y": 2.0}], self.primary_keys
+        )
+        assert changes == {} and unknown == []
+
+    def test_changed_and_unknown_records(self):
+        """Test changed fields are reported and unseen robots are left for the database check"""
+        print("\n🧪 Testing changed and unseen records")
+
+        changes, unknown = detect_changes_against_snapshot(
+            self.snapshot,
+            [{"robot_sn": "ROBOT_A", "x": 5.0, "y": 2.0}, {"robot_sn": "ROBOT_B", "x": 0.0}],
+            self.primary_keys
+        )
+        assert list(changes) == ["ROBOT_A"]
+        change = changes["ROBOT_A"]
+        assert change["change_type"] == "update" and change["changed_fields"] == ["x"]
+        assert change["old_values"]["x"] == 1.0 and change["new_values"]["x"] == 5.0
+        assert unknown == [{"robot_sn": "ROBOT_B", "x": 0.0}]
+
+
+def run_state_write_coalescer_tests():
+    """Run all state write coalescer tests"""
+    print("=" * 60)
+    print("RUNNING STATE WRITE COALESCER TESTS")
+    print("=" * 60)
+
+    total_tests = 0
+    passed_tests = 0
+
+    for test_class in (TestStateWriteCoalescer, TestWriterSnapshot, TestWriterConnections, TestSnapshotChangeDetection):
+        test_instance = test_class()
+        test_methods = [method for method in dir(test_instance) if method.startswith("test_")]
+
+        for method_name in test_methods:
+            total_tests += 1
+            try:
+                test_instance.setup_method()
+                method = getattr(test_instance, method_name)
+                method()
+                passed_tests += 1
+                print(f"✅ {method_name} - PASSED")
+            except Exception as e:
+                print(f"❌ {method_name} - FAILED: {e}")
+                import traceback
+
+                traceback.print_exc()
+
+    print(f"\n{'='*60}")
+    print("STATE WRITE COALESCER TESTS SUMMARY")
+    print(f"{'='*60}")
+    print(f"Total tests: {total_tests}")
+    print(f"Passed: {passed_tests}")
+    print(f"Failed: {total_tests - passed_tests}")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    run_state_write_coalescer_tests()
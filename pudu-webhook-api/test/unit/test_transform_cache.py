@@ -0,0 +1,308 @@
+"""
+Unit tests for the shared map transform cache and cached coordinate transformation
+"""
+import io
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Fix path resolution when running from test directory
+current_file = Path(__file__).resolve()
+unit_dir = current_file.parent      # test/unit/
+test_dir = unit_dir.parent          # test/
+root_dir = test_dir.parent          # pudu-webhook-api/
+
+# Add the root directory to Python path
+sys.path.insert(0, str(root_dir))
+
+# Change working directory to root so relative imports work
+os.chdir(root_dir)
+
+from test.utils.test_helpers import TestDataLoader
+
+import pymysql
+from PIL import Image
+
+from services import transform_service
+from services.map_transform_cache import MapTransformCache
+from services.robot_metadata_cache import RobotMetadataCache
+from services.transform_service import TransformService
+
+ROBOT_MAP_XML = "<map><resolution>0.05</resolution><origin>-10.0 -20.0 0.0</origin></map>"
+TRANSFORM = [1.0, 0.0, 5.0, 0.0, 1.0, 7.0, 0.0, 0.0, 1.0]
+
+
+class FakeResolver:
+    """Serves mnt_robots_management rows from memory"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def get_robot_metadata_rows(self, robot_sns=None):
+        return [row for row in self.rows if robot_sns is None or row[0] in robot_sns]
+
+
+class FakeConfig:
+    """Minimal DatabaseConfig: transform-supported databases plus the metadata cache"""
+
+    def __init__(self, robot_sns):
+        self.config = {"transform_supported_databases": ["foxx_irvine_office"]}
+        rows = [(robot_sn, robot_sn, "foxx_irvine_office") for robot_sn in robot_sns]
+        self.metadata_cache = RobotMetadataCache(FakeResolver(rows), ["foxx_irvine_office"])
+
+    def get_robot_database_mapping(self, robot_sns):
+        return self.metadata_cache.get_database_mapping(robot_sns)
+
+
+class CountingTransformService(TransformService):
+    """TransformService whose database and HTTP lookups are served from memory and counted"""
+
+    def __init__(self, config, maps, current_maps=None):
+        super().__init__(config)
+        self.map_transform_cache = MapTransformCache(max_maps=2, negative_ttl=300)
+        self.maps = maps
+        self.current_maps = current_maps or {}
+        self.queries = []
+        self.png_fetches = []
+        self.failing_queries = 0
+
+        png = io.BytesIO()
+        Image.new("RGB", (400, 300)).save(png, format="PNG")
+        self.png_bytes = png.getvalue()
+
+    def _query(self, database_name, table_name, primary_keys, query):
+        self.queries.append(table_name)
+        if self.failing_queries:
+            self.failing_queries -= 1
+            raise pymysql.err.OperationalError(2013, "Lost connection to MySQL server during query")
+        if table_name == "pro_floor_info":
+            map_name = query.split("robot_map_name = '")[1].split("'")[0]
+            if map_name in self.maps:
+                return [(json.dumps(self.maps[map_name]), None, "floor.png", f"{map_name}.png", ROBOT_MAP_XML)]
+            return []
+        robot_sn = query.split("robot_sn = '")[1].split("'")[0]
+        return [(self.current_maps[robot_sn],)] if robot_sn in self.current_maps else []
+
+    def _fetch_png_from_url(self, url):
+        self.png_fetches.append(url)
+        return self.png_bytes
+
+
+class LookupTable:
+    """RDSTable double for TransformService._query whose connection can be lost while idle"""
+
+    created = []
+
+    def __init__(self, connection_config, database_name, table_name, fields, primary_keys=None):
+        self.lost = False
+        self.closed = False
+        LookupTable.created.append(self)
+
+    def query_data(self, query):
+        if self.lost:
+            raise pymysql.err.OperationalError(2006, "MySQL server has gone away")
+        return [("1F",)]
+
+    def close(self):
+        self.closed = True
+
+
+class TestTransformCache:
+    """Test that warm pose callbacks are transformed without database or HTTP calls"""
+
+    def setup_method(self):
+        """Setup for each test"""
+        self.test_data = TestDataLoader()
+        pose_data = self.test_data.load_test_data("robot_pose_data.json")
+        self.poses = [case["data"] for cases in pose_data.values() for case in cases
+                      if isinstance(case.get("data"), dict) and case["data"].get("sn")
+                      and isinstance(case["data"].get("x"), (int, float)) and case["data"]["x"] != 0
+                      and isinstance(case["data"].get("y"), (int, float))]
+        self.robot_sns = sorted({pose["sn"] for pose in self.poses})
+        self.config = FakeConfig(self.robot_sns)
+        self.config.metadata_cache.get_many(self.robot_sns)
+        self.service = CountingTransformService(self.config, {"1F": TRANSFORM, "2F": TRANSFORM, "3F": TRANSFORM})
+
+    def _transform(self, pose, map_name=None):
+        robot_data = {"robot_sn": pose["sn"], "x": pose["x"], "y": pose["y"], "z": pose.get("yaw")}
+        if map_name:
+            robot_data["map_name"] = map_name
+        return self.service.transform_robot_coordinates_single(robot_data)
+
+    def test_warm_poses_need_no_lookups(self):
+        """Test one map query and one PNG fetch serve every later pose on that map"""
+        print("\n🧪 Testing warm pose transformation")
+
+        self._transform(self.poses[0], map_name="1F")
+        self.service.queries.clear()
+        self.service.png_fetches.clear()
+
+        for pose in self.poses * 5:
+            result = self._transform(pose, map_name="1F")
+            # 300 px tall robot map, 0.05 m/px, origin (-10, -20), floor transform = translation (5, 7)
+            expected_u = int((pose["x"] + 10.0) / 0.05)
+            expected_v = int(300 - (pose["y"] + 20.0) / 0.05)
+            assert (result["original_x"], result["original_y"]) == (expected_u, expected_v)
+            assert (result["new_x"], result["new_y"]) == (expected_u + 5, expected_v + 7)
+
+        assert self.service.queries == [] and self.service.png_fetches == []
+        assert self.service.get_stats()["hits"] >= len(self.poses) * 5
+
+    def test_current_map_comes_from_the_callback_stream(self):
+        """Test a map seen in one callback is used for later poses without a work_location query"""
+        print("\n🧪 Testing per-robot current map")
+
+        pose = self.poses[0]
+        self._transform(pose, map_name="2F")
+        self.service.queries.clear()
+
+        result = self._transform(pose)
+        assert result["new_x"] is not None
+        assert "mnt_robots_work_location" not in self.service.queries
+        assert self.config.metadata_cache.get_current_map(pose["sn"]) == "2F"
+
+    def test_expired_current_map_is_looked_up_again(self):
+        """Test a floor change seen in work_location replaces the map from an earlier task report"""
+        print("\n🧪 Testing current map expiry")
+
+        pose = self.poses[0]
+        self.config.metadata_cache.set_current_map(pose["sn"], "1F")
+        self.service.current_maps[pose["sn"]] = "2F"
+        self._transform(pose)
+        assert "mnt_robots_work_location" not in self.service.queries
+
+        self.config.metadata_cache.current_map_ttl_seconds = 0
+        assert self._transform(pose)["new_x"] is not None
+        assert self.service.queries.count("mnt_robots_work_location") == 1
+        assert self.config.metadata_cache.get_current_map(pose["sn"], include_expired=True) == "2F"
+
+        # Without a map in work_location the expired map is still used, and not looked up per pose
+        del self.service.current_maps[pose["sn"]]
+        self.service.map_lookup_retry = 300
+        for _ in range(3):
+            assert self._transform(pose)["new_x"] is not None
+        assert self.service.queries.count("mnt_robots_work_location") == 2
+
+    def test_robot_without_map_is_not_looked_up_per_pose(self):
+        """Test a robot with no known map queries work_location once, then waits for the retry interval"""
+        print("\n🧪 Testing robots without a map")
+
+        for _ in range(5):
+            assert self._transform(self.poses[0])["new_x"] is None
+        assert self.service.queries == ["mnt_robots_work_location"]
+
+        self.service.current_maps[self.poses[0]["sn"]] = "1F"
+        self.service.map_lookup_retry = 0
+        assert self._transform(self.poses[0])["new_x"] is not None
+
+    def test_unknown_maps_are_cached_and_known_maps_bounded(self):
+        """Test missing maps are not re-queried and the least recently used map is evicted"""
+        print("\n🧪 Testing negative caching and eviction")
+
+        for _ in range(3):
+            assert self._transform(self.poses[0], map_name="NOT_CONFIGURED")["new_x"] is None
+        assert self.service.queries.count("pro_floor_info") == 1
+
+        for map_name in ("1F", "2F", "3F"):
+            self._transform(self.poses[0], map_name=map_name)
+        stats = self.service.map_transform_cache.get_stats()
+        assert stats["entries"] == 2 and stats["evictions"] == 1, stats
+
+    def test_failed_lookups_are_not_cached_as_missing(self):
+        """Test a map or current-map query that raised is retried on the next pose, not remembered as missing"""
+        print("\n🧪 Testing failed lookups")
+
+        self.service.failing_queries = 1
+        assert self._transform(self.poses[0], map_name="1F")["new_x"] is None
+        assert self._transform(self.poses[0], map_name="1F")["new_x"] is not None
+        assert self.service.queries.count("pro_floor_info") == 2
+
+        pose = self.poses[-1]
+        self.service.current_maps[pose["sn"]] = "1F"
+        self.service.failing_queries = 1
+        assert self._transform(pose)["new_x"] is None
+        assert self._transform(pose)["new_x"] is not None
+        assert self.service.queries.count("mnt_robots_work_location") == 2
+
+    def test_lost_idle_connection_is_replaced(self):
+        """Test a lookup on an idle connection that was lost reconnects and succeeds"""
+        print("\n🧪 Testing lost idle connections")
+
+        original_table_class = transform_service.RDSTable
+        transform_service.RDSTable = LookupTable
+        LookupTable.created = []
+        service = TransformService(self.config)
+        try:
+            query = "SELECT map_name FROM mnt_robots_work_location WHERE robot_sn = 'X'"
+            assert service._query("foxx_irvine_office", "mnt_robots_work_location", ["robot_sn"], query) == [("1F",)]
+            idle = LookupTable.created[0]
+            idle.lost = True
+
+            assert service._query("foxx_irvine_office", "mnt_robots_work_location", ["robot_sn"], query) == [("1F",)]
+            assert idle.closed and len(LookupTable.created) == 2
+            assert service._idle_tables[("foxx_irvine_office", "mnt_robots_work_location")] == [LookupTable.created[1]]
+        finally:
+            transform_service.RDSTable = original_table_class
+
+    def test_concurrent_misses_load_once(self):
+        """Test many threads asking for a new map trigger a single load"""
+        print("\n🧪 Testing concurrent loads")
+
+        cache = MapTransformCache(max_maps=4)
+        loads = []
+
+        def slow_loader(map_name):
+            loads.append(map_name)
+            time.sleep(0.1)
+            return self.service._load_map_transform(map_name)
+
+        threads = [threading.Thread(target=cache.get_or_load, args=("1F", slow_loader)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert loads == ["1F"], f"Expected one load, got {loads}"
+        assert cache.get_or_load("1F", slow_loader).robot_map_height == 300
+
+
+def run_transform_cache_tests():
+    """Run all map transform cache tests"""
+    print("=" * 60)
+    print("RUNNING MAP TRANSFORM CACHE TESTS")
+    print("=" * 60)
+
+    test_instance = TestTransformCache()
+    test_methods = [method for method in dir(test_instance) if method.startswith("test_")]
+
+    total_tests = 0
+    passed_tests = 0
+
+    for method_name in test_methods:
+        total_tests += 1
+        try:
+            test_instance.setup_method()
+            method = getattr(test_instance, method_name)
+            method()
+            passed_tests += 1
+            print(f"✅ {method_name} - PASSED")
+        except Exception as e:
+            print(f"❌ {method_name} - FAILED: {e}")
+            import traceback
+
+            traceback.print_exc()
+
+    print(f"\n{'='*60}")
+    print("MAP TRANSFORM CACHE TESTS SUMMARY")
+    print(f"{'='*60}")
+    print(f"Total tests: {total_tests}")
+    print(f"Passed: {passed_tests}")
+    print(f"Failed: {total_tests - passed_tests}")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    run_transform_cache_tests()
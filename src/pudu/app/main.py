@@ -1,10 +1,12 @@
 # src/pudu/app/main.py
 from pudu.apis import get_schedule_table, get_charging_table, get_events_table, get_location_table, get_robot_status_table, get_ongoing_tasks_table
 from pudu.rds import RDSTable
-from pudu.notifications import send_change_based_notifications, detect_data_changes, NotificationService
+from pudu.rds.utils import BULK_LOAD_MIN_ROWS, is_load_data_local_rejected
+from pudu.notifications import send_change_based_notifications, detect_data_changes, NotificationService, NotificationDispatcher, NotificationCoalescer
 from pudu.configs import DynamicDatabaseConfig
 from pudu.services.task_management_service import TaskManagementService
 from pudu.services.transform_service import TransformService
+from pudu.services.daily_rollup_service import DailyRollupService
 from pudu.rds.rdsTable import ConnectionManager
 from pudu.apis.core.config_manager import config_manager
 import logging
@@ -19,6 +21,9 @@ sys.path.append('../')
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for background notifications at the end of a run
+NOTIFICATION_FLUSH_TIMEOUT = 120
+
 
 class App:
     """Main application with parallel API processing and dynamic database resolution"""
@@ -29,7 +34,15 @@ class App:
         self.config = DynamicDatabaseConfig(config_path)
         self.s3_config = self._load_s3_config(config_path)
         self.notification_service = NotificationService()
+        # Notifications are delivered in the background so they don't extend pipeline latency
+        self.notification_dispatcher = NotificationDispatcher(self.notification_service)
+        # Repeated status ticks / event floods are coalesced per robot and rate limited before dispatch
+        self.notification_coalescer = NotificationCoalescer(self.notification_dispatcher)
         self.transform_service = TransformService(self.config, self.s3_config)
+        # Per-robot-per-day report rollups, refreshed for the days touched by each run
+        self.daily_rollups = DailyRollupService()
+        # Cleared once the server rejects LOAD DATA LOCAL INFILE, so later batches go straight to executemany
+        self.bulk_load_available = True
 
         # Get all robots and their database mappings
         self.robot_db_mapping = self.config.resolver.get_robot_database_mapping()
@@ -361,6 +374,9 @@ class App:
                     reuse_connection=True
                 )
                 table.target_robots = table_config.get('robot_sns', [])
+                # Optional LOAD DATA path for large batches (e.g. 31-day backfills), enabled per table in config
+                table.bulk_load = table_config.get('bulk_load', False)
+                table.bulk_load_min_rows = table_config.get('bulk_load_min_rows', BULK_LOAD_MIN_ROWS)
                 tables.append(table)
                 logger.info(f"✅ Initialized {table_type} table: {table_config['database']}.{table_config['table_name']} for {len(table.target_robots)} robots")
             except Exception as e:
@@ -425,7 +441,7 @@ class App:
                     for change_info in changes.values():
                         changed_records.append(change_info['new_values'])
                     # insert the changed records and get the ids (formatted as (original_data_dict, unique_key_in_db))
-                    ids = table.batch_insert_with_ids(changed_records)
+                    ids = self._write_changed_records(table, changed_records)
                     # ids is a list of tuples, each tuple contains (original_data_dict, unique_key_in_db)
                     # now we need to add the database_key to each change record
                     # step 1: add database_key to primary_key_values dict
@@ -468,6 +484,33 @@ class App:
 
         return successful_inserts, failed_inserts, all_changes
 
+    def _write_changed_records(self, table: RDSTable, changed_records: List[dict]):
+        """
+        Upsert changed records and return [(original_data_dict, unique_key_in_db), ...].
+
+        Tables with bulk_load enabled use LOAD DATA into a staging table for batches of at least
+        bulk_load_min_rows records, falling back to batch_insert_with_ids when the load fails
+        (e.g. local_infile disabled on the server).
+        """
+        use_bulk_load = (self.bulk_load_available
+                         and getattr(table, 'bulk_load', False)
+                         and table.primary_keys
+                         and len(changed_records) >= getattr(table, 'bulk_load_min_rows', BULK_LOAD_MIN_ROWS))
+        if not use_bulk_load:
+            return table.batch_insert_with_ids(changed_records)
+
+        logger.info(f"📦 Bulk loading {len(changed_records)} records into {table.database_name}.{table.table_name}")
+        try:
+            return table.bulk_load_upsert_with_ids(changed_records)
+        except Exception as e:
+            if is_load_data_local_rejected(e):
+                self.bulk_load_available = False
+                logger.warning(f"⚠️ LOAD DATA LOCAL INFILE rejected ({e}); using batch inserts for the rest of this run")
+            else:
+                logger.warning(f"⚠️ Bulk load into {table.database_name}.{table.table_name} failed ({e}); "
+                               f"retrying with batch insert")
+            return table.batch_insert_with_ids(changed_records)
+
     def _process_location_data(self):
         """
         Process location data with proper project_id-based routing
@@ -1086,6 +1129,8 @@ class App:
             'total_successful_notifications': 0,
             'total_failed_notifications': 0,
         }
+        notification_stats_start = self.notification_dispatcher.get_stats()
+        coalescer_stats_start = self.notification_coalescer.get_stats()
 
         try:
             # STEP 1: Fetch all API data for all customers in parallel (NEW MULTI-CUSTOMER LOGIC)
@@ -1126,6 +1171,7 @@ class App:
                 pipeline_stats['total_successful_inserts'] += successful
                 pipeline_stats['total_failed_inserts'] += failed
                 self._handle_notifications(changes, 'robot_status', pipeline_stats)
+                self.daily_rollups.track_changes(changes, 'robot_status')
             else:
                 logger.info("ℹ️ No robot status data to process")
 
@@ -1139,6 +1185,7 @@ class App:
                 pipeline_stats['total_successful_inserts'] += successful
                 pipeline_stats['total_failed_inserts'] += failed
                 self._handle_notifications(changes, 'robot_ongoing_task', pipeline_stats)
+                self.daily_rollups.track_changes(changes, 'robot_task')
             else:
                 logger.info("ℹ️ No ongoing tasks data to process")
 
@@ -1153,6 +1200,7 @@ class App:
                 pipeline_stats['total_successful_inserts'] += successful
                 pipeline_stats['total_failed_inserts'] += failed
                 self._handle_notifications(changes, 'robot_task', pipeline_stats, start_time, end_time)
+                self.daily_rollups.track_changes(changes, 'robot_task')
             else:
                 logger.info("ℹ️ No schedule data to process")
 
@@ -1167,6 +1215,7 @@ class App:
                 pipeline_stats['total_successful_inserts'] += successful
                 pipeline_stats['total_failed_inserts'] += failed
                 self._handle_notifications(changes, 'robot_charging', pipeline_stats, start_time, end_time)
+                self.daily_rollups.track_changes(changes, 'robot_charging')
             else:
                 logger.info("ℹ️ No charging data to process")
 
@@ -1181,11 +1230,18 @@ class App:
                 pipeline_stats['total_successful_inserts'] += successful
                 pipeline_stats['total_failed_inserts'] += failed
                 self._handle_notifications(changes, 'robot_events', pipeline_stats, start_time, end_time)
+                self.daily_rollups.track_changes(changes, 'robot_events')
             else:
                 logger.info("ℹ️ No events data to process")
 
             logger.info("=" * 50)
 
+            # Recompute the daily rollups of every robot-day written above
+            self._refresh_daily_rollups()
+
+            # Wait for queued notifications before reporting (the process may be frozen/terminated after run)
+            self._flush_notifications(pipeline_stats, notification_stats_start, coalescer_stats_start)
+
             # Calculate execution time and print summary
             pipeline_end = datetime.now()
             execution_time = (pipeline_end - pipeline_start).total_seconds()
@@ -1217,11 +1273,47 @@ class App:
             logger.error(f"💥 Critical error in multi-customer pipeline: {e}", exc_info=True)
             raise
         finally:
+            # Emit anything still buffered, deliver it and stop the coalescer's and dispatcher's threads
+            # before the invocation ends (a new App is built per Lambda invocation; warm containers
+            # would keep every run's threads). The coalescer feeds the dispatcher, so it closes first
+            self.notification_coalescer.close()
+            self.notification_dispatcher.close(timeout=NOTIFICATION_FLUSH_TIMEOUT)
             # Close all connections at the end
             logger.info("🔒 Closing all pooled connections...")
             ConnectionManager.close_all_connections()
             self.config.close()
 
+    def _refresh_daily_rollups(self):
+        """Refresh mnt_robot_daily_rollup for the days touched by this run (failures don't fail the run)"""
+        logger.info("📅 Refreshing daily rollups...")
+        try:
+            written = self.daily_rollups.refresh()
+            logger.info(f"📅 Daily rollups refreshed: {written}")
+        except Exception as e:
+            logger.error(f"❌ Error refreshing daily rollups: {e}")
+
+    def _flush_notifications(self, pipeline_stats: Dict, stats_start: Dict, coalescer_stats_start: Dict):
+        """Flush the coalescer and dispatcher and record delivered/failed counts for this run"""
+        self.notification_coalescer.flush()
+        coalescer_stats = self.notification_coalescer.get_stats()
+        suppressed = coalescer_stats['suppressed'] - coalescer_stats_start['suppressed']
+        queued = coalescer_stats['sent'] - coalescer_stats_start['sent']
+        logger.info(f"📧 Notifications coalesced: {pipeline_stats['total_successful_notifications']} generated, "
+                    f"{queued} queued, {suppressed} suppressed "
+                    f"({coalescer_stats['rate_limited'] - coalescer_stats_start['rate_limited']} rate limited)")
+
+        logger.info(f"📧 Waiting for {self.notification_dispatcher.get_stats()['pending']} pending notifications...")
+        if not self.notification_dispatcher.flush(timeout=NOTIFICATION_FLUSH_TIMEOUT):
+            logger.warning("⚠️ Notification flush timed out, waiting again when the dispatcher closes")
+
+        stats_end = self.notification_dispatcher.get_stats()
+        sent = stats_end['sent'] - stats_start['sent']
+        failed = stats_end['failed'] - stats_start['failed']
+        logger.info(f"📧 Notifications delivered: {sent}/{queued} queued ({failed} failed, "
+                    f"{stats_end['retried'] - stats_start['retried']} retries)")
+        pipeline_stats['total_successful_notifications'] = sent
+        pipeline_stats['total_failed_notifications'] += failed
+
     def _handle_notifications(self, changes: Dict, data_type: str, pipeline_stats: Dict, start_time: str = None, end_time: str = None):
         """Handle notifications for changes"""
         logger.info(f"📧 Handling notifications for {data_type} changes...")
@@ -1234,7 +1326,7 @@ class App:
                 try:
                     time_range = f"{start_time} to {end_time}" if start_time and end_time else None
                     notif_success, notif_failed = send_change_based_notifications(
-                        self.notification_service, database_name, table_name, change_data, data_type,
+                        self.notification_coalescer, database_name, table_name, change_data, data_type,
                         time_range=time_range
                     )
                     pipeline_stats['total_successful_notifications'] += notif_success
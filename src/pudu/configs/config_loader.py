@@ -69,6 +69,7 @@ class ConfigLoader:
         return {
             'api_host': os.getenv('NOTIFICATION_API_HOST', ''),
             'api_endpoint': os.getenv('NOTIFICATION_API_ENDPOINT', ''),
+            'api_batch_endpoint': os.getenv('NOTIFICATION_API_BATCH_ENDPOINT', ''),
             'icons_config_path': os.getenv('ICONS_CONFIG_PATH', 'icons.yaml')
         }
 
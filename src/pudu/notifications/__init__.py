@@ -3,11 +3,15 @@ Robot Package
 """
 
 from .notification_service import *
+from .notification_dispatcher import *
+from .notification_coalescer import *
 from .notification_sender import *
 from .change_detector import *
 
 __all__ = [
     "NotificationService",
+    "NotificationDispatcher",
+    "NotificationCoalescer",
     "send_change_based_notifications",
     "detect_data_changes"
 ]
\ No newline at end of file
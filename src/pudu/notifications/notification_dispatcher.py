@@ -0,0 +1,271 @@
+import atexit
+import http.client
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .notification_service import NotificationService
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying (rate limited / transient server errors)
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+_STOP = object()
+
+
+class NotificationDispatcher:
+    """
+    Background notification dispatcher with keep-alive connections.
+
+    Exposes send_notification() with the same signature as NotificationService so it can be
+    passed to send_change_based_notifications(). The call only enqueues the notification and
+    returns True when it was accepted; a bounded pool of worker threads, each holding one
+    keep-alive connection to the notification API, delivers it with retry and backoff.
+    When the service has a batch endpoint configured, workers drain up to batch_size queued
+    notifications and POST them as one JSON array.
+
+    Call close() (or at least flush()) before the process or Lambda invocation ends, since a frozen
+    container never runs atexit hooks. close() stops the worker threads and is also registered
+    with atexit until it runs, so queued notifications are delivered on interpreter exit. What is
+    still queued when close()'s timeout expires is dropped (and counted) rather than waited for.
+    """
+
+    def __init__(self, notification_service: NotificationService, max_workers: int = None,
+                 max_queue_size: int = 10000, max_retries: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 10.0, batch_size: int = None):
+        self.notification_service = notification_service
+        self.max_workers = max_workers or int(os.getenv('NOTIFICATION_MAX_WORKERS', '4'))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.batch_size = batch_size or int(os.getenv('NOTIFICATION_BATCH_SIZE', '50'))
+        self.batch_endpoint = getattr(notification_service, 'batch_endpoint', '') or ''
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._workers: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        # Set when close() gives up waiting: workers stop retrying and drop what is left
+        self._stop_event = threading.Event()
+        self._stats = {'queued': 0, 'sent': 0, 'failed': 0, 'retried': 0, 'dropped': 0}
+
+        atexit.register(self.close)
+
+    def send_notification(self, robot_sn: str, notification_type: str, title: str, content: str,
+                          severity: str, status: str, payload: dict) -> bool:
+        """
+        Queue a notification for background delivery.
+
+        Returns:
+            bool: True if the notification was queued, False if the dispatcher is closed or the queue is full
+        """
+        if self._closed:
+            logger.warning(f"Dispatcher closed, dropping notification for robot {robot_sn}: {title}")
+            self._increment('dropped')
+            return False
+
+        self._ensure_workers()
+        notification_data = self.notification_service.build_notification_data(
+            robot_sn, notification_type, title, content, severity, status, payload
+        )
+        try:
+            self._queue.put_nowait(notification_data)
+        except queue.Full:
+            logger.warning(f"Notification queue full, dropping notification for robot {robot_sn}: {title}")
+            self._increment('dropped')
+            return False
+
+        self._increment('queued')
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued notification has been delivered or has failed.
+
+        Returns:
+            bool: True if the queue drained, False if the timeout expired first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    logger.warning(f"Notification flush timed out with {self._queue.unfinished_tasks} pending")
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = 30.0):
+        """
+        Flush pending notifications and stop the worker threads (idempotent).
+
+        Returns within about timeout (plus a second for workers to exit); notifications still
+        queued by then are dropped and in-flight deliveries stop retrying.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self._workers)
+        atexit.unregister(self.close)
+
+        if workers:
+            if not self.flush(timeout):
+                self._stop_event.set()
+                self._drop_queued()
+            for _ in workers:
+                try:
+                    self._queue.put_nowait(_STOP)
+                except queue.Full:
+                    # Workers still busy with a full queue exit on the stop event
+                    self._stop_event.set()
+                    break
+            join_deadline = time.monotonic() + (5.0 if not self._stop_event.is_set() else 1.0)
+            for worker in workers:
+                worker.join(timeout=max(0.0, join_deadline - time.monotonic()))
+
+        stats = self.get_stats()
+        logger.info(f"📧 Notification dispatcher closed: {stats['sent']} sent, {stats['failed']} failed, "
+                    f"{stats['retried']} retries, {stats['dropped']} dropped")
+
+    def get_stats(self) -> Dict[str, int]:
+        """Cumulative counters: queued, sent, failed, retried, dropped"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['pending'] = self._queue.unfinished_tasks
+        return stats
+
+    def _drop_queued(self):
+        """Discard every queued notification (close() timed out)"""
+        dropped = 0
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+            if item is not _STOP:
+                dropped += 1
+        if dropped:
+            logger.warning(f"Notification dispatcher closing, dropped {dropped} queued notification(s)")
+            self._increment('dropped', dropped)
+
+    def _increment(self, counter: str, amount: int = 1):
+        with self._lock:
+            self._stats[counter] += amount
+
+    def _ensure_workers(self):
+        """Start the worker pool on first use"""
+        if self._workers:
+            return
+        with self._lock:
+            if self._workers:
+                return
+            for index in range(self.max_workers):
+                worker = threading.Thread(target=self._worker_loop, name=f"notification-dispatcher-{index}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            logger.info(f"📧 Started {self.max_workers} notification workers"
+                        f"{' (batch endpoint enabled)' if self.batch_endpoint else ''}")
+
+    def _worker_loop(self):
+        """Deliver queued notifications over one keep-alive connection"""
+        conn = None
+        stopping = False
+
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP or self._stop_event.is_set():
+                self._queue.task_done()
+                if item is not _STOP:
+                    self._increment('dropped')
+                    continue
+                break
+
+            batch = [item]
+            if self.batch_endpoint:
+                while len(batch) < self.batch_size:
+                    try:
+                        next_item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if next_item is _STOP:
+                        self._queue.task_done()
+                        stopping = True
+                        break
+                    batch.append(next_item)
+
+            try:
+                conn, delivered = self._deliver(conn, batch)
+                self._increment('sent' if delivered else 'failed', len(batch))
+            except Exception as e:
+                logger.error(f"❌ Unexpected error delivering {len(batch)} notification(s): {e}")
+                self._increment('failed', len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _deliver(self, conn, batch: List[dict]):
+        """
+        POST one notification (or a batch to the batch endpoint) with retry and exponential backoff.
+
+        Returns:
+            tuple: (connection to reuse or None, delivered: bool)
+        """
+        if len(batch) > 1:
+            endpoint, body = self.batch_endpoint, json.dumps(batch)
+        else:
+            endpoint, body = self.notification_service.endpoint, json.dumps(batch[0])
+        robot_ids = sorted({notification.get('robotId') for notification in batch})
+
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                if conn is None:
+                    conn = self.notification_service.create_connection()
+                conn.request("POST", endpoint, body, self.notification_service.headers)
+                res = conn.getresponse()
+                data = res.read()
+
+                if res.status == 200:
+                    logger.info(f"✅ Sent {len(batch)} notification(s) for robots {robot_ids}")
+                    return conn, True
+                if res.status not in RETRYABLE_STATUSES:
+                    logger.error(f"❌ Failed to send {len(batch)} notification(s) for robots {robot_ids}. "
+                                 f"Status: {res.status}, Response: {data.decode('utf-8', errors='replace')}")
+                    return conn, False
+                last_error = f"HTTP {res.status}"
+            except (http.client.HTTPException, OSError) as e:
+                # Dropped keep-alive or network error - reconnect on the next attempt
+                last_error = str(e) or e.__class__.__name__
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                conn = None
+
+            if attempt < self.max_retries and not self._stop_event.is_set():
+                self._increment('retried')
+                delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+                # Backoff is cut short when close() stops waiting
+                if self._stop_event.wait(delay * (0.5 + random.random() / 2)):
+                    break
+            else:
+                break
+
+        logger.error(f"❌ Giving up on {len(batch)} notification(s) for robots {robot_ids} "
+                     f"after {self.max_retries + 1} attempts: {last_error}")
+        return conn, False
@@ -24,18 +24,23 @@ class NotificationService:
                 notification_config = config.get_notification_config()
                 self.api_host = notification_config.get('api_host', '')
                 self.endpoint = notification_config.get('api_endpoint', '')
+                self.batch_endpoint = notification_config.get('api_batch_endpoint', '')
                 logger.info("Using config_loader for notification settings (local testing)")
             except Exception as e:
                 logger.warning(f"Config loader failed, falling back to environment variables: {e}")
                 # Fallback to environment variables
                 self.api_host = os.getenv('NOTIFICATION_API_HOST', '')
                 self.endpoint = os.getenv('NOTIFICATION_API_ENDPOINT', '')
+                self.batch_endpoint = os.getenv('NOTIFICATION_API_BATCH_ENDPOINT', '')
         else:
             # Load from environment variables (Lambda/production)
             self.api_host = os.getenv('NOTIFICATION_API_HOST', '')
             self.endpoint = os.getenv('NOTIFICATION_API_ENDPOINT', '')
+            self.batch_endpoint = os.getenv('NOTIFICATION_API_BATCH_ENDPOINT', '')
             logger.info("Using environment variables for notification settings")
 
+        self.timeout = float(os.getenv('NOTIFICATION_API_TIMEOUT', '10'))
+
         self.headers = {'Content-Type': 'application/json'}
 
         # Log configuration (without sensitive data)
@@ -55,19 +60,11 @@ class NotificationService:
             status: Notification status tag (completed, failed, warning, in_progress, etc.)
         """
         try:
-            # Use HTTP connection (change to HTTPSConnection if move to HTTPS)
-            conn = http.client.HTTPSConnection(self.api_host)
+            conn = self.create_connection()
 
             # Build data - include status if provided
-            notification_data = {
-                "robotId": robot_sn,
-                "notificationType": notification_type,
-                "title": title,
-                "content": content,
-                "severity": severity,
-                "status": status,
-                "payload": payload # for identifying the record in the database
-            }
+            notification_data = self.build_notification_data(robot_sn, notification_type, title, content,
+                                                             severity, status, payload)
 
             notification_data_json = json.dumps(notification_data)
 
@@ -91,6 +88,25 @@ class NotificationService:
             except:
                 pass
 
+    def create_connection(self) -> http.client.HTTPSConnection:
+        """Create a connection to the notification API (kept alive and reused by NotificationDispatcher)"""
+        # Use HTTP connection (change to HTTPSConnection if move to HTTPS)
+        return http.client.HTTPSConnection(self.api_host, timeout=self.timeout)
+
+    @staticmethod
+    def build_notification_data(robot_sn: str, notification_type: str, title: str, content: str,
+                                severity: str, status: str, payload: dict) -> dict:
+        """Build the notification request body"""
+        return {
+            "robotId": robot_sn,
+            "notificationType": notification_type,
+            "title": title,
+            "content": content,
+            "severity": severity,
+            "status": status,
+            "payload": payload # for identifying the record in the database
+        }
+
     def test_connection(self) -> bool:
         """Test if the notification service is reachable"""
         try:
@@ -1,4 +1,5 @@
 # src/pudu/rds/rdsTable.py
+from contextlib import contextmanager
 from .utils import *
 from sqlalchemy import create_engine
 from sqlalchemy.pool import NullPool
@@ -200,14 +201,54 @@ class RDSTable(RDSDatabase):
     def batch_insert(self, data_list: list):
         batch_insert(self.cursor, self.table_name, data_list, primary_keys=self.primary_keys)
 
-    def batch_insert_with_ids(self, data_list: list):
+    def batch_insert_with_ids(self, data_list: list, id_resolution: str = ID_RESOLUTION_BATCHED):
         """
         Batch insert data and return primary keys matched to original data.
 
+        Args:
+            data_list: List of dictionaries containing data to insert
+            id_resolution: ID_RESOLUTION_BATCHED (default) or ID_RESOLUTION_OR_CHAIN (legacy re-query)
+
+        Returns:
+            list of tuples: [(original_data_dict, auto_generated_primary_key), ...]
+        """
+        return batch_insert_with_ids(self.cursor, self.table_name, data_list, self.primary_keys,
+                                     id_resolution=id_resolution)
+
+    @contextmanager
+    def _bulk_load_cursor(self):
+        """Cursor on a separate connection opened with local_infile, closed after the load"""
+        connection = connect_rds_instance(config_file=self.connection_config, local_infile=True)
+        try:
+            cursor = connection.cursor()
+            use_database(cursor, self.database_name)
+            yield cursor
+        finally:
+            connection.close()
+
+    def bulk_load_upsert(self, data):
+        """
+        Bulk upsert a DataFrame or list of dicts via LOAD DATA LOCAL INFILE and a staging table.
+
+        Runs on its own connection: only bulk loads enable local_infile.
+
+        Returns:
+            int: Number of rows loaded
+        """
+        with self._bulk_load_cursor() as cursor:
+            return bulk_load_upsert(cursor, self.table_name, data, self.primary_keys)
+
+    def bulk_load_upsert_with_ids(self, data_list: list):
+        """
+        Bulk upsert via LOAD DATA and return primary keys matched to original data.
+
+        Runs on its own connection: only bulk loads enable local_infile.
+
         Returns:
             list of tuples: [(original_data_dict, auto_generated_primary_key), ...]
         """
-        return batch_insert_with_ids(self.cursor, self.table_name, data_list, self.primary_keys)
+        with self._bulk_load_cursor() as cursor:
+            return bulk_load_upsert_with_ids(cursor, self.table_name, data_list, self.primary_keys)
 
     def query_data(self, query: str = None):
         if query:
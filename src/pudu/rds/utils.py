@@ -5,9 +5,11 @@ import pandas as pd
 import boto3
 from botocore.exceptions import ClientError
 import json
+import tempfile
+import uuid
 
 
-def connect_rds_instance(config_file="credentials.yaml"):
+def connect_rds_instance(config_file="credentials.yaml", local_infile=False):
     base_dir = os.path.dirname(os.path.abspath(__file__))
     config_file = os.path.join(base_dir, "credentials.yaml")
     # Load the YAML configuration file
@@ -19,7 +21,8 @@ def connect_rds_instance(config_file="credentials.yaml"):
     return pymysql.connect(
         host=db_config['host'],
         user=username,
-        password=password)
+        password=password,
+        local_infile=local_infile)  # only bulk load connections (LOAD DATA LOCAL INFILE) enable it
 
 def get_secret(secret_name, region_name):
     # Create a Secrets Manager client
@@ -115,6 +118,125 @@ def batch_insert(cursor, table_name: str, data_list: list, primary_keys: list):
     cursor.executemany(sql, values_list)
     cursor.connection.commit()
 
+# Bulk LOAD DATA ingestion (used for large backfill batches)
+BULK_LOAD_MIN_ROWS = 1000
+BULK_LOAD_CHUNK_ROWS = 50000
+
+# MySQL errors raised when LOAD DATA LOCAL INFILE is disabled on the client or the server
+# (local_infile is OFF by default on RDS MySQL 8)
+LOAD_DATA_LOCAL_REJECTED_ERRORS = {1148, 2068, 3948}
+
+def is_load_data_local_rejected(error) -> bool:
+    """True if error is the server or client refusing LOAD DATA LOCAL INFILE"""
+    args = getattr(error, 'args', ())
+    return bool(args) and args[0] in LOAD_DATA_LOCAL_REJECTED_ERRORS
+
+def _to_load_data_text(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert every column to LOAD DATA text form: NULL as \\N, datetimes as MySQL literals,
+    booleans as 0/1 and backslash/tab/newline escaped.
+    """
+    text_df = pd.DataFrame(index=df.index)
+    for column in df.columns:
+        series = df[column]
+        null_mask = series.isna()
+
+        if pd.api.types.is_datetime64_any_dtype(series):
+            text = series.dt.strftime('%Y-%m-%d %H:%M:%S')
+        elif pd.api.types.is_bool_dtype(series):
+            text = series.astype(int).astype(str)
+        else:
+            text = series.map(lambda value: value.strftime('%Y-%m-%d %H:%M:%S') if hasattr(value, 'strftime')
+                              else int(value) if isinstance(value, bool) else value).astype(str)
+            text = (text.str.replace('\\', '\\\\', regex=False)
+                        .str.replace('\t', '\\t', regex=False)
+                        .str.replace('\n', '\\n', regex=False)
+                        .str.replace('\r', '\\r', regex=False))
+
+        text_df[column] = text.where(~null_mask, '\\N')
+    return text_df
+
+def _write_load_data_file(df: pd.DataFrame, file_obj, chunk_rows: int = BULK_LOAD_CHUNK_ROWS):
+    """Stream a DataFrame into a tab-separated LOAD DATA file chunk by chunk"""
+    for start in range(0, len(df), chunk_rows):
+        text_df = _to_load_data_text(df.iloc[start:start + chunk_rows])
+        lines = ['\t'.join(row) for row in text_df.itertuples(index=False, name=None)]
+        file_obj.write('\n'.join(lines) + '\n')
+
+def bulk_load_upsert(cursor, table_name: str, data, primary_keys: list):
+    """
+    Bulk upsert rows through LOAD DATA LOCAL INFILE into a staging table followed by a single
+    INSERT ... SELECT ... ON DUPLICATE KEY UPDATE into the target table.
+
+    Intended for large batches (backfills) where executemany round trips dominate.
+    Rows with the same unique key keep the last occurrence, matching batch_insert.
+
+    Args:
+        cursor: Database cursor (connection must be opened with local_infile=True)
+        table_name: Name of the target table
+        data: pandas DataFrame or list of dictionaries
+        primary_keys: List of column names that form unique constraints
+
+    Returns:
+        int: Number of rows loaded into the staging table
+    """
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    if df.empty:
+        return 0
+
+    columns = list(df.columns)
+    column_list = ', '.join(columns)
+    staging_table = f"_stg_{table_name}_{uuid.uuid4().hex[:8]}"
+
+    with tempfile.NamedTemporaryFile('w', suffix='.tsv', encoding='utf-8', newline='', delete=False) as tmp_file:
+        _write_load_data_file(df, tmp_file)
+        file_path = tmp_file.name
+
+    try:
+        # Staging table mirrors the target's columns and unique keys, REPLACE keeps the last duplicate
+        cursor.execute(f"CREATE TEMPORARY TABLE {staging_table} LIKE {table_name}")
+        escaped_path = file_path.replace('\\', '/').replace("'", "''")
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE '{escaped_path}' REPLACE INTO TABLE {staging_table} "
+            f"CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({column_list})"
+        )
+
+        update_columns = [column for column in columns if column not in (primary_keys or [])]
+        sql = f"INSERT INTO {table_name} ({column_list}) SELECT {column_list} FROM {staging_table} AS s"
+        if primary_keys and update_columns:
+            update_clause = ', '.join([f"{column}=s.{column}" for column in update_columns])
+            sql += f" ON DUPLICATE KEY UPDATE {update_clause}"
+        cursor.execute(sql)
+        cursor.connection.commit()
+    finally:
+        try:
+            cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {staging_table}")
+        except Exception:
+            pass
+        os.remove(file_path)
+
+    return len(df)
+
+def bulk_load_upsert_with_ids(cursor, table_name: str, data_list: list, primary_keys: list):
+    """
+    Bulk upsert through bulk_load_upsert and return primary keys matched to original data.
+
+    Returns:
+        list of tuples: [(original_data_dict, unique_key_in_db), ...]
+    """
+    if not data_list:
+        return []
+    if not primary_keys:
+        raise ValueError("bulk_load_upsert_with_ids requires unique key columns to resolve IDs")
+
+    pk_column = get_primary_key_column(cursor, table_name)
+    if not pk_column:
+        raise ValueError(f"Could not detect primary key column for table '{table_name}'")
+
+    bulk_load_upsert(cursor, table_name, data_list, primary_keys)
+    return _query_ids_by_key_chunks(cursor, table_name, data_list, primary_keys, pk_column)
+
 def get_primary_key_column(cursor, table_name: str):
     """
     Automatically detect the primary key column name for a MySQL table.
@@ -147,7 +269,16 @@ def get_primary_key_column(cursor, table_name: str):
 
     return None
 
-def batch_insert_with_ids(cursor, table_name: str, data_list: list, primary_keys: list = None):
+# ID resolution modes for batch_insert_with_ids
+ID_RESOLUTION_BATCHED = "batched"    # LAST_INSERT_ID per insert chunk / chunked tuple-IN lookup for upserts
+ID_RESOLUTION_OR_CHAIN = "or_chain"  # legacy single OR-chain re-query
+ID_RESOLUTION_CHUNK_SIZE = 1000
+
+# Time-related unique key fields that need normalization before matching
+ID_TIME_FIELDS = {'start_time', 'end_time', 'create_time', 'update_time', 'task_time', 'upload_time'}
+
+def batch_insert_with_ids(cursor, table_name: str, data_list: list, primary_keys: list = None,
+                          id_resolution: str = ID_RESOLUTION_BATCHED, chunk_size: int = ID_RESOLUTION_CHUNK_SIZE):
     """
     Batch insert data and return primary keys matched to original data.
     The batch_insert_with_ids function will return IDs for ALL data passed to it, regardless of whether they were actually inserted, updated, or unchanged.
@@ -157,6 +288,10 @@ def batch_insert_with_ids(cursor, table_name: str, data_list: list, primary_keys
         table_name: Name of the table to insert into
         data_list: List of dictionaries containing data to insert
         primary_keys: List of column names that form unique constraints (for ON DUPLICATE KEY UPDATE)
+        id_resolution: ID_RESOLUTION_BATCHED (default) inserts pure inserts in multi-row chunks and reads
+            LAST_INSERT_ID per chunk, and resolves upsert IDs with chunked tuple-IN lookups.
+            ID_RESOLUTION_OR_CHAIN keeps the original single OR-chain re-query.
+        chunk_size: Rows per multi-row INSERT / keys per IN lookup in batched mode
 
     Returns:
         list of tuples: [(original_data_dict, unique_key_in_db), ...]
@@ -164,11 +299,18 @@ def batch_insert_with_ids(cursor, table_name: str, data_list: list, primary_keys
     if not data_list:
         return []
 
+    if id_resolution not in (ID_RESOLUTION_BATCHED, ID_RESOLUTION_OR_CHAIN):
+        raise ValueError(f"Unknown id_resolution mode '{id_resolution}'")
+
     # Step 1: Get primary key column name
     pk_column = get_primary_key_column(cursor, table_name)
     if not pk_column:
         raise ValueError(f"Could not detect primary key column for table '{table_name}'")
 
+    # Pure inserts in batched mode: each multi-row INSERT reports the first generated ID of that statement
+    if not primary_keys and id_resolution == ID_RESOLUTION_BATCHED:
+        return _insert_with_last_insert_ids(cursor, table_name, data_list, chunk_size)
+
     # Step 2: Perform batch insert using existing function
     # primary_keys or [] - when primary_keys is None, it will be treated as []; if not None, it will be treated as the provided primary_keys
     batch_insert(cursor, table_name, data_list, primary_keys or [])
@@ -176,6 +318,8 @@ def batch_insert_with_ids(cursor, table_name: str, data_list: list, primary_keys
     # Step 3: Query back the primary keys
     if primary_keys:
         # Use unique constraints to find the records
+        if id_resolution == ID_RESOLUTION_BATCHED:
+            return _query_ids_by_key_chunks(cursor, table_name, data_list, primary_keys, pk_column, chunk_size)
         return _query_ids_by_unique_keys(cursor, table_name, data_list, primary_keys, pk_column)
     else:
         # For pure inserts, use lastrowid
@@ -185,6 +329,133 @@ def batch_insert_with_ids(cursor, table_name: str, data_list: list, primary_keys
             results.append((data, first_id + i))
         return results
 
+def _insert_with_last_insert_ids(cursor, table_name: str, data_list: list, chunk_size: int = ID_RESOLUTION_CHUNK_SIZE):
+    """
+    Insert rows as explicit multi-row INSERT chunks and assign IDs from LAST_INSERT_ID.
+
+    MySQL reports the first auto-increment value of a multi-row INSERT and allocates
+    the rest of that statement consecutively, so IDs stay correct even when the batch
+    is larger than what a single statement can carry.
+    """
+    columns = list(data_list[0].keys())
+    row_placeholder = "(" + ", ".join(['%s'] * len(columns)) + ")"
+
+    results = []
+    for start in range(0, len(data_list), chunk_size):
+        chunk = data_list[start:start + chunk_size]
+        sql = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES {', '.join([row_placeholder] * len(chunk))}"
+        values = [
+            None if (value is None or pd.isna(value)) else value
+            for row in chunk
+            for value in (row.get(column) for column in columns)
+        ]
+        cursor.execute(sql, values)
+
+        first_id = cursor.lastrowid
+        results.extend((data, first_id + offset) for offset, data in enumerate(chunk))
+
+    cursor.connection.commit()
+    return results
+
+def _normalize_key_value(value, field_name=None):
+    """Normalize values for tuple comparison - convert timestamps to strings for time fields only"""
+    # Only process time fields
+    if field_name and field_name not in ID_TIME_FIELDS:
+        return value
+
+    if hasattr(value, 'strftime'):  # datetime/timestamp object
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    elif isinstance(value, str) and field_name in ID_TIME_FIELDS:
+        # Only try to parse strings for known time fields
+        try:
+            dt = pd.to_datetime(value)
+            return dt.strftime('%Y-%m-%d %H:%M:%S')
+        except:
+            return value
+
+    return value
+
+def _normalize_key_tuples(records: list, unique_keys: list):
+    """
+    Normalize the unique key values of all records at once and return them as tuples.
+
+    Time fields are parsed column-wise with a single pd.to_datetime call instead of per value.
+    """
+    frame = pd.DataFrame([[record.get(key) for key in unique_keys] for record in records],
+                         columns=unique_keys, dtype=object)
+
+    for key in unique_keys:
+        if key not in ID_TIME_FIELDS:
+            continue
+        column = frame[key]
+        try:
+            parsed = pd.to_datetime(column, errors='coerce', format='mixed')
+            formatted = parsed.dt.strftime('%Y-%m-%d %H:%M:%S').astype(object)
+            frame[key] = formatted.where(parsed.notna(), column)
+        except (TypeError, ValueError):
+            # Mixed timezones or unparseable types - fall back to per-value normalization
+            frame[key] = column.map(lambda value: _normalize_key_value(value, key))
+
+    return list(frame.itertuples(index=False, name=None))
+
+def _is_null_key_value(value):
+    return value is None or (isinstance(value, float) and pd.isna(value))
+
+def _query_ids_by_key_chunks(cursor, table_name: str, data_list: list, unique_keys: list, pk_column: str,
+                             chunk_size: int = ID_RESOLUTION_CHUNK_SIZE):
+    """
+    Query primary keys for records using chunked tuple-IN lookups on their unique keys.
+
+    Keys are normalized once, de-duplicated and sent as parameterized
+    WHERE (k1, k2) IN ((..), (..)) chunks so the lookup can use the unique index.
+    Records with NULL key values cannot be matched by IN and use the OR-chain query.
+    """
+    normalized_keys = _normalize_key_tuples(data_list, unique_keys)
+
+    lookup_keys = []
+    seen_keys = set()
+    null_key_indices = []
+    for index, key in enumerate(normalized_keys):
+        if any(_is_null_key_value(value) for value in key):
+            null_key_indices.append(index)
+        elif key not in seen_keys:
+            seen_keys.add(key)
+            lookup_keys.append(key)
+
+    if len(unique_keys) == 1:
+        key_expression = unique_keys[0]
+        key_placeholder = "%s"
+    else:
+        key_expression = "(" + ", ".join(unique_keys) + ")"
+        key_placeholder = "(" + ", ".join(['%s'] * len(unique_keys)) + ")"
+    select_columns = ", ".join([pk_column] + unique_keys)
+
+    pk_map = {}
+    for start in range(0, len(lookup_keys), chunk_size):
+        chunk = lookup_keys[start:start + chunk_size]
+        query = (f"SELECT {select_columns} FROM {table_name} "
+                 f"WHERE {key_expression} IN ({', '.join([key_placeholder] * len(chunk))})")
+        cursor.execute(query, [value for key in chunk for value in key])
+        db_rows = cursor.fetchall()
+
+        db_keys = _normalize_key_tuples([dict(zip(unique_keys, row[1:])) for row in db_rows], unique_keys)
+        for row, key in zip(db_rows, db_keys):
+            pk_map[key] = row[0]
+
+    null_key_ids = {}
+    if null_key_indices:
+        null_records = [data_list[index] for index in null_key_indices]
+        null_results = _query_ids_by_unique_keys(cursor, table_name, null_records, unique_keys, pk_column)
+        null_key_ids = {index: pk_value for index, (_, pk_value) in zip(null_key_indices, null_results)}
+
+    results = []
+    for index, (data, key) in enumerate(zip(data_list, normalized_keys)):
+        if index in null_key_ids:
+            results.append((data, null_key_ids[index]))
+        else:
+            results.append((data, pk_map.get(key)))
+    return results
+
 def _query_ids_by_unique_keys(cursor, table_name: str, data_list: list, unique_keys: list, pk_column: str):
     """
     Query primary keys for records using their unique key constraints.
@@ -200,29 +471,6 @@ def _query_ids_by_unique_keys(cursor, table_name: str, data_list: list, unique_k
         else:
             return f"'{value}'"
 
-    def normalize_for_comparison(value, field_name=None):
-        """Normalize values for tuple comparison - convert timestamps to strings for time fields only"""
-
-        # Define time-related field names that need normalization
-        TIME_FIELDS = {'start_time', 'end_time', 'create_time', 'update_time', 'task_time', 'upload_time'}
-
-        # Only process time fields
-        if field_name and field_name not in TIME_FIELDS:
-            return value
-
-        if hasattr(value, 'strftime'):  # datetime/timestamp object
-            return value.strftime('%Y-%m-%d %H:%M:%S')
-        elif isinstance(value, str) and field_name in TIME_FIELDS:
-            # Only try to parse strings for known time fields
-            try:
-                import pandas as pd
-                dt = pd.to_datetime(value)
-                return dt.strftime('%Y-%m-%d %H:%M:%S')
-            except:
-                return value
-
-        return value
-
     # Build WHERE conditions (same as before)
     for data in data_list:
         record_conditions = []
@@ -252,7 +500,7 @@ def _query_ids_by_unique_keys(cursor, table_name: str, data_list: list, unique_k
             unique_values = row[1:]
             # NORMALIZE database values for comparison
             normalized_tuple = tuple(
-                    normalize_for_comparison(val, unique_keys[i])
+                    _normalize_key_value(val, unique_keys[i])
                     for i, val in enumerate(unique_values)
                 )
             pk_map[normalized_tuple] = pk_value
@@ -261,7 +509,7 @@ def _query_ids_by_unique_keys(cursor, table_name: str, data_list: list, unique_k
         for data in data_list:
             # NORMALIZE data values for comparison
             normalized_tuple = tuple(
-                normalize_for_comparison(data.get(key), key)
+                _normalize_key_value(data.get(key), key)
                 for key in unique_keys
             )
             pk_value = pk_map.get(normalized_tuple)
@@ -7,8 +7,10 @@ into comprehensive metrics for robot performance reports.
 
 from .metrics_calculator import PerformanceMetricsCalculator
 from .chart_data_formatter import ChartDataFormatter
+from .computation_context import ComputationContext
 
 __all__ = [
     "PerformanceMetricsCalculator",
-    "ChartDataFormatter"
+    "ChartDataFormatter",
+    "ComputationContext"
 ]
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Per-report computation context for PerformanceMetricsCalculator.
+
+Memoizes calculator results for one report in a bounded LRU keyed by a content fingerprint of
+the input DataFrame (shape, columns and a hash of the columns the calculation reads), so equal
+frames share results and a recycled id() or a new report can never return a stale result.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Results memoized per report; a report makes a few hundred cached calls (per robot/facility/map)
+REPORT_CONTEXT_MAX_ENTRIES = 1024
+
+
+def dataframe_fingerprint(df: pd.DataFrame, key_columns: Iterable[str] = None) -> Tuple:
+    """
+    Cheap content fingerprint of a DataFrame: shape, column names and a hash of key_columns
+    (those present; all columns when None)
+    """
+    columns = [column for column in (key_columns or df.columns) if column in df.columns]
+    if not columns or df.empty:
+        return (df.shape, tuple(df.columns), None)
+
+    try:
+        row_hashes = pd.util.hash_pandas_object(df[columns], index=False)
+    except TypeError:
+        # Unhashable cells (lists, dicts) hash by their text
+        row_hashes = pd.util.hash_pandas_object(df[columns].astype(str), index=False)
+
+    digest = hashlib.blake2b(row_hashes.values.tobytes(), digest_size=16).hexdigest()
+    return (df.shape, tuple(df.columns), digest)
+
+
+class ComputationContext:
+    """Bounded, thread-safe LRU of calculation results with hit/miss counters"""
+
+    def __init__(self, max_entries: int = REPORT_CONTEXT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._results: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the result stored under key, computing and storing it on a miss"""
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self._stats['hits'] += 1
+                return self._results[key]
+            self._stats['misses'] += 1
+
+        # Compute outside the lock; concurrent misses for the same key compute the same value
+        result = compute()
+
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+                self._stats['evictions'] += 1
+        return result
+
+    def get_stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counters plus current size"""
+        with self._lock:
+            return dict(self._stats, size=len(self._results), max_entries=self.max_entries)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+
+def cached_in_report_context(*key_columns: str):
+    """
+    Memoize a calculator method taking a DataFrame first in the calculator's report context.
+
+    key_columns are the columns the method reads; the fingerprint hashes only those.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, df: pd.DataFrame, *args, **kwargs):
+            context: Optional[ComputationContext] = getattr(self, 'report_context', None)
+            if context is None or df is None or df.empty:
+                return func(self, df, *args, **kwargs)
+
+            key = (func.__name__, dataframe_fingerprint(df, key_columns), args, tuple(sorted(kwargs.items())))
+            return context.get_or_compute(key, lambda: func(self, df, *args, **kwargs))
+
+        return wrapper
+    return decorator
@@ -3,71 +3,134 @@ Optimized Calculators Package for Robot Management Reporting System
 
 OPTIMIZATION IMPROVEMENTS:
 1. Role Separation: All calculations moved here from database_data_service.py
-2. Caching: Results cached by DataFrame id to eliminate redundant calculations
+2. Caching: Results cached per report by DataFrame content to eliminate redundant calculations
 3. Batch Operations: Pre-calculate shared metrics once, reuse everywhere
 4. Moved Methods: event_location_mapping, event_type_by_location, map_coverage,
    robot_health_scores, daily_efficiency, financial_trends all now here
 """
 
+import json
 import logging
 from typing import Dict, List, Optional, Any, Tuple, Set
 import pandas as pd
 from datetime import datetime, timedelta
 import numpy as np
-from functools import lru_cache, wraps
 import threading
 
+from .computation_context import ComputationContext, cached_in_report_context
+
 logger = logging.getLogger(__name__)
 
-def cache_by_dataframe_id_and_robot(func):
-    """Thread-safe decorator with robot-specific caching"""
-    cache = {}
-    lock = threading.Lock()
-
-    @wraps(func)
-    def wrapper(self, df: pd.DataFrame, *args, **kwargs):
-        if df.empty:
-            return func(self, df, *args, **kwargs)
-
-        # Extract robot_sn if available
-        robot_sn = None
-        if 'robot_sn' in df.columns and not df.empty:
-            unique_robots = df['robot_sn'].unique()
-            if len(unique_robots) == 1:
-                robot_sn = unique_robots[0]
-            elif len(unique_robots) > 1:
-                # Multiple robots - use SORTED hash for stability
-                robot_sn = tuple(sorted(unique_robots))  # ✓ STABLE!
-
-                # If too many robots (>100), use hash instead to avoid huge tuples
-                if len(unique_robots) > 100:
-                    import hashlib
-                    robots_str = ','.join(sorted(unique_robots))
-                    robot_sn = hashlib.md5(robots_str.encode()).hexdigest()[:16]
-
-        # Include robot_sn in cache key
-        cache_key = (
-            id(df),
-            threading.get_ident(),
-            robot_sn,  # ← NEW: robot context
-            args,
-            tuple(sorted(kwargs.items()))
-        )
-
-        with lock:
-            if cache_key in cache:
-                logger.debug(f"Cache hit for {func.__name__} (robot {robot_sn})")
-                return cache[cache_key]
-
-        result = func(self, df, *args, **kwargs)
-
-        with lock:
-            cache[cache_key] = result
+# Charging durations parsed once when report frames are normalized at fetch time
+# (see services/report_frames.py); calculators fall back to parsing 'duration' without them
+CHARGING_MINUTES_COLUMN = 'duration_minutes'
+CHARGING_HOURS_COLUMN = 'duration_hours'
 
-        return result
 
-    wrapper.clear_cache = lambda: cache.clear()
-    return wrapper
+def _charging_duration_to_hours(duration_str) -> float:
+    """Parse a charging duration ('1h 5min', '45min' or seconds) to hours, 0 when unparseable"""
+    try:
+        if pd.isna(duration_str):
+            return 0
+        if isinstance(duration_str, (int, float)):
+            return duration_str / 3600
+
+        duration_str = str(duration_str).lower()
+        hours = 0
+        minutes = 0
+        if 'h' in duration_str:
+            hours = int(duration_str.split('h')[0].strip())
+            if 'm' in duration_str:
+                minutes = int(duration_str.split('h')[1].split('m')[0].strip())
+        elif 'm' in duration_str:
+            minutes = int(duration_str.split('m')[0].strip())
+        return hours + (minutes / 60)
+    except:
+        return 0
+
+
+def _duration_str_to_minutes(duration_str) -> float:
+    """Parse a duration string like '0h 04min' (or seconds) to minutes, 0 when unparseable"""
+    if pd.isna(duration_str) or not str(duration_str).strip():
+        return 0.0
+
+    try:
+        duration_str = str(duration_str).strip()
+        hours = 0
+        minutes = 0
+
+        if 'h' in duration_str and 'min' in duration_str:
+            parts = duration_str.split('h')
+            hours = int(parts[0].strip())
+            min_part = parts[1].strip()
+            if min_part.endswith('min'):
+                minutes = int(min_part.replace('min', '').strip())
+        elif 'min' in duration_str:
+            minutes = int(duration_str.replace('min', '').strip())
+        elif 'h' in duration_str:
+            hours = int(duration_str.replace('h', '').strip())
+        else:
+            seconds = float(duration_str)
+            minutes = seconds / 60
+
+        return hours * 60 + minutes
+    except:
+        return 0.0
+
+
+def _map_distinct_values(values: pd.Series, parse) -> pd.Series:
+    """Apply a scalar parser to a Series by parsing each distinct value once (missing values parse as NaN input)"""
+    parsed = values.map({value: parse(value) for value in values.dropna().unique()})
+    if values.isna().any():
+        parsed = parsed.where(values.notna(), parse(np.nan))
+    return parsed
+
+
+def _segment_sums(keys: pd.Series, values: Dict[str, pd.Series]) -> pd.DataFrame:
+    """
+    Per-key sums of each values column in one sort, indexed by the sorted distinct keys (missing keys dropped).
+
+    Each key's rows are summed as one contiguous numpy slice in their original order, so totals are
+    bit-identical to summing that key's own sub-frame (groupby().sum() compensates and can differ in the
+    last bit, which flips values rounded for display).
+    """
+    codes, uniques = pd.factorize(keys, sort=True)
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    starts = np.searchsorted(sorted_codes, np.arange(len(uniques)), side='left')
+    ends = np.searchsorted(sorted_codes, np.arange(len(uniques)), side='right')
+
+    sums = {'count': (ends - starts).tolist()}
+    for name, column in values.items():
+        ordered = column.to_numpy()[order]
+        sums[name] = [ordered[start:end].sum() for start, end in zip(starts, ends)]
+    return pd.DataFrame(sums, index=uniques)
+
+
+def map_labels(values: pd.Series, mapping) -> pd.Series:
+    """
+    Series.map returning plain values: mapping a categorical column (normalized report frames) can
+    otherwise return a categorical, which rejects new fill values and groups by unobserved categories
+    """
+    mapped = values.map(mapping)
+    if isinstance(mapped.dtype, pd.CategoricalDtype):
+        mapped = pd.Series(np.asarray(mapped), index=mapped.index, name=mapped.name)
+    return mapped
+
+
+def parse_duration_series_to_minutes(durations: pd.Series) -> pd.Series:
+    """Durations ('0h 04min' strings or seconds) to minutes, each distinct value parsed once"""
+    if pd.api.types.is_numeric_dtype(durations) and not pd.api.types.is_bool_dtype(durations):
+        return (durations / 60).fillna(0.0)
+    return _map_distinct_values(durations, _duration_str_to_minutes)
+
+
+def parse_charging_series_to_hours(durations: pd.Series) -> pd.Series:
+    """Charging durations ('1h 5min' strings or seconds) to hours, each distinct value parsed once"""
+    if pd.api.types.is_numeric_dtype(durations) and not pd.api.types.is_bool_dtype(durations):
+        return (durations / 3600).fillna(0)
+    return _map_distinct_values(durations, _charging_duration_to_hours)
+
 
 class PerformanceMetricsCalculator:
     """
@@ -90,43 +153,18 @@ class PerformanceMetricsCalculator:
         self._robot_facility_map = None
         self._robot_facility_lock = threading.Lock()
 
+        # Memoized results of @cached_in_report_context methods, replaced for every report
+        self.report_context = ComputationContext()
+
         self.period_length = self._calculate_period_length(start_date, end_date)
 
-    def _get_cache_key(self, df: pd.DataFrame) -> Tuple:
+    def begin_report_context(self) -> ComputationContext:
         """
-        Generate cache key that's unique per DataFrame content.
-
-        For single-robot DataFrames: Include robot_sn for specificity
-        For multi-robot DataFrames: Use hash of all robot SNs for stability
+        Start a fresh computation context for a new report (previous results and caches dropped).
+        Returns the context so the caller can read its hit/miss counters.
         """
-        if df.empty:
-            return (0, threading.get_ident(), 0, ())
-
-        # Extract robot context if available
-        robot_context = None
-        if 'robot_sn' in df.columns:
-            unique_robots = df['robot_sn'].unique()
-
-            if len(unique_robots) == 1:
-                # Single robot - use robot_sn directly
-                robot_context = unique_robots[0]
-            elif len(unique_robots) > 1:
-                # Multiple robots - use SORTED hash for stability
-                robot_context = tuple(sorted(unique_robots))  # ✓ STABLE!
-
-                # If too many robots (>100), use hash instead to avoid huge tuples
-                if len(unique_robots) > 100:
-                    import hashlib
-                    robots_str = ','.join(sorted(unique_robots))
-                    robot_context = hashlib.md5(robots_str.encode()).hexdigest()[:16]
-
-        return (
-            id(df),
-            threading.get_ident(),
-            len(df),
-            tuple(df.columns),
-            robot_context
-        )
+        self.clear_all_caches()
+        return self.report_context
 
     def clear_all_caches(self):
         """Clear all caches - thread-safe"""
@@ -139,6 +177,13 @@ class PerformanceMetricsCalculator:
         with self._robot_facility_lock:
             self._robot_facility_map = None
 
+        previous_context, self.report_context = self.report_context, ComputationContext()
+        stats = previous_context.get_stats()
+        if stats['hits'] or stats['misses']:
+            logger.info(f"Report computation cache: {stats['hits']} hits, {stats['misses']} misses, "
+                        f"{stats['evictions']} evictions")
+        previous_context.clear()
+
         logger.info("All calculation caches cleared")
 
     # ============================================================================
@@ -250,41 +295,51 @@ class PerformanceMetricsCalculator:
 
     def _parse_duration_str_to_minutes(self, duration_str: str) -> float:
         """Parse duration string like '0h 04min' to minutes"""
-        if pd.isna(duration_str) or not str(duration_str).strip():
-            return 0.0
+        return _duration_str_to_minutes(duration_str)
 
-        try:
-            duration_str = str(duration_str).strip()
-            hours = 0
-            minutes = 0
-
-            if 'h' in duration_str and 'min' in duration_str:
-                parts = duration_str.split('h')
-                hours = int(parts[0].strip())
-                min_part = parts[1].strip()
-                if min_part.endswith('min'):
-                    minutes = int(min_part.replace('min', '').strip())
-            elif 'min' in duration_str:
-                minutes = int(duration_str.replace('min', '').strip())
-            elif 'h' in duration_str:
-                hours = int(duration_str.replace('h', '').strip())
-            else:
-                seconds = float(duration_str)
-                minutes = seconds / 60
+    def _parse_duration_series_to_minutes(self, durations: pd.Series) -> pd.Series:
+        """Vectorized _parse_duration_str_to_minutes: each distinct duration string is parsed once"""
+        return parse_duration_series_to_minutes(durations)
 
-            return hours * 60 + minutes
-        except:
-            return 0.0
+    def _parse_charging_series_to_hours(self, durations: pd.Series) -> pd.Series:
+        """Charging durations ('1h 5min' strings or seconds) to hours, each distinct value parsed once"""
+        return parse_charging_series_to_hours(durations)
+
+    def _charging_minutes(self, charging_df: pd.DataFrame) -> pd.Series:
+        """Charging session durations in minutes, read from the column parsed at fetch time when present"""
+        if CHARGING_MINUTES_COLUMN in charging_df.columns:
+            return charging_df[CHARGING_MINUTES_COLUMN]
+        return self._parse_duration_series_to_minutes(charging_df['duration'])
+
+    def _charging_hours(self, charging_df: pd.DataFrame) -> pd.Series:
+        """Charging session durations in hours, read from the column parsed at fetch time when present"""
+        if CHARGING_HOURS_COLUMN in charging_df.columns:
+            return charging_df[CHARGING_HOURS_COLUMN]
+        return self._parse_charging_series_to_hours(charging_df['duration'])
 
     def _parse_datetime_column(self, df: pd.DataFrame, column: str) -> pd.DataFrame:
         """Centralized datetime parsing. Returns DataFrame with new column '{column}_dt'"""
         if df.empty or column not in df.columns:
             return df
 
-        df_copy = df.copy()
-        dt_column = f'{column}_dt'
-        df_copy[dt_column] = pd.to_datetime(df_copy[column], errors='coerce')
-        return df_copy[df_copy[dt_column].notna()]
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            parsed = df[column]
+        else:
+            parsed = pd.to_datetime(df[column], errors='coerce')
+        valid = parsed.notna()
+        if not valid.all():
+            df, parsed = df[valid], parsed[valid]
+
+        # Only a new column is added, so a shallow copy leaves the caller's frame untouched
+        df_copy = df.copy(deep=False)
+        df_copy[f'{column}_dt'] = parsed
+        return df_copy
+
+    def _format_dates(self, datetimes: pd.Series, date_format: str = '%m/%d') -> pd.Series:
+        """dt.strftime that formats each distinct calendar day once instead of every row"""
+        codes, unique_days = pd.factorize(datetimes.dt.normalize())
+        labels = np.append(np.asarray(pd.DatetimeIndex(unique_days).strftime(date_format), dtype=object), np.nan)
+        return pd.Series(labels[codes], index=datetimes.index)
 
     def _calculate_unique_dates(self, df: pd.DataFrame, datetime_column: str) -> int:
         """Calculate unique dates from a datetime column"""
@@ -292,11 +347,11 @@ class PerformanceMetricsCalculator:
             return 0
         return df[datetime_column].dt.date.nunique()
 
-    @cache_by_dataframe_id_and_robot
+    @cached_in_report_context('duration')
     def _sum_task_durations(self, tasks_df: pd.DataFrame) -> float:
         """
         OPTIMIZED: Cached method to sum task durations in hours.
-        Uses decorator to cache by DataFrame id.
+        Cached per report by the content of the duration column.
         """
         if tasks_df.empty or 'duration' not in tasks_df.columns:
             return 0.0
@@ -305,7 +360,7 @@ class PerformanceMetricsCalculator:
         total_seconds = durations.sum()
         return total_seconds / 3600
 
-    @cache_by_dataframe_id_and_robot
+    @cached_in_report_context('status')
     def _count_completed_tasks(self, tasks_df: pd.DataFrame) -> int:
         """OPTIMIZED: Cached method to count completed tasks"""
         if tasks_df.empty or 'status' not in tasks_df.columns:
@@ -315,7 +370,7 @@ class PerformanceMetricsCalculator:
             'end|complet|finish', case=False, na=False
         )])
 
-    @cache_by_dataframe_id_and_robot
+    @cached_in_report_context('status')
     def _count_tasks_by_status(self, tasks_df: pd.DataFrame) -> Dict[str, int]:
         """
         OPTIMIZED: Cached method to categorize tasks by status.
@@ -389,150 +444,120 @@ class PerformanceMetricsCalculator:
                 charging_data['robot_sn'] == robot_sn
             ] if not charging_data.empty else pd.DataFrame()
 
-            total_period_hours = period_length * 24 if period_length > 0 else 24
-
-            # Initialize metrics
-            uptime_hours = 0.0
-            downtime_hours = 0.0
-            working_hours = 0.0
-            charging_hours = 0.0
-
             # OPTIMIZED: Use pre-aggregated counts instead of DataFrame operations
-            if robot_metrics.empty:
-                # No operation data - assume 100% uptime
-                logger.info(f"No operation metrics for {robot_sn}, assuming 100% uptime")
-                uptime_hours = total_period_hours
-                downtime_hours = 0.0
+            operation_totals = None
+            if not robot_metrics.empty:
+                operation_totals = (robot_metrics.iloc[0]['total_records'], robot_metrics.iloc[0]['online_records'])
             else:
-                # Extract pre-calculated aggregations
-                total_records = robot_metrics.iloc[0]['total_records']
-                online_records = robot_metrics.iloc[0]['online_records']
-
-                # Calculate uptime ratio from aggregated counts
-                uptime_hours = (online_records / total_records * total_period_hours) if total_records > 0 else total_period_hours
-                downtime_hours = total_period_hours - uptime_hours
+                logger.info(f"No operation metrics for {robot_sn}, assuming 100% uptime")
 
             # Calculate working hours from tasks (unchanged)
+            working_hours = 0.0
             if not robot_tasks.empty and 'duration' in robot_tasks.columns:
                 working_hours = pd.to_numeric(
                     robot_tasks['duration'], errors='coerce'
                 ).fillna(0).sum() / 3600
 
             # Calculate charging hours (unchanged)
+            charging_hours = 0.0
             if not robot_charging.empty and 'duration' in robot_charging.columns:
-                def parse_duration(duration_str):
-                    try:
-                        if pd.isna(duration_str):
-                            return 0
-                        if isinstance(duration_str, (int, float)):
-                            return duration_str / 3600
-
-                        duration_str = str(duration_str).lower()
-                        hours = 0
-                        minutes = 0
-                        if 'h' in duration_str:
-                            hours = int(duration_str.split('h')[0].strip())
-                            if 'm' in duration_str:
-                                minutes = int(duration_str.split('h')[1].split('m')[0].strip())
-                        elif 'm' in duration_str:
-                            minutes = int(duration_str.split('m')[0].strip())
-                        return hours + (minutes / 60)
-                    except:
-                        return 0
-
-                charging_hours = robot_charging['duration'].apply(parse_duration).sum()
-
-            # Calculate idle hours
-            idle_hours = max(0, uptime_hours - working_hours - charging_hours)
-
-            # Sanity check
-            if working_hours + charging_hours > uptime_hours:
-                uptime_hours = working_hours + charging_hours
-                downtime_hours = max(0, total_period_hours - uptime_hours)
-                idle_hours = 0
-
-            # Calculate ratios
-            uptime_ratio = (uptime_hours / total_period_hours * 100) if total_period_hours > 0 else 0.0
-            working_ratio = (working_hours / total_period_hours * 100) if total_period_hours > 0 else 0.0
-            charging_ratio = (charging_hours / total_period_hours * 100) if total_period_hours > 0 else 0.0
-            idle_ratio = (idle_hours / total_period_hours * 100) if total_period_hours > 0 else 0.0
-            utilization_score = (working_hours / uptime_hours * 100) if uptime_hours > 0 else 0.0
+                charging_hours = self._charging_hours(robot_charging).sum()
 
-            return {
-                'uptime_hours': round(uptime_hours, 1),
-                'downtime_hours': round(downtime_hours, 1),
-                'idle_hours': round(idle_hours, 1),
-                'working_hours': round(working_hours, 1),
-                'charging_hours': round(charging_hours, 1),
-                'uptime_ratio': round(uptime_ratio, 1),
-                'working_ratio': round(working_ratio, 1),
-                'charging_ratio': round(charging_ratio, 1),
-                'idle_ratio': round(idle_ratio, 1),
-                'utilization_score': round(utilization_score, 1)
-            }
+            return self._uptime_metrics_from_totals(operation_totals, working_hours, charging_hours, period_length)
 
         except Exception as e:
             logger.error(f"Error calculating uptime for {robot_sn}: {e}", exc_info=True)
 
             # Fallback: assume 100% uptime, calculate what we can
-            total_period_hours = period_length * 24 if period_length > 0 else 24
-
-            # Try to get working hours
             working_hours = 0.0
             if not tasks_data.empty and 'duration' in tasks_data.columns:
                 robot_tasks = tasks_data[tasks_data['robot_sn'] == robot_sn]
                 if not robot_tasks.empty:
                     working_hours = pd.to_numeric(robot_tasks['duration'], errors='coerce').fillna(0).sum() / 3600
 
-            # Try to get charging hours
             charging_hours = 0.0
             if not charging_data.empty:
                 robot_charging = charging_data[charging_data['robot_sn'] == robot_sn]
                 if not robot_charging.empty and 'duration' in robot_charging.columns:
-                    def parse_duration(duration_str):
-                        try:
-                            if pd.isna(duration_str):
-                                return 0
-                            if isinstance(duration_str, (int, float)):
-                                return duration_str / 3600
-                            duration_str = str(duration_str).lower()
-                            hours = 0
-                            minutes = 0
-                            if 'h' in duration_str:
-                                hours = int(duration_str.split('h')[0].strip())
-                                if 'm' in duration_str:
-                                    minutes = int(duration_str.split('h')[1].split('m')[0].strip())
-                            elif 'm' in duration_str:
-                                minutes = int(duration_str.split('m')[0].strip())
-                            return hours + (minutes / 60)
-                        except:
-                            return 0
-
-                    charging_hours = robot_charging['duration'].apply(parse_duration).sum()
-
-            # Assume full uptime
+                    charging_hours = self._charging_hours(robot_charging).sum()
+
+            return self._full_uptime_metrics(working_hours, charging_hours, period_length)
+
+    def _uptime_metrics_from_totals(self, operation_totals: Optional[Tuple[Any, Any]], working_hours: float,
+                                    charging_hours: float, period_length: int) -> Dict[str, Any]:
+        """
+        Uptime breakdown for one robot from its (total_records, online_records) operation counts
+        (None when the robot has no operation data, assumed 100% up) and its working/charging hours
+        """
+        total_period_hours = period_length * 24 if period_length > 0 else 24
+
+        if operation_totals is None:
             uptime_hours = total_period_hours
-            idle_hours = max(0, uptime_hours - working_hours - charging_hours)
-            utilization_score = (working_hours / uptime_hours * 100) if uptime_hours > 0 else 0.0
+            downtime_hours = 0.0
+        else:
+            total_records, online_records = operation_totals
 
-            return {
-                'uptime_hours': round(uptime_hours, 1),
-                'downtime_hours': 0.0,
-                'idle_hours': round(idle_hours, 1),
-                'working_hours': round(working_hours, 1),
-                'charging_hours': round(charging_hours, 1),
-                'uptime_ratio': 100.0,
-                'working_ratio': round(working_hours / total_period_hours * 100, 1) if total_period_hours > 0 else 0.0,
-                'charging_ratio': round(charging_hours / total_period_hours * 100, 1) if total_period_hours > 0 else 0.0,
-                'idle_ratio': round(idle_hours / total_period_hours * 100, 1) if total_period_hours > 0 else 0.0,
-                'utilization_score': round(utilization_score, 1)
-            }
+            # Calculate uptime ratio from aggregated counts
+            uptime_hours = (online_records / total_records * total_period_hours) if total_records > 0 else total_period_hours
+            downtime_hours = total_period_hours - uptime_hours
+
+        # Calculate idle hours
+        idle_hours = max(0, uptime_hours - working_hours - charging_hours)
+
+        # Sanity check
+        if working_hours + charging_hours > uptime_hours:
+            uptime_hours = working_hours + charging_hours
+            downtime_hours = max(0, total_period_hours - uptime_hours)
+            idle_hours = 0
+
+        # Calculate ratios
+        uptime_ratio = (uptime_hours / total_period_hours * 100) if total_period_hours > 0 else 0.0
+        working_ratio = (working_hours / total_period_hours * 100) if total_period_hours > 0 else 0.0
+        charging_ratio = (charging_hours / total_period_hours * 100) if total_period_hours > 0 else 0.0
+        idle_ratio = (idle_hours / total_period_hours * 100) if total_period_hours > 0 else 0.0
+        utilization_score = (working_hours / uptime_hours * 100) if uptime_hours > 0 else 0.0
+
+        return {
+            'uptime_hours': round(uptime_hours, 1),
+            'downtime_hours': round(downtime_hours, 1),
+            'idle_hours': round(idle_hours, 1),
+            'working_hours': round(working_hours, 1),
+            'charging_hours': round(charging_hours, 1),
+            'uptime_ratio': round(uptime_ratio, 1),
+            'working_ratio': round(working_ratio, 1),
+            'charging_ratio': round(charging_ratio, 1),
+            'idle_ratio': round(idle_ratio, 1),
+            'utilization_score': round(utilization_score, 1)
+        }
+
+    def _full_uptime_metrics(self, working_hours: float, charging_hours: float, period_length: int) -> Dict[str, Any]:
+        """Fallback uptime breakdown assuming the robot was up for the whole period"""
+        total_period_hours = period_length * 24 if period_length > 0 else 24
+
+        uptime_hours = total_period_hours
+        idle_hours = max(0, uptime_hours - working_hours - charging_hours)
+        utilization_score = (working_hours / uptime_hours * 100) if uptime_hours > 0 else 0.0
+
+        return {
+            'uptime_hours': round(uptime_hours, 1),
+            'downtime_hours': 0.0,
+            'idle_hours': round(idle_hours, 1),
+            'working_hours': round(working_hours, 1),
+            'charging_hours': round(charging_hours, 1),
+            'uptime_ratio': 100.0,
+            'working_ratio': round(working_hours / total_period_hours * 100, 1) if total_period_hours > 0 else 0.0,
+            'charging_ratio': round(charging_hours / total_period_hours * 100, 1) if total_period_hours > 0 else 0.0,
+            'idle_ratio': round(idle_hours / total_period_hours * 100, 1) if total_period_hours > 0 else 0.0,
+            'utilization_score': round(utilization_score, 1)
+        }
 
     def calculate_fleet_availability(self, robot_data: pd.DataFrame, tasks_data: pd.DataFrame,
-                                     start_date: str, end_date: str) -> Dict[str, Any]:
+                                     start_date: str, end_date: str,
+                                     daily_rollups: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
         """
         Calculate fleet status - robots online/offline at report generation time.
-        OPTIMIZED: Uses cached duration sum and days with tasks.
+        OPTIMIZED: Uses cached duration sum and days with tasks, or the period's daily rollups
+        (one row per robot and day) when given.
         """
         try:
             num_robots = len(robot_data) if not robot_data.empty else 0
@@ -548,20 +573,24 @@ class PerformanceMetricsCalculator:
 
             robots_online_rate = (robots_online / num_robots * 100) if num_robots > 0 else 0
 
-            # OPTIMIZED: Use cached calculations
-            total_running_hours = self.get_cached_duration_sum(tasks_data) if not tasks_data.empty else 0
+            if daily_rollups is not None:
+                total_running_hours, avg_task_duration, avg_daily_running_hours, days_with_tasks = \
+                    self._task_time_totals_from_rollups(daily_rollups)
+            else:
+                # OPTIMIZED: Use cached calculations
+                total_running_hours = self.get_cached_duration_sum(tasks_data) if not tasks_data.empty else 0
 
-            # Calculate average task duration
-            avg_task_duration = 0
-            if not tasks_data.empty and 'duration' in tasks_data.columns:
-                durations = pd.to_numeric(tasks_data['duration'], errors='coerce').dropna()
-                avg_task_duration = (durations.mean() / 60) if len(durations) > 0 else 0
+                # Calculate average task duration
+                avg_task_duration = 0
+                if not tasks_data.empty and 'duration' in tasks_data.columns:
+                    durations = pd.to_numeric(tasks_data['duration'], errors='coerce').dropna()
+                    avg_task_duration = (durations.mean() / 60) if len(durations) > 0 else 0
 
-            # OPTIMIZED: Use cached days calculation
-            avg_daily_running_hours = self.calculate_avg_daily_running_hours_per_robot(
-                tasks_data, robot_data
-            )
-            days_with_tasks = self.get_cached_days_with_tasks(tasks_data)
+                # OPTIMIZED: Use cached days calculation
+                avg_daily_running_hours = self.calculate_avg_daily_running_hours_per_robot(
+                    tasks_data, robot_data
+                )
+                days_with_tasks = self.get_cached_days_with_tasks(tasks_data)
 
             return {
                 'robots_online_rate': round(robots_online_rate, 1),
@@ -580,7 +609,24 @@ class PerformanceMetricsCalculator:
             logger.error(f"Error calculating fleet status: {e}")
             return self._get_default_fleet_metrics()
 
-    @cache_by_dataframe_id_and_robot
+    @staticmethod
+    def _task_time_totals_from_rollups(daily_rollups: pd.DataFrame) -> Tuple[float, float, float, int]:
+        """
+        Running hours, average task minutes, average daily running hours per robot and days with
+        tasks from daily rollups (the same figures calculate_fleet_availability derives from task rows)
+        """
+        task_days = daily_rollups[daily_rollups['task_count'] > 0]
+        if task_days.empty:
+            return 0, 0, 0.0, 0
+
+        total_seconds = task_days['task_duration'].sum()
+        timed_tasks = task_days['timed_task_count'].sum()
+        avg_task_duration = (total_seconds / timed_tasks / 60) if timed_tasks > 0 else 0
+        daily_hours = task_days['task_duration'] / 3600
+        avg_daily_running_hours = daily_hours.groupby(task_days['robot_sn']).mean().mean()
+        return total_seconds / 3600, avg_task_duration, avg_daily_running_hours, task_days['rollup_date'].nunique()
+
+    @cached_in_report_context('start_time')
     def calculate_days_with_tasks(self, tasks_data: pd.DataFrame) -> int:
         """
         OPTIMIZED: Cached calculation of days with tasks.
@@ -626,10 +672,10 @@ class PerformanceMetricsCalculator:
             ).fillna(0) / 3600
 
             daily_robot_hours = tasks_with_dates.groupby(
-                ['robot_sn', 'date']
+                ['robot_sn', 'date'], observed=True
             )['hours'].sum().reset_index()
 
-            robot_avg = daily_robot_hours.groupby('robot_sn')['hours'].mean()
+            robot_avg = daily_robot_hours.groupby('robot_sn', observed=True)['hours'].mean()
 
             return robot_avg.mean() if len(robot_avg) > 0 else 0.0
 
@@ -778,21 +824,32 @@ class PerformanceMetricsCalculator:
     # CHARGING PERFORMANCE METRICS (UNCHANGED)
     # ============================================================================
 
-    def calculate_charging_performance_metrics(self, charging_data: pd.DataFrame) -> Dict[str, Any]:
-        """Calculate charging session performance metrics"""
+    def calculate_charging_performance_metrics(self, charging_data: pd.DataFrame,
+                                               daily_rollups: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+        """
+        Calculate charging session performance metrics. Session counts and charging time come from
+        daily_rollups when given; medians and power gains always need the session rows.
+        """
         try:
-            if charging_data.empty:
+            if charging_data.empty and (daily_rollups is None or daily_rollups['charging_sessions'].sum() == 0):
                 return self._get_placeholder_charging_metrics()
 
             total_sessions = len(charging_data)
 
             durations = []
             if 'duration' in charging_data.columns:
-                durations = charging_data['duration'].apply(
-                    self._parse_duration_str_to_minutes
-                ).tolist()
+                durations = self._charging_minutes(charging_data).tolist()
                 durations = [d for d in durations if d > 0]
 
+            avg_duration = np.mean(durations) if durations else 0
+            total_charging_time = round(sum(durations), 1) if durations else 0
+            if daily_rollups is not None:
+                total_sessions = int(daily_rollups['charging_sessions'].sum())
+                timed_sessions = daily_rollups['timed_charging_sessions'].sum()
+                charging_minutes = daily_rollups['charging_minutes'].sum()
+                avg_duration = charging_minutes / timed_sessions if timed_sessions > 0 else 0
+                total_charging_time = round(charging_minutes, 1) if timed_sessions > 0 else 0
+
             power_gains = []
             if 'power_gain' in charging_data.columns:
                 power_gain_series = charging_data['power_gain'].astype(str).str.replace(
@@ -800,7 +857,6 @@ class PerformanceMetricsCalculator:
                 ).str.replace('%', '').str.strip()
                 power_gains = pd.to_numeric(power_gain_series, errors='coerce').dropna().tolist()
 
-            avg_duration = np.mean(durations) if durations else 0
             median_duration = np.median(durations) if durations else 0
             avg_power_gain = np.mean(power_gains) if power_gains else 0
             median_power_gain = np.median(power_gains) if power_gains else 0
@@ -811,7 +867,7 @@ class PerformanceMetricsCalculator:
                 'median_charging_duration_minutes': round(median_duration, 1),
                 'avg_power_gain_percent': round(avg_power_gain, 1),
                 'median_power_gain_percent': round(median_power_gain, 1),
-                'total_charging_time': round(sum(durations), 1) if durations else 0
+                'total_charging_time': total_charging_time
             }
 
         except Exception as e:
@@ -822,27 +878,35 @@ class PerformanceMetricsCalculator:
     # RESOURCE UTILIZATION METRICS (UNCHANGED)
     # ============================================================================
 
-    def calculate_resource_utilization_metrics(self, tasks_data: pd.DataFrame) -> Dict[str, Any]:
-        """Calculate resource utilization and efficiency metrics"""
+    def calculate_resource_utilization_metrics(self, tasks_data: pd.DataFrame,
+                                               daily_rollups: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+        """Calculate resource utilization and efficiency metrics (totals from daily_rollups when given)"""
         try:
-            if tasks_data.empty:
-                return self._get_placeholder_resource_metrics()
+            if daily_rollups is not None:
+                if daily_rollups['task_count'].sum() == 0:
+                    return self._get_placeholder_resource_metrics()
+                total_energy = daily_rollups['consumption'].sum()
+                total_area_sqm = daily_rollups['actual_area'].sum()
+                total_water = daily_rollups['water_consumption'].sum()
+            else:
+                if tasks_data.empty:
+                    return self._get_placeholder_resource_metrics()
 
-            total_energy = 0
-            if 'consumption' in tasks_data.columns:
-                total_energy = tasks_data['consumption'].fillna(0).sum()
-            elif 'energy_consumption' in tasks_data.columns:
-                total_energy = tasks_data['energy_consumption'].fillna(0).sum()
+                total_energy = 0
+                if 'consumption' in tasks_data.columns:
+                    total_energy = tasks_data['consumption'].fillna(0).sum()
+                elif 'energy_consumption' in tasks_data.columns:
+                    total_energy = tasks_data['energy_consumption'].fillna(0).sum()
 
-            total_area_sqm = 0
-            if 'actual_area' in tasks_data.columns:
-                total_area_sqm = tasks_data['actual_area'].fillna(0).sum()
+                total_area_sqm = 0
+                if 'actual_area' in tasks_data.columns:
+                    total_area_sqm = tasks_data['actual_area'].fillna(0).sum()
 
-            total_area_sqft = total_area_sqm * 10.764
+                total_water = 0
+                if 'water_consumption' in tasks_data.columns:
+                    total_water = tasks_data['water_consumption'].fillna(0).sum()
 
-            total_water = 0
-            if 'water_consumption' in tasks_data.columns:
-                total_water = tasks_data['water_consumption'].fillna(0).sum()
+            total_area_sqft = total_area_sqm * 10.764
 
             area_per_kwh = total_area_sqft / total_energy if total_energy > 0 else 0
             area_per_gallon = (
@@ -865,27 +929,34 @@ class PerformanceMetricsCalculator:
     # EVENT ANALYSIS METRICS (UNCHANGED)
     # ============================================================================
 
-    def calculate_event_analysis_metrics(self, events_data: pd.DataFrame) -> Dict[str, Any]:
-        """Calculate event and error analysis metrics"""
+    def calculate_event_analysis_metrics(self, events_data: pd.DataFrame,
+                                         daily_rollups: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+        """Calculate event and error analysis metrics (counts from daily_rollups when given)"""
         try:
-            if events_data.empty:
-                return self._get_placeholder_event_metrics()
-
-            total_events = len(events_data)
-
-            event_levels = {}
-            if 'event_level' in events_data.columns:
-                level_counts = events_data['event_level'].value_counts()
-                event_levels = {
-                    str(k).lower(): int(v) for k, v in level_counts.items() if pd.notna(k)
-                }
-
-            event_types = {}
-            if 'event_type' in events_data.columns:
-                type_counts = events_data['event_type'].value_counts()
-                event_types = {
-                    str(k): int(v) for k, v in type_counts.items() if pd.notna(k)
-                }
+            if daily_rollups is not None:
+                total_events = int(daily_rollups['event_count'].sum())
+                if total_events == 0:
+                    return self._get_placeholder_event_metrics()
+                event_levels = self._rollup_event_counts(daily_rollups['event_level_counts'], str.lower)
+                event_types = self._rollup_event_counts(daily_rollups['event_type_counts'], str)
+            else:
+                if events_data.empty:
+                    return self._get_placeholder_event_metrics()
+
+                total_events = len(events_data)
+
+                event_levels = {}
+                if 'event_level' in events_data.columns:
+                    # Levels differing only in case ('Error', 'error') count together
+                    level_counts = events_data['event_level'].dropna().astype(str).str.lower().value_counts()
+                    event_levels = {k: int(v) for k, v in level_counts.items()}
+
+                event_types = {}
+                if 'event_type' in events_data.columns:
+                    type_counts = events_data['event_type'].value_counts()
+                    event_types = {
+                        str(k): int(v) for k, v in type_counts.items() if pd.notna(k)
+                    }
 
             critical_events = 0
             error_events = 0
@@ -918,6 +989,16 @@ class PerformanceMetricsCalculator:
             logger.error(f"Error calculating event metrics: {e}")
             return self._get_placeholder_event_metrics()
 
+    @staticmethod
+    def _rollup_event_counts(day_counts: pd.Series, label) -> Dict[str, int]:
+        """Sum per-day JSON {value: count} objects into one dict, most frequent first like value_counts"""
+        totals: Dict[str, int] = {}
+        for counts in day_counts.dropna():
+            for value, count in (json.loads(counts) if isinstance(counts, str) else counts).items():
+                key = label(value)
+                totals[key] = totals.get(key, 0) + int(count)
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
     # ============================================================================
     # MOVED FROM DATABASE_DATA_SERVICE: Event Location Methods
     # ============================================================================
@@ -940,9 +1021,9 @@ class PerformanceMetricsCalculator:
                 robot_building_map = self.set_robot_facility_map(robot_locations)
 
             # Add building column
-            events_with_building = events_data.copy()
-            events_with_building['building'] = events_with_building['robot_sn'].map(
-                robot_building_map
+            events_with_building = events_data.copy(deep=False)
+            events_with_building['building'] = map_labels(
+                events_with_building['robot_sn'], robot_building_map
             ).fillna('Unknown Building')
 
             # Vectorized level extraction
@@ -999,9 +1080,9 @@ class PerformanceMetricsCalculator:
                 robot_building_map = self.set_robot_facility_map(robot_locations)
 
             # Add building column
-            events_with_building = events_data.copy()
-            events_with_building['building'] = events_with_building['robot_sn'].map(
-                robot_building_map
+            events_with_building = events_data.copy(deep=False)
+            events_with_building['building'] = map_labels(
+                events_with_building['robot_sn'], robot_building_map
             ).fillna('Unknown Building')
 
             event_type_location_breakdown = {}
@@ -1046,7 +1127,7 @@ class PerformanceMetricsCalculator:
             map_metrics = []
 
             # Single groupby
-            for map_name, map_tasks in tasks_data.groupby('map_name'):
+            for map_name, map_tasks in tasks_data.groupby('map_name', observed=True):
                 if pd.isna(map_name):
                     continue
 
@@ -1328,9 +1409,9 @@ class PerformanceMetricsCalculator:
                 robot_facility_map = self.set_robot_facility_map(robot_locations)
 
             # Add facility and date columns
-            tasks_with_context = tasks_data.copy()
-            tasks_with_context['facility'] = tasks_with_context['robot_sn'].map(
-                robot_facility_map
+            tasks_with_context = tasks_data.copy(deep=False)
+            tasks_with_context['facility'] = map_labels(
+                tasks_with_context['robot_sn'], robot_facility_map
             )
             tasks_with_context['start_time_dt'] = pd.to_datetime(
                 tasks_with_context['start_time'], errors='coerce'
@@ -1349,7 +1430,7 @@ class PerformanceMetricsCalculator:
                 return {}
 
             # Add calculated columns - VECTORIZED
-            tasks_filtered['date_str'] = tasks_filtered['start_time_dt'].dt.strftime('%m/%d')
+            tasks_filtered['date_str'] = self._format_dates(tasks_filtered['start_time_dt'])
             tasks_filtered['hours'] = pd.to_numeric(
                 tasks_filtered['duration'], errors='coerce'
             ).fillna(0) / 3600
@@ -1360,40 +1441,30 @@ class PerformanceMetricsCalculator:
                 tasks_filtered['plan_area'], errors='coerce'
             ).fillna(0)
 
-            location_efficiency = {}
-
-            # Multi-level groupby
-            for facility, facility_group in tasks_filtered.groupby('facility'):
-                if pd.isna(facility):
-                    continue
+            # One groupby over (facility, day); coverage capped at 100%
+            daily_agg = tasks_filtered.groupby(['facility', 'date_str']).agg({
+                'hours': 'sum',
+                'actual_area': 'sum',
+                'plan_area': 'sum'
+            })
+            plan_area = daily_agg['plan_area']
+            coverage = (daily_agg['actual_area'] / plan_area.where(plan_area > 0) * 100).fillna(0).clip(upper=100)
+
+            dates = [date.strftime('%m/%d') for date in date_range]
+            running_hours_by_day = {}
+            coverage_by_day = {}
+            for (facility, date_str), hours, day_coverage in zip(
+                    daily_agg.index, daily_agg['hours'].tolist(), coverage.tolist()):
+                running_hours_by_day.setdefault(facility, {})[date_str] = hours
+                coverage_by_day.setdefault(facility, {})[date_str] = day_coverage
 
-                # Aggregate by date
-                daily_agg = facility_group.groupby('date_str').agg({
-                    'hours': 'sum',
-                    'actual_area': 'sum',
-                    'plan_area': 'sum'
-                }).reset_index()
-
-                # Initialize with zeros for all dates
-                daily_data = {date.strftime('%m/%d'): {
-                    'running_hours': 0,
-                    'coverage_percentage': 0
-                } for date in date_range}
-
-                # Fill in actual data
-                for _, row in daily_agg.iterrows():
-                    date_str = row['date_str']
-                    if date_str in daily_data:
-                        coverage = (row['actual_area'] / row['plan_area'] * 100) if row['plan_area'] > 0 else 0
-                        daily_data[date_str]['running_hours'] = row['hours']
-                        daily_data[date_str]['coverage_percentage'] = min(coverage, 100)
-
-                # Convert to lists
-                dates = list(daily_data.keys())
+            location_efficiency = {}
+            for facility, facility_hours in running_hours_by_day.items():
+                facility_coverage = coverage_by_day[facility]
                 location_efficiency[facility] = {
-                    'dates': dates,
-                    'running_hours': [round(daily_data[d]['running_hours'], 2) for d in dates],
-                    'coverage_percentages': [round(daily_data[d]['coverage_percentage'], 1) for d in dates]
+                    'dates': list(dates),
+                    'running_hours': [round(facility_hours.get(d, 0), 2) for d in dates],
+                    'coverage_percentages': [round(facility_coverage.get(d, 0), 1) for d in dates]
                 }
 
             logger.info(f"Calculated daily efficiency for {len(location_efficiency)} locations")
@@ -1436,7 +1507,7 @@ class PerformanceMetricsCalculator:
 
             # Process tasks
             if not tasks_data.empty and 'start_time' in tasks_data.columns:
-                tasks_with_dates = tasks_data.copy()
+                tasks_with_dates = tasks_data.copy(deep=False)
                 tasks_with_dates['start_time_dt'] = pd.to_datetime(
                     tasks_with_dates['start_time'], errors='coerce'
                 )
@@ -1447,7 +1518,7 @@ class PerformanceMetricsCalculator:
 
                 if not tasks_filtered.empty:
                     # Vectorized calculations
-                    tasks_filtered['date_str'] = tasks_filtered['start_time_dt'].dt.strftime('%m/%d')
+                    tasks_filtered['date_str'] = self._format_dates(tasks_filtered['start_time_dt'])
                     tasks_filtered['area_sqft'] = pd.to_numeric(
                         tasks_filtered['actual_area'], errors='coerce'
                     ).fillna(0) * 10.764
@@ -1505,9 +1576,9 @@ class PerformanceMetricsCalculator:
                 robot_facility_map = self.set_robot_facility_map(robot_locations)
 
             # Add facility column to tasks
-            tasks_with_facility = tasks_data.copy()
-            tasks_with_facility['facility'] = tasks_with_facility['robot_sn'].map(
-                robot_facility_map
+            tasks_with_facility = tasks_data.copy(deep=False)
+            tasks_with_facility['facility'] = map_labels(
+                tasks_with_facility['robot_sn'], robot_facility_map
             )
 
             facility_metrics = {}
@@ -1605,10 +1676,11 @@ class PerformanceMetricsCalculator:
 
             # Aggregate coverage per day
             tasks_with_dates['date'] = tasks_with_dates['start_time_dt'].dt.date
-            daily_coverage = tasks_with_dates.groupby('date').apply(
-                lambda df: (df['actual_area'].sum() / df['plan_area'].sum() * 100)
-                if df['plan_area'].sum() > 0 else 0
-            ).reset_index(name='daily_coverage')
+            daily_areas = tasks_with_dates.groupby('date')[['actual_area', 'plan_area']].sum()
+            daily_plan_area = daily_areas['plan_area']
+            daily_coverage = (
+                daily_areas['actual_area'] / daily_plan_area.where(daily_plan_area > 0) * 100
+            ).fillna(0).reset_index(name='daily_coverage')
 
             # Create complete date range and merge
             full_dates = pd.DataFrame({'date': pd.date_range(start=start_date, end=end_date)})
@@ -1651,9 +1723,9 @@ class PerformanceMetricsCalculator:
             if not robot_facility_map:
                 robot_facility_map = self.set_robot_facility_map(robot_locations)
 
-            tasks_with_facility = tasks_data.copy()
-            tasks_with_facility['facility'] = tasks_with_facility['robot_sn'].map(
-                robot_facility_map
+            tasks_with_facility = tasks_data.copy(deep=False)
+            tasks_with_facility['facility'] = map_labels(
+                tasks_with_facility['robot_sn'], robot_facility_map
             )
 
             facility_metrics = {}
@@ -1748,9 +1820,9 @@ class PerformanceMetricsCalculator:
             if not robot_building_map:
                 robot_building_map = self.set_robot_facility_map(robot_locations)
 
-            tasks_with_building = tasks_data.copy()
-            tasks_with_building['building'] = tasks_with_building['robot_sn'].map(
-                robot_building_map
+            tasks_with_building = tasks_data.copy(deep=False)
+            tasks_with_building['building'] = map_labels(
+                tasks_with_building['robot_sn'], robot_building_map
             ).fillna('Unknown Building')
 
             # Analyze tasks against targets (if provided)
@@ -1765,7 +1837,7 @@ class PerformanceMetricsCalculator:
             for building_name, building_tasks in tasks_with_building.groupby('building'):
                 result[building_name] = []
 
-                for map_name, map_tasks in building_tasks.groupby('map_name'):
+                for map_name, map_tasks in building_tasks.groupby('map_name', observed=True):
                     if pd.isna(map_name):
                         continue
 
@@ -1865,70 +1937,56 @@ class PerformanceMetricsCalculator:
                 logger.warning(f"Missing columns for target analysis: {missing_cols}")
                 return {}
 
+            first_targets, target_positions = self._first_target_per_map(performance_targets)
+            task_targets = self._task_target_values(tasks_data, first_targets, [
+                'target_efficiency', 'target_area_value', 'target_area_percentage', 'target_duration'
+            ])
+
+            # Flag every task against its map's targets in one pass
+            efficiency = pd.to_numeric(tasks_data['efficiency'], errors='coerce')
+            actual_area_sqm = pd.to_numeric(tasks_data['actual_area'], errors='coerce')
+            duration = pd.to_numeric(tasks_data['duration'], errors='coerce')
+
+            area_storage_type = map_labels(tasks_data['map_name'], pd.Series(
+                first_targets['area_storage_type'].fillna('').astype(str).str.lower().values
+                if 'area_storage_type' in first_targets.columns else '',
+                index=first_targets['map_name'].values
+            ))
+
+            # Area target: absolute sqm value, or percentage of the task's plan_area
+            below_area = (area_storage_type == 'value') & (actual_area_sqm < task_targets['target_area_value'])
+            if 'plan_area' in tasks_data.columns:
+                plan_area_sqm = pd.to_numeric(tasks_data['plan_area'], errors='coerce')
+                actual_percentage = (actual_area_sqm * 10.764) / (plan_area_sqm * 10.764) * 100
+                below_area |= ((area_storage_type == 'percentage') & (plan_area_sqm > 0) &
+                               (actual_percentage < task_targets['target_area_percentage']))
+
+            # Tasks EXCEEDING target duration (both in seconds) are considered poor performance
+            task_flags = pd.DataFrame({
+                'below_efficiency': efficiency < task_targets['target_efficiency'],
+                'below_area': below_area,
+                'exceeding_duration': duration > task_targets['target_duration'],
+            })
+            map_counts = task_flags.groupby(tasks_data['map_name'], observed=True).sum()
+            map_sizes = tasks_data.groupby('map_name', observed=True).size()
+
             target_analysis = {}
 
-            # Group tasks by map_name
-            for map_name, map_tasks in tasks_data.groupby('map_name'):
+            for map_name, total_tasks in map_sizes.items():
                 if pd.isna(map_name) or map_name == '':
                     continue
 
-                # Check if we have targets for this map
-                map_targets = performance_targets[performance_targets['map_name'] == map_name]
-
-                if map_targets.empty:
+                if map_name not in target_positions:
                     # No targets defined for this map - skip
                     continue
 
                 # Get the target values (first row if multiple)
-                target = map_targets.iloc[0]
+                target = first_targets.iloc[target_positions[map_name]]
 
-                total_tasks = len(map_tasks)
-                below_efficiency = 0
-                below_area = 0
-                exceeding_duration = 0
-
-                # Analyze each task
-                for _, task in map_tasks.iterrows():
-                    # 1. Check efficiency target
-                    if pd.notna(target.get('target_efficiency')):
-                        task_efficiency = pd.to_numeric(task['efficiency'], errors='coerce')
-                        if pd.notna(task_efficiency) and task_efficiency < target['target_efficiency']:
-                            below_efficiency += 1
-
-                    # 2. Check area target (depends on area_storage_type)
-                    actual_area_sqm = pd.to_numeric(task['actual_area'], errors='coerce')
-                    if pd.notna(actual_area_sqm):
-                        actual_area_sqft = actual_area_sqm * 10.764  # Convert to sqft
-
-                        area_storage_type = target.get('area_storage_type', '').lower()
-
-                        if area_storage_type == 'value':
-                            # Compare against absolute value in sqft
-                            target_area_value = pd.to_numeric(target.get('target_area_value'), errors='coerce')
-                            if pd.notna(target_area_value) and actual_area_sqm < target_area_value:
-                                below_area += 1
-
-                        elif area_storage_type == 'percentage':
-                            # Compare against percentage of plan_area
-                            if 'plan_area' in task.index and pd.notna(task['plan_area']):
-                                plan_area_sqm = pd.to_numeric(task['plan_area'], errors='coerce')
-                                if pd.notna(plan_area_sqm) and plan_area_sqm > 0:
-                                    plan_area_sqft = plan_area_sqm * 10.764
-                                    actual_percentage = (actual_area_sqft / plan_area_sqft * 100)
-
-                                    target_area_pct = pd.to_numeric(target.get('target_area_percentage'), errors='coerce')
-                                    if pd.notna(target_area_pct) and actual_percentage < target_area_pct:
-                                        below_area += 1
-
-                    # 3. Check duration target (tasks exceeding target are below performance)
-                    target_duration = pd.to_numeric(target.get('target_duration'), errors='coerce')
-                    if pd.notna(target_duration):
-                        task_duration = pd.to_numeric(task['duration'], errors='coerce')
-                        if pd.notna(task_duration):
-                            # Duration in tasks is in seconds, target_duration is also in seconds
-                            # Tasks EXCEEDING target duration are considered poor performance
-                            if task_duration > target_duration:
-                                exceeding_duration += 1
+                total_tasks = int(total_tasks)
+                below_efficiency = int(map_counts.at[map_name, 'below_efficiency'])
+                below_area = int(map_counts.at[map_name, 'below_area'])
+                exceeding_duration = int(map_counts.at[map_name, 'exceeding_duration'])
 
                 # Calculate compliance rates
                 efficiency_compliance = round((total_tasks - below_efficiency) / total_tasks * 100, 1) if total_tasks > 0 else 0
@@ -1962,6 +2020,28 @@ class PerformanceMetricsCalculator:
             logger.error(f"Error analyzing tasks against targets: {e}", exc_info=True)
             return {}
 
+    def _first_target_per_map(self, performance_targets: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[Any, int]]:
+        """First performance target row per map_name, and each map's position in that frame"""
+        first_targets = performance_targets.drop_duplicates('map_name')
+        target_positions = {
+            map_name: position for position, map_name in enumerate(first_targets['map_name'])
+            if pd.notna(map_name)
+        }
+        return first_targets, target_positions
+
+    def _task_target_values(self, tasks_data: pd.DataFrame, first_targets: pd.DataFrame,
+                            target_columns: List[str]) -> pd.DataFrame:
+        """Numeric target values of each task's map, aligned to tasks_data (NaN where a map or column has no target)"""
+        map_names = first_targets['map_name'].values
+        task_targets = pd.DataFrame(index=tasks_data.index)
+        for column in target_columns:
+            if column in first_targets.columns:
+                values = pd.to_numeric(first_targets[column], errors='coerce').values
+                task_targets[column] = map_labels(tasks_data['map_name'], pd.Series(values, index=map_names))
+            else:
+                task_targets[column] = np.nan
+        return task_targets
+
     def calculate_map_days_with_tasks(self, map_df: pd.DataFrame) -> int:
         """Calculate days with tasks for a specific map - uses cached calculation"""
         return self.get_cached_days_with_tasks(map_df)
@@ -1980,8 +2060,8 @@ class PerformanceMetricsCalculator:
                                                operation_metrics: pd.DataFrame = None,
                                                period_length: int = 0) -> List[Dict[str, Any]]:
         """
-        Calculate detailed performance for individual robots
-        FIXED: Proper error handling and empty data handling
+        Calculate detailed performance for individual robots.
+        VECTORIZED: one groupby pass over tasks and one over charging sessions for all robots.
         """
         try:
             # Check if we have robot data
@@ -1989,182 +2069,57 @@ class PerformanceMetricsCalculator:
                 logger.warning("No robot status data available for individual robot performance")
                 return []
 
-            robot_metrics = []
-
-            # Pre-group tasks and charging by robot (may be empty)
-            robot_tasks_groups = {}
-            if not tasks_data.empty and 'robot_sn' in tasks_data.columns:
-                try:
-                    for robot_sn, robot_tasks in tasks_data.groupby('robot_sn'):
-                        robot_tasks_groups[robot_sn] = robot_tasks.copy() # ✅ Copy DataFrame to prevent concurrent modification
-                except Exception as e:
-                    logger.error(f"Error grouping tasks by robot: {e}")
+            task_totals = self._aggregate_tasks_by_robot(tasks_data)
+            charging_totals = self._aggregate_charging_by_robot(charging_data)
+            operation_totals = self._operation_totals_by_robot(operation_metrics)
 
-            robot_charging_groups = {}
-            if not charging_data.empty and 'robot_sn' in charging_data.columns:
-                try:
-                    for robot_sn, robot_charging in charging_data.groupby('robot_sn'):
-                        robot_charging_groups[robot_sn] = robot_charging
-                except Exception as e:
-                    logger.error(f"Error grouping charging by robot: {e}")
+            robot_metrics = []
 
             # Process each robot
-            for idx, robot in robot_status.iterrows():
+            for idx, robot in zip(robot_status.index, robot_status.to_dict('records')):
                 try:
                     robot_sn = robot.get('robot_sn')
                     if not robot_sn or pd.isna(robot_sn):
                         logger.warning(f"Skipping robot with missing serial number at index {idx}")
                         continue
 
-                    # Get data for this robot (may be empty)
-                    robot_tasks = robot_tasks_groups.get(robot_sn, pd.DataFrame())
-                    robot_charging = robot_charging_groups.get(robot_sn, pd.DataFrame())
-
-                    # Handle robot with NO TASKS
-                    if robot_tasks.empty:
-                        logger.info(f"Robot {robot_sn} has no tasks in this period")
-
-                        # Calculate uptime/downtime even without tasks
-                        try:
-                            uptime_metrics = self.calculate_uptime_downtime_metrics(
-                                operation_metrics if operation_metrics is not None else pd.DataFrame(),
-                                robot_tasks,  # Empty, but still pass it
-                                robot_charging,
-                                robot_sn,
-                                period_length
-                            )
-                        except Exception as e:
-                            logger.warning(f"Error calculating uptime for robot {robot_sn} without tasks: {e}")
-                            uptime_metrics = {
-                                'uptime_hours': 0.0,
-                                'downtime_hours': 0.0,
-                                'idle_hours': 0.0,
-                                'working_hours': 0.0,
-                                'charging_hours': 0.0,
-                                'charging_ratio': 0.0,
-                                'uptime_ratio': 0.0,
-                                'working_ratio': 0.0,
-                                'idle_ratio': 0.0,
-                                'utilization_score': 0.0
-                            }
-
-                        robot_metrics.append({
-                            'robot_id': robot_sn,
-                            'robot_name': robot.get('robot_name', f'Robot {robot_sn}'),
-                            'location': self._get_robot_location_name(robot),
-                            'total_tasks': 0,
-                            'tasks_completed': 0,
-                            'total_area_cleaned': 0,
-                            'average_coverage': 0.0,
-                            'days_with_tasks': 0,
-                            'completion_rate': 0.0,
-                            'running_hours': 0.0,
-                            'avg_efficiency': 0.0,
-                            'charging_sessions': len(robot_charging) if not robot_charging.empty else 0,
-                            'battery_level': robot.get('battery_level', 0),
-                            'water_level': robot.get('water_level', 0),
-                            'sewage_level': robot.get('sewage_level', 0),
-                            # Use uptime metrics calculated in the try block
-                            'uptime_hours': uptime_metrics.get('uptime_hours', 0.0),
-                            'downtime_hours': uptime_metrics.get('downtime_hours', 0.0),
-                            'idle_hours': uptime_metrics.get('idle_hours', 0.0),
-                            'working_hours': 0.0,  # Correctly 0 since no tasks
-                            'charging_hours': uptime_metrics.get('charging_hours', 0.0),
-                            'charging_ratio': uptime_metrics.get('charging_ratio', 0.0),
-                            'uptime_ratio': uptime_metrics.get('uptime_ratio', 0.0),
-                            'working_ratio': 0.0,  # Correctly 0 since no tasks
-                            'idle_ratio': uptime_metrics.get('idle_ratio', 0.0),
-                            'utilization_score': uptime_metrics.get('utilization_score', 0.0)
-                        })
-                        continue
-
-                    # Normal calculation for robots WITH tasks
-                    total_tasks = len(robot_tasks)
-
-                    # Use cached calculations if available
-                    try:
-                        status_counts = self.get_cached_status_counts(robot_tasks)
-                        completed_tasks = status_counts['completed']
-                    except Exception as e:
-                        logger.warning(f"Cache miss for robot {robot_sn} status counts: {e}")
-                        # Fallback: count manually
-                        completed_tasks = len(robot_tasks[robot_tasks['status'].str.lower().str.contains('end|complet|finish', na=False)])
+                    tasks = task_totals.get(robot_sn)
+                    charging = charging_totals.get(robot_sn, {'sessions': 0, 'hours': 0.0})
+                    working_hours = tasks['running_hours'] if tasks else 0.0
 
                     try:
-                        running_hours = self.get_cached_duration_sum(robot_tasks)
-                    except Exception as e:
-                        logger.warning(f"Cache miss for robot {robot_sn} duration sum: {e}")
-                        # Fallback: calculate manually
-                        running_hours = pd.to_numeric(robot_tasks['duration'], errors='coerce').fillna(0).sum() / 3600
-
-                    # Area calculations
-                    total_area_cleaned = 0
-                    total_planned_area = 0
-                    if 'actual_area' in robot_tasks.columns:
-                        total_area_cleaned = robot_tasks['actual_area'].fillna(0).sum() * 10.764
-                    if 'plan_area' in robot_tasks.columns:
-                        total_planned_area = robot_tasks['plan_area'].fillna(0).sum() * 10.764
-
-                    average_coverage = (total_area_cleaned / total_planned_area * 100) if total_planned_area > 0 else 0
-
-                    # Days with tasks
-                    try:
-                        robot_days_with_tasks = self.get_cached_days_with_tasks(robot_tasks)
-                    except Exception as e:
-                        logger.warning(f"Cache miss for robot {robot_sn} days: {e}")
-                        # Fallback
-                        if 'start_time' in robot_tasks.columns:
-                            dates = pd.to_datetime(robot_tasks['start_time'], errors='coerce').dt.date
-                            robot_days_with_tasks = dates.nunique()
-                        else:
-                            robot_days_with_tasks = 0
-
-                    completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
-
-                    location_name = self._get_robot_location_name(robot)
-
-                    # Average efficiency
-                    avg_efficiency = 0
-                    if 'efficiency' in robot_tasks.columns:
-                        avg_efficiency = robot_tasks['efficiency'].fillna(0).mean()
-
-                    # Calculate uptime metrics
-                    try:
-                        uptime_metrics = self.calculate_uptime_downtime_metrics(
-                            operation_metrics if operation_metrics is not None else pd.DataFrame(),
-                            robot_tasks,
-                            robot_charging,
-                            robot_sn,
-                            period_length
+                        if operation_totals is None:
+                            raise KeyError("operation metrics are missing robot_sn/total_records/online_records")
+                        uptime_metrics = self._uptime_metrics_from_totals(
+                            operation_totals.get(robot_sn), working_hours, charging['hours'], period_length
                         )
                     except Exception as e:
-                        logger.warning(f"Error calculating uptime for {robot_sn}: {e}")
-                        uptime_metrics = {
-                            'uptime_hours': 0.0,
-                            'downtime_hours': 0.0,
-                            'idle_hours': 0.0,
-                            'working_hours': 0.0,
-                            'charging_hours': 0.0,
-                            'charging_ratio': 0.0,
-                            'uptime_ratio': 0.0,
-                            'working_ratio': 0.0,
-                            'idle_ratio': 0.0,
-                            'utilization_score': 0.0
+                        logger.error(f"Error calculating uptime for {robot_sn}: {e}")
+                        uptime_metrics = self._full_uptime_metrics(working_hours, charging['hours'], period_length)
+
+                    # Handle robot with NO TASKS
+                    if not tasks:
+                        logger.info(f"Robot {robot_sn} has no tasks in this period")
+                        tasks = {
+                            'total_tasks': 0, 'completed_tasks': 0, 'total_area_cleaned': 0, 'average_coverage': 0.0,
+                            'days_with_tasks': 0, 'completion_rate': 0.0, 'running_hours': 0.0, 'avg_efficiency': 0.0,
                         }
+                        # Working time is correctly 0 since no tasks
+                        uptime_metrics = dict(uptime_metrics, working_hours=0.0, working_ratio=0.0)
 
                     robot_metrics.append({
                         'robot_id': robot_sn,
                         'robot_name': robot.get('robot_name', f'Robot {robot_sn}'),
-                        'location': location_name,
-                        'total_tasks': total_tasks,
-                        'tasks_completed': completed_tasks,
-                        'total_area_cleaned': round(total_area_cleaned, 0),
-                        'average_coverage': round(average_coverage, 1),
-                        'days_with_tasks': robot_days_with_tasks,
-                        'completion_rate': round(completion_rate, 1),
-                        'running_hours': round(running_hours, 1),
-                        'avg_efficiency': round(avg_efficiency, 1),
-                        'charging_sessions': len(robot_charging) if not robot_charging.empty else 0,
+                        'location': self._get_robot_location_name(robot),
+                        'total_tasks': tasks['total_tasks'],
+                        'tasks_completed': tasks['completed_tasks'],
+                        'total_area_cleaned': round(tasks['total_area_cleaned'], 0),
+                        'average_coverage': round(tasks['average_coverage'], 1),
+                        'days_with_tasks': tasks['days_with_tasks'],
+                        'completion_rate': round(tasks['completion_rate'], 1),
+                        'running_hours': round(tasks['running_hours'], 1),
+                        'avg_efficiency': round(tasks['avg_efficiency'], 1),
+                        'charging_sessions': charging['sessions'],
                         'battery_level': robot.get('battery_level', 0),
                         'water_level': robot.get('water_level', 0),
                         'sewage_level': robot.get('sewage_level', 0),
@@ -2194,6 +2149,83 @@ class PerformanceMetricsCalculator:
             logger.error(f"Critical error in calculate_individual_robot_performance: {e}", exc_info=True)
             return []
 
+    def _aggregate_tasks_by_robot(self, tasks_data: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-robot task totals in one groupby pass: task and completion counts, running hours,
+        area cleaned/coverage, active days and average efficiency (robots without tasks are absent)
+        """
+        if tasks_data.empty or 'robot_sn' not in tasks_data.columns:
+            return {}
+
+        columns = tasks_data.columns
+        completed = tasks_data['status'].astype(str).str.contains(
+            'end|complet|finish', case=False, na=False
+        ) if 'status' in columns else pd.Series(False, index=tasks_data.index)
+
+        per_task = {'completed': completed.astype(int)}
+        for column in ['duration', 'actual_area', 'plan_area', 'efficiency']:
+            if column in columns:
+                per_task[column] = pd.to_numeric(tasks_data[column], errors='coerce').fillna(0)
+            else:
+                per_task[column] = pd.Series(0, index=tasks_data.index)
+        totals = _segment_sums(tasks_data['robot_sn'], per_task)
+
+        days_with_tasks = pd.Series(0, index=totals.index)
+        if 'start_time' in columns:
+            start_dates = pd.to_datetime(tasks_data['start_time'], errors='coerce').dt.normalize()
+            days_with_tasks = start_dates.groupby(tasks_data['robot_sn'], observed=True).nunique().reindex(totals.index, fill_value=0)
+
+        total_area_cleaned = totals['actual_area'] * 10.764 if 'actual_area' in columns else pd.Series(0, index=totals.index)
+        total_planned_area = totals['plan_area'] * 10.764 if 'plan_area' in columns else pd.Series(0, index=totals.index)
+        avg_efficiency = totals['efficiency'] / totals['count'] if 'efficiency' in columns else pd.Series(0, index=totals.index)
+
+        robot_totals = {}
+        for robot_sn, total_tasks, completed_tasks, duration, area_cleaned, planned_area, efficiency, active_days in zip(
+                totals.index, totals['count'].tolist(), totals['completed'].tolist(),
+                totals['duration'].to_numpy(), total_area_cleaned.to_numpy(), total_planned_area.to_numpy(),
+                avg_efficiency.to_numpy(), days_with_tasks.tolist()):
+            robot_totals[robot_sn] = {
+                'total_tasks': total_tasks,
+                'completed_tasks': completed_tasks,
+                'running_hours': duration / 3600,
+                'total_area_cleaned': area_cleaned,
+                'average_coverage': (area_cleaned / planned_area * 100) if planned_area > 0 else 0,
+                'days_with_tasks': active_days,
+                'completion_rate': (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0,
+                'avg_efficiency': efficiency,
+            }
+        return robot_totals
+
+    def _aggregate_charging_by_robot(self, charging_data: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+        """Per-robot charging session counts and charging hours in one groupby pass"""
+        if charging_data.empty or 'robot_sn' not in charging_data.columns:
+            return {}
+
+        if 'duration' in charging_data.columns:
+            hours = self._charging_hours(charging_data)
+        else:
+            hours = pd.Series(0.0, index=charging_data.index)
+
+        totals = _segment_sums(charging_data['robot_sn'], {'hours': hours})
+        return {
+            robot_sn: {'sessions': sessions, 'hours': charging_hours}
+            for robot_sn, sessions, charging_hours in zip(totals.index, totals['count'].tolist(), totals['hours'].to_numpy())
+        }
+
+    def _operation_totals_by_robot(self, operation_metrics: Optional[pd.DataFrame]) -> Optional[Dict[str, Tuple[Any, Any]]]:
+        """
+        (total_records, online_records) of each robot's first operation metrics row.
+        Empty when there are no operation metrics, None when the frame lacks the needed columns.
+        """
+        if operation_metrics is None or operation_metrics.empty:
+            return {}
+
+        if not {'robot_sn', 'total_records', 'online_records'}.issubset(operation_metrics.columns):
+            return None
+
+        first_rows = operation_metrics.drop_duplicates('robot_sn')
+        return dict(zip(first_rows['robot_sn'],
+                        zip(first_rows['total_records'].tolist(), first_rows['online_records'].tolist())))
 
     def _get_robot_location_name(self, robot: pd.Series) -> str:
         """
@@ -2421,7 +2453,7 @@ class PerformanceMetricsCalculator:
 
                 if not tasks_filtered.empty:
                     # Vectorized savings calculation
-                    tasks_filtered['date_str'] = tasks_filtered['start_time_dt'].dt.strftime('%m/%d')
+                    tasks_filtered['date_str'] = self._format_dates(tasks_filtered['start_time_dt'])
                     tasks_filtered['area_sqft'] = pd.to_numeric(
                         tasks_filtered['actual_area'], errors='coerce'
                     ).fillna(0) * 10.764
@@ -2586,7 +2618,7 @@ class PerformanceMetricsCalculator:
 
                 if not tasks_filtered.empty:
                     # Add calculated columns
-                    tasks_filtered['date_str'] = tasks_filtered['start_time_dt'].dt.strftime('%m/%d')
+                    tasks_filtered['date_str'] = self._format_dates(tasks_filtered['start_time_dt'])
                     tasks_filtered['energy'] = pd.to_numeric(
                         tasks_filtered['consumption'], errors='coerce'
                     ).fillna(0)
@@ -2604,12 +2636,12 @@ class PerformanceMetricsCalculator:
                         'water': 'sum',
                         'task_savings': 'sum'
                     })
+                    daily_agg = daily_agg[daily_agg.index.isin(list(daily_data))]
 
-                    for date_str, row in daily_agg.iterrows():
-                        if date_str in daily_data:
-                            daily_data[date_str]['energy_consumption'] = row['energy']
-                            daily_data[date_str]['water_usage'] = row['water']
-                            daily_data[date_str]['daily_savings'] = row['task_savings']
+                    for column, key in [('energy', 'energy_consumption'), ('water', 'water_usage'),
+                                        ('task_savings', 'daily_savings')]:
+                        for date_str, value in zip(daily_agg.index, daily_agg[column].to_numpy()):
+                            daily_data[date_str][key] = value
 
             # Process charging data
             if not charging_data.empty and 'start_time' in charging_data.columns:
@@ -2620,19 +2652,21 @@ class PerformanceMetricsCalculator:
                 ]
 
                 if not charging_filtered.empty:
-                    charging_filtered['date_str'] = charging_filtered['start_time_dt'].dt.strftime('%m/%d')
-                    charging_filtered['duration_min'] = charging_filtered['duration'].apply(
-                        self._parse_duration_str_to_minutes
-                    )
-
-                    # Group and count
-                    for date_str, date_charges in charging_filtered.groupby('date_str'):
-                        if date_str in daily_data:
-                            daily_data[date_str]['charging_sessions'] = len(date_charges)
-                            valid_durations = date_charges['duration_min'][date_charges['duration_min'] > 0]
-                            if len(valid_durations) > 0:
-                                daily_data[date_str]['charging_duration_total'] = valid_durations.sum()
-                                daily_data[date_str]['charging_session_count'] = len(valid_durations)
+                    charging_filtered['date_str'] = self._format_dates(charging_filtered['start_time_dt'])
+                    charging_filtered['duration_min'] = self._charging_minutes(charging_filtered)
+
+                    # Group and count (sessions, plus total and count of parseable durations)
+                    valid_durations = charging_filtered['duration_min'].where(charging_filtered['duration_min'] > 0)
+                    daily_charging = valid_durations.groupby(charging_filtered['date_str']).agg(['size', 'sum', 'count'])
+                    daily_charging = daily_charging[daily_charging.index.isin(list(daily_data))]
+
+                    for date_str, sessions, duration_total, session_count in zip(
+                            daily_charging.index, daily_charging['size'].tolist(),
+                            daily_charging['sum'].to_numpy(), daily_charging['count'].tolist()):
+                        daily_data[date_str]['charging_sessions'] = sessions
+                        if session_count > 0:
+                            daily_data[date_str]['charging_duration_total'] = duration_total
+                            daily_data[date_str]['charging_session_count'] = session_count
 
             # Convert to lists
             dates = list(daily_data.keys())
@@ -3146,63 +3180,57 @@ class PerformanceMetricsCalculator:
                 logger.warning(f"Missing required columns in tasks_data for target analysis")
                 return {}
 
-            target_analysis = {}
+            target_columns = ['target_efficiency', 'target_area_value', 'target_area_percentage', 'target_duration']
+            missing_target_cols = [col for col in target_columns + ['area_storage_type']
+                                   if col not in performance_targets.columns]
+            if missing_target_cols:
+                logger.error(f"Missing columns in performance targets: {missing_target_cols}")
+                return {}
+
+            first_targets, target_positions = self._first_target_per_map(performance_targets)
+            task_targets = self._task_target_values(tasks_data, first_targets, target_columns)
 
-            # Group tasks by map_name
-            for map_name, map_tasks in tasks_data.groupby('map_name'):
-                # Check if we have targets for this map
-                map_targets = performance_targets[performance_targets['map_name'] == map_name]
+            # Flag every task against its map's targets in one pass
+            efficiency = pd.to_numeric(tasks_data['efficiency'], errors='coerce')
+            actual_area_sqft = pd.to_numeric(tasks_data['actual_area'], errors='coerce') * 10.764  # Convert to sqft
+            duration = pd.to_numeric(tasks_data['duration'], errors='coerce')
+            area_storage_type = map_labels(tasks_data['map_name'], pd.Series(
+                first_targets['area_storage_type'].values, index=first_targets['map_name'].values
+            ))
 
-                if map_targets.empty:
+            # Area target: absolute value, or percentage of the task's plan_area
+            below_area = (area_storage_type == 'value') & (actual_area_sqft < task_targets['target_area_value'])
+            if 'plan_area' in tasks_data.columns:
+                plan_area_sqft = pd.to_numeric(tasks_data['plan_area'], errors='coerce') * 10.764
+                actual_percentage = (actual_area_sqft / plan_area_sqft.where(plan_area_sqft > 0) * 100).fillna(0)
+                actual_percentage = actual_percentage.where(plan_area_sqft.notna() & actual_area_sqft.notna())
+                below_area |= ((area_storage_type == 'percentage') &
+                               (actual_percentage < task_targets['target_area_percentage']))
+
+            # Tasks EXCEEDING target duration (both in seconds) are considered "below target"
+            task_flags = pd.DataFrame({
+                'below_efficiency': efficiency < task_targets['target_efficiency'],
+                'below_area': below_area,
+                'exceeding_duration': duration > task_targets['target_duration'],
+            })
+            map_counts = task_flags.groupby(tasks_data['map_name'], observed=True).sum()
+            map_sizes = tasks_data.groupby('map_name', observed=True).size()
+
+            target_analysis = {}
+
+            for map_name, total_tasks in map_sizes.items():
+                if map_name not in target_positions:
                     # No targets defined for this map - skip
                     logger.debug(f"No performance targets found for map: {map_name}")
                     continue
 
                 # Get the target values (first row if multiple)
-                target = map_targets.iloc[0]
+                target = first_targets.iloc[target_positions[map_name]]
 
-                total_tasks = len(map_tasks)
-                below_efficiency = 0
-                below_area = 0
-                below_duration = 0
-
-                # Analyze each task
-                for _, task in map_tasks.iterrows():
-                    # 1. Check efficiency target
-                    if pd.notna(target['target_efficiency']):
-                        task_efficiency = pd.to_numeric(task['efficiency'], errors='coerce')
-                        if pd.notna(task_efficiency) and task_efficiency < target['target_efficiency']:
-                            below_efficiency += 1
-
-                    # 2. Check area target (depends on area_storage_type)
-                    actual_area_sqm = pd.to_numeric(task['actual_area'], errors='coerce')
-                    if pd.notna(actual_area_sqm):
-                        actual_area_sqft = actual_area_sqm * 10.764  # Convert to sqft
-
-                        if target['area_storage_type'] == 'value':
-                            # Compare against absolute value
-                            if pd.notna(target['target_area_value']) and actual_area_sqft < target['target_area_value']:
-                                below_area += 1
-
-                        elif target['area_storage_type'] == 'percentage':
-                            # Compare against percentage of plan_area
-                            if 'plan_area' in task and pd.notna(task['plan_area']):
-                                plan_area_sqm = pd.to_numeric(task['plan_area'], errors='coerce')
-                                if pd.notna(plan_area_sqm):
-                                    plan_area_sqft = plan_area_sqm * 10.764
-                                    actual_percentage = (actual_area_sqft / plan_area_sqft * 100) if plan_area_sqft > 0 else 0
-
-                                    if pd.notna(target['target_area_percentage']) and actual_percentage < target['target_area_percentage']:
-                                        below_area += 1
-
-                    # 3. Check duration target
-                    if pd.notna(target['target_duration']):
-                        task_duration = pd.to_numeric(task['duration'], errors='coerce')
-                        if pd.notna(task_duration):
-                            # Duration in tasks is in seconds, target_duration is also in seconds
-                            # Tasks EXCEEDING target duration are considered "below target"
-                            if task_duration > target['target_duration']:
-                                below_duration += 1
+                total_tasks = int(total_tasks)
+                below_efficiency = int(map_counts.at[map_name, 'below_efficiency'])
+                below_area = int(map_counts.at[map_name, 'below_area'])
+                below_duration = int(map_counts.at[map_name, 'exceeding_duration'])
 
                 # Store results only if we have targets
                 target_analysis[map_name] = {
@@ -0,0 +1,316 @@
+"""
+Chart images for PDF reports.
+
+ChartDataFormatter.pdf_chart_specs turns report content into chart specs: plain, picklable dicts
+holding everything a chart image depends on. This module draws them:
+
+- Each chart is its own matplotlib Figure on an Agg canvas (no pyplot current-figure state, so
+  reports rendering at the same time cannot save each other's figures); the style is applied with
+  rc_context under a lock while the figure is built, instead of changing the process-wide rcParams.
+  Artists keep the style they were created with, so PNGs are rasterized outside the lock
+- Images are cached by a hash of the spec, image format and PDF_CHART_VERSION, so repeat reports
+  (and charts whose data did not change) skip drawing
+- Charts missing from the cache are drawn in a process pool when one is configured, falling back
+  to drawing in process when worker processes are unavailable (e.g. AWS Lambda)
+- PNG at PDF_CHART_DPI, or SVG (text kept as text), as data URIs for <img> tags
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Any, Dict, Optional
+
+from ..services.worker_context import report_worker_context
+
+logger = logging.getLogger(__name__)
+
+# Bump when chart drawing changes so cached images are drawn again
+PDF_CHART_VERSION = 1
+
+PDF_CHART_DPI = 150
+
+# Matches the web (Chart.js) charts
+PDF_CHART_STYLE = {
+    'figure.facecolor': 'white',
+    'axes.facecolor': 'white',
+    'axes.edgecolor': '#dee2e6',
+    'axes.linewidth': 0.8,
+    'xtick.color': '#666',
+    'ytick.color': '#666',
+    'text.color': '#333',
+    'font.size': 10
+}
+
+# SVG output: text stays text (smaller files than glyph paths) and element ids are reproducible
+PDF_CHART_SVG_STYLE = {
+    'svg.fonttype': 'none',
+    'svg.hashsalt': 'pdf-charts',
+}
+
+PDF_CHART_MIME_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+# rc_context changes matplotlib's global rcParams; one chart is built at a time per process
+_draw_lock = threading.Lock()
+
+# Chart render worker processes and the image cache, shared by all reports in this process
+_chart_pool: Optional[ProcessPoolExecutor] = None
+_chart_pool_lock = threading.Lock()
+_chart_image_cache: Optional['ChartImageCache'] = None
+_chart_image_cache_lock = threading.Lock()
+
+
+class ChartImageCache:
+    """Bounded, thread-safe LRU of chart image data URIs with hit/miss counters"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._images: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            image = self._images.get(key)
+            if image is None:
+                self.stats['misses'] += 1
+                return None
+            self._images.move_to_end(key)
+            self.stats['hits'] += 1
+            return image
+
+    def put(self, key: str, image: str):
+        with self._lock:
+            self._images[key] = image
+            self._images.move_to_end(key)
+            while len(self._images) > self.max_entries:
+                self._images.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+
+
+def get_chart_image_cache(max_entries: int = 256) -> ChartImageCache:
+    """The process-wide chart image cache, created with max_entries on first use"""
+    global _chart_image_cache
+    with _chart_image_cache_lock:
+        if _chart_image_cache is None:
+            _chart_image_cache = ChartImageCache(max_entries)
+        return _chart_image_cache
+
+
+def chart_image_key(spec: Dict[str, Any], image_format: str) -> str:
+    """Content hash of a chart image: its spec, the output format and the drawing version"""
+    identity = json.dumps({'version': PDF_CHART_VERSION, 'dpi': PDF_CHART_DPI, 'format': image_format,
+                           'spec': spec}, sort_keys=True, default=str)
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+
+# ============================================================================
+# Drawing
+# ============================================================================
+
+def render_pdf_chart(spec: Dict[str, Any], image_format: str = 'png') -> str:
+    """Draw one chart spec and return it as a data URI"""
+    import matplotlib
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    with _draw_lock, matplotlib.rc_context(PDF_CHART_STYLE):
+        fig = Figure(figsize=spec['figsize'])
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+        CHART_DRAWERS[spec['kind']](fig, ax, spec)
+        if spec['kind'] == 'pie':
+            bbox_inches = None
+        else:
+            fig.tight_layout()
+            bbox_inches = 'tight'
+
+    buffer = BytesIO()
+    if image_format == 'svg':
+        # The SVG writer reads svg.* rcParams while saving
+        with _draw_lock, matplotlib.rc_context(PDF_CHART_SVG_STYLE):
+            fig.savefig(buffer, format='svg', bbox_inches=bbox_inches, facecolor='white', edgecolor='none',
+                        metadata={'Date': None})
+    else:
+        fig.savefig(buffer, format=image_format, bbox_inches=bbox_inches, facecolor='white', edgecolor='none',
+                    dpi=PDF_CHART_DPI)
+
+    chart_img = base64.b64encode(buffer.getvalue()).decode()
+    return f"data:{PDF_CHART_MIME_TYPES[image_format]};base64,{chart_img}"
+
+
+def _draw_pie(fig, ax, spec: Dict[str, Any]):
+    if spec['sizes']:
+        wedges, texts, autotexts = ax.pie(spec['sizes'], labels=spec['labels'], colors=spec['colors'],
+                                         autopct='%1.1f%%', startangle=spec['startangle'],
+                                         textprops={'fontsize': 11, 'color': '#333'})
+
+        # Style the text
+        for autotext in autotexts:
+            autotext.set_color('white')
+            autotext.set_fontweight('bold')
+
+    ax.set_title(spec['title'], fontsize=14, fontweight='bold', pad=20)
+
+
+def _draw_bar_line(fig, ax1, spec: Dict[str, Any]):
+    """Weekday bars on the left axis and a weekday line on the right axis"""
+    import numpy as np
+
+    bars, line = spec['bars'], spec['line']
+    x = np.arange(len(spec['labels']))
+
+    ax1.bar(x, bars['data'], 0.8, color=bars['color'], edgecolor=bars['edgecolor'],
+            linewidth=1, label=bars['label'])
+
+    ax1.set_xlabel('Day of Week', fontsize=spec['label_size'])
+    ax1.set_ylabel(bars['ylabel'], fontsize=spec['label_size'], color=bars['axis_color'])
+    if spec['ylim_zero']:
+        ax1.set_ylim(bottom=0)
+    ax1.set_title(spec['title'], fontsize=spec['title_size'], fontweight='bold', pad=spec['title_pad'])
+    ax1.set_xticks(x)
+    ax1.set_xticklabels(spec['labels'])
+    ax1.tick_params(axis='y', labelcolor=bars['axis_color'])
+
+    ax2 = ax1.twinx()
+    ax2.plot(x, line['data'], color=line['color'], linewidth=line['linewidth'], marker='o',
+             markersize=line['markersize'], markerfacecolor=line['color'], markeredgecolor=line['color'],
+             label=line['label'])
+
+    ax2.set_ylabel(line['ylabel'], fontsize=spec['label_size'], color=line['color'])
+    if spec['ylim_zero']:
+        ax2.set_ylim(bottom=0)
+    ax2.tick_params(axis='y', labelcolor=line['color'])
+
+    ax1.legend(loc='upper left')
+    ax2.legend(loc='upper right')
+
+
+def _draw_double_bar(fig, ax1, spec: Dict[str, Any]):
+    """Side-by-side weekday bars on the left and right axes"""
+    import numpy as np
+
+    left, right = spec['left'], spec['right']
+    x = np.arange(len(spec['labels']))
+    width = 0.35
+
+    ax1.bar(x - width/2, left['data'], width, color=left['color'], edgecolor=left['color'],
+            linewidth=1, label=left['label'])
+
+    ax1.set_xlabel('Day of Week', fontsize=12)
+    ax1.set_ylabel(left['ylabel'], fontsize=12, color=left['axis_color'])
+    ax1.set_title(spec['title'], fontsize=14, fontweight='bold', pad=20)
+    ax1.set_xticks(x)
+    ax1.set_xticklabels(spec['labels'])
+    ax1.tick_params(axis='y', labelcolor=left['axis_color'])
+
+    ax2 = ax1.twinx()
+    ax2.bar(x + width/2, right['data'], width, color=right['color'], edgecolor=right['color'],
+            linewidth=1, label=right['label'])
+
+    ax2.set_ylabel(right['ylabel'], fontsize=12, color=right['axis_color'])
+    ax2.tick_params(axis='y', labelcolor=right['axis_color'])
+
+    ax1.legend(loc='upper left')
+    ax2.legend(loc='upper right')
+
+
+CHART_DRAWERS = {
+    'pie': _draw_pie,
+    'bar_line': _draw_bar_line,
+    'double_bar': _draw_double_bar,
+}
+
+
+# ============================================================================
+# Rendering report charts: cache, process pool, in-process fallback
+# ============================================================================
+
+def render_pdf_charts(specs: Dict[str, Dict[str, Any]], image_format: str = 'png', render_workers: int = 0,
+                      cache: Optional[ChartImageCache] = None) -> Dict[str, str]:
+    """
+    Data URIs of all chart specs, in spec order. Cached images are reused; the others are drawn
+    in the chart process pool (render_workers > 0 and more than one chart to draw) or in process.
+    """
+    keys = {name: chart_image_key(spec, image_format) for name, spec in specs.items()}
+    images = {}
+    if cache is not None:
+        for name, key in keys.items():
+            image = cache.get(key)
+            if image is not None:
+                images[name] = image
+
+    missing = [name for name in specs if name not in images]
+    if render_workers and len(missing) > 1:
+        images.update(_render_in_pool(specs, missing, image_format, render_workers))
+    for name in missing:
+        if name not in images:
+            images[name] = render_pdf_chart(specs[name], image_format)
+        if cache is not None:
+            cache.put(keys[name], images[name])
+
+    return {name: images[name] for name in specs}
+
+
+def _render_in_pool(specs: Dict[str, Dict[str, Any]], names, image_format: str,
+                    render_workers: int) -> Dict[str, str]:
+    """Charts drawn by the worker processes; charts whose worker failed are left out"""
+    try:
+        pool = _chart_process_pool(render_workers)
+        futures = {name: pool.submit(render_pdf_chart, specs[name], image_format) for name in names}
+    except Exception as e:
+        logger.warning(f"Chart process pool unavailable ({e}); drawing charts in process")
+        return {}
+
+    images = {}
+    for name, future in futures.items():
+        try:
+            images[name] = future.result()
+        except Exception as e:
+            logger.warning(f"Chart {name} failed in worker ({e}); drawing in process")
+            if isinstance(e, BrokenProcessPool):
+                _discard_chart_process_pool(pool)
+    return images
+
+
+def _chart_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    The chart process pool, started on first use. Workers come from the report worker context
+    (see worker_context), whose forkserver has this module and matplotlib preloaded.
+    """
+    global _chart_pool
+    with _chart_pool_lock:
+        if _chart_pool is None:
+            context = report_worker_context()
+            _chart_pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+            logger.info(f"Started chart process pool with {max_workers} workers ({context.get_start_method()})")
+        return _chart_pool
+
+
+def _discard_chart_process_pool(pool: ProcessPoolExecutor):
+    """Drop a pool whose workers died, so the next report starts a new one"""
+    global _chart_pool
+    with _chart_pool_lock:
+        if _chart_pool is pool:
+            _chart_pool = None
+    pool.shutdown(wait=False)
+
+
+def shutdown_chart_process_pool():
+    """Stop the chart worker processes (a later report starts a new pool)"""
+    global _chart_pool
+    with _chart_pool_lock:
+        if _chart_pool is not None:
+            _chart_pool.shutdown(wait=True, cancel_futures=True)
+            _chart_pool = None
@@ -17,13 +17,16 @@ KEY CHANGES:
 import logging
 import os
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import pandas as pd
 from pudu.configs.database_config_loader import DynamicDatabaseConfig
 from pudu.rds.rdsTable import RDSTable
 from ..templates.robot_html_template import RobotPerformanceTemplate
 from ..templates.robot_pdf_template import RobotPDFTemplate
 from ..services.database_data_service import DatabaseDataService
+from ..services.metrics_cache import ReportMetricsCache
+from ..services.pdf_browser_pool import PDF_OPTIONS, get_pdf_browser_pool
+from pudu.services.daily_rollup_service import ROLLUP_SEAL_DELAY
 from .report_config import ReportConfig, ReportDetailLevel
 from ..calculators.chart_data_formatter import ChartDataFormatter
 
@@ -44,7 +47,7 @@ class ReportGenerator:
         self.config_path = config_path
         self.output_dir = output_dir
         self.config = DynamicDatabaseConfig(config_path)
-        self.chart_formatter = ChartDataFormatter()
+        self.chart_formatter = ChartDataFormatter.from_config(self.config.config.get('pdf_charts', {}))
         self.connection_config = "credentials.yaml"
 
         # Store report configuration
@@ -59,13 +62,23 @@ class ReportGenerator:
             self.report_config.get_date_range()[1]
         )
 
+        # Computed metrics of earlier identical reports (None when report_metrics_cache is disabled)
+        self.metrics_cache = ReportMetricsCache.from_config(
+            self.config.config.get('report_metrics_cache', {}), self.config.config.get('region', 'us-east-2')
+        )
+
         # Initialize both HTML and PDF templates
         self.html_template = RobotPerformanceTemplate()
-        self.pdf_template = RobotPDFTemplate()
+        self.pdf_template = RobotPDFTemplate(self.chart_formatter)
 
         # Initialize weasyprint for PDF generation
         self._init_pdf_capability()
 
+        # Warm browser pool shared by all reports in this process (None: a browser per PDF)
+        pdf_pool_config = self.config.config.get('pdf_browser_pool', {})
+        self.pdf_browser_pool = (get_pdf_browser_pool(pdf_pool_config)
+                                 if self.pdf_enabled and pdf_pool_config.get('enabled', True) else None)
+
         # Create output directory if it doesn't exist
         self._ensure_output_directory()
 
@@ -98,6 +111,9 @@ class ReportGenerator:
             raise Exception("PDF generation not available. Install playwright: pip install playwright")
 
         try:
+            if self.pdf_browser_pool is not None:
+                return await self.pdf_browser_pool.render_pdf_async(html_content)
+
             from playwright.async_api import async_playwright
 
             async with async_playwright() as p:
@@ -108,16 +124,7 @@ class ReportGenerator:
                 await page.set_content(html_content, wait_until='networkidle')
 
                 # Generate PDF as bytes
-                pdf_bytes = await page.pdf(
-                    format='A4',
-                    margin={
-                        'top': '0.75in',
-                        'right': '0.75in',
-                        'bottom': '0.75in',
-                        'left': '0.75in'
-                    },
-                    print_background=True
-                )
+                pdf_bytes = await page.pdf(**PDF_OPTIONS)
 
                 await browser.close()
                 return pdf_bytes
@@ -204,29 +211,24 @@ class ReportGenerator:
 
             # Convert HTML to PDF using Playwright
             logger.info("Converting HTML to PDF using Playwright...")
-            from playwright.sync_api import sync_playwright
+            if self.pdf_browser_pool is not None:
+                pdf_bytes = self.pdf_browser_pool.render_pdf(html_content)
+                with open(file_path, 'wb') as f:
+                    f.write(pdf_bytes)
+            else:
+                from playwright.sync_api import sync_playwright
 
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
+                with sync_playwright() as p:
+                    browser = p.chromium.launch(headless=True)
+                    page = browser.new_page()
 
-                # Set content and wait for it to load
-                page.set_content(html_content, wait_until='networkidle')
-
-                # Generate PDF with options
-                page.pdf(
-                    path=file_path,
-                    format='A4',
-                    margin={
-                        'top': '0.75in',
-                        'right': '0.75in',
-                        'bottom': '0.75in',
-                        'left': '0.75in'
-                    },
-                    print_background=True
-                )
+                    # Set content and wait for it to load
+                    page.set_content(html_content, wait_until='networkidle')
+
+                    # Generate PDF with options
+                    page.pdf(path=file_path, **PDF_OPTIONS)
 
-                browser.close()
+                    browser.close()
 
             file_size = os.path.getsize(file_path)
             logger.info(f"Successfully saved PDF report to {file_path} (Size: {file_size:,} bytes)")
@@ -373,9 +375,9 @@ class ReportGenerator:
         start_time = datetime.now()
 
         try:
-            # Clear calculator caches
-            self.data_service.metrics_calculator.clear_all_caches()
-            logger.info("✓ Cleared calculation caches for new report")
+            # Fresh bounded computation context for this report (drops the previous report's results)
+            report_context = self.data_service.metrics_calculator.begin_report_context()
+            logger.info("✓ Started calculation context for new report")
 
             # Validate configuration
             validation_errors = self.report_config.validate()
@@ -397,55 +399,30 @@ class ReportGenerator:
             target_robots = self._resolve_target_robots()
             logger.info(f"Targeting {len(target_robots)} robots for report generation")
 
-            # === LEVEL 1 PARALLELISM: Fetch current AND previous period data in PARALLEL ===
-            logger.info("=" * 80)
-            logger.info("LEVEL 1 PARALLELISM: Fetching CURRENT + PREVIOUS period data in parallel")
-            logger.info("=" * 80)
-
-            from concurrent.futures import ThreadPoolExecutor, as_completed
-
-            with ThreadPoolExecutor(max_workers=2) as period_executor:
-                # Submit both period fetches concurrently
-                current_future = period_executor.submit(
-                    self.data_service.fetch_all_report_data,
-                    target_robots, current_start, current_end, self.report_config.content_categories
-                )
+            # Reuse metrics of an identical earlier report (same robots, periods, categories and data version)
+            metrics_cache_key = self._get_metrics_cache_key(
+                target_robots, (current_start, current_end), (previous_start, previous_end)
+            )
+            computed = self.metrics_cache.get(metrics_cache_key) if metrics_cache_key else None
+            metrics_cache_status = 'hit' if computed is not None else ('miss' if metrics_cache_key else 'disabled')
 
-                previous_future = period_executor.submit(
-                    self.data_service.fetch_all_report_data,
-                    target_robots, previous_start, previous_end, self.report_config.content_categories
+            if computed is not None:
+                logger.info(f"✓✓✓ Reusing cached report metrics ({metrics_cache_key}), skipping fetch and calculation")
+                computed = dict(computed, fetch_seconds=0.0, calc_seconds=0.0)
+            else:
+                computed = self._fetch_and_calculate_metrics(
+                    target_robots, (current_start, current_end), (previous_start, previous_end), start_time
                 )
+                # Fallback (comparison-less) metrics from a failed calculation are not cached
+                comparison_available = computed['comprehensive_metrics'].get(
+                    'comparison_metadata', {}).get('comparison_available', False)
+                if metrics_cache_key and comparison_available:
+                    self.metrics_cache.put(metrics_cache_key, computed)
 
-                # Wait for both to complete and log progress
-                current_data = None
-                previous_data = None
-
-                for future in as_completed([current_future, previous_future]):
-                    try:
-                        if future == current_future:
-                            current_data = future.result(timeout=120)  # 2 min timeout
-                            logger.info("✓✓✓ CURRENT period data fetched")
-                        else:
-                            previous_data = future.result(timeout=120)
-                            logger.info("✓✓✓ PREVIOUS period data fetched")
-                    except Exception as e:
-                        logger.error(f"Period data fetch failed: {e}")
-                        if future == current_future:
-                            current_data = {}
-                        else:
-                            previous_data = {}
-
-            fetch_time = (datetime.now() - start_time).total_seconds()
-            logger.info(f"✓✓✓ ALL DATA FETCHED in {fetch_time:.2f}s (2-level parallel execution)")
-
-            # Calculate metrics with comparison
-            logger.info("Calculating comprehensive metrics with period comparison...")
-            calc_start = datetime.now()
-            comprehensive_metrics = self.data_service.calculate_comprehensive_metrics_with_comparison(
-                current_data, previous_data, current_start, current_end, previous_start, previous_end
-            )
-            calc_time = (datetime.now() - calc_start).total_seconds()
-            logger.info(f"✓ Metrics calculated in {calc_time:.2f}s")
+            comprehensive_metrics = computed['comprehensive_metrics']
+            combine_periods = computed['combine_periods']
+            fetch_time = computed['fetch_seconds']
+            calc_time = computed['calc_seconds']
 
             # Generate structured report content
             logger.info("Generating structured report content...")
@@ -473,15 +450,15 @@ class ReportGenerator:
                 'robots_included': len(target_robots),
                 'detail_level': self.report_config.detail_level.value,
                 'content_categories': self.report_config.content_categories,
-                'total_records_processed': sum(len(data) if hasattr(data, '__len__') else 0
-                                             for data in current_data.values()),
-                'comparison_records_processed': sum(len(data) if hasattr(data, '__len__') else 0
-                                                  for data in previous_data.values()),
+                'total_records_processed': computed['total_records_processed'],
+                'comparison_records_processed': computed['comparison_records_processed'],
+                'metrics_cache': metrics_cache_status,
+                'computation_cache': report_context.get_stats(),
                 'metrics_calculated': list(comprehensive_metrics.keys()),
                 'template_type': 'comprehensive_with_comparison_and_facility_breakdown',
                 'report_version': '4.0',  # UPDATED for 2-level parallel version
                 'optimization_features': [
-                    'level1_parallel_period_fetching',  # NEW
+                    'combined_period_fetching' if combine_periods else 'level1_parallel_period_fetching',
                     'level2_parallel_query_execution',  # NEW
                     'sql_aggregated_operation_metrics',  # NEW
                     'cached_calculations',
@@ -494,9 +471,9 @@ class ReportGenerator:
                     'total_seconds': execution_time
                 },
                 'parallelism_stats': {  # NEW
-                    'level1_workers': 2,  # Current + Previous periods
+                    'level1_workers': 1 if combine_periods else 2,  # Current + Previous periods
                     'level2_workers': 5,  # Independent queries per period
-                    'total_parallel_queries': 10  # 5 queries × 2 periods
+                    'total_parallel_queries': 6 if combine_periods else 10  # combined: 4 range queries + 2 aggregates
                 }
             }
 
@@ -528,6 +505,108 @@ class ReportGenerator:
                 }
             }
 
+    def _fetch_and_calculate_metrics(self, target_robots: List[str], current_period: Tuple[str, str],
+                                     previous_period: Tuple[str, str], start_time: datetime) -> Dict[str, Any]:
+        """Fetch both periods and calculate comprehensive metrics with comparison and ROI"""
+        (current_start, current_end), (previous_start, previous_end) = current_period, previous_period
+
+        combine_periods = self.data_service.combine_period_fetch and previous_end < current_start
+        if combine_periods:
+            # One range scan per table over both periods, shared status/locations/targets
+            logger.info("=" * 80)
+            logger.info("Fetching CURRENT + PREVIOUS period data in one combined pass")
+            logger.info("=" * 80)
+
+            current_data, previous_data = self.data_service.fetch_report_data_for_periods(
+                target_robots, (current_start, current_end), (previous_start, previous_end),
+                self.report_config.content_categories
+            )
+        else:
+            # === LEVEL 1 PARALLELISM: Fetch current AND previous period data in PARALLEL ===
+            logger.info("=" * 80)
+            logger.info("LEVEL 1 PARALLELISM: Fetching CURRENT + PREVIOUS period data in parallel")
+            logger.info("=" * 80)
+
+            from concurrent.futures import ThreadPoolExecutor, as_completed
+
+            with ThreadPoolExecutor(max_workers=2) as period_executor:
+                # Submit both period fetches concurrently
+                current_future = period_executor.submit(
+                    self.data_service.fetch_all_report_data,
+                    target_robots, current_start, current_end, self.report_config.content_categories
+                )
+
+                previous_future = period_executor.submit(
+                    self.data_service.fetch_all_report_data,
+                    target_robots, previous_start, previous_end, self.report_config.content_categories
+                )
+
+                # Wait for both to complete and log progress
+                current_data = None
+                previous_data = None
+
+                for future in as_completed([current_future, previous_future]):
+                    try:
+                        if future == current_future:
+                            current_data = future.result(timeout=120)  # 2 min timeout
+                            logger.info("✓✓✓ CURRENT period data fetched")
+                        else:
+                            previous_data = future.result(timeout=120)
+                            logger.info("✓✓✓ PREVIOUS period data fetched")
+                    except Exception as e:
+                        logger.error(f"Period data fetch failed: {e}")
+                        if future == current_future:
+                            current_data = {}
+                        else:
+                            previous_data = {}
+
+        fetch_time = (datetime.now() - start_time).total_seconds()
+        logger.info(f"✓✓✓ ALL DATA FETCHED in {fetch_time:.2f}s "
+                    f"({'combined period fetch' if combine_periods else '2-level parallel execution'})")
+
+        # Calculate metrics with comparison
+        logger.info("Calculating comprehensive metrics with period comparison...")
+        calc_start = datetime.now()
+        comprehensive_metrics = self.data_service.calculate_comprehensive_metrics_with_comparison(
+            current_data, previous_data, current_start, current_end, previous_start, previous_end
+        )
+        calc_time = (datetime.now() - calc_start).total_seconds()
+        logger.info(f"✓ Metrics calculated in {calc_time:.2f}s")
+
+        return {
+            'comprehensive_metrics': comprehensive_metrics,
+            'combine_periods': combine_periods,
+            'total_records_processed': sum(len(data) if hasattr(data, '__len__') else 0
+                                           for data in current_data.values()),
+            'comparison_records_processed': sum(len(data) if hasattr(data, '__len__') else 0
+                                                for data in previous_data.values()),
+            'fetch_seconds': fetch_time,
+            'calc_seconds': calc_time
+        }
+
+    def _get_metrics_cache_key(self, target_robots: List[str], current_period: Tuple[str, str],
+                               previous_period: Tuple[str, str]) -> Optional[str]:
+        """
+        Cache key of this report's metrics, or None when they shouldn't be cached: no cache configured,
+        data version unknown, or the report period not sealed yet (rows for it may still arrive)
+        """
+        if self.metrics_cache is None or not target_robots:
+            return None
+
+        if pd.Timestamp(current_period[1]).to_pydatetime() + ROLLUP_SEAL_DELAY > datetime.utcnow():
+            return None
+
+        data_version = self.data_service.fetch_data_version(
+            target_robots, self.report_config.database_name, previous_period[0], current_period[1]
+        )
+        if data_version is None:
+            return None
+
+        return ReportMetricsCache.make_key(
+            self.report_config.database_name, target_robots, current_period, previous_period,
+            self.report_config.content_categories, data_version
+        )
+
     def _extract_location_criteria(self) -> Dict[str, List[str]]:
         """Extract and normalize location criteria from config"""
         location = self.report_config.location
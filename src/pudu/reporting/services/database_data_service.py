@@ -9,25 +9,75 @@ KEY FIXES:
 """
 
 import logging
+import threading
 from typing import Dict, List, Optional, Any, Tuple
 import pandas as pd
 from datetime import datetime, timedelta
 import numpy as np
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 import time
 
 # Reuse existing RDS infrastructure
 from pudu.rds.rdsTable import RDSTable
 from pudu.configs.database_config_loader import DynamicDatabaseConfig
+from .report_frames import normalize_report_data
+from .shared_frames import SharedFrameHandle, SharedFrames, attach_frames
+from .worker_context import report_worker_context
+from .roi_ledger_service import ROI_LEDGER_TABLE, ROI_LEDGER_PRIMARY_KEYS, RoiLedgerService
+from pudu.services.daily_rollup_service import (
+    EVENT_COUNT_COLUMNS, ROLLUP_TABLE, aggregate_report_rows, combine_rollups, compute_rollups_from_source,
+    is_sealed, robot_day_windows, split_rollup_range
+)
 
 # Import calculator
-from ..calculators.metrics_calculator import PerformanceMetricsCalculator
+from ..calculators.metrics_calculator import PerformanceMetricsCalculator, map_labels
 
 logger = logging.getLogger(__name__)
 
 # CRITICAL FIX: Force new connections for each thread
 reuse_connection = False
 
+# Row-level report data read once over both comparison periods and split in memory: key -> time column
+PERIOD_SPLIT_COLUMNS = {
+    'cleaning_tasks': 'start_time',
+    'charging_tasks': 'start_time',
+    'events': 'task_time',
+}
+
+# Small metadata tables a report reads besides the robot history (robot names/types/locations,
+# buildings, performance targets); the pipeline doesn't refresh rollups when they change
+REPORT_METADATA_TABLES = ['mnt_robots_management', 'pro_building_info', 'mnt_robot_performance_targets_setting']
+
+# History tables the webhook API writes straight into project databases, without a rollup refresh:
+# table -> (time column, table type whose report columns are hashed). Tasks and events are upserted
+# in place (same id), so their rows are hashed; status history is append-only, so count and latest
+# timestamp are enough.
+RAW_VERSION_TABLES = {
+    'mnt_robots_task': ('start_time', 'robot_task'),
+    'mnt_robot_events': ('task_time', 'robot_events'),
+    'mnt_robot_operation_history': ('timestamp_utc', None),
+}
+
+# Independent groups of comprehensive metrics (family -> DatabaseDataService method), in report order.
+# Each reads only the report frames, so the families can run in separate worker processes.
+METRIC_FAMILIES = {
+    'fleet': '_fleet_metrics',
+    'tasks': '_task_metrics',
+    'charging': '_charging_metrics',
+    'resources': '_resource_metrics',
+    'events': '_event_metrics',
+    'facilities': '_facility_metrics',
+    'robots': '_robot_metrics',
+    'map_coverage': '_map_coverage_metrics',
+    'map_performance': '_map_performance_metrics',
+    'trends': '_trend_metrics',
+}
+
+# Worker processes for metric families, shared by all services in this process (see _metrics_process_pool)
+_metrics_pool: Optional[ProcessPoolExecutor] = None
+_metrics_pool_lock = threading.Lock()
+
 
 class DatabaseDataService:
     """
@@ -48,6 +98,25 @@ class DatabaseDataService:
         self.max_retries = 3
         self.retry_delay = 1  # seconds
 
+        # Read whole days from mnt_robot_daily_rollup (days it doesn't cover fall back to raw rows)
+        self.use_daily_rollups = config.config.get('daily_rollups', {}).get('enabled', True)
+
+        # All-time ROI from monthly ledger checkpoints plus recent tasks instead of the full task history
+        self.use_roi_ledger = config.config.get('roi_ledger', {}).get('enabled', True)
+
+        # Fetch the current and comparison periods together (one range scan per table, shared lookups)
+        self.combine_period_fetch = config.config.get('report_fetch', {}).get('combine_periods', True)
+
+        # Convert fetched tables once to typed, read-only frames (see report_frames.py)
+        self.normalize_frames = config.config.get('report_fetch', {}).get('normalize_frames', True)
+
+        # Metric families in worker processes for reports with at least min_task_rows tasks (0 workers: in process)
+        process_pool_config = config.config.get('metrics_process_pool', {})
+        self.metrics_pool_workers = (process_pool_config.get('max_workers', 4)
+                                     if process_pool_config.get('enabled', False) else 0)
+        self.metrics_pool_min_task_rows = process_pool_config.get('min_task_rows', 50000)
+        self.metric_family_seconds: Dict[Tuple[str, str], Dict[str, float]] = {}
+
     # ============================================================================
     # FIXED: Connection Management
     # ============================================================================
@@ -210,6 +279,12 @@ class DatabaseDataService:
                         target_robots, self.database_name, start_date, end_date
                     )
 
+                if self.use_daily_rollups:
+                    futures['sealed_rollups'] = executor.submit(
+                        self.fetch_sealed_rollups,
+                        target_robots, self.database_name, start_date, end_date
+                    )
+
                 # Collect results as they complete
                 for key, future in futures.items():
                     try:
@@ -223,13 +298,18 @@ class DatabaseDataService:
             if 'events' not in report_data:
                 report_data['events'] = pd.DataFrame()
 
+            if self.use_daily_rollups:
+                report_data['daily_rollups'] = self._report_daily_rollups(
+                    report_data.pop('sealed_rollups'), report_data, 'event-analysis' in content_categories
+                )
+
             logger.info(f"Parallel data fetching completed: {list(report_data.keys())}")
-            return report_data
+            return self._normalize_report_data(report_data)[0]
 
         except Exception as e:
             logger.error(f"Error in fetch_all_report_data: {e}")
             # Return whatever we managed to fetch
-            return {
+            return self._normalize_report_data({
                 'robot_status': report_data.get('robot_status', pd.DataFrame()),
                 'robot_locations': report_data.get('robot_locations', pd.DataFrame()),
                 'cleaning_tasks': report_data.get('cleaning_tasks', pd.DataFrame()),
@@ -237,7 +317,127 @@ class DatabaseDataService:
                 'events': report_data.get('events', pd.DataFrame()),
                 'operation_metrics': report_data.get('operation_metrics', pd.DataFrame()),
                 'performance_targets': report_data.get('performance_targets', pd.DataFrame())
-            }
+            })[0]
+
+    def fetch_report_data_for_periods(self, target_robots: List[str],
+                                      current_period: Tuple[str, str], previous_period: Tuple[str, str],
+                                      content_categories: List[str]) -> Tuple[Dict[str, pd.DataFrame], Dict[str, pd.DataFrame]]:
+        """
+        Fetch current and comparison period data in one pass.
+
+        Cleaning tasks, charging sessions and events are queried once over the union of both periods
+        and split by period in memory. Robot status (as of the current period end), locations and
+        performance targets are fetched once and shared. Operation metrics and the sealed daily
+        rollups stay per period since they are aggregated or stored per whole day.
+
+        Args:
+            target_robots: List of robot serial numbers
+            current_period: (start, end) of the report period (UTC format)
+            previous_period: (start, end) of the comparison period, ending before the report period starts
+
+        Returns:
+            (current_data, previous_data) with the same keys as fetch_all_report_data
+        """
+        (current_start, current_end), (previous_start, previous_end) = current_period, previous_period
+        logger.info(f"Fetching report data for both periods ({previous_start} to {current_end}) in one pass")
+
+        current_data, previous_data = {}, {}
+        try:
+            # Period-independent lookups, fetched once
+            robot_status = self.fetch_robot_status_data(target_robots, self.database_name, current_end)
+            robot_locations = self.fetch_location_data(target_robots, self.database_name, robot_status)
+            for data in (current_data, previous_data):
+                data['robot_status'] = robot_status
+                data['robot_locations'] = robot_locations
+
+            with ThreadPoolExecutor(max_workers=5) as executor:
+                futures = {
+                    'cleaning_tasks': executor.submit(
+                        self.fetch_cleaning_tasks_data, target_robots, self.database_name, previous_start, current_end
+                    ),
+                    'charging_tasks': executor.submit(
+                        self.fetch_charging_data, target_robots, self.database_name, previous_start, current_end
+                    ),
+                    'performance_targets': executor.submit(
+                        self.fetch_performance_targets, target_robots, self.database_name
+                    ),
+                    'operation_metrics': executor.submit(
+                        self.fetch_operation_metrics_aggregated, target_robots, self.database_name, current_start, current_end
+                    ),
+                    'previous_operation_metrics': executor.submit(
+                        self.fetch_operation_metrics_aggregated, target_robots, self.database_name, previous_start, previous_end
+                    ),
+                }
+                if 'event-analysis' in content_categories:
+                    futures['events'] = executor.submit(
+                        self.fetch_events_data, target_robots, self.database_name, previous_start, current_end
+                    )
+                if self.use_daily_rollups:
+                    futures['sealed_rollups'] = executor.submit(
+                        self.fetch_sealed_rollups, target_robots, self.database_name, current_start, current_end
+                    )
+                    futures['previous_sealed_rollups'] = executor.submit(
+                        self.fetch_sealed_rollups, target_robots, self.database_name, previous_start, previous_end
+                    )
+
+                results = {}
+                for key, future in futures.items():
+                    try:
+                        results[key] = future.result(timeout=60)
+                        logger.info(f"✓ {key} fetched ({len(results[key])} records)")
+                    except Exception as e:
+                        logger.error(f"✗ {key} fetch failed: {e}")
+                        results[key] = pd.DataFrame()
+
+            for key, time_column in PERIOD_SPLIT_COLUMNS.items():
+                current_data[key], previous_data[key] = self._split_by_periods(
+                    results.get(key, pd.DataFrame()), time_column, [current_period, previous_period]
+                )
+
+            current_data['operation_metrics'] = results['operation_metrics']
+            previous_data['operation_metrics'] = results['previous_operation_metrics']
+            current_data['performance_targets'] = previous_data['performance_targets'] = results['performance_targets']
+
+            if self.use_daily_rollups:
+                include_events = 'event-analysis' in content_categories
+                current_data['daily_rollups'] = self._report_daily_rollups(
+                    results['sealed_rollups'], current_data, include_events)
+                previous_data['daily_rollups'] = self._report_daily_rollups(
+                    results['previous_sealed_rollups'], previous_data, include_events)
+
+        except Exception as e:
+            logger.error(f"Error in fetch_report_data_for_periods: {e}")
+
+        # Return whatever we managed to fetch (daily rollups only when they were built)
+        report_keys = ['robot_status', 'robot_locations', 'cleaning_tasks', 'charging_tasks', 'events',
+                       'operation_metrics', 'performance_targets']
+        reports = []
+        for data in (current_data, previous_data):
+            report = {key: data.get(key, pd.DataFrame()) for key in report_keys}
+            if 'daily_rollups' in data:
+                report['daily_rollups'] = data['daily_rollups']
+            reports.append(report)
+        return self._normalize_report_data(*reports)
+
+    def _normalize_report_data(self, *reports: Dict[str, pd.DataFrame]) -> Tuple[Dict[str, pd.DataFrame], ...]:
+        """Typed, read-only report frames when report_fetch.normalize_frames is on, else the data as fetched"""
+        if not self.normalize_frames:
+            return reports
+        return normalize_report_data(*reports)
+
+    @staticmethod
+    def _split_by_periods(data: pd.DataFrame, time_column: str,
+                          periods: List[Tuple[str, str]]) -> List[pd.DataFrame]:
+        """Rows of `data` falling in each (start, end) period, bounds inclusive like the range queries"""
+        if data.empty or time_column not in data.columns:
+            return [pd.DataFrame() for _ in periods]
+
+        times = pd.to_datetime(data[time_column], errors='coerce')
+        frames = []
+        for start, end in periods:
+            in_period = (times >= pd.Timestamp(start)) & (times <= pd.Timestamp(end))
+            frames.append(data[in_period].reset_index(drop=True) if in_period.any() else pd.DataFrame())
+        return frames
 
     # ============================================================================
     # FIXED: Data Fetching Methods with Proper Connection Management
@@ -507,7 +707,8 @@ class DatabaseDataService:
         - latest_status: most recent status
         - latest_battery_soh_raw: most recent battery SOH (raw string, UNKNOWN converted to '100')
 
-        OPTIMIZED: Uses window functions instead of correlated subqueries for 10-15x performance.
+        OPTIMIZED: Whole days are summed from the pipeline-maintained daily rollups; only partial
+        edge days (and days not rolled up yet) are aggregated from mnt_robot_operation_history.
 
         Battery SOH Processing:
         - Percentage strings (e.g., "78%") -> numeric value (78)
@@ -519,6 +720,266 @@ class DatabaseDataService:
         if not target_robots:
             return pd.DataFrame()
 
+        if self.use_daily_rollups:
+            try:
+                return self._operation_metrics_from_rollups(target_robots, database_name, start_date, end_date)
+            except Exception as e:
+                logger.warning(f"Daily rollup read failed, falling back to operation history: {e}")
+
+        return self._fetch_operation_metrics_raw(target_robots, database_name, start_date, end_date)
+
+    def _operation_metrics_from_rollups(self, target_robots: List[str], database_name: str,
+                                        start_date: str, end_date: str) -> pd.DataFrame:
+        """Operation metrics summed from daily rollups (same columns as the raw operation history query)"""
+        logger.info(f"Fetching operation metrics from daily rollups for {len(target_robots)} robots")
+
+        daily = self.fetch_daily_rollups(target_robots, database_name, start_date, end_date)
+        daily = daily[daily['status_samples'] > 0]
+        if daily.empty:
+            logger.warning(f"No operation metrics found for {start_date} to {end_date}")
+            return pd.DataFrame()
+
+        totals = daily.groupby('robot_sn')[['status_samples', 'online_samples', 'soh_sum', 'soh_samples']].sum()
+        latest = daily.assign(latest_status_time=pd.to_datetime(daily['latest_status_time'])) \
+            .sort_values('latest_status_time').groupby('robot_sn').tail(1).set_index('robot_sn').reindex(totals.index)
+
+        # Convert UNKNOWN to '100' for latest battery SOH (raw string)
+        latest_soh = latest['latest_battery_soh'].where(
+            latest['latest_battery_soh'].astype(str).str.strip().str.upper() != 'UNKNOWN', '100'
+        )
+        result_df = pd.DataFrame({
+            'robot_sn': totals.index,
+            'total_records': totals['status_samples'].values,
+            'online_records': totals['online_samples'].values,
+            'avg_battery_soh_numeric': (totals['soh_sum'] / totals['soh_samples'].replace(0, np.nan)).values,
+            'latest_status': latest['latest_status'].values,
+            'latest_battery_soh_raw': latest_soh.values,
+        })
+
+        logger.info(f"✓ Retrieved aggregated metrics for {len(result_df)} robots from {len(daily)} robot-days")
+        return result_df
+
+    def fetch_data_version(self, target_robots: List[str], database_name: str, start_date: str,
+                           end_date: str) -> Optional[str]:
+        """
+        Data version watermark of a report: changes whenever data the report reads may have changed.
+
+        The pipeline refreshes a robot's daily rollup row whenever it writes task, charging, event or
+        status rows for that robot and day, so the latest refreshed_at (and row count) of the target
+        robots' rollups up to end_date moves with every change to their history. The webhook API
+        writes tasks, events and status rows without touching the rollups, so a watermark of those
+        tables over the report range (start_date to end_date, see RAW_VERSION_TABLES) is included.
+        Robot, location and performance target metadata has no update time, so the checksums of
+        REPORT_METADATA_TABLES are part of the watermark too.
+
+        Returns:
+            Watermark string, or None when it can't be determined (no rollups, disabled or error)
+        """
+        if not target_robots or not self.use_daily_rollups:
+            return None
+
+        table = self._create_table_with_retry(
+            connection_config=self.connection_config,
+            database_name=database_name,
+            table_name='mnt_robot_operation_history',
+            fields=None,
+            primary_keys=['robot_sn', 'timestamp_utc']
+        )
+        if not table:
+            return None
+
+        try:
+            if not table.query_data(f"SHOW TABLES LIKE '{ROLLUP_TABLE}'"):
+                return None
+
+            robot_list = "', '".join(target_robots)
+            version = table.execute_query(f"""
+                SELECT MAX(refreshed_at) AS refreshed_at, COUNT(*) AS rollup_rows
+                FROM {ROLLUP_TABLE}
+                WHERE robot_sn IN ('{robot_list}')
+                  AND rollup_date <= '{end_date.split(' ')[0]}'
+            """)
+            if version.empty or pd.isna(version['refreshed_at'].iloc[0]):
+                return None
+
+            # Missing tables (e.g. no performance targets yet) have a NULL checksum
+            checksums = table.execute_query(f"CHECKSUM TABLE {', '.join(REPORT_METADATA_TABLES)}")
+            metadata_version = '.'.join(
+                'none' if pd.isna(checksum) else str(int(checksum)) for checksum in checksums['Checksum']
+            )
+            raw_version = '.'.join(
+                self._raw_table_version(table, table_name, time_column, table_type, robot_list, start_date, end_date)
+                for table_name, (time_column, table_type) in RAW_VERSION_TABLES.items()
+            )
+            return (f"{pd.Timestamp(version['refreshed_at'].iloc[0]).isoformat()}/"
+                    f"{int(version['rollup_rows'].iloc[0])}/{metadata_version}/{raw_version}")
+
+        except Exception as e:
+            logger.warning(f"Could not read data version of {database_name}: {e}")
+            return None
+        finally:
+            table.close()
+
+    def _raw_table_version(self, table, table_name: str, time_column: str, table_type: Optional[str],
+                           robot_list: str, start_date: str, end_date: str) -> str:
+        """Row count and content hash (or latest timestamp) of the target robots' rows of a raw table in range"""
+        if table_type:
+            # NULLs are spelled out so moving a value between columns still changes the row hash
+            hashed = ', '.join(f"COALESCE({column}, 'NULL')" for column in self.get_required_columns(table_type))
+            marker = f"BIT_XOR(CRC32(CONCAT_WS('|', {hashed})))"
+        else:
+            marker = f"MAX({time_column})"
+
+        version = table.execute_query(f"""
+            SELECT COUNT(*) AS row_count, {marker} AS marker
+            FROM {table_name}
+            WHERE robot_sn IN ('{robot_list}')
+              AND {time_column} >= '{start_date}'
+              AND {time_column} <= '{end_date}'
+        """)
+        marker_value = version['marker'].iloc[0]
+        if pd.isna(marker_value):
+            marker_value = 'none'
+        elif isinstance(marker_value, (pd.Timestamp, datetime)):
+            marker_value = pd.Timestamp(marker_value).strftime('%Y%m%d%H%M%S')
+        return f"{int(version['row_count'].iloc[0])}-{marker_value}"
+
+    def fetch_sealed_rollups(self, target_robots: List[str], database_name: str, start_date: str,
+                             end_date: str) -> pd.DataFrame:
+        """
+        Stored mnt_robot_daily_rollup rows of the whole days in a report range that the pipeline has
+        sealed, one per robot and day (other robot-days have to be aggregated from raw rows).
+
+        Returns:
+            DataFrame with the rollup columns (empty without a rollup table)
+        """
+        whole_days, _ = split_rollup_range(start_date, end_date)
+        if not target_robots or not whole_days:
+            return combine_rollups([])
+
+        table = self._create_table_with_retry(
+            connection_config=self.connection_config,
+            database_name=database_name,
+            table_name='mnt_robot_operation_history',
+            fields=None,
+            primary_keys=['robot_sn', 'timestamp_utc']
+        )
+        if not table:
+            raise ConnectionError(f"Failed to create connection for {database_name}")
+
+        try:
+            return combine_rollups([self._read_sealed_rollups(table, target_robots, *whole_days)])
+        finally:
+            table.close()
+
+    def _read_sealed_rollups(self, table: RDSTable, target_robots: List[str], first_day, last_day) -> pd.DataFrame:
+        """Sealed rollup rows of the target robots for [first_day, last_day], without refreshed_at"""
+        if not table.query_data(f"SHOW TABLES LIKE '{ROLLUP_TABLE}'"):
+            return pd.DataFrame()
+
+        robot_list = "', '".join(target_robots)
+        stored = self._execute_query_with_retry(table, f"""
+            SELECT *
+            FROM {ROLLUP_TABLE}
+            WHERE robot_sn IN ('{robot_list}')
+              AND rollup_date >= '{first_day}'
+              AND rollup_date <= '{last_day}'
+        """)
+        if stored.empty:
+            return stored
+
+        # A robot's day is read from rollups only when its own row is stored and sealed
+        stored['rollup_date'] = pd.to_datetime(stored['rollup_date']).dt.date
+        stored = stored[[is_sealed(day, refreshed_at) for day, refreshed_at
+                         in zip(stored['rollup_date'], stored['refreshed_at'])]]
+        return stored.drop(columns=['refreshed_at'])
+
+    def _report_daily_rollups(self, sealed_rollups: pd.DataFrame, report_data: Dict[str, pd.DataFrame],
+                              include_events: bool) -> pd.DataFrame:
+        """
+        Daily rollups of one report period for the task, charging and event totals: each robot's
+        sealed whole days as stored, every other robot-day (partial edge days, days not sealed yet)
+        aggregated from the period's fetched rows. Event counts are left out when events were not
+        requested, like the event rows.
+        """
+        sealed_rollups = combine_rollups([sealed_rollups])
+        if not include_events:
+            sealed_rollups = combine_rollups([sealed_rollups.drop(columns=['event_count'] + EVENT_COUNT_COLUMNS)])
+        sealed_keys = set(zip(sealed_rollups['robot_sn'], sealed_rollups['rollup_date']))
+
+        def unsealed_rows(key: str, time_column: str) -> pd.DataFrame:
+            rows = report_data.get(key, pd.DataFrame())
+            if rows.empty or not sealed_keys:
+                return rows
+            days = pd.to_datetime(rows[time_column], errors='coerce').dt.date
+            return rows[[(robot_sn, day) not in sealed_keys for robot_sn, day in zip(rows['robot_sn'], days)]]
+
+        raw_rollups = aggregate_report_rows(unsealed_rows('cleaning_tasks', 'start_time'),
+                                            unsealed_rows('charging_tasks', 'start_time'),
+                                            unsealed_rows('events', 'task_time'))
+        logger.info(f"Report totals: {len(sealed_rollups)} robot-days from {ROLLUP_TABLE}, "
+                    f"{len(raw_rollups)} aggregated from fetched rows")
+        return combine_rollups([sealed_rollups, raw_rollups])
+
+    def fetch_daily_rollups(self, target_robots: List[str], database_name: str, start_date: str,
+                            end_date: str) -> pd.DataFrame:
+        """
+        Per robot-day operation history rollups for a report range.
+
+        Each robot's whole days come from mnt_robot_daily_rollup when the pipeline has stored and
+        sealed that robot's row for the day; partial edge days and every (robot, day) without a
+        sealed row (recent days, days before the rollups were built, robots not rolled up yet)
+        are aggregated from raw rows.
+
+        Returns:
+            DataFrame with one row per robot and day (columns of mnt_robot_daily_rollup)
+        """
+        if not target_robots:
+            return combine_rollups([])
+
+        # Raw windows are read through the operation history table, which every project database has
+        table = self._create_table_with_retry(
+            connection_config=self.connection_config,
+            database_name=database_name,
+            table_name='mnt_robot_operation_history',
+            fields=None,
+            primary_keys=['robot_sn', 'timestamp_utc']
+        )
+        if not table:
+            raise ConnectionError(f"Failed to create connection for {database_name}")
+
+        try:
+            whole_days, raw_windows = split_rollup_range(start_date, end_date)
+            raw_queries = [(target_robots, window_start, window_end) for window_start, window_end in raw_windows]
+            frames = []
+
+            if whole_days:
+                first_day, last_day = whole_days
+                stored = self._read_sealed_rollups(table, target_robots, first_day, last_day)
+                frames.append(stored)
+                sealed = set(zip(stored['robot_sn'], stored['rollup_date'])) if not stored.empty else set()
+
+                days = [first_day + timedelta(days=i) for i in range((last_day - first_day).days + 1)]
+                raw_keys = [(robot_sn, day) for robot_sn in target_robots for day in days
+                            if (robot_sn, day) not in sealed]
+                raw_queries += [(sorted(robot_sns), window_start, window_end)
+                                for robot_sns, window_start, window_end in robot_day_windows(raw_keys)]
+                logger.info(f"Daily rollups: {len(sealed)}/{len(days) * len(set(target_robots))} robot-days from "
+                            f"{ROLLUP_TABLE}, {len(raw_queries)} raw windows")
+
+            for robot_sns, window_start, window_end in raw_queries:
+                frames.append(compute_rollups_from_source(
+                    lambda query: self._execute_query_with_retry(table, query),
+                    robot_sns, window_start, window_end, sources=['robot_status']
+                ))
+
+            return combine_rollups(frames)
+        finally:
+            table.close()
+
+    def _fetch_operation_metrics_raw(self, target_robots: List[str], database_name: str,
+                                     start_date: str, end_date: str) -> pd.DataFrame:
+        """Aggregated operation metrics straight from mnt_robot_operation_history"""
         logger.info(f"Fetching aggregated operation metrics for {len(target_robots)} robots")
 
         try:
@@ -675,14 +1136,19 @@ class DatabaseDataService:
             return pd.DataFrame()
 
     def fetch_all_time_tasks_for_roi(self, target_robots: List[str], database_name: str,
-                                     end_date: str) -> pd.DataFrame:
+                                     end_date: str, since_date: str = None) -> pd.DataFrame:
         """
         OPTIMIZED: Fetch minimal task data for ROI calculation directly from known database.
 
+        With since_date (the earliest date the ROI will be evaluated at), history before the latest
+        settled monthly checkpoint comes from the ROI ledger as one opening row per robot, and only
+        tasks since the checkpoint are read.
+
         Args:
             target_robots: List of robot serial numbers
             database_name: Project database name (from report_config)
             end_date: End date filter (UTC format)
+            since_date: Earliest ROI cutoff (UTC format); None reads the full task history
 
         Returns:
             DataFrame with minimal task data for ROI calculation
@@ -691,6 +1157,12 @@ class DatabaseDataService:
             logger.warning("No target robots provided for ROI tasks fetch")
             return pd.DataFrame()
 
+        if since_date and self.use_roi_ledger:
+            try:
+                return self._fetch_roi_tasks_from_ledger(target_robots, database_name, end_date, since_date)
+            except Exception as e:
+                logger.warning(f"ROI ledger read failed, falling back to full task history: {e}")
+
         logger.info(f"Fetching all-time tasks for ROI ({len(target_robots)} robots) from {database_name}")
 
         try:
@@ -735,6 +1207,48 @@ class DatabaseDataService:
             logger.error(f"Error fetching ROI tasks from {database_name}: {e}")
             return pd.DataFrame()
 
+    def _fetch_roi_tasks_from_ledger(self, target_robots: List[str], database_name: str,
+                                     end_date: str, since_date: str) -> pd.DataFrame:
+        """ROI task frame from ledger checkpoints plus the tasks since (errors propagate to the caller)"""
+        table = self._create_table_with_retry(
+            connection_config=self.connection_config,
+            database_name=database_name,
+            table_name='mnt_robots_task',
+            fields=None,
+            primary_keys=['robot_sn', 'start_time']
+        )
+        if not table:
+            raise ConnectionError(f"Failed to create connection for {database_name}")
+
+        def write_rows(rows: List[dict]):
+            ledger_table = self._create_table_with_retry(
+                connection_config=self.connection_config,
+                database_name=database_name,
+                table_name=ROI_LEDGER_TABLE,
+                fields=None,
+                primary_keys=ROI_LEDGER_PRIMARY_KEYS
+            )
+            if not ledger_table:
+                raise ConnectionError(f"Failed to open {ROI_LEDGER_TABLE} in {database_name}")
+            try:
+                ledger_table.batch_insert(rows)
+            finally:
+                ledger_table.close()
+
+        try:
+            if not table.query_data(f"SHOW TABLES LIKE '{ROI_LEDGER_TABLE}'"):
+                RoiLedgerService.ensure_table(database_name, self.connection_config)
+
+            # Raising reads: a failed query must not be mistaken for "no tasks" and checkpointed
+            ledger = RoiLedgerService(table.execute_query, write_rows)
+            since = datetime.strptime(since_date.split(' ')[0], '%Y-%m-%d').date()
+            result_df = ledger.fetch_roi_tasks(target_robots, end_date, since)
+
+            logger.info(f"✓ Retrieved {len(result_df)} ROI rows (ledger + recent tasks) from {database_name}")
+            return result_df
+        finally:
+            table.close()
+
     def fetch_performance_targets(self, target_robots: List[str], database_name: str) -> pd.DataFrame:
         """
         OPTIMIZED: Fetch performance targets directly from known database.
@@ -806,198 +1320,22 @@ class DatabaseDataService:
 
     def calculate_comprehensive_metrics(self, data: Dict[str, pd.DataFrame],
                                         start_date: str, end_date: str) -> Dict[str, Any]:
-        """Calculate comprehensive metrics using calculator"""
+        """
+        Calculate comprehensive metrics using calculator.
+
+        The independent metric families (METRIC_FAMILIES) run in this process or, when
+        metrics_process_pool is enabled and the report is large enough, in worker processes over
+        shared-memory copies of the report frames. Results are assembled in family order either way;
+        cost analysis runs last since it builds on the resource utilization metrics.
+        """
         logger.info("Calculating comprehensive metrics")
 
         try:
-            # Extract DataFrames
-            robot_data = data.get('robot_status', pd.DataFrame())
             tasks_data = data.get('cleaning_tasks', pd.DataFrame())
-            charging_data = data.get('charging_tasks', pd.DataFrame())
-            events_data = data.get('events', pd.DataFrame())
-            robot_locations = data.get('robot_locations', pd.DataFrame())
-            operation_metrics = data.get('operation_metrics', pd.DataFrame())
-            performance_targets = data.get('performance_targets', pd.DataFrame())
 
-            # Start with empty dict
             metrics = {}
-
-            # Pre-calculate shared metrics
-            if not tasks_data.empty:
-                self.metrics_calculator.precalculate_task_metrics(tasks_data)
-                logger.info("✓ Pre-calculated task metrics")
-
-            if not robot_locations.empty:
-                self.metrics_calculator.set_robot_facility_map(robot_locations)
-                logger.info("✓ Cached robot-facility mapping")
-
-            # Calculate each metric with individual error handling
-            try:
-                metrics['fleet_performance'] = self.metrics_calculator.calculate_fleet_availability(
-                    robot_data, tasks_data, start_date, end_date
-                )
-            except Exception as e:
-                logger.error(f"Error calculating fleet performance: {e}")
-                metrics['fleet_performance'] = {
-                    'total_robots': 0,
-                    'active_robots': 0,
-                    'total_running_hours': 0.0,
-                    'avg_daily_running_hours_per_robot': 0.0,
-                    'days_with_tasks': 0,
-                    'period_length': 0,
-                    'days_ratio': '0/0'
-                }
-
-            try:
-                metrics['task_performance'] = self.metrics_calculator.calculate_task_performance_metrics(
-                    tasks_data
-                )
-            except Exception as e:
-                logger.error(f"Error calculating task performance: {e}")
-                metrics['task_performance'] = {
-                    'total_tasks': 0,
-                    'completed_tasks': 0,
-                    'cancelled_tasks': 0,
-                    'interrupted_tasks': 0,
-                    'completion_rate': 0.0,
-                    'total_area_cleaned': 0.0,
-                    'coverage_efficiency': 0.0,
-                    'task_modes': {},
-                    'incomplete_task_rate': 0.0
-                }
-
-            try:
-                metrics['charging_performance'] = self.metrics_calculator.calculate_charging_performance_metrics(
-                    charging_data
-                )
-            except Exception as e:
-                logger.error(f"Error calculating charging performance: {e}")
-                metrics['charging_performance'] = {
-                    'total_sessions': 0,
-                    'avg_charging_duration_minutes': 0.0,
-                    'median_charging_duration_minutes': 0.0,
-                    'avg_power_gain_percent': 0.0,
-                    'median_power_gain_percent': 0.0,
-                    'total_charging_time': 0.0
-                }
-
-            try:
-                metrics['resource_utilization'] = self.metrics_calculator.calculate_resource_utilization_metrics(
-                    tasks_data
-                )
-            except Exception as e:
-                logger.error(f"Error calculating resource utilization: {e}")
-                metrics['resource_utilization'] = {
-                    'total_energy_consumption_kwh': 0.0,
-                    'total_water_consumption_floz': 0.0,
-                    'area_per_kwh': 0,
-                    'area_per_gallon': 0,
-                    'total_area_cleaned_sqft': 0.0
-                }
-
-            try:
-                metrics['event_analysis'] = self.metrics_calculator.calculate_event_analysis_metrics(
-                    events_data
-                )
-            except Exception as e:
-                logger.error(f"Error calculating event analysis: {e}")
-                metrics['event_analysis'] = {
-                    'total_events': 0,
-                    'critical_events': 0,
-                    'error_events': 0,
-                    'warning_events': 0,
-                    'info_events': 0,
-                    'event_types': {},
-                    'event_levels': {}
-                }
-
-            # Event location metrics
-            if not events_data.empty and not robot_locations.empty:
-                try:
-                    metrics['event_location_mapping'] = self.metrics_calculator.calculate_event_location_mapping(
-                        events_data, robot_locations
-                    )
-                    metrics['event_type_by_location'] = self.metrics_calculator.calculate_event_type_by_location(
-                        events_data, robot_locations
-                    )
-                except Exception as e:
-                    logger.error(f"Error calculating event location metrics: {e}")
-                    metrics['event_location_mapping'] = {}
-                    metrics['event_type_by_location'] = {}
-            else:
-                metrics['event_location_mapping'] = {}
-                metrics['event_type_by_location'] = {}
-
-            # Facility-specific metrics
-            if not robot_locations.empty:
-                try:
-                    facility_metrics_batch = self._calculate_all_facility_metrics_batch_delegated(
-                        tasks_data, charging_data, robot_locations, start_date, end_date
-                    )
-                    metrics.update(facility_metrics_batch)
-                except Exception as e:
-                    logger.error(f"Error calculating facility metrics: {e}")
-                    metrics['facility_performance'] = {'facilities': {}}
-                    metrics['facility_efficiency_metrics'] = {}
-                    metrics['facility_task_metrics'] = {}
-                    metrics['facility_charging_metrics'] = {}
-                    metrics['facility_resource_metrics'] = {}
-                    metrics['facility_breakdown_metrics'] = {}
-            else:
-                metrics['facility_performance'] = {'facilities': {}}
-                metrics['facility_efficiency_metrics'] = {}
-                metrics['facility_task_metrics'] = {}
-                metrics['facility_charging_metrics'] = {}
-                metrics['facility_resource_metrics'] = {}
-                metrics['facility_breakdown_metrics'] = {}
-
-            # Individual robot metrics
-            period_length = self.metrics_calculator._calculate_period_length(start_date, end_date)
-            try:
-                metrics['individual_robots'] = self.metrics_calculator.calculate_individual_robot_performance(
-                    tasks_data, charging_data,
-                    robot_locations if not robot_locations.empty else robot_data,
-                    operation_metrics, period_length
-                )
-            except Exception as e:
-                logger.error(f"Error calculating individual robots: {e}")
-                metrics['individual_robots'] = []
-
-            # Map coverage
-            try:
-                metrics['map_coverage'] = self.metrics_calculator.calculate_map_coverage_metrics(tasks_data)
-            except Exception as e:
-                logger.error(f"Error calculating map coverage: {e}")
-                metrics['map_coverage'] = []
-
-            # Map performance by building
-            try:
-                if not robot_locations.empty:
-                    metrics['map_performance_by_building'] = self.metrics_calculator.calculate_map_performance_by_building(
-                        tasks_data, robot_locations, performance_targets
-                    )
-                else:
-                    metrics['map_performance_by_building'] = {}
-            except Exception as e:
-                logger.error(f"Error calculating map performance: {e}")
-                metrics['map_performance_by_building'] = {}
-
-            # Trend data
-            try:
-                metrics['trend_data'] = self.metrics_calculator.calculate_daily_trends(
-                    tasks_data, charging_data, start_date, end_date
-                )
-            except Exception as e:
-                logger.error(f"Error calculating trends: {e}")
-                metrics['trend_data'] = {
-                    'dates': [],
-                    'charging_sessions_trend': [],
-                    'charging_duration_trend': [],
-                    'energy_consumption_trend': [],
-                    'water_usage_trend': [],
-                    'cost_savings_trend': [],
-                    'roi_improvement_trend': []
-                }
+            for family_metrics in self._calculate_metric_families(data, start_date, end_date).values():
+                metrics.update(family_metrics)
 
             # Cost analysis
             try:
@@ -1037,6 +1375,257 @@ class DatabaseDataService:
                 'map_coverage': []
             }
 
+    # ============================================================================
+    # Metric families - independent groups of comprehensive metrics
+    # ============================================================================
+
+    @classmethod
+    def for_metric_families(cls, start_date: str, end_date: str) -> 'DatabaseDataService':
+        """Service with only a calculator, for metric family workers (no configuration or database access)"""
+        service = cls.__new__(cls)
+        service.metrics_calculator = PerformanceMetricsCalculator(start_date, end_date)
+        return service
+
+    def _calculate_metric_families(self, data: Dict[str, pd.DataFrame], start_date: str,
+                                   end_date: str) -> Dict[str, Dict[str, Any]]:
+        """Metrics of every family, in METRIC_FAMILIES order, with per-family timings recorded"""
+        tasks_data = data.get('cleaning_tasks', pd.DataFrame())
+        results = None
+        if self.metrics_pool_workers and len(tasks_data) >= self.metrics_pool_min_task_rows:
+            results = self._calculate_metric_families_in_pool(data, start_date, end_date)
+
+        if results is None:
+            # Pre-calculate shared metrics
+            if not tasks_data.empty:
+                self.metrics_calculator.precalculate_task_metrics(tasks_data)
+                logger.info("✓ Pre-calculated task metrics")
+
+            robot_locations = data.get('robot_locations', pd.DataFrame())
+            if not robot_locations.empty:
+                self.metrics_calculator.set_robot_facility_map(robot_locations)
+                logger.info("✓ Cached robot-facility mapping")
+
+            results = {}
+            for family, method_name in METRIC_FAMILIES.items():
+                started = time.perf_counter()
+                results[family] = (getattr(self, method_name)(data, start_date, end_date),
+                                   time.perf_counter() - started)
+
+        timings = {family: round(seconds, 3) for family, (_, seconds) in results.items()}
+        self.metric_family_seconds[(start_date, end_date)] = timings
+        logger.info(f"Metric family timings for {start_date} to {end_date}: "
+                    + ", ".join(f"{family} {seconds:.2f}s" for family, seconds in timings.items()))
+        return {family: family_metrics for family, (family_metrics, _) in results.items()}
+
+    def _calculate_metric_families_in_pool(self, data: Dict[str, pd.DataFrame], start_date: str,
+                                           end_date: str) -> Optional[Dict[str, Tuple[Dict[str, Any], float]]]:
+        """
+        Run every metric family in the worker process pool over shared report frames. A family whose
+        worker fails is calculated here instead; None when the pool or shared memory is unavailable.
+        """
+        try:
+            pool = _metrics_process_pool(self.metrics_pool_workers)
+            with SharedFrames(data) as shared_frames:
+                futures = {
+                    family: pool.submit(_calculate_metric_family, family, shared_frames.handles, start_date, end_date)
+                    for family in METRIC_FAMILIES
+                }
+                results = {}
+                for family, future in futures.items():
+                    try:
+                        results[family] = future.result()
+                    except Exception as e:
+                        logger.warning(f"Metric family {family} failed in worker ({e}); calculating in process")
+                        if isinstance(e, BrokenProcessPool):
+                            _discard_metrics_process_pool(pool)
+                        started = time.perf_counter()
+                        results[family] = (getattr(self, METRIC_FAMILIES[family])(data, start_date, end_date),
+                                           time.perf_counter() - started)
+                return results
+        except Exception as e:
+            logger.warning(f"Metrics process pool unavailable ({e}); calculating metric families in process")
+            return None
+
+    def _fleet_metrics(self, data: Dict[str, pd.DataFrame], start_date: str, end_date: str) -> Dict[str, Any]:
+        try:
+            return {'fleet_performance': self.metrics_calculator.calculate_fleet_availability(
+                data.get('robot_status', pd.DataFrame()), data.get('cleaning_tasks', pd.DataFrame()),
+                start_date, end_date, daily_rollups=data.get('daily_rollups')
+            )}
+        except Exception as e:
+            logger.error(f"Error calculating fleet performance: {e}")
+            return {'fleet_performance': {
+                'total_robots': 0,
+                'active_robots': 0,
+                'total_running_hours': 0.0,
+                'avg_daily_running_hours_per_robot': 0.0,
+                'days_with_tasks': 0,
+                'period_length': 0,
+                'days_ratio': '0/0'
+            }}
+
+    def _task_metrics(self, data: Dict[str, pd.DataFrame], start_date: str, end_date: str) -> Dict[str, Any]:
+        try:
+            return {'task_performance': self.metrics_calculator.calculate_task_performance_metrics(
+                data.get('cleaning_tasks', pd.DataFrame())
+            )}
+        except Exception as e:
+            logger.error(f"Error calculating task performance: {e}")
+            return {'task_performance': {
+                'total_tasks': 0,
+                'completed_tasks': 0,
+                'cancelled_tasks': 0,
+                'interrupted_tasks': 0,
+                'completion_rate': 0.0,
+                'total_area_cleaned': 0.0,
+                'coverage_efficiency': 0.0,
+                'task_modes': {},
+                'incomplete_task_rate': 0.0
+            }}
+
+    def _charging_metrics(self, data: Dict[str, pd.DataFrame], start_date: str, end_date: str) -> Dict[str, Any]:
+        try:
+            return {'charging_performance': self.metrics_calculator.calculate_charging_performance_metrics(
+                data.get('charging_tasks', pd.DataFrame()), daily_rollups=data.get('daily_rollups')
+            )}
+        except Exception as e:
+            logger.error(f"Error calculating charging performance: {e}")
+            return {'charging_performance': {
+                'total_sessions': 0,
+                'avg_charging_duration_minutes': 0.0,
+                'median_charging_duration_minutes': 0.0,
+                'avg_power_gain_percent': 0.0,
+                'median_power_gain_percent': 0.0,
+                'total_charging_time': 0.0
+            }}
+
+    def _resource_metrics(self, data: Dict[str, pd.DataFrame], start_date: str, end_date: str) -> Dict[str, Any]:
+        try:
+            return {'resource_utilization': self.metrics_calculator.calculate_resource_utilization_metrics(
+                data.get('cleaning_tasks', pd.DataFrame()), daily_rollups=data.get('daily_rollups')
+            )}
+        except Exception as e:
+            logger.error(f"Error calculating resource utilization: {e}")
+            return {'resource_utilization': {
+                'total_energy_consumption_kwh': 0.0,
+                'total_water_consumption_floz': 0.0,
+                'area_per_kwh': 0,
+                'area_per_gallon': 0,
+                'total_area_cleaned_sqft': 0.0
+            }}
+
+    def _event_metrics(self, data: Dict[str, pd.DataFrame], start_date: str, end_date: str) -> Dict[str, Any]:
+        events_data = data.get('events', pd.DataFrame())
+        robot_locations = data.get('robot_locations', pd.DataFrame())
+        metrics = {}
+        try:
+            metrics['event_analysis'] = self.metrics_calculator.calculate_event_analysis_metrics(
+                events_data, daily_rollups=data.get('daily_rollups')
+            )
+        except Exception as e:
+            logger.error(f"Error calculating event analysis: {e}")
+            metrics['event_analysis'] = {
+                'total_events': 0,
+                'critical_events': 0,
+                'error_events': 0,
+                'warning_events': 0,
+                'info_events': 0,
+                'event_types': {},
+                'event_levels': {}
+            }
+
+        # Event location metrics
+        if not events_data.empty and not robot_locations.empty:
+            try:
+                metrics['event_location_mapping'] = self.metrics_calculator.calculate_event_location_mapping(
+                    events_data, robot_locations
+                )
+                metrics['event_type_by_location'] = self.metrics_calculator.calculate_event_type_by_location(
+                    events_data, robot_locations
+                )
+            except Exception as e:
+                logger.error(f"Error calculating event location metrics: {e}")
+                metrics['event_location_mapping'] = {}
+                metrics['event_type_by_location'] = {}
+        else:
+            metrics['event_location_mapping'] = {}
+            metrics['event_type_by_location'] = {}
+        return metrics
+
+    def _facility_metrics(self, data: Dict[str, pd.DataFrame], start_date: str, end_date: str) -> Dict[str, Any]:
+        robot_locations = data.get('robot_locations', pd.DataFrame())
+        empty_facility_metrics = {
+            'facility_performance': {'facilities': {}},
+            'facility_efficiency_metrics': {},
+            'facility_task_metrics': {},
+            'facility_charging_metrics': {},
+            'facility_resource_metrics': {},
+            'facility_breakdown_metrics': {},
+        }
+        if robot_locations.empty:
+            return empty_facility_metrics
+        try:
+            return self._calculate_all_facility_metrics_batch_delegated(
+                data.get('cleaning_tasks', pd.DataFrame()), data.get('charging_tasks', pd.DataFrame()),
+                robot_locations, start_date, end_date
+            )
+        except Exception as e:
+            logger.error(f"Error calculating facility metrics: {e}")
+            return empty_facility_metrics
+
+    def _robot_metrics(self, data: Dict[str, pd.DataFrame], start_date: str, end_date: str) -> Dict[str, Any]:
+        robot_locations = data.get('robot_locations', pd.DataFrame())
+        period_length = self.metrics_calculator._calculate_period_length(start_date, end_date)
+        try:
+            return {'individual_robots': self.metrics_calculator.calculate_individual_robot_performance(
+                data.get('cleaning_tasks', pd.DataFrame()), data.get('charging_tasks', pd.DataFrame()),
+                robot_locations if not robot_locations.empty else data.get('robot_status', pd.DataFrame()),
+                data.get('operation_metrics', pd.DataFrame()), period_length
+            )}
+        except Exception as e:
+            logger.error(f"Error calculating individual robots: {e}")
+            return {'individual_robots': []}
+
+    def _map_coverage_metrics(self, data: Dict[str, pd.DataFrame], start_date: str, end_date: str) -> Dict[str, Any]:
+        try:
+            return {'map_coverage': self.metrics_calculator.calculate_map_coverage_metrics(
+                data.get('cleaning_tasks', pd.DataFrame())
+            )}
+        except Exception as e:
+            logger.error(f"Error calculating map coverage: {e}")
+            return {'map_coverage': []}
+
+    def _map_performance_metrics(self, data: Dict[str, pd.DataFrame], start_date: str, end_date: str) -> Dict[str, Any]:
+        robot_locations = data.get('robot_locations', pd.DataFrame())
+        try:
+            if robot_locations.empty:
+                return {'map_performance_by_building': {}}
+            return {'map_performance_by_building': self.metrics_calculator.calculate_map_performance_by_building(
+                data.get('cleaning_tasks', pd.DataFrame()), robot_locations,
+                data.get('performance_targets', pd.DataFrame())
+            )}
+        except Exception as e:
+            logger.error(f"Error calculating map performance: {e}")
+            return {'map_performance_by_building': {}}
+
+    def _trend_metrics(self, data: Dict[str, pd.DataFrame], start_date: str, end_date: str) -> Dict[str, Any]:
+        try:
+            return {'trend_data': self.metrics_calculator.calculate_daily_trends(
+                data.get('cleaning_tasks', pd.DataFrame()), data.get('charging_tasks', pd.DataFrame()),
+                start_date, end_date
+            )}
+        except Exception as e:
+            logger.error(f"Error calculating trends: {e}")
+            return {'trend_data': {
+                'dates': [],
+                'charging_sessions_trend': [],
+                'charging_duration_trend': [],
+                'energy_consumption_trend': [],
+                'water_usage_trend': [],
+                'cost_savings_trend': [],
+                'roi_improvement_trend': []
+            }}
+
     def _calculate_all_facility_metrics_batch_delegated(self, tasks_data: pd.DataFrame,
                                               charging_data: pd.DataFrame,
                                               robot_locations: pd.DataFrame,
@@ -1060,20 +1649,20 @@ class DatabaseDataService:
                 robot_facility_map = self.metrics_calculator.set_robot_facility_map(robot_locations)
 
             # Add facility column to tasks (guard missing robot_sn)
-            tasks_with_facility = tasks_data.copy()
+            tasks_with_facility = tasks_data.copy(deep=False)
             if 'robot_sn' in tasks_with_facility.columns:
-                tasks_with_facility['facility'] = tasks_with_facility['robot_sn'].map(
-                    robot_facility_map
+                tasks_with_facility['facility'] = map_labels(
+                    tasks_with_facility['robot_sn'], robot_facility_map
                 )
             else:
                 logger.warning("tasks_data missing robot_sn; facility mapping skipped for tasks")
                 tasks_with_facility['facility'] = np.nan
 
             # Add facility column to charging (guard missing robot_sn)
-            charging_with_facility = charging_data.copy()
+            charging_with_facility = charging_data.copy(deep=False)
             if 'robot_sn' in charging_with_facility.columns:
-                charging_with_facility['facility'] = charging_with_facility['robot_sn'].map(
-                    robot_facility_map
+                charging_with_facility['facility'] = map_labels(
+                    charging_with_facility['robot_sn'], robot_facility_map
                 )
             else:
                 if charging_with_facility.empty:
@@ -1208,10 +1797,10 @@ class DatabaseDataService:
                 try:
                     total_sessions = len(facility_charging)
 
-                    # Vectorized duration parsing
-                    durations = facility_charging.get('duration', pd.Series([], dtype=object)).apply(
-                        self.metrics_calculator._parse_duration_str_to_minutes
-                    ).tolist()
+                    # Durations parsed at fetch time when the frame was normalized
+                    durations = []
+                    if 'duration' in facility_charging.columns:
+                        durations = self.metrics_calculator._charging_minutes(facility_charging).tolist()
                     durations = [d for d in durations if d > 0]
 
                     # Vectorized power gain parsing
@@ -1316,7 +1905,11 @@ class DatabaseDataService:
                 logger.info(f"Calculating ROI for {len(target_robots)} robots")
 
                 # Fetch all-time task data for ROI
-                all_time_tasks = self.fetch_all_time_tasks_for_roi(target_robots, self.database_name, current_end)
+                # ROI is evaluated at previous_end, current_start and current_end
+                all_time_tasks = self.fetch_all_time_tasks_for_roi(
+                    target_robots, self.database_name, current_end,
+                    since_date=min(previous_end, current_start)
+                )
 
                 # Calculate current and previous ROI
                 roi_metrics = self.metrics_calculator.calculate_roi_metrics(
@@ -1575,4 +2168,53 @@ class DatabaseDataService:
 
     def calculate_reporting_period_length(self, start_date: str, end_date: str) -> int:
         """Calculate reporting period length in days"""
-        return self.metrics_calculator._calculate_period_length(start_date, end_date)
\ No newline at end of file
+        return self.metrics_calculator._calculate_period_length(start_date, end_date)
+
+
+# ============================================================================
+# Metric family worker processes
+# ============================================================================
+
+def _metrics_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    The metric family process pool, started on first use. Workers come from the report worker
+    context (see worker_context), whose forkserver has this module preloaded.
+    """
+    global _metrics_pool
+    with _metrics_pool_lock:
+        if _metrics_pool is None:
+            context = report_worker_context()
+            _metrics_pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+            logger.info(f"Started metrics process pool with {max_workers} workers ({context.get_start_method()})")
+        return _metrics_pool
+
+
+def _discard_metrics_process_pool(pool: ProcessPoolExecutor):
+    """Drop a pool whose workers died, so the next report starts a new one"""
+    global _metrics_pool
+    with _metrics_pool_lock:
+        if _metrics_pool is pool:
+            _metrics_pool = None
+    pool.shutdown(wait=False)
+
+
+def shutdown_metrics_process_pool():
+    """Stop the metric family worker processes (a later report starts a new pool)"""
+    global _metrics_pool
+    with _metrics_pool_lock:
+        if _metrics_pool is not None:
+            _metrics_pool.shutdown(wait=True, cancel_futures=True)
+            _metrics_pool = None
+
+
+def _calculate_metric_family(family: str, handles: Dict[str, SharedFrameHandle],
+                             start_date: str, end_date: str) -> Tuple[Dict[str, Any], float]:
+    """Worker process: metrics of one family over the shared report frames, and the seconds taken"""
+    started = time.perf_counter()
+    data = attach_frames(handles)
+    service = DatabaseDataService.for_metric_families(start_date, end_date)
+    robot_locations = data.get('robot_locations', pd.DataFrame())
+    if not robot_locations.empty:
+        service.metrics_calculator.set_robot_facility_map(robot_locations)
+    family_metrics = getattr(service, METRIC_FAMILIES[family])(data, start_date, end_date)
+    return family_metrics, time.perf_counter() - started
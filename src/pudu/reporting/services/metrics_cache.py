@@ -0,0 +1,160 @@
+"""
+Content-addressed cache of computed report metrics.
+
+Scheduled and on-demand reports often ask for the same project, robots and period. The result of
+calculate_comprehensive_metrics_with_comparison is stored under a hash of everything it depends
+on: database, sorted target robots, both periods, content categories and the project's data
+version watermark (see DatabaseDataService.fetch_data_version). A repeat report skips fetching
+and calculation and only re-renders. Entries expire after a TTL.
+
+Entries are gzipped pickles. They are only read from the cache directory or bucket this service
+writes to, never from user input.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import pickle
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+# Bump when metric calculations change so entries computed by older code are not reused
+METRICS_CACHE_VERSION = 1
+
+METRICS_CACHE_PREFIX = "report-metrics-cache"
+
+
+class LocalMetricsCacheBackend:
+    """Filesystem storage for cached metrics (single host runs and tests)"""
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+
+    def put(self, key: str, body: bytes) -> bool:
+        path = os.path.join(self.root_dir, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so concurrent readers never see a partial entry
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as file:
+            file.write(body)
+        os.replace(temp_path, path)
+        return True
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(os.path.join(self.root_dir, key), 'rb') as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+
+class S3MetricsCacheBackend:
+    """S3 storage for cached metrics, shared by the report API and scheduled report workers"""
+
+    def __init__(self, s3_client, bucket_name: str):
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+
+    def put(self, key: str, body: bytes) -> bool:
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=key,
+            Body=body,
+            ContentType='application/octet-stream',
+            Metadata={'content_type': 'report_metrics'}
+        )
+        return True
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.s3_client.get_object(Bucket=self.bucket_name, Key=key)['Body'].read()
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return None
+            raise
+
+
+class ReportMetricsCache:
+    """Get/put computed report metrics by content key, with a TTL"""
+
+    def __init__(self, backend, ttl_seconds: float = 24 * 3600):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'errors': 0, 'stores': 0}
+
+    @classmethod
+    def from_config(cls, cache_config: Dict[str, Any], region: str = 'us-east-2') -> Optional['ReportMetricsCache']:
+        """
+        Build the cache from the report_metrics_cache config section (None when disabled)
+
+        Keys: enabled, backend ('local' or 's3'), local_dir, s3_bucket, ttl_hours
+        """
+        if not cache_config or not cache_config.get('enabled', False):
+            return None
+
+        ttl_seconds = float(cache_config.get('ttl_hours', 24)) * 3600
+        if cache_config.get('backend', 'local') == 's3':
+            bucket_name = cache_config.get('s3_bucket')
+            if not bucket_name:
+                logger.warning("Report metrics cache backend is s3 but no s3_bucket is configured, cache disabled")
+                return None
+            import boto3
+            backend = S3MetricsCacheBackend(boto3.client('s3', region_name=region), bucket_name)
+        else:
+            backend = LocalMetricsCacheBackend(cache_config.get('local_dir', '/tmp/report_metrics_cache'))
+        return cls(backend, ttl_seconds)
+
+    @staticmethod
+    def make_key(database_name: str, target_robots: List[str], current_period: Tuple[str, str],
+                 previous_period: Tuple[str, str], content_categories: List[str], data_version: str) -> str:
+        """Content address of a metrics result"""
+        identity = json.dumps({
+            'version': METRICS_CACHE_VERSION,
+            'database': database_name,
+            'robots': sorted(set(target_robots)),
+            'current_period': list(current_period),
+            'previous_period': list(previous_period),
+            'content_categories': sorted(set(content_categories or [])),
+            'data_version': data_version,
+        }, sort_keys=True)
+        digest = hashlib.sha256(identity.encode('utf-8')).hexdigest()
+        return f"{METRICS_CACHE_PREFIX}/{database_name}/{digest}.pkl.gz"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value for key, or None when missing, expired or unreadable"""
+        try:
+            body = self.backend.get(key)
+            if body is None:
+                self.stats['misses'] += 1
+                return None
+
+            entry = pickle.loads(gzip.decompress(body))
+            if time.time() - entry['created_at'] > self.ttl_seconds:
+                self.stats['expired'] += 1
+                return None
+
+            self.stats['hits'] += 1
+            return entry['value']
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Report metrics cache read failed for {key}: {e}")
+            return None
+
+    def put(self, key: str, value: Any) -> bool:
+        """Store value under key (failures are logged and ignored)"""
+        try:
+            body = gzip.compress(pickle.dumps({'created_at': time.time(), 'value': value},
+                                              protocol=pickle.HIGHEST_PROTOCOL))
+            self.backend.put(key, body)
+            self.stats['stores'] += 1
+            return True
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Report metrics cache write failed for {key}: {e}")
+            return False
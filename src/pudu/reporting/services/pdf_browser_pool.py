@@ -0,0 +1,263 @@
+"""
+Persistent headless Chromium pool for HTML to PDF conversion.
+
+Launching Chromium for every PDF costs more than rendering a typical report, and concurrent
+report requests each started their own browser. This pool keeps one browser running with a fixed
+number of warm contexts, each holding a page that is reused for render after render:
+
+- Concurrency is bounded by the number of pages (max_pages); further renders wait in a FIFO
+  queue (at most max_queue of them, each for at most queue_timeout_seconds)
+- A context is closed and replaced after renders_per_context renders, so memory a page
+  accumulates stays bounded; a context that failed a render is replaced before its next use
+- A browser that disconnected (crashed) is relaunched on the next render
+
+Playwright objects belong to the event loop they were created on, so the pool runs its own event
+loop in a daemon thread. Sync callers block on the render, async callers await it; both work from
+any thread or event loop. One pool is shared per process (get_pdf_browser_pool).
+"""
+
+import asyncio
+import atexit
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# page.pdf options for reports
+PDF_OPTIONS = {
+    'format': 'A4',
+    'margin': {
+        'top': '0.75in',
+        'right': '0.75in',
+        'bottom': '0.75in',
+        'left': '0.75in'
+    },
+    'print_background': True
+}
+
+# Shared pool of this process (see get_pdf_browser_pool)
+_pdf_browser_pool: Optional['PdfBrowserPool'] = None
+_pdf_browser_pool_lock = threading.Lock()
+
+
+class PdfRenderQueueFull(Exception):
+    """Raised when max_queue renders are already waiting for a page"""
+
+
+class _PageSlot:
+    """One warm browser context and its reused page"""
+
+    def __init__(self, slot_id: int):
+        self.slot_id = slot_id
+        self.browser = None
+        self.context = None
+        self.page = None
+        self.renders = 0
+
+
+class PdfBrowserPool:
+    """Warm browser contexts rendering HTML to PDF bytes, with bounded concurrency and a wait queue"""
+
+    def __init__(self, max_pages: int = 2, renders_per_context: int = 50, max_queue: int = 32,
+                 queue_timeout_seconds: float = 120.0, wait_until: str = 'networkidle'):
+        self.max_pages = max(1, int(max_pages))
+        self.renders_per_context = max(1, int(renders_per_context))
+        self.max_queue = max(0, int(max_queue))
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.wait_until = wait_until
+
+        self._start_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._playwright = None
+        self._browser = None
+        self._browser_lock: Optional[asyncio.Lock] = None
+        self._slots: Optional[asyncio.Queue] = None
+        self._waiting = 0
+        self.stats = {'renders': 0, 'failures': 0, 'browser_launches': 0, 'context_recycles': 0,
+                      'queue_rejections': 0, 'max_queue_wait_seconds': 0.0}
+
+    @classmethod
+    def from_config(cls, pool_config: Dict[str, Any]) -> 'PdfBrowserPool':
+        """
+        Build a pool from the pdf_browser_pool config section
+
+        Keys: max_pages, renders_per_context, max_queue, queue_timeout_seconds, wait_until
+        """
+        return cls(
+            max_pages=pool_config.get('max_pages', 2),
+            renders_per_context=pool_config.get('renders_per_context', 50),
+            max_queue=pool_config.get('max_queue', 32),
+            queue_timeout_seconds=float(pool_config.get('queue_timeout_seconds', 120)),
+            wait_until=pool_config.get('wait_until', 'networkidle'),
+        )
+
+    # ============================================================================
+    # Public API
+    # ============================================================================
+
+    def render_pdf(self, html_content: str) -> bytes:
+        """Render HTML to PDF bytes, blocking until a page is free and the render finishes"""
+        self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(self._render(html_content), self._loop).result()
+
+    async def render_pdf_async(self, html_content: str) -> bytes:
+        """Render HTML to PDF bytes from any event loop (the browser runs on the pool's own loop)"""
+        if self._loop is None:
+            # Starting launches the browser; keep the caller's loop responsive meanwhile
+            await asyncio.get_running_loop().run_in_executor(None, self._ensure_started)
+        future = asyncio.run_coroutine_threadsafe(self._render(html_content), self._loop)
+        return await asyncio.wrap_future(future)
+
+    def close(self):
+        """Close the pages, contexts and browser and stop the pool's event loop"""
+        with self._start_lock:
+            if self._loop is None:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=30)
+            except Exception as e:
+                logger.warning(f"Error closing PDF browser pool: {e}")
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=10)
+            self._loop.close()
+            self._loop = None
+            self._thread = None
+            logger.info(f"Closed PDF browser pool: {self.stats}")
+
+    # ============================================================================
+    # Pool event loop
+    # ============================================================================
+
+    def _ensure_started(self):
+        """Start the pool's event loop thread and launch the browser with its warm contexts"""
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="pdf-browser-pool", daemon=True)
+            thread.start()
+            try:
+                asyncio.run_coroutine_threadsafe(self._start(), loop).result()
+            except Exception:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result()
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join(timeout=10)
+                loop.close()
+                raise
+            self._loop, self._thread = loop, thread
+
+    async def _start(self):
+        self._browser_lock = asyncio.Lock()
+        self._slots = asyncio.Queue()
+        self._waiting = 0
+        await self._ensure_browser()
+        for slot_id in range(self.max_pages):
+            slot = _PageSlot(slot_id)
+            await self._open_context(slot)
+            self._slots.put_nowait(slot)
+        logger.info(f"Started PDF browser pool with {self.max_pages} warm pages")
+
+    async def _launch_browser(self):
+        """Start Playwright and launch headless Chromium"""
+        from playwright.async_api import async_playwright
+
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        return await self._playwright.chromium.launch(headless=True)
+
+    async def _ensure_browser(self):
+        """The running browser, relaunched when it disconnected"""
+        async with self._browser_lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._browser is not None:
+                    logger.warning("PDF browser disconnected, relaunching")
+                self._browser = await self._launch_browser()
+                self.stats['browser_launches'] += 1
+            return self._browser
+
+    async def _open_context(self, slot: _PageSlot):
+        browser = await self._ensure_browser()
+        slot.browser = browser
+        slot.context = await browser.new_context()
+        slot.page = await slot.context.new_page()
+        slot.renders = 0
+
+    async def _close_context(self, slot: _PageSlot):
+        context, slot.context, slot.page = slot.context, None, None
+        if context is not None:
+            try:
+                await context.close()
+            except Exception as e:
+                logger.debug(f"Error closing PDF page context {slot.slot_id}: {e}")
+
+    async def _render(self, html_content: str) -> bytes:
+        if self._waiting >= self.max_queue and self._slots.empty():
+            self.stats['queue_rejections'] += 1
+            raise PdfRenderQueueFull(f"{self._waiting} PDF renders already waiting for a page")
+
+        started = time.perf_counter()
+        self._waiting += 1
+        try:
+            slot = await asyncio.wait_for(self._slots.get(), timeout=self.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"No PDF page free within {self.queue_timeout_seconds}s")
+        finally:
+            self._waiting -= 1
+        waited = time.perf_counter() - started
+        self.stats['max_queue_wait_seconds'] = max(self.stats['max_queue_wait_seconds'], round(waited, 3))
+
+        try:
+            browser = await self._ensure_browser()
+            if slot.page is None or slot.browser is not browser or slot.renders >= self.renders_per_context:
+                if slot.page is not None:
+                    self.stats['context_recycles'] += 1
+                await self._close_context(slot)
+                await self._open_context(slot)
+
+            await slot.page.set_content(html_content, wait_until=self.wait_until)
+            pdf_bytes = await slot.page.pdf(**PDF_OPTIONS)
+            slot.renders += 1
+            self.stats['renders'] += 1
+            return pdf_bytes
+        except Exception:
+            # Replace the context before its next use; the page may be in any state
+            self.stats['failures'] += 1
+            await self._close_context(slot)
+            raise
+        finally:
+            self._slots.put_nowait(slot)
+
+    async def _shutdown(self):
+        while self._slots is not None and not self._slots.empty():
+            await self._close_context(self._slots.get_nowait())
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception as e:
+                logger.debug(f"Error closing PDF browser: {e}")
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+def get_pdf_browser_pool(pool_config: Dict[str, Any]) -> PdfBrowserPool:
+    """The process-wide PDF browser pool, created from pool_config on first use"""
+    global _pdf_browser_pool
+    with _pdf_browser_pool_lock:
+        if _pdf_browser_pool is None:
+            _pdf_browser_pool = PdfBrowserPool.from_config(pool_config)
+            atexit.register(shutdown_pdf_browser_pool)
+        return _pdf_browser_pool
+
+
+def shutdown_pdf_browser_pool():
+    """Close the process-wide PDF browser pool (a later render creates a new one)"""
+    global _pdf_browser_pool
+    with _pdf_browser_pool_lock:
+        pool, _pdf_browser_pool = _pdf_browser_pool, None
+    if pool is not None:
+        pool.close()
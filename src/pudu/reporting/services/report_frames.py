@@ -0,0 +1,142 @@
+"""
+Typed report frames: each table fetched for a report is converted once, right after the fetch,
+into a fixed schema that the calculators can use without re-parsing or defensive copies.
+
+- Time columns become datetime64 (strings parsed once instead of in every calculator)
+- Numeric columns become numbers (values can arrive as strings or Decimal objects); percentage
+  levels narrow to int32 when that is lossless
+- Repeated labels (robot_sn, status, map_name) become categoricals
+- Charging durations ('1h 5min') are parsed once into minutes and hours columns
+- Column arrays are marked read-only, so a calculator writing into shared report data raises
+  instead of silently changing what other calculators (and the comparison period) see
+
+Measured values (areas, durations, consumption) stay float64: they are summed and rounded for
+display, and float32 would change the reported figures.
+"""
+
+import logging
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..calculators.metrics_calculator import (
+    CHARGING_HOURS_COLUMN, CHARGING_MINUTES_COLUMN,
+    parse_charging_series_to_hours, parse_duration_series_to_minutes
+)
+
+logger = logging.getLogger(__name__)
+
+# Column types per report data key: datetime, numeric (float64/int64), level (int32 when lossless), category
+REPORT_FRAME_SCHEMAS: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    'robot_status': {
+        'datetime': ('timestamp_utc',),
+        'level': ('water_level', 'sewage_level', 'battery_level'),
+    },
+    'cleaning_tasks': {
+        'datetime': ('start_time', 'end_time'),
+        'numeric': ('actual_area', 'plan_area', 'duration', 'efficiency', 'consumption', 'water_consumption'),
+        'level': ('battery_usage', 'progress'),
+        'category': ('robot_sn', 'status', 'map_name'),
+    },
+    'charging_tasks': {
+        'datetime': ('start_time', 'end_time'),
+        'category': ('robot_sn', 'status'),
+    },
+    'events': {
+        'datetime': ('task_time', 'upload_time', 'created_at'),
+        'category': ('robot_sn',),
+    },
+    'operation_metrics': {
+        'numeric': ('total_records', 'online_records', 'avg_battery_soh_numeric'),
+    },
+    'performance_targets': {
+        'numeric': ('target_efficiency', 'target_area_value', 'target_area_percentage', 'target_duration'),
+    },
+}
+
+INT32_RANGE = (np.iinfo(np.int32).min, np.iinfo(np.int32).max)
+
+
+def _to_level(values: pd.Series) -> pd.Series:
+    """Numeric percentage/level column, int32 when every value is a whole number in range"""
+    numeric = pd.to_numeric(values, errors='coerce')
+    if numeric.empty or numeric.isna().any():
+        return numeric
+    array = numeric.to_numpy()
+    if np.all(np.mod(array, 1) == 0) and INT32_RANGE[0] <= array.min() and array.max() <= INT32_RANGE[1]:
+        return numeric.astype(np.int32)
+    return numeric
+
+
+def normalize_report_frame(key: str, data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert one fetched table to its report schema (see REPORT_FRAME_SCHEMAS). Tables without a
+    schema and empty frames are returned unchanged; columns missing from the frame are skipped.
+    """
+    schema = REPORT_FRAME_SCHEMAS.get(key)
+    if schema is None or data.empty:
+        return data
+
+    columns = {column: data[column] for column in data.columns}
+    for column in schema.get('datetime', ()):
+        if column in columns and not pd.api.types.is_datetime64_any_dtype(columns[column]):
+            columns[column] = pd.to_datetime(columns[column], errors='coerce')
+    for column in schema.get('numeric', ()):
+        if column in columns:
+            columns[column] = pd.to_numeric(columns[column], errors='coerce')
+    for column in schema.get('level', ()):
+        if column in columns:
+            columns[column] = _to_level(columns[column])
+    for column in schema.get('category', ()):
+        if column in columns:
+            columns[column] = columns[column].astype('category')
+
+    if key == 'charging_tasks' and 'duration' in columns:
+        columns[CHARGING_MINUTES_COLUMN] = parse_duration_series_to_minutes(columns['duration'])
+        columns[CHARGING_HOURS_COLUMN] = parse_charging_series_to_hours(columns['duration'])
+
+    return _read_only_frame(columns, data.index)
+
+
+def freeze_frame(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copy of `data` whose numpy-backed columns are read-only (in-place writes raise ValueError).
+    Adding or replacing columns on a (shallow) copy still works, so calculators can extend it.
+    """
+    return _read_only_frame({column: data[column] for column in data.columns}, data.index)
+
+
+def _read_only_frame(columns: Dict[str, pd.Series], index: pd.Index) -> pd.DataFrame:
+    """Assemble a frame from its own read-only copies of the numpy-backed columns (extension arrays as-is)"""
+    arrays = {}
+    for column, values in columns.items():
+        if isinstance(values.dtype, np.dtype):
+            array = values.to_numpy(copy=True)
+            array.flags.writeable = False
+            arrays[column] = array
+        else:
+            arrays[column] = values.array
+    return pd.DataFrame(arrays, index=index, copy=False)
+
+
+def normalize_report_data(*reports: Dict[str, pd.DataFrame]) -> Tuple[Dict[str, pd.DataFrame], ...]:
+    """
+    Normalize report data dicts (as returned by the fetch methods). A frame shared between the
+    dicts (the same object, e.g. robot status for both comparison periods) is normalized once.
+    """
+    normalized_frames = {}
+    normalized_reports = []
+    for report_data in reports:
+        normalized = {}
+        for key, data in report_data.items():
+            frame_key = (key, id(data))
+            if frame_key not in normalized_frames:
+                try:
+                    normalized_frames[frame_key] = normalize_report_frame(key, data)
+                except Exception as e:
+                    logger.warning(f"Could not normalize {key} ({e}); using it as fetched")
+                    normalized_frames[frame_key] = data
+            normalized[key] = normalized_frames[frame_key]
+        normalized_reports.append(normalized)
+    return tuple(normalized_reports)
@@ -0,0 +1,252 @@
+"""
+Per-robot cumulative cleaning ledger for all-time ROI.
+
+mnt_robot_roi_ledger holds monthly checkpoints: for each robot and month start, the total area
+(and task count) of every ROI-eligible task that started before that month, plus the robot's
+first task time. All-time ROI for any end date is then one checkpoint row per robot plus the
+tasks since the checkpoint, instead of the robot's whole task history.
+
+Checkpoints are built lazily by the first report that needs them and only once the month is
+older than ROI_LEDGER_SETTLE_DAYS. Tasks the pipeline writes for an earlier month (late callbacks,
+backfills, corrections) delete that robot's checkpoints after the month (see
+ledger_invalidation_query), so the next report rebuilds them from the task table.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from pudu.rds.rdsTable import RDSDatabase
+
+logger = logging.getLogger(__name__)
+
+ROI_LEDGER_TABLE = "mnt_robot_roi_ledger"
+ROI_LEDGER_PRIMARY_KEYS = ['robot_sn', 'checkpoint_month']
+
+# Checkpoints are only taken at month starts at least this old (task backfills reach back 31 days)
+ROI_LEDGER_SETTLE_DAYS = 35
+
+ROI_LEDGER_TABLE_DDL = f"""
+CREATE TABLE IF NOT EXISTS {ROI_LEDGER_TABLE} (
+    robot_sn VARCHAR(100) NOT NULL,
+    checkpoint_month DATE NOT NULL,
+    cumulative_area DECIMAL(16,2) NOT NULL DEFAULT 0,
+    task_count INT NOT NULL DEFAULT 0,
+    first_task_time DATETIME NOT NULL,
+    refreshed_at DATETIME NOT NULL,
+    PRIMARY KEY (robot_sn, checkpoint_month)
+)
+"""
+
+# Tasks that count towards ROI (same filter as the all-time ROI task query)
+ROI_TASK_FILTER = "actual_area IS NOT NULL AND actual_area > 0"
+
+ROI_TASK_COLUMNS = ['robot_sn', 'actual_area', 'consumption', 'water_consumption', 'start_time', 'status', 'efficiency']
+
+
+def checkpoint_for(cutoff: date, today: date = None) -> date:
+    """Latest usable checkpoint month for a cutoff date: month start <= cutoff and settled"""
+    today = today or datetime.utcnow().date()
+    settled = min(cutoff, today - timedelta(days=ROI_LEDGER_SETTLE_DAYS))
+    return settled.replace(day=1)
+
+
+def ledger_invalidation_query(task_days: Dict[str, date]) -> str:
+    """DELETE of every checkpoint that counts tasks up to a month after each robot's earliest written task day"""
+    conditions = " OR ".join(
+        f"(robot_sn = '{robot_sn}' AND checkpoint_month > '{task_day.replace(day=1)}')"
+        for robot_sn, task_day in sorted(task_days.items())
+    )
+    return f"DELETE FROM {ROI_LEDGER_TABLE} WHERE {conditions}"
+
+
+class RoiLedgerService:
+    """
+    Reads and extends the ROI ledger of a project database.
+
+    execute_query(sql) -> DataFrame runs reads; write_rows(list_of_dicts) upserts ledger rows.
+    """
+
+    def __init__(self, execute_query: Callable[[str], pd.DataFrame], write_rows: Callable[[List[dict]], None]):
+        self.execute_query = execute_query
+        self.write_rows = write_rows
+
+    @staticmethod
+    def ensure_table(database_name: str, connection_config: str = "credentials.yaml"):
+        """Create the ledger table if the project database doesn't have it yet"""
+        database = RDSDatabase(connection_config, database_name, reuse_connection=True)
+        try:
+            database.query_data(ROI_LEDGER_TABLE_DDL)
+        finally:
+            database.close()
+
+    def get_opening_balances(self, target_robots: List[str], checkpoint: date) -> pd.DataFrame:
+        """
+        Cumulative ROI totals of every robot before `checkpoint`, extending the ledger up to it.
+
+        Returns:
+            DataFrame with robot_sn, cumulative_area, task_count, first_task_time (robots without
+            tasks before the checkpoint are omitted)
+        """
+        robot_list = "', '".join(target_robots)
+        stored = self.execute_query(f"""
+            SELECT l.robot_sn, l.checkpoint_month, l.cumulative_area, l.task_count, l.first_task_time
+            FROM {ROI_LEDGER_TABLE} l
+            INNER JOIN (
+                SELECT robot_sn, MAX(checkpoint_month) AS checkpoint_month
+                FROM {ROI_LEDGER_TABLE}
+                WHERE robot_sn IN ('{robot_list}')
+                  AND checkpoint_month <= '{checkpoint}'
+                GROUP BY robot_sn
+            ) latest
+                ON l.robot_sn = latest.robot_sn
+                AND l.checkpoint_month = latest.checkpoint_month
+        """)
+        if not stored.empty:
+            stored['checkpoint_month'] = pd.to_datetime(stored['checkpoint_month']).dt.date
+
+        current = stored[stored['checkpoint_month'] == checkpoint] if not stored.empty else stored
+        stale = [robot_sn for robot_sn in target_robots
+                 if current.empty or robot_sn not in set(current['robot_sn'])]
+        if not stale:
+            return current[['robot_sn', 'cumulative_area', 'task_count', 'first_task_time']].reset_index(drop=True)
+
+        bases = stored[stored['robot_sn'].isin(stale)] if not stored.empty else stored
+        extended = self._extend(stale, bases, checkpoint)
+        frames = [frame for frame in (current, extended) if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=['robot_sn', 'cumulative_area', 'task_count', 'first_task_time'])
+        return pd.concat(frames, ignore_index=True)[
+            ['robot_sn', 'cumulative_area', 'task_count', 'first_task_time']
+        ].reset_index(drop=True)
+
+    def _extend(self, robots: List[str], bases: pd.DataFrame, checkpoint: date) -> pd.DataFrame:
+        """Roll robots forward from their latest checkpoint (or from their first task) to `checkpoint`"""
+        base_by_robot = {row['robot_sn']: row for row in bases.to_dict(orient='records')}
+        rolled = [robot_sn for robot_sn in robots if robot_sn in base_by_robot]
+        new = [robot_sn for robot_sn in robots if robot_sn not in base_by_robot]
+
+        monthly_frames = []
+        if rolled:
+            monthly_frames.append(self._monthly_totals(
+                rolled, min(base_by_robot[robot_sn]['checkpoint_month'] for robot_sn in rolled), checkpoint
+            ))
+        if new:
+            monthly_frames.append(self._monthly_totals(new, None, checkpoint))
+        monthly_frames = [frame for frame in monthly_frames if not frame.empty]
+        monthly = pd.concat(monthly_frames, ignore_index=True) if monthly_frames else pd.DataFrame()
+
+        refreshed_at = datetime.utcnow().replace(microsecond=0)
+        rows = []
+        for robot_sn in robots:
+            base = base_by_robot.get(robot_sn)
+            robot_months = monthly[monthly['robot_sn'] == robot_sn] if not monthly.empty else monthly
+            if base is not None:
+                robot_months = robot_months[robot_months['task_month'] >= base['checkpoint_month']] \
+                    if not robot_months.empty else robot_months
+                area = float(base['cumulative_area'])
+                task_count = int(base['task_count'])
+                first_task_time = pd.Timestamp(base['first_task_time'])
+                start_month = base['checkpoint_month']
+            elif robot_months.empty:
+                continue
+            else:
+                area, task_count = 0.0, 0
+                first_task_time = robot_months['first_task_time'].min()
+                start_month = robot_months['task_month'].min()
+
+            by_month = robot_months.set_index('task_month') if not robot_months.empty else None
+            month = start_month
+            while month < checkpoint:
+                if by_month is not None and month in by_month.index:
+                    area += float(by_month.loc[month, 'area'])
+                    task_count += int(by_month.loc[month, 'task_count'])
+                month = (pd.Timestamp(month) + pd.offsets.MonthBegin(1)).date()
+                rows.append({
+                    'robot_sn': robot_sn,
+                    'checkpoint_month': month,
+                    'cumulative_area': round(area, 2),
+                    'task_count': task_count,
+                    'first_task_time': first_task_time.to_pydatetime(),
+                    'refreshed_at': refreshed_at,
+                })
+
+        if rows:
+            self.write_rows(rows)
+            logger.info(f"📒 Extended ROI ledger to {checkpoint} for {len({row['robot_sn'] for row in rows})} robots "
+                        f"({len(rows)} checkpoints)")
+
+        latest = {}
+        for row in rows:
+            if row['checkpoint_month'] == checkpoint:
+                latest[row['robot_sn']] = row
+        return pd.DataFrame(list(latest.values()), columns=['robot_sn', 'cumulative_area', 'task_count', 'first_task_time'])
+
+    def _monthly_totals(self, robots: List[str], since: Optional[date], checkpoint: date) -> pd.DataFrame:
+        """Per robot and month ROI task totals in [since, checkpoint)"""
+        robot_list = "', '".join(robots)
+        since_filter = f"AND start_time >= '{since} 00:00:00'" if since else ""
+        monthly = self.execute_query(f"""
+            SELECT
+                robot_sn,
+                DATE_SUB(DATE(start_time), INTERVAL DAYOFMONTH(start_time) - 1 DAY) AS task_month,
+                SUM(actual_area) AS area,
+                COUNT(*) AS task_count,
+                MIN(start_time) AS first_task_time
+            FROM mnt_robots_task
+            WHERE robot_sn IN ('{robot_list}')
+              AND start_time < '{checkpoint} 00:00:00'
+              {since_filter}
+              AND {ROI_TASK_FILTER}
+            GROUP BY robot_sn, task_month
+        """)
+        if not monthly.empty:
+            monthly['task_month'] = pd.to_datetime(monthly['task_month']).dt.date
+            monthly['area'] = pd.to_numeric(monthly['area'], errors='coerce').fillna(0)
+            monthly['first_task_time'] = pd.to_datetime(monthly['first_task_time'])
+        return monthly
+
+    def fetch_tasks_since(self, target_robots: List[str], checkpoint: date, end_date: str) -> pd.DataFrame:
+        """ROI-eligible tasks from the checkpoint month to end_date"""
+        robot_list = "', '".join(target_robots)
+        return self.execute_query(f"""
+            SELECT {', '.join(ROI_TASK_COLUMNS)}
+            FROM mnt_robots_task
+            WHERE robot_sn IN ('{robot_list}')
+              AND start_time >= '{checkpoint} 00:00:00'
+              AND start_time <= '{end_date}'
+              AND {ROI_TASK_FILTER}
+            ORDER BY robot_sn, start_time ASC
+        """)
+
+    def fetch_roi_tasks(self, target_robots: List[str], end_date: str, since_date: date,
+                        today: date = None) -> pd.DataFrame:
+        """
+        ROI task frame for calculate_roi_metrics / calculate_daily_roi_trends: one opening row per
+        robot carrying its totals before the checkpoint (dated at its first task) plus the real tasks
+        since. Sums and first-task dates on or after since_date match the full task history.
+        """
+        checkpoint = checkpoint_for(since_date, today)
+        balances = self.get_opening_balances(target_robots, checkpoint)
+        tail = self.fetch_tasks_since(target_robots, checkpoint, end_date)
+
+        opening = pd.DataFrame({
+            'robot_sn': balances['robot_sn'],
+            'actual_area': pd.to_numeric(balances['cumulative_area'], errors='coerce'),
+            'consumption': None,
+            'water_consumption': None,
+            'start_time': pd.to_datetime(balances['first_task_time']),
+            'status': 'Ledger checkpoint',
+            'efficiency': None,
+        }, columns=ROI_TASK_COLUMNS)
+        opening = opening[opening['actual_area'] > 0]
+
+        frames = [frame for frame in (opening, tail) if not frame.empty]
+        if not frames:
+            return pd.DataFrame()
+        result = pd.concat(frames, ignore_index=True)
+        result['start_time'] = pd.to_datetime(result['start_time'])
+        logger.info(f"📒 ROI tasks from ledger checkpoint {checkpoint}: {len(opening)} opening rows + {len(tail)} tasks")
+        return result.sort_values(['robot_sn', 'start_time']).reset_index(drop=True)
@@ -0,0 +1,107 @@
+"""
+Report frames shared with metric worker processes through shared memory.
+
+Each DataFrame is pickled once with protocol 5: the small pickle stream (index, dtypes, object
+columns) travels with every task, while the column buffers are copied once into a SharedMemory
+block. Workers rebuild the frame over read-only views of that block, so numeric, datetime and
+categorical code columns are shared by all workers instead of copied into each of them.
+"""
+
+import gc
+import logging
+import pickle
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# (shared memory block name or None, pickle stream, (offset, size) of each out-of-band buffer)
+SharedFrameHandle = Tuple[Optional[str], bytes, List[Tuple[int, int]]]
+
+# Worker side: frames attached for the most recent report, by block name
+_attached_frames: Dict[str, Tuple[shared_memory.SharedMemory, pd.DataFrame]] = {}
+
+# Worker side: released blocks whose memory is still referenced, kept open until the worker exits
+_unreleased_blocks: List[shared_memory.SharedMemory] = []
+
+
+class SharedFrames:
+    """
+    Owner of the shared memory blocks holding one report's frames. Use as a context manager;
+    the blocks are unlinked on exit (workers still attached keep their mapping until they release it).
+    """
+
+    def __init__(self, frames: Dict[str, pd.DataFrame]):
+        self._blocks: List[shared_memory.SharedMemory] = []
+        self.handles: Dict[str, SharedFrameHandle] = {}
+        try:
+            for key, frame in frames.items():
+                self.handles[key] = self._share(frame)
+        except Exception:
+            self.close()
+            raise
+
+    def _share(self, frame: pd.DataFrame) -> SharedFrameHandle:
+        buffers = []
+        payload = pickle.dumps(frame, protocol=5, buffer_callback=buffers.append)
+        raw_buffers = [buffer.raw() for buffer in buffers]
+        size = sum(raw.nbytes for raw in raw_buffers)
+        if not size:
+            return None, payload, []
+
+        block = shared_memory.SharedMemory(create=True, size=size)
+        self._blocks.append(block)
+        spans, offset = [], 0
+        for raw in raw_buffers:
+            block.buf[offset:offset + raw.nbytes] = raw.cast('B')
+            spans.append((offset, raw.nbytes))
+            offset += raw.nbytes
+        return block.name, payload, spans
+
+    def close(self):
+        for block in self._blocks:
+            try:
+                block.close()
+                block.unlink()
+            except (FileNotFoundError, BufferError) as e:
+                logger.warning(f"Could not release shared frame block {block.name}: {e}")
+        self._blocks = []
+
+    def __enter__(self) -> 'SharedFrames':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def attach_frames(handles: Dict[str, SharedFrameHandle]) -> Dict[str, pd.DataFrame]:
+    """
+    Worker side: the frames behind `handles`, rebuilt over read-only shared memory views.
+    Frames of other (earlier) reports attached by this worker are released first.
+    """
+    names = {name for name, _, _ in handles.values() if name is not None}
+    released = [_attached_frames.pop(name)[0] for name in list(_attached_frames) if name not in names]
+    if released:
+        gc.collect()
+    for block in released:
+        try:
+            block.close()
+        except BufferError:
+            # A view is still referenced somewhere; the mapping goes when the worker exits
+            logger.debug(f"Shared frame block {block.name} still in use, left mapped")
+            _unreleased_blocks.append(block)
+
+    frames = {}
+    for key, (name, payload, spans) in handles.items():
+        if name is None:
+            frames[key] = pickle.loads(payload)
+            continue
+        if name not in _attached_frames:
+            block = shared_memory.SharedMemory(name=name)
+            view = block.buf.toreadonly()
+            frame = pickle.loads(payload, buffers=[view[offset:offset + size] for offset, size in spans])
+            _attached_frames[name] = (block, frame)
+        frames[key] = _attached_frames[name][1]
+    return frames
@@ -0,0 +1,45 @@
+"""
+Start context of the report worker process pools (metric families, chart images).
+
+A process has a single forkserver, started with whatever preload list is set when the first pool
+needs it, so the pools must not each set their own. They all get their context here, with one
+combined preload list.
+"""
+
+import logging
+import multiprocessing
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Modules the forkserver imports once, so forked workers start with them loaded (missing optional
+# modules, e.g. matplotlib, are skipped by the forkserver)
+REPORT_WORKER_PRELOAD = [
+    'pudu.reporting.services.database_data_service',
+    'pudu.reporting.calculators.pdf_chart_renderer',
+    'matplotlib.figure',
+    'matplotlib.backends.backend_agg',
+]
+
+_worker_context: Optional[multiprocessing.context.BaseContext] = None
+_worker_context_lock = threading.Lock()
+
+
+def report_worker_context() -> multiprocessing.context.BaseContext:
+    """
+    The multiprocessing context of every report worker pool: forkserver with REPORT_WORKER_PRELOAD
+    (forking the report process itself is unsafe while its threads hold locks), spawn where
+    forkserver is not available.
+    """
+    global _worker_context
+    with _worker_context_lock:
+        if _worker_context is None:
+            try:
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload(REPORT_WORKER_PRELOAD)
+            except ValueError:
+                context = multiprocessing.get_context('spawn')
+            logger.info(f"Report worker processes start with {context.get_start_method()}")
+            _worker_context = context
+        return _worker_context
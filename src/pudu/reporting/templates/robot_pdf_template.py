@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
 import logging
 from ..core.report_config import ReportConfig
@@ -9,8 +9,8 @@ logger = logging.getLogger(__name__)
 class RobotPDFTemplate:
     """PDF template generator using actual database metrics (static version of HTML template)"""
 
-    def __init__(self):
-        self.chart_formatter = ChartDataFormatter()
+    def __init__(self, chart_formatter: Optional[ChartDataFormatter] = None):
+        self.chart_formatter = chart_formatter or ChartDataFormatter()
 
     def generate_comprehensive_pdf_content(self, content: Dict[str, Any], config: ReportConfig) -> str:
         """Generate comprehensive PDF-ready HTML content (static version without interactivity)"""
@@ -7,11 +7,17 @@ from .robot_database_resolver import *
 from .task_management_service import *
 from .transform_service import *
 from .s3_service import *
+from .work_location_archive import *
+from .daily_rollup_service import *
 
 __all__ = [
     "WorkLocationService",
     "RobotDatabaseResolver",
     "TaskManagementService",
     "TransformService",
-    "S3TransformService"
+    "S3TransformService",
+    "WorkLocationArchiveWriter",
+    "LocalArchiveBackend",
+    "S3ArchiveBackend",
+    "DailyRollupService"
 ]
\ No newline at end of file
@@ -0,0 +1,473 @@
+# src/pudu/services/daily_rollup_service.py
+import json
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from pudu.rds.rdsTable import RDSDatabase, RDSTable
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_TABLE = "mnt_robot_daily_rollup"
+ROLLUP_PRIMARY_KEYS = ['robot_sn', 'rollup_date']
+
+# A rollup day is only trusted by reports once it was refreshed this long after the day ended
+# (covers late callbacks and local-time task/charging timestamps up to 12h off UTC)
+ROLLUP_SEAL_DELAY = timedelta(hours=12)
+
+# Unsealed rollup days younger than this are re-refreshed by every pipeline run until they seal
+ROLLUP_RESEAL_DAYS = 3
+
+ROLLUP_TABLE_DDL = f"""
+CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+    robot_sn VARCHAR(100) NOT NULL,
+    rollup_date DATE NOT NULL,
+    -- mnt_robots_task (by DATE(start_time))
+    task_count INT NOT NULL DEFAULT 0,
+    timed_task_count INT NOT NULL DEFAULT 0,
+    actual_area DECIMAL(14,2) NOT NULL DEFAULT 0,
+    plan_area DECIMAL(14,2) NOT NULL DEFAULT 0,
+    task_duration DECIMAL(14,2) NOT NULL DEFAULT 0,
+    consumption DECIMAL(12,4) NOT NULL DEFAULT 0,
+    water_consumption DECIMAL(14,2) NOT NULL DEFAULT 0,
+    -- mnt_robots_charging_sessions (by DATE(start_time))
+    charging_sessions INT NOT NULL DEFAULT 0,
+    timed_charging_sessions INT NOT NULL DEFAULT 0,
+    charging_minutes DECIMAL(12,2) NOT NULL DEFAULT 0,
+    -- mnt_robot_events (by DATE(task_time))
+    event_count INT NOT NULL DEFAULT 0,
+    event_level_counts JSON NULL,
+    event_type_counts JSON NULL,
+    -- mnt_robot_operation_history (by DATE(timestamp_utc))
+    status_samples INT NOT NULL DEFAULT 0,
+    online_samples INT NOT NULL DEFAULT 0,
+    soh_sum DECIMAL(14,2) NOT NULL DEFAULT 0,
+    soh_samples INT NOT NULL DEFAULT 0,
+    latest_status VARCHAR(50) NULL,
+    latest_battery_soh VARCHAR(50) NULL,
+    latest_status_time DATETIME NULL,
+    refreshed_at DATETIME NOT NULL,
+    PRIMARY KEY (robot_sn, rollup_date),
+    INDEX idx_rollup_date (rollup_date)
+)
+"""
+
+# Source tables rolled up per day: table_type -> (table_name, day column, columns read)
+ROLLUP_SOURCES = {
+    'robot_task': ('mnt_robots_task', 'start_time',
+                   ['robot_sn', 'start_time', 'actual_area', 'plan_area', 'duration', 'consumption', 'water_consumption']),
+    'robot_charging': ('mnt_robots_charging_sessions', 'start_time', ['robot_sn', 'start_time', 'duration']),
+    'robot_events': ('mnt_robot_events', 'task_time', ['robot_sn', 'task_time', 'event_level', 'event_type']),
+    'robot_status': ('mnt_robot_operation_history', 'timestamp_utc', None),
+}
+
+COUNT_COLUMNS = ['task_count', 'timed_task_count', 'charging_sessions', 'timed_charging_sessions', 'event_count',
+                 'status_samples', 'online_samples', 'soh_samples']
+SUM_COLUMNS = ['actual_area', 'plan_area', 'task_duration', 'consumption', 'water_consumption',
+               'charging_minutes', 'soh_sum']
+EVENT_COUNT_COLUMNS = ['event_level_counts', 'event_type_counts']
+LATEST_COLUMNS = ['latest_status', 'latest_battery_soh', 'latest_status_time']
+ROLLUP_COLUMNS = ROLLUP_PRIMARY_KEYS + COUNT_COLUMNS + SUM_COLUMNS + EVENT_COUNT_COLUMNS + LATEST_COLUMNS
+
+# Battery SOH to numeric, same mapping as the report's operation metrics
+SOH_NUMERIC_SQL = """
+    CASE
+        WHEN battery_soh LIKE '%\\%%' THEN
+            CAST(REPLACE(REPLACE(battery_soh, '%', ''), '+', '') AS DECIMAL(5,2))
+        WHEN UPPER(TRIM(battery_soh)) IN ('HEALTHY', 'UNKNOWN') THEN 100
+        WHEN UPPER(TRIM(battery_soh)) = 'GOOD' THEN 80
+        WHEN UPPER(TRIM(battery_soh)) = 'FAIR' THEN 70
+        WHEN UPPER(TRIM(battery_soh)) = 'POOR' THEN 50
+        ELSE NULL
+    END"""
+
+
+def _robot_filter(robot_sns: Optional[Iterable[str]]) -> str:
+    if robot_sns is None:
+        return ""
+    robot_list = "', '".join(sorted(robot_sns))
+    return f"robot_sn IN ('{robot_list}') AND"
+
+
+def operation_rollup_query(robot_sns: Optional[Iterable[str]], start_time: str, end_time: str) -> str:
+    """
+    Per robot-day operation history aggregates for [start_time, end_time] in a single scan:
+    sample counts, SOH sum/count and the day's last status/SOH.
+    """
+    return f"""
+        SELECT
+            robot_sn,
+            rollup_date,
+            COUNT(*) AS status_samples,
+            SUM(CASE WHEN LOWER(status) = 'online' THEN 1 ELSE 0 END) AS online_samples,
+            COALESCE(SUM(soh_numeric), 0) AS soh_sum,
+            COUNT(soh_numeric) AS soh_samples,
+            MAX(CASE WHEN rn = 1 THEN status END) AS latest_status,
+            MAX(CASE WHEN rn = 1 THEN battery_soh END) AS latest_battery_soh,
+            MAX(timestamp_utc) AS latest_status_time
+        FROM (
+            SELECT
+                robot_sn,
+                DATE(timestamp_utc) AS rollup_date,
+                status,
+                battery_soh,
+                timestamp_utc,
+                {SOH_NUMERIC_SQL} AS soh_numeric,
+                ROW_NUMBER() OVER (PARTITION BY robot_sn, DATE(timestamp_utc) ORDER BY timestamp_utc DESC) AS rn
+            FROM mnt_robot_operation_history
+            WHERE {_robot_filter(robot_sns)} timestamp_utc >= '{start_time}'
+              AND timestamp_utc <= '{end_time}'
+        ) samples
+        GROUP BY robot_sn, rollup_date
+    """
+
+
+def source_rows_query(source: str, robot_sns: Optional[Iterable[str]], start_time: str, end_time: str) -> str:
+    """Raw rows of a task/charging/event source table needed to roll it up"""
+    table_name, day_column, columns = ROLLUP_SOURCES[source]
+    return f"""
+        SELECT {', '.join(columns)}
+        FROM {table_name}
+        WHERE {_robot_filter(robot_sns)} {day_column} >= '{start_time}'
+          AND {day_column} <= '{end_time}'
+    """
+
+
+def _with_rollup_date(data: pd.DataFrame, day_column: str, columns: List[str]) -> pd.DataFrame:
+    """Copy of data with its rollup_date (rows without a day dropped) and the given columns (missing ones empty)"""
+    data = data.copy()
+    for column in columns:
+        if column not in data.columns:
+            data[column] = None
+    data['rollup_date'] = pd.to_datetime(data[day_column], errors='coerce').dt.date
+    data['robot_sn'] = data['robot_sn'].astype(object)
+    return data.dropna(subset=['rollup_date'])
+
+
+def aggregate_tasks(tasks: pd.DataFrame) -> pd.DataFrame:
+    """Per robot-day task count, area (m²), duration (s), energy (kWh) and water"""
+    if tasks is None or tasks.empty:
+        return pd.DataFrame(columns=ROLLUP_PRIMARY_KEYS)
+    measures = ['actual_area', 'plan_area', 'duration', 'consumption', 'water_consumption']
+    tasks = _with_rollup_date(tasks, 'start_time', measures)
+    for column in measures:
+        tasks[column] = pd.to_numeric(tasks[column], errors='coerce')
+    return tasks.groupby(ROLLUP_PRIMARY_KEYS).agg(
+        task_count=('robot_sn', 'size'),
+        timed_task_count=('duration', 'count'),
+        actual_area=('actual_area', 'sum'),
+        plan_area=('plan_area', 'sum'),
+        task_duration=('duration', 'sum'),
+        consumption=('consumption', 'sum'),
+        water_consumption=('water_consumption', 'sum'),
+    ).reset_index()
+
+
+def aggregate_charging(charging: pd.DataFrame) -> pd.DataFrame:
+    """Per robot-day charging sessions, sessions with a duration and their total minutes"""
+    # Parsed like the report does, so rolled-up and raw minutes agree (imported here: the
+    # reporting package imports this module)
+    from pudu.reporting.calculators.metrics_calculator import parse_duration_series_to_minutes
+
+    if charging is None or charging.empty:
+        return pd.DataFrame(columns=ROLLUP_PRIMARY_KEYS)
+    charging = _with_rollup_date(charging, 'start_time', ['duration'])
+    minutes = parse_duration_series_to_minutes(charging['duration']).astype(float)
+    charging['charging_minutes'] = minutes.where(minutes > 0, 0.0)
+    charging['timed'] = (minutes > 0).astype(int)
+    return charging.groupby(ROLLUP_PRIMARY_KEYS).agg(
+        charging_sessions=('robot_sn', 'size'),
+        timed_charging_sessions=('timed', 'sum'),
+        charging_minutes=('charging_minutes', 'sum'),
+    ).reset_index()
+
+
+def aggregate_events(events: pd.DataFrame) -> pd.DataFrame:
+    """Per robot-day event count plus counts by level and by type (JSON objects, unset values skipped)"""
+    if events is None or events.empty:
+        return pd.DataFrame(columns=ROLLUP_PRIMARY_KEYS)
+    events = _with_rollup_date(events, 'task_time', ['event_level', 'event_type'])
+
+    def counts_json(values: pd.Series) -> str:
+        return json.dumps({str(value): int(count) for value, count in values.dropna().value_counts().sort_index().items()})
+
+    return events.groupby(ROLLUP_PRIMARY_KEYS).agg(
+        event_count=('robot_sn', 'size'),
+        event_level_counts=('event_level', counts_json),
+        event_type_counts=('event_type', counts_json),
+    ).reset_index()
+
+
+def aggregate_report_rows(tasks: pd.DataFrame, charging: pd.DataFrame, events: pd.DataFrame) -> pd.DataFrame:
+    """Task, charging and event rollup rows of rows a report already fetched"""
+    return combine_rollups([aggregate_tasks(tasks), aggregate_charging(charging), aggregate_events(events)])
+
+
+def combine_rollups(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Merge per-source and per-window daily aggregates into rollup rows, one per robot-day
+    (missing counts and sums are 0).
+    """
+    frames = [frame for frame in frames if frame is not None and not frame.empty]
+    combined = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=ROLLUP_PRIMARY_KEYS)
+    for column in ROLLUP_COLUMNS:
+        if column not in combined.columns:
+            combined[column] = None
+    combined['rollup_date'] = pd.to_datetime(combined['rollup_date']).dt.date
+    for column in COUNT_COLUMNS + SUM_COLUMNS:
+        combined[column] = pd.to_numeric(combined[column], errors='coerce').fillna(0)
+
+    if frames:
+        aggregations = {column: 'sum' for column in COUNT_COLUMNS + SUM_COLUMNS}
+        aggregations.update({column: 'first' for column in ROLLUP_COLUMNS if column not in aggregations
+                             and column not in ROLLUP_PRIMARY_KEYS})
+        combined = combined.groupby(ROLLUP_PRIMARY_KEYS, as_index=False).agg(aggregations)
+
+    for column in COUNT_COLUMNS:
+        combined[column] = combined[column].astype(int)
+    for column in SUM_COLUMNS:
+        combined[column] = combined[column].astype(float)
+    return combined[ROLLUP_COLUMNS].sort_values(ROLLUP_PRIMARY_KEYS).reset_index(drop=True)
+
+
+def split_rollup_range(start_time: str, end_time: str) -> Tuple[Optional[Tuple[date, date]], List[Tuple[str, str]]]:
+    """
+    Split a report range into the whole days it covers and the partial edge windows.
+
+    Returns:
+        ((first_whole_day, last_whole_day) or None, [(window_start, window_end), ...])
+    """
+    start_dt, end_dt = pd.Timestamp(start_time).to_pydatetime(), pd.Timestamp(end_time).to_pydatetime()
+    first_day = start_dt.date() if start_dt.time() == time.min else start_dt.date() + timedelta(days=1)
+    last_day = end_dt.date() if end_dt.time() >= time(23, 59, 59) else end_dt.date() - timedelta(days=1)
+
+    if first_day > last_day:
+        return None, [(start_time, end_time)]
+
+    edges = []
+    if start_dt.date() < first_day:
+        edges.append((start_time, f"{start_dt.date()} 23:59:59"))
+    if end_dt.date() > last_day:
+        edges.append((f"{end_dt.date()} 00:00:00", end_time))
+    return (first_day, last_day), edges
+
+
+def robot_day_windows(keys: Iterable[Tuple[str, date]]) -> List[Tuple[Set[str], str, str]]:
+    """
+    Group (robot, day) keys into queries: each robot's days merged into contiguous windows,
+    robots sharing a window queried together. Returns [(robot_sns, window_start, window_end), ...]
+    """
+    days_by_robot: Dict[str, Set[date]] = {}
+    for robot_sn, day in keys:
+        days_by_robot.setdefault(robot_sn, set()).add(day)
+    robots_by_window: Dict[Tuple[str, str], Set[str]] = {}
+    for robot_sn, days in days_by_robot.items():
+        for window in day_windows(days):
+            robots_by_window.setdefault(window, set()).add(robot_sn)
+    return [(robots, window_start, window_end) for (window_start, window_end), robots in sorted(robots_by_window.items())]
+
+
+def day_windows(days: Iterable[date]) -> List[Tuple[str, str]]:
+    """Merge days into contiguous [first 00:00:00, last 23:59:59] windows"""
+    windows = []
+    for day in sorted(set(days)):
+        if windows and windows[-1][1] == day - timedelta(days=1):
+            windows[-1][1] = day
+        else:
+            windows.append([day, day])
+    return [(f"{first} 00:00:00", f"{last} 23:59:59") for first, last in windows]
+
+
+def is_sealed(rollup_date: date, refreshed_at) -> bool:
+    """A rollup day is final once it was refreshed ROLLUP_SEAL_DELAY after the day ended"""
+    if refreshed_at is None or pd.isna(refreshed_at):
+        return False
+    return pd.Timestamp(refreshed_at).to_pydatetime() >= datetime.combine(rollup_date, time.min) + timedelta(days=1) + ROLLUP_SEAL_DELAY
+
+
+class DailyRollupService:
+    """
+    Maintains mnt_robot_daily_rollup, one row per robot per day, in each project database.
+
+    The pipeline records the (robot, day) keys touched by each write with track_changes() and calls
+    refresh() once per run; every touched day is recomputed from the source tables (so re-delivered
+    or corrected rows never double count) and upserted. Keys stay pending until their
+    upsert succeeds. Recent days that are not sealed yet are refreshed again until they are.
+    Task writes also invalidate the ROI ledger checkpoints after each robot's earliest task month.
+    """
+
+    def __init__(self, connection_config: str = "credentials.yaml"):
+        self.connection_config = connection_config
+        self.pending: Dict[str, Set[Tuple[str, date]]] = {}
+        # database -> robot -> earliest day of a written task (ROI ledger checkpoints after it are stale)
+        self.pending_task_days: Dict[str, Dict[str, date]] = {}
+        self._tables_ready: Set[str] = set()
+
+    def track_changes(self, changes: Dict, table_type: str):
+        """Record touched (robot, day) keys from _insert_to_database_with_filtering() changes"""
+        if table_type not in ROLLUP_SOURCES or not changes:
+            return
+        day_column = ROLLUP_SOURCES[table_type][1]
+        for (database_name, _), change_data in changes.items():
+            keys = self.pending.setdefault(database_name, set())
+            for change_info in change_data.values():
+                values = change_info.get('new_values') or {}
+                robot_sn = values.get('robot_sn') or change_info.get('robot_sn')
+                day_value = values.get(day_column) or change_info.get('primary_key_values', {}).get(day_column)
+                day = pd.to_datetime(day_value, errors='coerce')
+                if robot_sn and not pd.isna(day):
+                    keys.add((robot_sn, day.date()))
+                    if table_type == 'robot_task':
+                        task_days = self.pending_task_days.setdefault(database_name, {})
+                        task_days[robot_sn] = min(task_days.get(robot_sn, day.date()), day.date())
+
+    def refresh(self, now: datetime = None) -> Dict[str, int]:
+        """Recompute and upsert every tracked day plus unsealed recent days; returns rows written per database"""
+        now = now or datetime.utcnow()
+        pending, self.pending = self.pending, {}
+        pending_task_days, self.pending_task_days = self.pending_task_days, {}
+        written = {}
+        for database_name, keys in pending.items():
+            table = None
+            task_days = pending_task_days.get(database_name, {})
+            try:
+                table = self._open_rollup_table(database_name)
+                rollups = self.compute_day_rollups(database_name, keys | self._unsealed_keys(table, now), table=table)
+                rollups['refreshed_at'] = now.replace(microsecond=0)
+                table.batch_insert(rollups.astype(object).where(rollups.notna(), None).to_dict(orient='records'))
+                written[database_name] = len(rollups)
+                logger.info(f"📅 Refreshed {len(rollups)} daily rollups in {database_name}")
+                self._invalidate_roi_ledger(table, database_name, task_days)
+            except Exception as e:
+                # Keep the keys (and any tracked since) for the next refresh
+                self.pending.setdefault(database_name, set()).update(keys)
+                for robot_sn, task_day in task_days.items():
+                    kept = self.pending_task_days.setdefault(database_name, {})
+                    kept[robot_sn] = min(kept.get(robot_sn, task_day), task_day)
+                logger.error(f"❌ Failed to refresh daily rollups in {database_name}, "
+                             f"{len(keys)} days kept pending: {e}")
+                written[database_name] = 0
+            finally:
+                if table is not None:
+                    table.close()
+        return written
+
+    def compute_day_rollups(self, database_name: str, keys: Set[Tuple[str, date]], table: RDSTable = None) -> pd.DataFrame:
+        """
+        Rollup rows for exactly these (robot, day) keys, zero rows included for days without data.
+        Each robot is read only for its own contiguous day windows (see robot_day_windows).
+        """
+        if not keys:
+            return combine_rollups([])
+        rollups = combine_rollups([
+            self.compute_rollups(database_name, robot_sns, window_start, window_end, table=table)
+            for robot_sns, window_start, window_end in robot_day_windows(keys)
+        ])
+
+        wanted = pd.DataFrame(sorted(keys), columns=ROLLUP_PRIMARY_KEYS)
+        return combine_rollups([wanted.merge(rollups, on=ROLLUP_PRIMARY_KEYS, how='left')])
+
+    def compute_rollups(self, database_name: str, robot_sns: Optional[Set[str]], start_time: str, end_time: str,
+                        sources: Iterable[str] = tuple(ROLLUP_SOURCES), table: RDSTable = None) -> pd.DataFrame:
+        """Rollup rows computed from the raw source tables for [start_time, end_time]"""
+        own_table = table is None
+        if own_table:
+            table = self._open_rollup_table(database_name)
+        try:
+            return compute_rollups_from_source(table.execute_query, robot_sns, start_time, end_time, sources)
+        finally:
+            if own_table:
+                table.close()
+
+    def backfill(self, database_name: str, start_day: date, end_day: date, robot_sns: Optional[Set[str]] = None,
+                 chunk_days: int = 7, now: datetime = None) -> int:
+        """Build rollups for a date range (e.g. history from before the pipeline maintained them)"""
+        now = now or datetime.utcnow()
+        table = self._open_rollup_table(database_name)
+        written = 0
+        try:
+            chunk_start = start_day
+            while chunk_start <= end_day:
+                chunk_end = min(end_day, chunk_start + timedelta(days=chunk_days - 1))
+                rollups = self.compute_rollups(database_name, robot_sns, f"{chunk_start} 00:00:00",
+                                               f"{chunk_end} 23:59:59", table=table)
+                if not rollups.empty:
+                    rollups['refreshed_at'] = now.replace(microsecond=0)
+                    table.batch_insert(rollups.astype(object).where(rollups.notna(), None).to_dict(orient='records'))
+                    written += len(rollups)
+                logger.info(f"📅 Backfilled {database_name} {chunk_start} to {chunk_end}: {len(rollups)} rollups")
+                chunk_start = chunk_end + timedelta(days=1)
+        finally:
+            table.close()
+        return written
+
+    def _open_rollup_table(self, database_name: str) -> RDSTable:
+        """Rollup table handle, creating the table the first time a database is refreshed"""
+        if database_name not in self._tables_ready:
+            database = RDSDatabase(self.connection_config, database_name, reuse_connection=True)
+            try:
+                database.query_data(ROLLUP_TABLE_DDL)
+            finally:
+                database.close()
+            self._tables_ready.add(database_name)
+        return RDSTable(
+            connection_config=self.connection_config,
+            database_name=database_name,
+            table_name=ROLLUP_TABLE,
+            fields=None,
+            primary_keys=ROLLUP_PRIMARY_KEYS,
+            reuse_connection=True
+        )
+
+    def _invalidate_roi_ledger(self, table: RDSTable, database_name: str, task_days: Dict[str, date]):
+        """Delete ROI ledger checkpoints that don't include the written tasks (reports rebuild them)"""
+        # Imported here: pudu.reporting imports this module
+        from pudu.reporting.services.roi_ledger_service import ROI_LEDGER_TABLE, ledger_invalidation_query
+
+        if not task_days or not table.query_data(f"SHOW TABLES LIKE '{ROI_LEDGER_TABLE}'"):
+            return
+        table.query_data(ledger_invalidation_query(task_days))
+        logger.info(f"📒 Invalidated ROI ledger checkpoints of {len(task_days)} robots in {database_name}")
+
+    def _unsealed_keys(self, table: RDSTable, now: datetime) -> Set[Tuple[str, date]]:
+        since = (now - timedelta(days=ROLLUP_RESEAL_DAYS)).date()
+        rows = table.query_data(f"""
+            SELECT robot_sn, rollup_date, refreshed_at FROM {ROLLUP_TABLE}
+            WHERE rollup_date >= '{since}'
+        """)
+        return {(robot_sn, pd.Timestamp(rollup_date).date()) for robot_sn, rollup_date, refreshed_at in rows or []
+                if not is_sealed(pd.Timestamp(rollup_date).date(), refreshed_at)}
+
+
+def compute_rollups_from_source(execute_query, robot_sns: Optional[Iterable[str]], start_time: str, end_time: str,
+                                sources: Iterable[str] = tuple(ROLLUP_SOURCES)) -> pd.DataFrame:
+    """
+    Rollup rows for [start_time, end_time] from the raw tables, using execute_query(sql) -> DataFrame.
+    Operation history is aggregated in SQL; tasks, charging and events are aggregated in pandas.
+    """
+    aggregators = {'robot_task': aggregate_tasks, 'robot_charging': aggregate_charging, 'robot_events': aggregate_events}
+    frames = []
+    for source in sources:
+        if source == 'robot_status':
+            frames.append(execute_query(operation_rollup_query(robot_sns, start_time, end_time)))
+        else:
+            frames.append(aggregators[source](execute_query(source_rows_query(source, robot_sns, start_time, end_time))))
+    return combine_rollups(frames)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backfill mnt_robot_daily_rollup for a project database")
+    parser.add_argument("--database", required=True)
+    parser.add_argument("--start", required=True, help="first day, YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="last day, YYYY-MM-DD")
+    parser.add_argument("--robots", nargs="*", help="robot serial numbers (default: all)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    rows = DailyRollupService().backfill(args.database, date.fromisoformat(args.start), date.fromisoformat(args.end),
+                                         set(args.robots) if args.robots else None)
+    logger.info(f"Backfilled {rows} daily rollups")
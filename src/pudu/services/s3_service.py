@@ -8,6 +8,7 @@ from PIL import Image
 import numpy as np
 from botocore.exceptions import ClientError
 import pandas as pd
+from .work_location_archive import S3ArchiveBackend, WorkLocationArchiveWriter
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +34,9 @@ class S3TransformService:
             # Add more databases and their buckets here
         }
 
+        # Hour-partitioned Parquet writer for archived work location rows (shares bucket_mapping)
+        self.work_location_archive = WorkLocationArchiveWriter(S3ArchiveBackend(self.s3_client, self.bucket_mapping))
+
     def update_bucket_mapping(self, database_to_bucket_mapping: Dict[str, str]):
         """
         Update the bucket mapping from configuration
@@ -320,12 +324,9 @@ class S3TransformService:
         """
         Upload robot work location data to S3 for archival
 
-        S3 structure:
-        robot-work-location-archive/
-        ├── database=university_of_florida/
-        │   └── year=2025/month=01/day=15/
-        │       └── robot_sn=811064412050012/
-        │           └── batch_20250115_1400.parquet
+        Rows are written through the hour-partitioned archive writer (see WorkLocationArchiveWriter),
+        so per-robot uploads land in the same database/hour partitions as batch archival and are
+        merged later by compact_work_location_archive().
 
         Args:
             archive_data (pd.DataFrame): Work location data to archive
@@ -335,46 +336,59 @@ class S3TransformService:
         Returns:
             bool: True if upload successful, False otherwise
         """
-        try:
-            # Get bucket name for this database
-            bucket_name = self.bucket_mapping.get(database_name)
-            if not bucket_name:
-                logger.warning(f"No S3 bucket configured for database: {database_name} for work location data upload")
-                return False
-
-            # Create S3 key with date partitioning
-            current_time = datetime.now()
-            date_str = current_time.strftime('%Y-%m-%d')
-            timestamp_str = current_time.strftime('%Y%m%d_%H%M%S')
+        if not self.bucket_mapping.get(database_name):
+            logger.warning(f"No S3 bucket configured for database: {database_name} for work location data upload")
+            return False
 
-            s3_key = f"robot-work-location-archive/database={database_name}/year={current_time.year}/month={current_time.month:02d}/day={current_time.day:02d}/robot_sn={robot_sn}/batch_{timestamp_str}.parquet"
+        self.work_location_archive.add(archive_data, database_name)
+        results = self.work_location_archive.flush()
+        if not all(results.values()):
+            logger.error(f"Error uploading work location data to S3 for robot {robot_sn}")
+            return False
+        return True
 
-            # Convert DataFrame to parquet bytes
-            parquet_buffer = io.BytesIO()
-            archive_data.to_parquet(parquet_buffer, index=False, engine='pyarrow')
-            parquet_bytes = parquet_buffer.getvalue()
+    def upload_work_location_partition(self, archive_data: pd.DataFrame, database_name: str, partition_hour: datetime) -> bool:
+        """
+        Upload one hour of archived work location data (all robots) to S3
 
-            # Upload to S3
-            self.s3_client.put_object(
-                Bucket=bucket_name,
-                Key=s3_key,
-                Body=parquet_bytes,
-                ContentType='application/octet-stream',
-                Metadata={
-                    'robot_sn': robot_sn,
-                    'database_name': database_name,
-                    'record_count': str(len(archive_data)),
-                    'archive_date': date_str,
-                    'content_type': 'work_location_data'
-                }
-            )
+        S3 structure:
+        robot-work-location-archive/
+        ├── database=university_of_florida/
+        │   └── year=2025/month=01/day=15/hour=14/
+        │       └── part-20250215_020000-1a2b3c4d.parquet
 
-            logger.info(f"📦 Uploaded {len(archive_data)} work location records to S3: s3://{bucket_name}/{s3_key}")
-            return True
+        Args:
+            archive_data (pd.DataFrame): Work location rows whose update_time falls in partition_hour
+            database_name (str): Database name to determine S3 bucket
+            partition_hour (datetime): Start of the hour the rows belong to
 
-        except Exception as e:
-            logger.error(f"Error uploading work location data to S3: {e}")
+        Returns:
+            bool: True if upload successful, False otherwise
+        """
+        if not self.bucket_mapping.get(database_name):
+            logger.warning(f"No S3 bucket configured for database: {database_name} for work location data upload")
             return False
+        return self.work_location_archive.write_partition(archive_data, database_name, partition_hour)
+
+    def compact_work_location_archive(self, database_name: str = None, min_age_hours: int = 2,
+                                      since: Optional[datetime] = None) -> int:
+        """
+        Merge small archive files per hour partition (all configured databases by default)
+
+        Only partitions from since are listed (default: the last COMPACTION_LOOKBACK_HOURS before
+        the min_age_hours cutoff), so the S3 listing does not grow with the archive.
+
+        Returns:
+            int: Number of partitions compacted
+        """
+        database_names = [database_name] if database_name else list(self.bucket_mapping.keys())
+        compacted = 0
+        for name in database_names:
+            try:
+                compacted += self.work_location_archive.compact(name, min_age_hours=min_age_hours, since=since)
+            except Exception as e:
+                logger.error(f"Error compacting work location archive for {name}: {e}")
+        return compacted
 
 # Factory function for easy integration
 def create_s3_service(region: str = 'us-east-1',
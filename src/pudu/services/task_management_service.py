@@ -1,7 +1,9 @@
 import logging
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import List, Dict, Tuple, Optional
+from pymysql.converters import escape_item
 from pudu.rds.rdsTable import RDSTable
 
 logger = logging.getLogger(__name__)
@@ -14,9 +16,19 @@ class TaskManagementService:
     1. Upsert ongoing tasks (update existing or insert new)
     2. Update ongoing tasks to completed when final reports arrive from get_schedule_table()
     3. Handle time overlap detection between estimated and actual times
+
+    By default all operations run set-based through reconcile_ongoing_tasks: one SELECT of the
+    is_report = 0 rows for the affected robots, in-memory matching, and a handful of bulk statements.
+    The per-robot/per-task implementations are kept as the fallback path.
     """
+    OVERLAP_TOLERANCE = timedelta(minutes=15)
+    BULK_STATEMENT_CHUNK_SIZE = 500
+
+    ONGOING_COLUMNS = ['id', 'robot_sn', 'task_id', 'task_name', 'status', 'start_time', 'end_time']
+
     @staticmethod
-    def manage_ongoing_tasks_complete(table: RDSTable, ongoing_tasks_data: List[dict], robots_needing_cleanup: List[str]):
+    def manage_ongoing_tasks_complete(table: RDSTable, ongoing_tasks_data: List[dict], robots_needing_cleanup: List[str],
+                                      batch: bool = True):
         """
         Complete management of ongoing tasks:
         1. Upsert ongoing tasks from API data
@@ -26,10 +38,19 @@ class TaskManagementService:
             table: Database table instance
             ongoing_tasks_data: List of ongoing task data from API
             robots_needing_cleanup: List of robot SNs that need cleanup (no ongoing tasks from API)
+            batch: Use set-based reconciliation (falls back to per-robot processing on failure)
 
         Returns:
             Dict[str, Dict]: Changes detected from upsert operations only (cleanup doesn't generate notifications)
         """
+        if batch:
+            try:
+                return TaskManagementService.reconcile_ongoing_tasks(
+                    table, ongoing_tasks_data=ongoing_tasks_data, robots_needing_cleanup=robots_needing_cleanup
+                )
+            except Exception as e:
+                logger.warning(f"Batch ongoing task reconciliation failed, falling back to per-robot processing: {e}")
+
         all_changes = {}
 
         # 1. Cleanup robots without ongoing tasks - no change tracking needed
@@ -336,11 +357,28 @@ class TaskManagementService:
             logger.error(f"❌ Error inserting new ongoing task: {e}")
 
     @staticmethod
-    def update_ongoing_tasks_to_completed(table: RDSTable, completed_tasks_data: List[dict]):
+    def update_ongoing_tasks_to_completed(table: RDSTable, completed_tasks_data: List[dict], batch: bool = True):
         """
         For each completed task, find matching ongoing tasks and update them.
         If multiple ongoing tasks match by task_id, find the one with largest time overlap.
+
+        Args:
+            table: Database table instance
+            completed_tasks_data: List of completed task reports
+            batch: Use set-based reconciliation (falls back to per-task processing on failure)
         """
+        if batch:
+            try:
+                TaskManagementService.reconcile_ongoing_tasks(table, completed_tasks_data=completed_tasks_data)
+                return
+            except Exception as e:
+                logger.warning(f"Batch completion matching failed, falling back to per-task processing: {e}")
+
+        TaskManagementService._update_ongoing_tasks_to_completed_individually(table, completed_tasks_data)
+
+    @staticmethod
+    def _update_ongoing_tasks_to_completed_individually(table: RDSTable, completed_tasks_data: List[dict]):
+        """Per-task completion matching: one or two queries and one update per completed task."""
         for completed_task in completed_tasks_data:
             try:
                 robot_sn = completed_task['robot_sn']
@@ -512,4 +550,326 @@ class TaskManagementService:
         ongoing_end_exp = ongoing_end + tolerance
 
         # Check overlap
-        return max(ongoing_start_exp, completed_start) <= min(ongoing_end_exp, completed_end)
\ No newline at end of file
+        return max(ongoing_start_exp, completed_start) <= min(ongoing_end_exp, completed_end)
+
+    # ------------------------------------------------------------------
+    # Set-based reconciliation
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def reconcile_ongoing_tasks(table: RDSTable, ongoing_tasks_data: List[dict] = None,
+                                robots_needing_cleanup: List[str] = None,
+                                completed_tasks_data: List[dict] = None) -> Dict[str, Dict]:
+        """
+        Set-based reconciliation of ongoing tasks for one table.
+
+        Pulls all is_report = 0 rows for the affected robots in one query, then:
+        1. Marks ongoing rows matching completed reports as completed (best interval overlap)
+        2. Deletes ongoing rows of robots without ongoing tasks from the API
+        3. Updates progress of ongoing rows for the same task, replaces rows of switched tasks
+           and inserts first-seen ongoing tasks
+
+        Each step is applied with at most a few bulk statements.
+
+        Returns:
+            Dict[str, Dict]: Changes detected from upsert operations (same format as _upsert_ongoing_tasks)
+        """
+        ongoing_tasks_data = ongoing_tasks_data or []
+        robots_needing_cleanup = robots_needing_cleanup or []
+        completed_tasks_data = completed_tasks_data or []
+
+        robot_sns = set(robots_needing_cleanup)
+        robot_sns.update(task['robot_sn'] for task in ongoing_tasks_data)
+        robot_sns.update(task['robot_sn'] for task in completed_tasks_data)
+        if not robot_sns:
+            return {}
+
+        ongoing_df = TaskManagementService._fetch_ongoing_rows(table, sorted(robot_sns))
+
+        # 1. Completed reports -> mark best matching ongoing rows as reported
+        if completed_tasks_data and not ongoing_df.empty:
+            matches = TaskManagementService._match_completed_to_ongoing(ongoing_df, completed_tasks_data)
+            completed_updates = [
+                TaskManagementService._completed_update_row(record_id, completed_tasks_data[completed_idx])
+                for completed_idx, record_id in matches.items()
+            ]
+            TaskManagementService._bulk_update_by_id(table, completed_updates)
+            ongoing_df = ongoing_df[~ongoing_df['id'].isin(matches.values())]
+            logger.info(f"Marked {len(completed_updates)} ongoing tasks as completed in {table.table_name}")
+
+        # 2. Cleanup robots without ongoing tasks from the API
+        if robots_needing_cleanup:
+            cleanup_rows = ongoing_df[ongoing_df['robot_sn'].isin(robots_needing_cleanup)]
+            if not cleanup_rows.empty:
+                TaskManagementService._bulk_delete_ongoing(table, robot_sns=cleanup_rows['robot_sn'].unique().tolist())
+                logger.info(f"Cleaned up {len(cleanup_rows)} ongoing tasks for {cleanup_rows['robot_sn'].nunique()} robots")
+            else:
+                logger.info(f"No ongoing tasks found for any of the {len(robots_needing_cleanup)} robots")
+
+        # 3. Upsert ongoing tasks from the API
+        if ongoing_tasks_data:
+            return TaskManagementService._apply_ongoing_upserts(table, ongoing_df, ongoing_tasks_data)
+        return {}
+
+    @staticmethod
+    def _fetch_ongoing_rows(table: RDSTable, robot_sns: List[str]) -> pd.DataFrame:
+        """Fetch all is_report = 0 rows for the robots with one query."""
+        columns = TaskManagementService.ONGOING_COLUMNS
+        frames = []
+        for start in range(0, len(robot_sns), TaskManagementService.BULK_STATEMENT_CHUNK_SIZE):
+            chunk = robot_sns[start:start + TaskManagementService.BULK_STATEMENT_CHUNK_SIZE]
+            query = f"""
+                SELECT {', '.join(columns)}
+                FROM {table.table_name}
+                WHERE robot_sn IN ({', '.join(TaskManagementService._sql_literal(sn) for sn in chunk)})
+                  AND is_report = 0
+            """
+            rows = table.query_data(query) or []
+            if rows and isinstance(rows[0], dict):
+                frames.append(pd.DataFrame([[row.get(column) for column in columns] for row in rows], columns=columns))
+            else:
+                frames.append(pd.DataFrame(list(rows), columns=columns))
+
+        ongoing_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+        ongoing_df['start_time'] = pd.to_datetime(ongoing_df['start_time'], errors='coerce')
+        ongoing_df['end_time'] = pd.to_datetime(ongoing_df['end_time'], errors='coerce')
+        return ongoing_df
+
+    @staticmethod
+    def _match_completed_to_ongoing(ongoing_df: pd.DataFrame, completed_tasks_data: List[dict]) -> Dict[int, int]:
+        """
+        Match completed reports to ongoing rows with vectorized interval overlap.
+
+        Same rules as the per-task path: prefer same task_id with the largest exact overlap,
+        otherwise same task_name with the largest overlap after widening the ongoing interval
+        by OVERLAP_TOLERANCE. Completed reports are assigned in order and an ongoing row is
+        used at most once.
+
+        Returns:
+            Dict[int, int]: completed task index -> ongoing record id
+        """
+        completed_df = pd.DataFrame({
+            'completed_idx': range(len(completed_tasks_data)),
+            'robot_sn': [task['robot_sn'] for task in completed_tasks_data],
+            'task_id': [task.get('task_id') for task in completed_tasks_data],
+            'task_name': [task.get('task_name') for task in completed_tasks_data],
+            'start_time': pd.to_datetime([task.get('start_time') for task in completed_tasks_data], errors='coerce'),
+            'end_time': pd.to_datetime([task.get('end_time') for task in completed_tasks_data], errors='coerce'),
+        })
+
+        pairs = completed_df.merge(ongoing_df, on='robot_sn', suffixes=('_completed', '_ongoing'))
+        if pairs.empty:
+            return {}
+
+        tolerance = TaskManagementService.OVERLAP_TOLERANCE
+        completed_start, completed_end = pairs['start_time_completed'], pairs['end_time_completed']
+        ongoing_start, ongoing_end = pairs['start_time_ongoing'], pairs['end_time_ongoing']
+
+        exact_overlap = np.minimum(ongoing_end, completed_end) - np.maximum(ongoing_start, completed_start)
+        tolerant_overlap = (np.minimum(ongoing_end + tolerance, completed_end)
+                            - np.maximum(ongoing_start - tolerance, completed_start))
+
+        same_task_id = (pairs['task_id_completed'].notna()
+                        & (pairs['task_id_completed'].astype(str) == pairs['task_id_ongoing'].astype(str)))
+        same_task_name = pairs['task_name_completed'] == pairs['task_name_ongoing']
+        by_task_id = same_task_id & (exact_overlap > timedelta(0))
+        by_task_name = same_task_name & (tolerant_overlap > timedelta(0))
+
+        pairs['tier'] = np.where(by_task_id, 0, np.where(by_task_name, 1, -1))
+        pairs['overlap'] = exact_overlap.where(by_task_id, tolerant_overlap)
+        candidates = pairs[pairs['tier'] >= 0].sort_values(
+            ['completed_idx', 'tier', 'overlap', 'start_time_ongoing'],
+            ascending=[True, True, False, False]
+        )
+
+        matches = {}
+        used_ids = set()
+        for completed_idx, record_id in zip(candidates['completed_idx'], candidates['id']):
+            if completed_idx in matches or record_id in used_ids:
+                continue
+            matches[int(completed_idx)] = record_id
+            used_ids.add(record_id)
+        return matches
+
+    @staticmethod
+    def _completed_update_row(record_id: int, completed_task: dict) -> dict:
+        """Column values written to an ongoing row once its completed report arrives."""
+        return {
+            'id': record_id,
+            'is_report': 1,
+            'end_time': completed_task['end_time'],
+            'progress': 100,
+            'status': completed_task['status'],
+            'map_url': completed_task.get('map_url', ''),
+            'actual_area': completed_task['actual_area'],
+            'efficiency': completed_task['efficiency'],
+            'start_time': completed_task['start_time']  # Update with actual start time
+        }
+
+    @staticmethod
+    def _apply_ongoing_upserts(table: RDSTable, ongoing_df: pd.DataFrame, ongoing_tasks_data: List[dict]) -> Dict[str, Dict]:
+        """Compute progress updates, task replacements and inserts in memory and apply them in bulk."""
+        # Robot can only have 1 ongoing task: compare against its most recent ongoing row
+        latest_df = ongoing_df.sort_values('start_time', ascending=False, na_position='last').drop_duplicates('robot_sn')
+        latest_by_robot = latest_df.set_index('robot_sn').to_dict(orient='index')
+
+        progress_updates = []
+        updated_tasks = []
+        replaced_tasks = []
+        new_tasks = []
+        processed_robots = set()
+
+        for ongoing_task in ongoing_tasks_data:
+            robot_sn = ongoing_task['robot_sn']
+            # Skip if we already processed this robot in this batch
+            if robot_sn in processed_robots:
+                continue
+            processed_robots.add(robot_sn)
+
+            existing = latest_by_robot.get(robot_sn)
+            if existing is None:
+                new_tasks.append(ongoing_task)
+            elif existing['task_id'] == ongoing_task['task_id'] and existing['task_name'] == ongoing_task['task_name']:
+                progress_updates.append(TaskManagementService._progress_update_row(existing['id'], ongoing_task))
+                updated_tasks.append((ongoing_task, existing))
+            else:
+                replaced_tasks.append((robot_sn, existing['task_name']))
+                new_tasks.append(ongoing_task)
+
+        TaskManagementService._bulk_update_by_id(table, progress_updates, coalesce_columns=['end_time'])
+
+        if replaced_tasks:
+            TaskManagementService._bulk_delete_ongoing(table, robot_task_names=replaced_tasks)
+            logger.info(f"🗑️ Deleted {len(replaced_tasks)} superseded ongoing tasks before inserting new ones")
+
+        new_ids = {}
+        if new_tasks:
+            for ongoing_task in new_tasks:
+                ongoing_task['is_report'] = 0
+            for original_data, db_id in table.batch_insert_with_ids(new_tasks):
+                new_ids[original_data['robot_sn']] = db_id
+            logger.info(f"🆕 Inserted {len(new_tasks)} new ongoing tasks into {table.table_name}")
+
+        changes_detected = {}
+        for ongoing_task, existing in updated_tasks:
+            change = TaskManagementService._ongoing_change_record(ongoing_task, 'update', existing['id'])
+            change['changed_fields'] = ['progress', 'status'] if existing['status'] != ongoing_task['status'] else ['progress']
+            changes_detected[TaskManagementService._ongoing_unique_id(ongoing_task)] = change
+        for ongoing_task in new_tasks:
+            change = TaskManagementService._ongoing_change_record(ongoing_task, 'new_record', new_ids.get(ongoing_task['robot_sn']))
+            changes_detected[TaskManagementService._ongoing_unique_id(ongoing_task)] = change
+
+        logger.info(f"Reconciled ongoing tasks: {len(progress_updates)} updated, {len(new_tasks)} inserted "
+                    f"({len(replaced_tasks)} replaced)")
+        return changes_detected
+
+    @staticmethod
+    def _progress_update_row(record_id: int, ongoing_task: dict) -> dict:
+        """Column values written to an existing ongoing row for the same task."""
+        row = {
+            'id': record_id,
+            'progress': ongoing_task.get('progress', 0),
+            'actual_area': ongoing_task.get('actual_area', 0),
+            'duration': ongoing_task.get('duration', 0),
+            'efficiency': ongoing_task.get('efficiency', 0),
+            'remaining_time': ongoing_task.get('remaining_time', 0),
+            'battery_usage': ongoing_task.get('battery_usage', 0),
+            'consumption': ongoing_task.get('consumption', 0),
+            'water_consumption': ongoing_task.get('water_consumption', 0),
+            'status': ongoing_task.get('status', 'In Progress'),
+            # Update estimated end time only if task is in progress or task ended (NULL keeps the current value)
+            'end_time': None
+        }
+        if str(ongoing_task.get('status', '')).lower() in ['in progress', 'task ended']:
+            row['end_time'] = ongoing_task.get('end_time')
+        return row
+
+    @staticmethod
+    def _ongoing_unique_id(ongoing_task: dict) -> str:
+        return f"{ongoing_task['robot_sn']}_{ongoing_task['task_id']}_{ongoing_task['start_time']}"
+
+    @staticmethod
+    def _ongoing_change_record(ongoing_task: dict, change_type: str, database_key) -> dict:
+        """Change record compatible with the change detection system."""
+        return {
+            'robot_sn': ongoing_task['robot_sn'],
+            'primary_key_values': {
+                'robot_sn': ongoing_task['robot_sn'],
+                'task_name': ongoing_task['task_name'],
+                'start_time': ongoing_task['start_time']
+            },
+            'change_type': change_type,
+            'changed_fields': list(ongoing_task.keys()),
+            'old_values': {},
+            'new_values': ongoing_task,
+            'database_key': database_key
+        }
+
+    @staticmethod
+    def _bulk_update_by_id(table: RDSTable, rows: List[dict], coalesce_columns: List[str] = None):
+        """
+        Update many rows by id with one UPDATE ... JOIN per chunk.
+
+        Args:
+            rows: Dicts with 'id' and the same set of columns to update
+            coalesce_columns: Columns where a NULL value keeps the existing database value
+        """
+        if not rows:
+            return
+
+        coalesce_columns = set(coalesce_columns or [])
+        columns = [column for column in rows[0].keys() if column != 'id']
+        set_clause = ', '.join(
+            f"t.{column} = COALESCE(u.{column}, t.{column})" if column in coalesce_columns else f"t.{column} = u.{column}"
+            for column in columns
+        )
+
+        for start in range(0, len(rows), TaskManagementService.BULK_STATEMENT_CHUNK_SIZE):
+            chunk = rows[start:start + TaskManagementService.BULK_STATEMENT_CHUNK_SIZE]
+            derived_rows = ' UNION ALL '.join(
+                'SELECT ' + ', '.join(
+                    f"{TaskManagementService._sql_literal(row.get(column))} AS {column}" for column in ['id'] + columns
+                )
+                for row in chunk
+            )
+            query = f"""
+                UPDATE {table.table_name} AS t
+                JOIN ({derived_rows}) AS u ON t.id = u.id
+                SET {set_clause}
+            """
+            table.query_data(query)
+
+    @staticmethod
+    def _bulk_delete_ongoing(table: RDSTable, robot_sns: List[str] = None, robot_task_names: List[Tuple[str, str]] = None):
+        """Delete is_report = 0 rows for whole robots or (robot_sn, task_name) pairs, chunked."""
+        literal = TaskManagementService._sql_literal
+        if robot_sns:
+            conditions = [f"robot_sn IN ({', '.join(literal(sn) for sn in chunk)})"
+                          for chunk in TaskManagementService._chunks(robot_sns)]
+        else:
+            conditions = [
+                "(robot_sn, task_name) IN (" + ', '.join(f"({literal(sn)}, {literal(name)})" for sn, name in chunk) + ")"
+                for chunk in TaskManagementService._chunks(robot_task_names or [])
+            ]
+
+        for condition in conditions:
+            query = f"""
+                DELETE FROM {table.table_name}
+                WHERE {condition}
+                  AND is_report = 0
+            """
+            table.query_data(query)
+
+    @staticmethod
+    def _chunks(items: list):
+        size = TaskManagementService.BULK_STATEMENT_CHUNK_SIZE
+        return [items[start:start + size] for start in range(0, len(items), size)]
+
+    @staticmethod
+    def _sql_literal(value) -> str:
+        """Escape a Python value as a MySQL literal (None/NaN/NaT -> NULL)."""
+        if value is None or (not isinstance(value, (str, bytes)) and pd.isna(value)):
+            return "NULL"
+        if isinstance(value, pd.Timestamp):
+            value = value.to_pydatetime()
+        return escape_item(value, 'utf8mb4')
@@ -0,0 +1,282 @@
+# src/pudu/services/work_location_archive.py
+import io
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_PREFIX = "robot-work-location-archive"
+
+# Explicit schema so every file in a partition has identical column types and can be merged by compaction.
+# Columns not listed here (e.g. added to the table later) are archived as strings after these.
+WORK_LOCATION_ARCHIVE_SCHEMA = pa.schema([
+    ('robot_sn', pa.string()),
+    ('map_name', pa.string()),
+    ('status', pa.string()),
+    ('update_time', pa.timestamp('ms')),
+    ('x', pa.float64()),
+    ('y', pa.float64()),
+    ('z', pa.float64()),
+    ('new_x', pa.float64()),
+    ('new_y', pa.float64()),
+    ('new_z', pa.float64()),
+    ('original_x', pa.float64()),
+    ('original_y', pa.float64()),
+    ('original_z', pa.float64()),
+])
+
+# Low-cardinality columns that benefit from dictionary encoding
+DICTIONARY_COLUMNS = ['robot_sn', 'map_name', 'status']
+
+# Hours before the compaction cutoff that a periodic compaction run looks back over
+COMPACTION_LOOKBACK_HOURS = 48
+
+
+class LocalArchiveBackend:
+    """
+    Filesystem storage backend for the work location archive (local runs and tests).
+    Each database maps to a directory under root_dir, mirroring one S3 bucket per database.
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+
+    def put(self, database_name: str, key: str, body: bytes) -> bool:
+        path = os.path.join(self.root_dir, database_name, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(body)
+        return True
+
+    def get(self, database_name: str, key: str) -> bytes:
+        with open(os.path.join(self.root_dir, database_name, key), 'rb') as file:
+            return file.read()
+
+    def list(self, database_name: str, prefix: str) -> List[Tuple[str, int]]:
+        """List (key, size) pairs under prefix"""
+        base = os.path.join(self.root_dir, database_name)
+        objects = []
+        for dirpath, _, filenames in os.walk(os.path.join(base, prefix)):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                objects.append((os.path.relpath(path, base).replace(os.sep, '/'), os.path.getsize(path)))
+        return sorted(objects)
+
+    def delete(self, database_name: str, keys: List[str]):
+        for key in keys:
+            os.remove(os.path.join(self.root_dir, database_name, key))
+
+
+class S3ArchiveBackend:
+    """S3 storage backend for the work location archive, one bucket per database"""
+
+    def __init__(self, s3_client, bucket_mapping: Dict[str, str]):
+        self.s3_client = s3_client
+        self.bucket_mapping = bucket_mapping
+
+    def _bucket(self, database_name: str) -> str:
+        bucket_name = self.bucket_mapping.get(database_name)
+        if not bucket_name:
+            raise ValueError(f"No S3 bucket configured for database: {database_name}")
+        return bucket_name
+
+    def put(self, database_name: str, key: str, body: bytes) -> bool:
+        self.s3_client.put_object(
+            Bucket=self._bucket(database_name),
+            Key=key,
+            Body=body,
+            ContentType='application/octet-stream',
+            Metadata={'database_name': database_name, 'content_type': 'work_location_data'}
+        )
+        return True
+
+    def get(self, database_name: str, key: str) -> bytes:
+        return self.s3_client.get_object(Bucket=self._bucket(database_name), Key=key)['Body'].read()
+
+    def list(self, database_name: str, prefix: str) -> List[Tuple[str, int]]:
+        """List (key, size) pairs under prefix"""
+        objects = []
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self._bucket(database_name), Prefix=prefix):
+            objects.extend((item['Key'], item['Size']) for item in page.get('Contents', []))
+        return sorted(objects)
+
+    def delete(self, database_name: str, keys: List[str]):
+        bucket_name = self._bucket(database_name)
+        for start in range(0, len(keys), 1000):
+            self.s3_client.delete_objects(
+                Bucket=bucket_name,
+                Delete={'Objects': [{'Key': key} for key in keys[start:start + 1000]], 'Quiet': True}
+            )
+
+
+class WorkLocationArchiveWriter:
+    """
+    Hour-partitioned Parquet writer for archived work location history.
+
+    Rows are buffered across robots per (database, hour) with add() and written by flush() as
+    files of up to max_file_rows rows (row groups of row_group_size) with an explicit schema,
+    dictionary encoding and zstd compression:
+
+        robot-work-location-archive/database=<db>/year=YYYY/month=MM/day=DD/hour=HH/part-<ts>-<id>.parquet
+
+    compact() periodically merges the small files of closed partitions into one sorted file.
+    """
+
+    def __init__(self, backend, row_group_size: int = 100_000, max_file_rows: int = 1_000_000,
+                 compression: str = 'zstd', compression_level: int = 3):
+        self.backend = backend
+        self.row_group_size = row_group_size
+        self.max_file_rows = max_file_rows
+        self.compression = compression
+        self.compression_level = compression_level
+        self._buffers: Dict[Tuple[str, datetime], List[pd.DataFrame]] = {}
+
+    @staticmethod
+    def partition_prefix(database_name: str, partition_hour: datetime) -> str:
+        return (f"{ARCHIVE_PREFIX}/database={database_name}/year={partition_hour.year}/"
+                f"month={partition_hour.month:02d}/day={partition_hour.day:02d}/hour={partition_hour.hour:02d}/")
+
+    def add(self, archive_data: pd.DataFrame, database_name: str):
+        """Buffer rows (any number of robots) into their database/hour partitions"""
+        if archive_data.empty:
+            return
+        update_times = pd.to_datetime(archive_data['update_time'])
+        for partition_hour, hour_data in archive_data.groupby(update_times.dt.floor('h'), sort=True):
+            self._buffers.setdefault((database_name, partition_hour.to_pydatetime()), []).append(hour_data)
+
+    def pending_rows(self) -> int:
+        return sum(len(frame) for frames in self._buffers.values() for frame in frames)
+
+    def flush(self) -> Dict[Tuple[str, datetime], bool]:
+        """
+        Write every buffered partition.
+
+        Returns:
+            Dict mapping (database_name, partition_hour) to whether all of its files were written
+        """
+        results = {}
+        buffers, self._buffers = self._buffers, {}
+        for (database_name, partition_hour), frames in buffers.items():
+            results[(database_name, partition_hour)] = self.write_partition(
+                pd.concat(frames, ignore_index=True), database_name, partition_hour
+            )
+        return results
+
+    def write_partition(self, hour_data: pd.DataFrame, database_name: str, partition_hour: datetime,
+                        file_prefix: str = 'part') -> bool:
+        """Write one partition's rows as one file per max_file_rows rows"""
+        try:
+            table = self._conform(hour_data)
+            prefix = self.partition_prefix(database_name, partition_hour)
+            timestamp_str = datetime.now().strftime('%Y%m%d_%H%M%S')
+            for offset in range(0, table.num_rows, self.max_file_rows):
+                key = f"{prefix}{file_prefix}-{timestamp_str}-{uuid.uuid4().hex[:8]}.parquet"
+                self.backend.put(database_name, key, self._to_parquet_bytes(table.slice(offset, self.max_file_rows)))
+            logger.info(f"📦 Archived {table.num_rows} work location records to {prefix}")
+            return True
+        except Exception as e:
+            logger.error(f"Error writing work location archive partition {database_name}/{partition_hour}: {e}")
+            return False
+
+    def compact(self, database_name: str, min_age_hours: int = 2, small_file_bytes: int = 8 * 1024 * 1024,
+                since: Optional[datetime] = None) -> int:
+        """
+        Merge the small files of each closed hour partition into a single sorted file.
+
+        Partitions younger than min_age_hours are skipped because they may still receive writes
+        (archival callers pass their retention plus a settle lag, as rows are archived by age).
+        Only partitions from since (default: COMPACTION_LOOKBACK_HOURS before that cutoff) are
+        listed, one day prefix at a time, so a run costs the same however large the archive grows;
+        pass an earlier since to compact older history once.
+        The merged file is written before its sources are deleted, so a failure never loses rows
+        (at worst a partition briefly holds both the sources and the merged file).
+
+        Returns:
+            int: Number of partitions compacted
+        """
+        cutoff = datetime.now() - timedelta(hours=min_age_hours)
+        if since is None:
+            since = cutoff - timedelta(hours=COMPACTION_LOOKBACK_HOURS)
+
+        partitions: Dict[str, List[Tuple[str, int]]] = {}
+        day = since.replace(hour=0, minute=0, second=0, microsecond=0)
+        while day <= cutoff:
+            day_prefix = (f"{ARCHIVE_PREFIX}/database={database_name}/year={day.year}/"
+                          f"month={day.month:02d}/day={day.day:02d}/")
+            for key, size in self.backend.list(database_name, day_prefix):
+                if key.endswith('.parquet') and '/hour=' in key:
+                    partitions.setdefault(key.rsplit('/', 1)[0] + '/', []).append((key, size))
+            day += timedelta(days=1)
+
+        compacted = 0
+        for prefix, objects in sorted(partitions.items()):
+            partition_hour = self._parse_partition_hour(prefix)
+            if partition_hour is None or partition_hour >= cutoff or partition_hour < since:
+                continue
+            small_keys = [key for key, size in objects if size < small_file_bytes]
+            if len(small_keys) < 2:
+                continue
+
+            try:
+                merged = pd.concat([
+                    pq.read_table(io.BytesIO(self.backend.get(database_name, key))).to_pandas()
+                    for key in small_keys
+                ], ignore_index=True).sort_values(['robot_sn', 'update_time'], kind='stable')
+                if not self.write_partition(merged, database_name, partition_hour, file_prefix='compacted'):
+                    continue
+                self.backend.delete(database_name, small_keys)
+                compacted += 1
+                logger.info(f"🗜️ Compacted {len(small_keys)} files ({len(merged)} rows) in {prefix}")
+            except Exception as e:
+                logger.error(f"Error compacting work location archive partition {prefix}: {e}")
+
+        return compacted
+
+    @staticmethod
+    def _parse_partition_hour(prefix: str) -> Optional[datetime]:
+        parts = dict(part.split('=', 1) for part in prefix.strip('/').split('/') if '=' in part)
+        try:
+            return datetime(int(parts['year']), int(parts['month']), int(parts['day']), int(parts['hour']))
+        except (KeyError, ValueError):
+            return None
+
+    @staticmethod
+    def _conform(data: pd.DataFrame) -> pa.Table:
+        """Cast rows to WORK_LOCATION_ARCHIVE_SCHEMA; unknown columns follow as strings"""
+        known = set(WORK_LOCATION_ARCHIVE_SCHEMA.names)
+        extra_columns = sorted(column for column in data.columns if column not in known)
+        schema = pa.schema(list(WORK_LOCATION_ARCHIVE_SCHEMA) + [pa.field(column, pa.string()) for column in extra_columns])
+
+        arrays = []
+        for field in schema:
+            if field.name not in data.columns:
+                arrays.append(pa.nulls(len(data), type=field.type))
+                continue
+            column = data[field.name]
+            if field.name == 'update_time':
+                column = pd.to_datetime(column)
+            elif pa.types.is_floating(field.type):
+                column = pd.to_numeric(column, errors='coerce')
+            elif pa.types.is_string(field.type):
+                column = column.where(column.isna(), column.astype(str))
+            arrays.append(pa.array(column, type=field.type, from_pandas=True))
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    def _to_parquet_bytes(self, table: pa.Table) -> bytes:
+        buffer = io.BytesIO()
+        pq.write_table(
+            table, buffer,
+            row_group_size=self.row_group_size,
+            compression=self.compression,
+            compression_level=self.compression_level,
+            use_dictionary=[column for column in DICTIONARY_COLUMNS if column in table.column_names],
+        )
+        return buffer.getvalue()
@@ -4,6 +4,7 @@ import pandas as pd
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 import concurrent.futures
+from pymysql.converters import escape_item
 from pudu.rds.rdsTable import RDSTable
 from pudu.apis.foxx_api import get_robot_work_location_and_mapping_data
 from pudu.apis.core.config_manager import config_manager
@@ -41,6 +42,14 @@ class WorkLocationService:
         # self.MAX_RETENTION_COUNT = 1000    # 1000 records max
         self.ARCHIVE_BATCH_SIZE = 500      # Archive 500 records at a time
         self.MIN_ARCHIVE_THRESHOLD = 100    # Only archive if we have at least 100 excess records
+        self.ARCHIVE_ROBOTS_PER_QUERY = 200     # Robots per range-scan archive fetch
+        self.ARCHIVE_DELETE_CHUNK_ROWS = 5000   # Rows per range DELETE statement
+        # Hours past retention before an archive hour partition is compacted: archiving keeps adding
+        # files to an hour (ARCHIVE_BATCH_SIZE rows per robot and run) until retention has passed it
+        self.ARCHIVE_COMPACTION_SETTLE_HOURS = 6
+
+        # Robots per grouped SELECT / multi-row UPDATE when refreshing idle heartbeats
+        self.IDLE_BATCH_CHUNK_SIZE = 500
 
         self.run_backfill = run_backfill
 
@@ -303,12 +312,77 @@ class WorkLocationService:
         OPTIMIZATION: For idle robots, only update the most recent record's update_time
         instead of inserting new records.
 
+        Batch path: one grouped query finds every robot's latest idle row, one multi-row
+        UPDATE ... JOIN moves their update_time forward and first-seen robots are bulk inserted.
+        Falls back to per-robot processing if the batch fails.
+
         Note: Table uses (robot_sn, update_time) as composite primary key, no id column.
 
         Args:
             table: Database table instance
             idle_robots_data: DataFrame containing only idle robots data
         """
+        try:
+            # Only the latest heartbeat per robot matters
+            latest_idle_data = idle_robots_data.sort_values('update_time').drop_duplicates('robot_sn', keep='last')
+            self._update_idle_robots_batch(table, latest_idle_data)
+        except Exception as e:
+            logger.warning(f"Batch idle robot update failed, falling back to individual processing: {e}")
+            self._update_idle_robots_individually(table, idle_robots_data)
+
+    def _update_idle_robots_batch(self, table: RDSTable, idle_robots_data: pd.DataFrame):
+        """Refresh idle heartbeats with one grouped SELECT and one UPDATE per chunk of robots"""
+        robot_sns = idle_robots_data['robot_sn'].tolist()
+        latest_times = self._fetch_latest_idle_times(table, robot_sns)
+
+        heartbeat_updates = []
+        first_seen_records = []
+        for robot_row in idle_robots_data.to_dict(orient='records'):
+            most_recent_time = latest_times.get(robot_row['robot_sn'])
+            if most_recent_time is None:
+                first_seen_records.append(robot_row)
+            else:
+                heartbeat_updates.append((robot_row['robot_sn'], most_recent_time, str(robot_row['update_time'])))
+
+        for start in range(0, len(heartbeat_updates), self.IDLE_BATCH_CHUNK_SIZE):
+            chunk = heartbeat_updates[start:start + self.IDLE_BATCH_CHUNK_SIZE]
+            derived_rows = ' UNION ALL '.join(
+                f"SELECT {self._sql_literal(robot_sn)} AS robot_sn, {self._sql_literal(old_time)} AS old_time, "
+                f"{self._sql_literal(new_time)} AS new_time"
+                for robot_sn, old_time, new_time in chunk
+            )
+            query = f"""
+                UPDATE {table.table_name} AS t
+                JOIN ({derived_rows}) AS u ON t.robot_sn = u.robot_sn AND t.update_time = u.old_time
+                SET t.update_time = u.new_time
+            """
+            table.query_data(query)
+
+        if first_seen_records:
+            table.batch_insert(first_seen_records)
+            logger.info(f"Inserted first records for {len(first_seen_records)} idle robots")
+
+        logger.debug(f"Updated heartbeat for {len(heartbeat_updates)} idle robots in {table.table_name}")
+
+    def _fetch_latest_idle_times(self, table: RDSTable, robot_sns: List[str]) -> Dict[str, object]:
+        """Latest idle update_time per robot, one grouped query per chunk of robots"""
+        latest_times = {}
+        for start in range(0, len(robot_sns), self.IDLE_BATCH_CHUNK_SIZE):
+            chunk = robot_sns[start:start + self.IDLE_BATCH_CHUNK_SIZE]
+            query = f"""
+                SELECT robot_sn, MAX(update_time) AS update_time FROM {table.table_name}
+                WHERE robot_sn IN ({', '.join(self._sql_literal(robot_sn) for robot_sn in chunk)}) AND status = 'idle'
+                GROUP BY robot_sn
+            """
+            for row in table.query_data(query):
+                # RDSTable maps rows onto its field names when fields are configured, so read positionally
+                robot_sn, update_time = tuple(row.values())[:2] if isinstance(row, dict) else row[:2]
+                if update_time is not None:
+                    latest_times[robot_sn] = update_time
+        return latest_times
+
+    def _update_idle_robots_individually(self, table: RDSTable, idle_robots_data: pd.DataFrame):
+        """Per-robot fallback: SELECT the latest idle row, then UPDATE it or insert a first record"""
         try:
             for _, robot_row in idle_robots_data.iterrows():
                 robot_sn = robot_row['robot_sn']
@@ -349,7 +423,14 @@ class WorkLocationService:
                     logger.warning(f"Error updating idle robot {robot_sn}: {e}")
 
         except Exception as e:
-            logger.error(f"Error in _update_idle_robots_efficiently: {e}")
+            logger.error(f"Error in _update_idle_robots_individually: {e}")
+
+    @staticmethod
+    def _sql_literal(value) -> str:
+        """Escape a Python value as a MySQL literal"""
+        if isinstance(value, pd.Timestamp):
+            value = value.to_pydatetime()
+        return escape_item(value, 'utf8mb4')
 
     def _prepare_enhanced_work_location_data(self, work_location_data: pd.DataFrame) -> pd.DataFrame:
         """
@@ -412,6 +493,10 @@ class WorkLocationService:
     def _run_archival_for_table(self, table: RDSTable):
         """
         Run archival process for a specific table to maintain performance
+
+        Plans all robots with one GROUP BY query, then archives them set-based (one range-scan
+        fetch per chunk of robots, one Parquet object per database/hour, chunked range deletes).
+        Falls back to per-robot archival if the batch path fails.
         """
         try:
             # Check which robots need archival
@@ -423,130 +508,189 @@ class WorkLocationService:
 
             logger.info(f"📦 {len(robots_needing_archive)} robots need archival in {table.database_name}")
 
-            for robot_sn, archive_info in robots_needing_archive.items():
-                try:
-                    # Get data to archive
-                    archive_data = self._get_archive_data_for_robot(table, robot_sn, archive_info)
+            try:
+                self._archive_robots_batch(table, robots_needing_archive)
+            except Exception as e:
+                logger.warning(f"Batch archival failed, falling back to individual processing: {e}")
+                self._archive_robots_individually(table, robots_needing_archive)
 
-                    if not archive_data.empty:
-                        # Archive to S3
-                        s3_success = self._upload_robot_data_to_s3(archive_data, robot_sn, table.database_name)
+        except Exception as e:
+            logger.error(f"Error running archival for {table.database_name}.{table.table_name}: {e}")
 
-                        if s3_success:
-                            # Delete from database
-                            self._delete_archived_data(table, robot_sn, archive_data)
-                            logger.info(f"✅ Archived {len(archive_data)} records for robot {robot_sn}")
-                        else:
-                            logger.warning(f"⚠️ Failed to upload to S3 for robot {robot_sn}, keeping data in DB")
+    def _archive_robots_individually(self, table: RDSTable, robots_needing_archive: Dict[str, Dict]):
+        """Per-robot fallback: fetch, upload and delete each robot's archivable rows separately"""
+        for robot_sn, archive_info in robots_needing_archive.items():
+            try:
+                # Get data to archive
+                archive_data = self._get_archive_data_for_robot(table, robot_sn, archive_info)
 
-                except Exception as e:
-                    logger.error(f"❌ Error archiving robot {robot_sn}: {e}")
+                if not archive_data.empty:
+                    # Archive to S3
+                    s3_success = self._upload_robot_data_to_s3(archive_data, robot_sn, table.database_name)
 
-        except Exception as e:
-            logger.error(f"Error running archival for {table.database_name}.{table.table_name}: {e}")
+                    if s3_success:
+                        # Delete from database
+                        self._delete_archived_data(table, robot_sn, archive_data)
+                        logger.info(f"✅ Archived {len(archive_data)} records for robot {robot_sn}")
+                    else:
+                        logger.warning(f"⚠️ Failed to upload to S3 for robot {robot_sn}, keeping data in DB")
+
+            except Exception as e:
+                logger.error(f"❌ Error archiving robot {robot_sn}: {e}")
 
     def _check_robots_needing_archive(self, table: RDSTable) -> Dict[str, Dict]:
         """
-        Check which robots need archival based on dual conditions:
-        - Keep max 24 hours OR 1000 records (whichever is LESS)
+        Archival planner: compute count/min/max/old_count for every robot with one GROUP BY query
+        and return the robots that have records older than MAX_RETENTION_HOURS.
         """
         robots_needing_archive = {}
 
         try:
-            # Get all robots that have data in this table
-            robots_query = f"SELECT DISTINCT robot_sn FROM {table.table_name}"
-            robot_results = table.query_data(robots_query)
-
-            for robot_record in robot_results:
-                robot_sn = robot_record[0] if isinstance(robot_record, tuple) else robot_record.get('robot_sn')
-                if not robot_sn:
-                    continue
+            time_cutoff = datetime.now() - timedelta(hours=self.MAX_RETENTION_HOURS)
+            cutoff_str = time_cutoff.strftime('%Y-%m-%d %H:%M:%S')
+            stats_query = f"""
+                SELECT
+                    robot_sn,
+                    COUNT(*) as total_count,
+                    MIN(update_time) as oldest_time,
+                    MAX(update_time) as newest_time,
+                    SUM(update_time < '{cutoff_str}') as old_count
+                FROM {table.table_name}
+                GROUP BY robot_sn
+            """
 
-                archive_info = self._check_robot_archive_needs(table, robot_sn)
-                if archive_info:
-                    robots_needing_archive[robot_sn] = archive_info
+            for stats in table.query_data(stats_query):
+                # RDSTable maps rows onto its field names when fields are configured, so read positionally
+                robot_sn, total_count, oldest_time, newest_time, old_count = (
+                    tuple(stats.values()) if isinstance(stats, dict) else tuple(stats)
+                )[:5]
+                old_count = int(old_count or 0)
+
+                if not robot_sn or total_count < self.MIN_ARCHIVE_THRESHOLD or old_count == 0:
+                    continue  # Not enough data to bother archiving, or nothing past retention
+
+                archive_info = {
+                    'excess_count': old_count,
+                    'cutoff_method': 'time',
+                    'cutoff_time': time_cutoff,
+                    'reason': f'Time limit exceeded: oldest record from {oldest_time} < {time_cutoff}',
+                    'archive_count': min(old_count, self.ARCHIVE_BATCH_SIZE) # archive at most ARCHIVE_BATCH_SIZE records
+                }
+                logger.debug(f"🗂️ Robot {robot_sn} needs archive: {archive_info['reason']}")
+                robots_needing_archive[robot_sn] = archive_info
 
         except Exception as e:
             logger.error(f"Error checking archive needs: {e}")
 
         return robots_needing_archive
 
-    def _check_robot_archive_needs(self, table: RDSTable, robot_sn: str) -> Optional[Dict]:
+    def _archive_robots_batch(self, table: RDSTable, robots_needing_archive: Dict[str, Dict]):
         """
-        NEW METHOD: Check if specific robot needs archival based on time AND count limits
+        Archive planned robots set-based: fetch their oldest rows with one range-scan query per
+        chunk of robots, upload one Parquet object per hour and delete only the uploaded hours.
         """
-        try:
-            # Get robot's data statistics
-            stats_query = f"""
-                SELECT
-                    COUNT(*) as total_count,
-                    MIN(update_time) as oldest_time,
-                    MAX(update_time) as newest_time
-                FROM {table.table_name}
-                WHERE robot_sn = '{robot_sn}'
-            """
+        archive_data = self._get_archive_data_for_robots(table, robots_needing_archive)
+        if archive_data.empty:
+            return
 
-            result = table.query_data(stats_query)
-            if not result:
-                return None
-
-            stats = result[0]
-            total_count = stats[0] if isinstance(stats, tuple) else stats.get('total_count')
-            oldest_time = stats[1] if isinstance(stats, tuple) else stats.get('oldest_time')
-
-            if total_count < self.MIN_ARCHIVE_THRESHOLD:
-                return None  # Not enough data to bother archiving
-
-            # Convert string timestamps to datetime if needed
-            if isinstance(oldest_time, str):
-                oldest_time = pd.to_datetime(oldest_time)
-
-            current_time = datetime.now()
-            time_cutoff = current_time - timedelta(hours=self.MAX_RETENTION_HOURS)
-
-            # Check both conditions: time-based and count-based
-            archive_info = None
-
-            # Condition 1: Count limit exceeded
-            # if total_count > self.MAX_RETENTION_COUNT:
-            #     excess_count = total_count - self.MAX_RETENTION_COUNT
-            #     archive_info = {
-            #         'excess_count': excess_count,
-            #         'cutoff_method': 'count',
-            #         'reason': f'Count limit exceeded: {total_count} > {self.MAX_RETENTION_COUNT}',
-            #         'archive_count': min(excess_count, self.ARCHIVE_BATCH_SIZE) # archive at most ARCHIVE_BATCH_SIZE records
-            #     }
-
-            # Condition 2: Time limit exceeded
-            if oldest_time < time_cutoff:
-                # Count how many records are older than 24 hours
-                old_count_query = f"""
-                    SELECT COUNT(*)
-                    FROM {table.table_name}
-                    WHERE robot_sn = '{robot_sn}'
-                    AND update_time < '{time_cutoff.strftime('%Y-%m-%d %H:%M:%S')}'
-                """
+        archive_data['update_time'] = pd.to_datetime(archive_data['update_time'])
+        partition_hours = archive_data['update_time'].dt.floor('h')
 
-                old_count_result = table.query_data(old_count_query)
-                old_count = old_count_result[0][0] if old_count_result else 0
+        archived_parts = []
+        for partition_hour, hour_data in archive_data.groupby(partition_hours, sort=True):
+            if self._upload_partition_to_s3(hour_data, table.database_name, partition_hour.to_pydatetime()):
+                archived_parts.append(hour_data)
+            else:
+                logger.warning(f"⚠️ Failed to upload {partition_hour} partition to S3, keeping {len(hour_data)} records in DB")
 
-                if old_count > 0:
-                    archive_info = {
-                        'excess_count': old_count,
-                        'cutoff_method': 'time',
-                        'cutoff_time': time_cutoff,
-                        'reason': f'Time limit exceeded: oldest record from {oldest_time} < {time_cutoff}',
-                        'archive_count': min(old_count, self.ARCHIVE_BATCH_SIZE) # archive at most ARCHIVE_BATCH_SIZE records
-                    }
+        if not archived_parts:
+            return
 
-            if archive_info:
-                logger.debug(f"🗂️ Robot {robot_sn} needs archive: {archive_info['reason']}")
+        archived_data = pd.concat(archived_parts)
+        deleted = self._delete_archived_ranges(table, archived_data)
+        logger.info(f"✅ Archived {len(archived_data)} records for {archived_data['robot_sn'].nunique()} robots "
+                    f"in {len(archived_parts)} hourly partitions ({deleted} rows deleted)")
 
-            return archive_info
+    def _get_archive_data_for_robots(self, table: RDSTable, robots_needing_archive: Dict[str, Dict]) -> pd.DataFrame:
+        """
+        Fetch the oldest archivable rows (at most ARCHIVE_BATCH_SIZE per robot) for many robots at once.
+        Each query is a range scan on the (robot_sn, update_time) primary key.
+        """
+        robot_sns = sorted(robots_needing_archive)
+        cutoff_time = next(iter(robots_needing_archive.values()))['cutoff_time']
+        frames = []
+
+        for start in range(0, len(robot_sns), self.ARCHIVE_ROBOTS_PER_QUERY):
+            chunk = robot_sns[start:start + self.ARCHIVE_ROBOTS_PER_QUERY]
+            query = f"""
+                SELECT * FROM (
+                    SELECT t.*, ROW_NUMBER() OVER (PARTITION BY robot_sn ORDER BY update_time ASC) AS archive_rank
+                    FROM {table.table_name} t
+                    WHERE robot_sn IN ({', '.join(self._sql_literal(robot_sn) for robot_sn in chunk)})
+                    AND update_time < '{cutoff_time.strftime('%Y-%m-%d %H:%M:%S')}'
+                ) ranked
+                WHERE archive_rank <= {self.ARCHIVE_BATCH_SIZE}
+                ORDER BY robot_sn, update_time
+            """
+            chunk_data = table.execute_query(query)
+            if chunk_data is not None and not chunk_data.empty:
+                frames.append(chunk_data.drop(columns=['archive_rank']))
+
+        if not frames:
+            return pd.DataFrame()
+
+        archive_data = pd.concat(frames, ignore_index=True)
+        logger.debug(f"📦 Retrieved {len(archive_data)} records for archival: {len(robot_sns)} robots")
+        return archive_data
+
+    def _upload_partition_to_s3(self, hour_data: pd.DataFrame, database_name: str, partition_hour: datetime) -> bool:
+        """Upload one database/hour partition through the transform service's S3 service"""
+        try:
+            if hasattr(self.transform_service, 's3_service') and self.transform_service.s3_service:
+                return self.transform_service.s3_service.upload_work_location_partition(
+                    hour_data, database_name, partition_hour
+                )
+            logger.warning(f"S3 service not available, cannot archive work location data for {database_name}")
+            return False
 
         except Exception as e:
-            logger.error(f"Error checking archive needs for robot {robot_sn}: {e}")
-            return None
+            logger.error(f"Error uploading work location partition {partition_hour} to S3: {e}")
+            return False
+
+    def _delete_archived_ranges(self, table: RDSTable, archived_data: pd.DataFrame) -> int:
+        """
+        Delete archived rows by primary-key ranges: one (robot_sn, update_time BETWEEN min AND max)
+        range per robot and hour, combined into statements of at most ARCHIVE_DELETE_CHUNK_ROWS rows.
+        Ranges are exact because the fetch took each robot's oldest rows in update_time order.
+        """
+        hours = archived_data['update_time'].dt.floor('h')
+        ranges = archived_data.groupby(['robot_sn', hours]).agg(
+            min_time=('update_time', 'min'), max_time=('update_time', 'max'), row_count=('update_time', 'size')
+        ).reset_index()
+
+        deleted = 0
+        chunk, chunk_rows = [], 0
+        for robot_range in ranges.itertuples(index=False):
+            chunk.append(robot_range)
+            chunk_rows += robot_range.row_count
+            if chunk_rows >= self.ARCHIVE_DELETE_CHUNK_ROWS:
+                deleted += self._delete_range_chunk(table, chunk)
+                chunk, chunk_rows = [], 0
+        if chunk:
+            deleted += self._delete_range_chunk(table, chunk)
+
+        logger.debug(f"🗑️ Deleted {deleted} archived records in {len(ranges)} ranges")
+        return deleted
+
+    def _delete_range_chunk(self, table: RDSTable, ranges: list) -> int:
+        conditions = ' OR '.join(
+            f"(robot_sn = {self._sql_literal(robot_range.robot_sn)} AND update_time BETWEEN "
+            f"{self._sql_literal(robot_range.min_time)} AND {self._sql_literal(robot_range.max_time)})"
+            for robot_range in ranges
+        )
+        deleted = table.cursor.execute(f"DELETE FROM {table.table_name} WHERE {conditions}")
+        table.cursor.connection.commit()
+        return deleted or 0
 
     def _get_archive_data_for_robot(self, table: RDSTable, robot_sn: str, archive_info: Dict) -> pd.DataFrame:
         """
@@ -1070,6 +1214,33 @@ class WorkLocationService:
         logger.debug(f"Filtered {len(filtered_mappings)} mappings for {len(target_robots)} robots using maps: {maps_used_by_target_robots}")
         return filtered_mappings
 
+    def compact_archive(self, since: Optional[datetime] = None) -> int:
+        """
+        Merge the small archive files of closed hour partitions (periodic compaction job)
+
+        Archived rows are partitioned by their update_time hour and only leave the database once
+        they are MAX_RETENTION_HOURS old, so a partition is closed once it is older than the
+        retention plus ARCHIVE_COMPACTION_SETTLE_HOURS. Only the lookback window before that
+        cutoff is listed unless since is given (e.g. for a one-off backfill).
+
+        Returns:
+            int: Number of partitions compacted
+        """
+        try:
+            if hasattr(self.transform_service, 's3_service') and self.transform_service.s3_service:
+                min_age_hours = self.MAX_RETENTION_HOURS + self.ARCHIVE_COMPACTION_SETTLE_HOURS
+                compacted = self.transform_service.s3_service.compact_work_location_archive(min_age_hours=min_age_hours,
+                                                                                    since=since)
+                logger.info(f"🗜️ Compacted {compacted} work location archive partitions")
+                return compacted
+            logger.warning("S3 service not available, skipping work location archive compaction")
+            return 0
+        except Exception as e:
+            logger.error(f"Error compacting work location archive: {e}")
+            return 0
+        finally:
+            self.config.close()
+
     def run_work_location_updates(self) -> bool:
         """
         Run all work location related updates with dynamic database resolution
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: executemany upsert (batch_insert_with_ids) vs LOAD DATA staging upsert (bulk_load_upsert_with_ids)
+
+Runs against a local MySQL stand-in, e.g.:
+    docker run -d --name mysql-bench -e MYSQL_ROOT_PASSWORD=bench -p 3306:3306 mysql:8 --local-infile=1
+    python bench_bulk_load.py --rows 20000
+
+Connection settings come from BENCH_MYSQL_HOST / BENCH_MYSQL_PORT / BENCH_MYSQL_USER /
+BENCH_MYSQL_PASSWORD / BENCH_MYSQL_DATABASE.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pymysql
+
+# Add the src directory to the path so we can import modules
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from pudu.rds.utils import batch_insert_with_ids, bulk_load_upsert_with_ids
+
+TABLE_NAME = "bench_robots_task"
+
+CREATE_TABLE_SQL = f"""
+    CREATE TABLE {TABLE_NAME} (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        robot_sn VARCHAR(64) NOT NULL,
+        task_name VARCHAR(255) NOT NULL,
+        start_time DATETIME NOT NULL,
+        end_time DATETIME NULL,
+        status VARCHAR(32) NULL,
+        actual_area DECIMAL(10, 2) NULL,
+        progress DECIMAL(5, 2) NULL,
+        duration INT NULL,
+        UNIQUE KEY uk_task (robot_sn, task_name, start_time)
+    )
+"""
+
+PRIMARY_KEYS = ["robot_sn", "task_name", "start_time"]
+
+
+def connect():
+    database = os.getenv("BENCH_MYSQL_DATABASE", "pudu_bench")
+    connection = pymysql.connect(
+        host=os.getenv("BENCH_MYSQL_HOST", "127.0.0.1"),
+        port=int(os.getenv("BENCH_MYSQL_PORT", "3306")),
+        user=os.getenv("BENCH_MYSQL_USER", "root"),
+        password=os.getenv("BENCH_MYSQL_PASSWORD", "bench"),
+        local_infile=True
+    )
+    cursor = connection.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS {database}")
+    cursor.execute(f"USE {database}")
+    return connection, cursor
+
+
+def reset_table(cursor):
+    cursor.execute(f"DROP TABLE IF EXISTS {TABLE_NAME}")
+    cursor.execute(CREATE_TABLE_SQL)
+    cursor.connection.commit()
+
+
+def generate_tasks(rows: int, robots: int = 50, status: str = "Task Ended"):
+    """Synthetic 31-day backfill: tasks spread evenly across robots and days"""
+    base_time = datetime(2024, 9, 1)
+    tasks = []
+    for i in range(rows):
+        start_time = base_time + timedelta(minutes=(i // robots) * 45)
+        tasks.append({
+            "robot_sn": f"BENCH{i % robots:04d}",
+            "task_name": f"Task {i % 7}",
+            "start_time": start_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "end_time": (start_time + timedelta(minutes=30)).strftime("%Y-%m-%d %H:%M:%S"),
+            "status": status,
+            "actual_area": round((i % 500) * 1.5, 2),
+            "progress": 100.0,
+            "duration": 1800,
+        })
+    return tasks
+
+
+def time_run(label, func, cursor, tasks):
+    start = time.perf_counter()
+    results = func(cursor, TABLE_NAME, tasks, PRIMARY_KEYS)
+    elapsed = time.perf_counter() - start
+    resolved = sum(1 for _, db_id in results if db_id is not None)
+    print(f"  {label:<28} {elapsed:8.3f}s  {len(tasks) / elapsed:10.0f} rows/s  ({resolved}/{len(tasks)} ids)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk LOAD DATA ingestion against executemany")
+    parser.add_argument("--rows", type=int, default=20000, help="Number of task rows per run")
+    args = parser.parse_args()
+
+    connection, cursor = connect()
+    inserts = generate_tasks(args.rows)
+    updates = generate_tasks(args.rows, status="Task Updated")
+
+    try:
+        for label, func in [("executemany + id lookup", batch_insert_with_ids),
+                            ("LOAD DATA + id lookup", bulk_load_upsert_with_ids)]:
+            print(f"\n{label} ({args.rows} rows)")
+            reset_table(cursor)
+            time_run("insert (empty table)", func, cursor, inserts)
+            time_run("upsert (all duplicates)", func, cursor, updates)
+    finally:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE_NAME}")
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark: PDF report rendering (chart images and report HTML, optionally HTML to PDF) on synthetic content
+
+Times the chart images drawn for a PDF report in process, from the image cache, in a process pool
+and as SVG, then the full PDF report HTML. With --pdf (needs Playwright and Chromium) also times
+HTML to PDF conversion: a browser launched per PDF against the warm browser pool.
+
+    python bench_pdf_rendering.py --locations 6 --days 90 --workers 4 --pdf
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add the src directory to the path so we can import modules
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from pudu.reporting.calculators.chart_data_formatter import ChartDataFormatter
+from pudu.reporting.calculators.pdf_chart_renderer import shutdown_chart_process_pool
+from pudu.reporting.core.report_config import ReportConfig
+from pudu.reporting.services.pdf_browser_pool import PDF_OPTIONS, PdfBrowserPool
+from pudu.reporting.templates.robot_pdf_template import RobotPDFTemplate
+
+CONTENT_CATEGORIES = ['charging-performance', 'cleaning-performance', 'resource-utilization',
+                      'financial-performance', 'facility-performance']
+
+
+def generate_content(locations: int, days: int, seed: int = 50):
+    """Report content with the task, mode, trend, financial and per-location series the PDF charts use"""
+    rng = np.random.default_rng(seed)
+    dates = [date.strftime('%Y-%m-%d') for date in pd.date_range('2024-09-01', periods=days)]
+
+    def series(scale):
+        return [round(float(value), 2) for value in rng.random(days) * scale]
+
+    buildings = [f"Building {index}" for index in range(locations)]
+    return {
+        'period': f"{dates[0]} to {dates[-1]}",
+        'task_performance': {'completed_tasks': int(rng.integers(500, 5000)), 'cancelled_tasks': int(rng.integers(0, 200)),
+                             'interrupted_tasks': int(rng.integers(0, 100))},
+        'facility_task_metrics': {building: {'primary_mode': rng.choice(['Scrubbing', 'Sweeping', 'Mixed tasks']),
+                                             'total_tasks': int(rng.integers(10, 900))} for building in buildings},
+        'trend_data': {'dates': dates, 'charging_sessions_trend': series(40), 'charging_duration_trend': series(90),
+                       'energy_consumption_trend': series(60), 'water_usage_trend': series(2000)},
+        'financial_trend_data': {'hours_saved_trend': series(80), 'savings_trend': series(2500)},
+        'daily_location_efficiency': {building: {'dates': dates, 'running_hours': series(16),
+                                                 'coverage_percentages': series(100)} for building in buildings},
+    }
+
+
+def time_run(label, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<44} {elapsed:8.3f}s")
+    return result
+
+
+def render_pdf_per_launch(html_content: str) -> bytes:
+    """Former conversion: a new browser for every PDF"""
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        page.set_content(html_content, wait_until='networkidle')
+        pdf_bytes = page.pdf(**PDF_OPTIONS)
+        browser.close()
+        return pdf_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF report rendering")
+    parser.add_argument("--locations", type=int, default=6, help="Locations (one efficiency chart each)")
+    parser.add_argument("--days", type=int, default=90, help="Report period length in days")
+    parser.add_argument("--workers", type=int, default=4, help="Chart process pool workers")
+    parser.add_argument("--pdf", action="store_true", help="Also time HTML to PDF conversion (needs Playwright)")
+    parser.add_argument("--reports", type=int, default=4, help="PDFs converted per --pdf variant")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    content = generate_content(args.locations, args.days)
+    config = ReportConfig({'service': 'robot-management', 'contentCategories': CONTENT_CATEGORIES,
+                           'timeRange': 'last-30-days', 'detailLevel': 'in-depth', 'outputFormat': 'pdf'},
+                          'benchmark_db')
+
+    in_process = ChartDataFormatter(cache_entries=0)
+    chart_count = len(in_process.pdf_chart_specs(content))
+    print(f"\n{args.locations} locations x {args.days} days: {chart_count} chart images")
+
+    images = time_run("charts, in process (png)", lambda: in_process.generate_pdf_chart_images(content))
+    print(f"  {'  image data':<44} {sum(len(image) for image in images.values()) / 1024:7.0f}KiB")
+    svg_images = time_run("charts, in process (svg)",
+                          lambda: ChartDataFormatter('svg', cache_entries=0).generate_pdf_chart_images(content))
+    print(f"  {'  image data':<44} {sum(len(image) for image in svg_images.values()) / 1024:7.0f}KiB")
+
+    cached = ChartDataFormatter(cache_entries=256)
+    cached.chart_image_cache.clear()
+    cached.generate_pdf_chart_images(content)
+    time_run("charts, cached (png)", lambda: cached.generate_pdf_chart_images(content))
+
+    pooled = ChartDataFormatter(render_workers=args.workers, cache_entries=0)
+    time_run(f"charts, {args.workers} workers, pool start (png)", lambda: pooled.generate_pdf_chart_images(content))
+    time_run(f"charts, {args.workers} workers, warm (png)", lambda: pooled.generate_pdf_chart_images(content))
+    shutdown_chart_process_pool()
+
+    cached_template = RobotPDFTemplate(cached)
+    html_content = time_run("report HTML, cached charts",
+                            lambda: cached_template.generate_comprehensive_pdf_content(content, config))
+    time_run("report HTML, in-process charts",
+             lambda: RobotPDFTemplate(in_process).generate_comprehensive_pdf_content(content, config))
+
+    if args.pdf:
+        print(f"\nHTML to PDF, {args.reports} reports")
+        time_run("browser launched per PDF", lambda: [render_pdf_per_launch(html_content) for _ in range(args.reports)])
+        pool = PdfBrowserPool(max_pages=2)
+        try:
+            time_run("browser pool, first PDF (starts the pool)", lambda: pool.render_pdf(html_content))
+            time_run("browser pool, sequential", lambda: [pool.render_pdf(html_content) for _ in range(args.reports)])
+
+            async def render_concurrently():
+                return await asyncio.gather(*[pool.render_pdf_async(html_content) for _ in range(args.reports)])
+
+            time_run("browser pool, concurrent", lambda: asyncio.run(render_concurrently()))
+        finally:
+            pool.close()
+
+
+if __name__ == "__main__":
+    main()
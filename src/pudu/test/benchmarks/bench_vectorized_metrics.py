@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-robot, per-map and per-day report metrics on a synthetic fleet (default 1k robots x 90 days)
+
+Times the grouped calculations used by report generation, and, for comparison, the former shape of
+the robot loop (slice each robot's tasks/charging and call the scalar helpers per robot).
+
+    python bench_vectorized_metrics.py --robots 1000 --days 90 --tasks-per-day 2
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add the src directory to the path so we can import modules
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from pudu.reporting.calculators.metrics_calculator import PerformanceMetricsCalculator
+
+MAPS = ['1F', '2F', '3F', 'B1', 'Lobby', 'Parking']
+CHARGING_DURATIONS = ['0h 45min', '1h 5min', '1h 30min', '2h 10min', '35min', '3h 02min']
+
+
+def generate_fleet(robots: int, days: int, tasks_per_day: int, seed: int = 46):
+    """Synthetic tasks, charging sessions, robot status, operation metrics, targets and locations"""
+    rng = np.random.default_rng(seed)
+    robot_sns = [f"BENCH{index:05d}" for index in range(robots)]
+    start = pd.Timestamp('2024-09-01')
+
+    task_count = robots * days * tasks_per_day
+    tasks = pd.DataFrame({
+        'robot_sn': rng.choice(robot_sns, task_count),
+        'map_name': rng.choice(MAPS, task_count),
+        'start_time': (start + pd.to_timedelta(rng.integers(0, days * 1440, task_count), unit='m')
+                       ).strftime('%Y-%m-%d %H:%M:%S'),
+        'status': rng.choice(['Task Ended', 'Task Cancelled', 'Task Interrupted'], task_count, p=[0.85, 0.1, 0.05]),
+        'duration': rng.integers(600, 7200, task_count),
+        'actual_area': rng.random(task_count) * 400,
+        'plan_area': rng.random(task_count) * 450 + 50,
+        'efficiency': rng.random(task_count) * 500,
+        'consumption': rng.random(task_count) * 3,
+        'water_consumption': rng.random(task_count) * 60,
+    })
+
+    charging_count = robots * days
+    charging = pd.DataFrame({
+        'robot_sn': rng.choice(robot_sns, charging_count),
+        'start_time': (start + pd.to_timedelta(rng.integers(0, days * 1440, charging_count), unit='m')
+                       ).strftime('%Y-%m-%d %H:%M:%S'),
+        'duration': rng.choice(CHARGING_DURATIONS, charging_count),
+        'power_gain': rng.choice(['+20%', '+35%', '+50%'], charging_count),
+    })
+
+    robot_status = pd.DataFrame({
+        'robot_sn': robot_sns,
+        'robot_name': [f"Robot {robot_sn}" for robot_sn in robot_sns],
+        'building_name': rng.choice(['HQ', 'Plant', 'Depot', 'Campus'], robots),
+        'battery_level': rng.integers(0, 100, robots),
+        'water_level': rng.integers(0, 100, robots),
+        'sewage_level': rng.integers(0, 100, robots),
+    })
+    operation_metrics = pd.DataFrame({
+        'robot_sn': robot_sns,
+        'total_records': days * 288,
+        'online_records': rng.integers(days * 200, days * 288, robots),
+    })
+    targets = pd.DataFrame({
+        'map_name': MAPS,
+        'target_efficiency': 250.0,
+        'target_area_value': 150.0,
+        'target_area_percentage': 80.0,
+        'area_storage_type': ['value', 'percentage'] * (len(MAPS) // 2),
+        'target_duration': 3600,
+    })
+    locations = robot_status[['robot_sn', 'building_name']]
+    return tasks, charging, robot_status, operation_metrics, targets, locations
+
+
+def per_robot_loop(calculator, tasks, charging, robot_status, operation_metrics, period_length):
+    """The former robot loop shape: per-robot frame copies and scalar helpers"""
+    task_groups = {robot_sn: group.copy() for robot_sn, group in tasks.groupby('robot_sn')}
+    charging_groups = dict(list(charging.groupby('robot_sn')))
+    for _, robot in robot_status.iterrows():
+        robot_tasks = task_groups.get(robot['robot_sn'], pd.DataFrame())
+        robot_charging = charging_groups.get(robot['robot_sn'], pd.DataFrame())
+        calculator.get_cached_status_counts(robot_tasks)
+        calculator.get_cached_duration_sum(robot_tasks)
+        calculator.get_cached_days_with_tasks(robot_tasks)
+        calculator.calculate_uptime_downtime_metrics(operation_metrics, robot_tasks, robot_charging,
+                                                     robot['robot_sn'], period_length)
+
+
+def time_run(label, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<44} {elapsed:8.3f}s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vectorized report metric calculations")
+    parser.add_argument("--robots", type=int, default=1000, help="Number of robots in the fleet")
+    parser.add_argument("--days", type=int, default=90, help="Report period length in days")
+    parser.add_argument("--tasks-per-day", type=int, default=2, help="Average cleaning tasks per robot per day")
+    parser.add_argument("--skip-loop", action="store_true", help="Skip timing the former per-robot loop")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    tasks, charging, robot_status, operation_metrics, targets, locations = generate_fleet(
+        args.robots, args.days, args.tasks_per_day)
+    start_date = "2024-09-01 00:00:00"
+    end_date = (pd.Timestamp(start_date) + pd.Timedelta(days=args.days) - pd.Timedelta(seconds=1)).strftime('%Y-%m-%d %H:%M:%S')
+    calculator = PerformanceMetricsCalculator(start_date, end_date)
+
+    print(f"\n{args.robots} robots x {args.days} days: {len(tasks)} tasks, {len(charging)} charging sessions")
+    time_run("individual robot performance", lambda: calculator.calculate_individual_robot_performance(
+        tasks, charging, robot_status, operation_metrics, args.days))
+    time_run("map targets (building breakdown)", lambda: calculator._analyze_tasks_against_targets(tasks, targets))
+    time_run("map targets (analyze_tasks_against_targets)",
+             lambda: calculator.analyze_tasks_against_targets(tasks, targets))
+    time_run("daily efficiency by location", lambda: calculator.calculate_daily_task_efficiency_by_location(
+        tasks, locations, start_date, end_date))
+    time_run("daily trends", lambda: calculator.calculate_daily_trends(tasks, charging, start_date, end_date))
+    time_run("charging performance", lambda: calculator.calculate_charging_performance_metrics(charging))
+
+    if not args.skip_loop:
+        print("\nFormer per-robot loop (for comparison)")
+        time_run("per-robot slices + scalar helpers", lambda: per_robot_loop(
+            PerformanceMetricsCalculator(start_date, end_date), tasks, charging, robot_status,
+            operation_metrics, args.days))
+
+
+if __name__ == "__main__":
+    main()
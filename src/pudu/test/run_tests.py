@@ -39,6 +39,32 @@ def run_test_file(test_file_path):
                     passed, failed = test_module.run_data_validation_tests()
                 elif hasattr(test_module, 'run_rds_functions_tests'):
                     passed, failed = test_module.run_rds_functions_tests()
+                elif hasattr(test_module, 'run_notification_delivery_tests'):
+                    passed, failed = test_module.run_notification_delivery_tests()
+                elif hasattr(test_module, 'run_work_location_tests'):
+                    passed, failed = test_module.run_work_location_tests()
+                elif hasattr(test_module, 'run_daily_rollup_tests'):
+                    passed, failed = test_module.run_daily_rollup_tests()
+                elif hasattr(test_module, 'run_roi_ledger_tests'):
+                    passed, failed = test_module.run_roi_ledger_tests()
+                elif hasattr(test_module, 'run_period_fetch_tests'):
+                    passed, failed = test_module.run_period_fetch_tests()
+                elif hasattr(test_module, 'run_metrics_cache_tests'):
+                    passed, failed = test_module.run_metrics_cache_tests()
+                elif hasattr(test_module, 'run_computation_context_tests'):
+                    passed, failed = test_module.run_computation_context_tests()
+                elif hasattr(test_module, 'run_vectorized_metrics_tests'):
+                    passed, failed = test_module.run_vectorized_metrics_tests()
+                elif hasattr(test_module, 'run_report_frames_tests'):
+                    passed, failed = test_module.run_report_frames_tests()
+                elif hasattr(test_module, 'run_metric_families_tests'):
+                    passed, failed = test_module.run_metric_families_tests()
+                elif hasattr(test_module, 'run_pdf_browser_pool_tests'):
+                    passed, failed = test_module.run_pdf_browser_pool_tests()
+                elif hasattr(test_module, 'run_pdf_charts_tests'):
+                    passed, failed = test_module.run_pdf_charts_tests()
+                elif hasattr(test_module, 'run_task_management_tests'):
+                    passed, failed = test_module.run_task_management_tests()
                 elif hasattr(test_module, 'run_real_scenario_tests'):
                     passed, failed = test_module.run_real_scenario_tests()
                 elif hasattr(test_module, 'run_integration_tests'):
@@ -75,7 +101,20 @@ def run_unit_tests():
         "unit/test_data_validation.py",
         "unit/test_batch_insert.py",
         "unit/test_rds_functions.py",
-        "unit/test_real_scenarios.py"
+        "unit/test_real_scenarios.py",
+        "unit/test_task_management.py",
+        "unit/test_notification_delivery.py",
+        "unit/test_work_location.py",
+        "unit/test_daily_rollups.py",
+        "unit/test_roi_ledger.py",
+        "unit/test_period_fetch.py",
+        "unit/test_metrics_cache.py",
+        "unit/test_computation_context.py",
+        "unit/test_vectorized_metrics.py",
+        "unit/test_report_frames.py",
+        "unit/test_metric_families.py",
+        "unit/test_pdf_browser_pool.py",
+        "unit/test_pdf_charts.py"
     ]
 
     passed = 0
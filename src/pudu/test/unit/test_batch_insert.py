@@ -8,7 +8,10 @@ sys.path.append('../../')
 from pudu.rds.utils import (
     batch_insert_with_ids,
     _query_ids_by_unique_keys,
-    get_primary_key_column
+    _query_ids_by_key_chunks,
+    bulk_load_upsert,
+    get_primary_key_column,
+    ID_RESOLUTION_OR_CHAIN
 )
 from pudu.test.utils.test_helpers import TestDataLoader, TestValidator
 from unittest.mock import MagicMock
@@ -517,6 +520,194 @@ class TestBatchInsert:
 
             print(f"    ✅ Batch size {batch_size}: {duration:.4f}s")
 
+    def test_chunked_tuple_in_lookup_with_json_task_data(self):
+        """Test _query_ids_by_key_chunks issues parameterized tuple-IN chunks and matches normalized times"""
+        print("  🧩 Testing chunked tuple-IN ID lookup with JSON task data")
+
+        all_tasks = self.test_data.get_all_tasks_from_task_data()
+
+        if len(all_tasks) > 0:
+            import pandas as pd
+
+            data_list = []
+            db_rows = []
+            for i, task in enumerate(all_tasks):
+                start_time = f'2024-09-01 {10+i}:30:00'
+                # Input uses ISO strings, database returns Timestamps - both must normalize to the same key
+                data_list.append({
+                    'robot_sn': task['robot_sn'],
+                    'task_name': task['task_name'],
+                    'start_time': start_time.replace(' ', 'T')
+                })
+                db_rows.append((400 + i, task['robot_sn'], task['task_name'], pd.Timestamp(start_time)))
+
+            self.mock_cursor.fetchall.return_value = db_rows
+
+            results = _query_ids_by_key_chunks(
+                self.mock_cursor,
+                "mnt_robots_task",
+                data_list,
+                ["robot_sn", "task_name", "start_time"],
+                "id",
+                chunk_size=2
+            )
+
+            assert len(results) == len(data_list)
+            for i, (original_data, db_id) in enumerate(results):
+                assert original_data is data_list[i]
+                assert db_id == 400 + i
+
+            # One parameterized query per chunk, no OR-chain
+            expected_chunks = (len(data_list) + 1) // 2
+            assert self.mock_cursor.execute.call_count == expected_chunks
+            executed_sql, params = self.mock_cursor.execute.call_args[0]
+            assert "WHERE (robot_sn, task_name, start_time) IN (" in executed_sql
+            assert " OR " not in executed_sql
+            assert all(isinstance(value, str) for value in params)
+
+            print(f"    ✅ Tuple-IN lookup resolved {len(results)} IDs in {expected_chunks} chunk(s)")
+
+    def test_batched_pure_insert_uses_last_insert_id_per_chunk(self):
+        """Test pure inserts assign IDs from LAST_INSERT_ID of each multi-row INSERT chunk"""
+        print("  🔢 Testing LAST_INSERT_ID resolution for chunked pure inserts")
+
+        data_list = [{'robot_sn': f'SN{i}', 'status': 'Online'} for i in range(5)]
+        self.mock_cursor.fetchone.return_value = ('id',)
+
+        # Each chunk INSERT reports its own first ID
+        chunk_first_ids = iter([100, 200, 300])
+        def execute(sql, params=None):
+            if sql.startswith("INSERT"):
+                self.mock_cursor.lastrowid = next(chunk_first_ids)
+        self.mock_cursor.execute.side_effect = execute
+
+        results = batch_insert_with_ids(self.mock_cursor, "mnt_robot_events", data_list, None, chunk_size=2)
+
+        assert [db_id for _, db_id in results] == [100, 101, 200, 201, 300]
+        assert not self.mock_cursor.executemany.called
+        print("    ✅ IDs assigned per insert chunk")
+
+    def test_null_unique_keys_fall_back_to_or_chain(self):
+        """Test records with NULL unique key values are still resolved in batched mode"""
+        print("  🚫 Testing NULL unique keys in batched ID lookup")
+
+        data_list = [
+            {'robot_sn': 'SN1', 'error_id': 'E1'},
+            {'robot_sn': 'SN2', 'error_id': None},
+        ]
+
+        def fetchall():
+            sql = self.mock_cursor.execute.call_args[0][0]
+            if " IN (" in sql:
+                return [(1, 'SN1', 'E1')]
+            return [(2, 'SN2', None)]
+        self.mock_cursor.fetchall.side_effect = fetchall
+
+        results = _query_ids_by_key_chunks(self.mock_cursor, "mnt_robot_events", data_list, ["robot_sn", "error_id"], "id")
+
+        assert results == [(data_list[0], 1), (data_list[1], 2)]
+        print("    ✅ NULL keys resolved via OR-chain fallback")
+
+    def test_or_chain_id_resolution_mode_still_available(self):
+        """Test the legacy OR-chain mode can be selected explicitly"""
+        print("  🔁 Testing legacy OR-chain ID resolution mode")
+
+        data_list = [{'robot_sn': '1230', 'status': 'Online'}, {'robot_sn': '1231', 'status': 'Online'}]
+        self.mock_cursor.fetchone.return_value = ('id',)
+        self.mock_cursor.fetchall.return_value = [(123, '1230'), (124, '1231')]
+
+        results = batch_insert_with_ids(self.mock_cursor, "mnt_robots_management", data_list, ["robot_sn"],
+                                        id_resolution=ID_RESOLUTION_OR_CHAIN)
+
+        assert results == [(data_list[0], 123), (data_list[1], 124)]
+        executed_sql = self.mock_cursor.execute.call_args[0][0]
+        assert "WHERE (robot_sn = '1230') OR (robot_sn = '1231')" in executed_sql
+        print("    ✅ OR-chain mode preserved")
+
+    def test_bulk_load_upsert_with_json_task_data(self):
+        """Test bulk_load_upsert stages a TSV via LOAD DATA and upserts with one INSERT ... SELECT"""
+        print("  📦 Testing LOAD DATA bulk upsert with JSON task data")
+
+        all_tasks = self.test_data.get_all_tasks_from_task_data()
+
+        if len(all_tasks) > 0:
+            import pandas as pd
+
+            df = pd.DataFrame([{
+                'robot_sn': task['robot_sn'],
+                'task_name': task['task_name'] + "\twith tab",
+                'start_time': pd.Timestamp(f'2024-09-01 {10+i}:30:00'),
+                'progress': None if i == 0 else task.get('progress', 0),
+            } for i, task in enumerate(all_tasks)])
+
+            executed = []
+            loaded_lines = []
+            def execute(sql, params=None):
+                executed.append(sql)
+                if sql.startswith("LOAD DATA"):
+                    file_path = sql.split("'")[1]
+                    with open(file_path, encoding='utf-8') as f:
+                        loaded_lines.extend(f.read().splitlines())
+            self.mock_cursor.execute.side_effect = execute
+
+            loaded = bulk_load_upsert(self.mock_cursor, "mnt_robots_task", df, ["robot_sn", "task_name", "start_time"])
+
+            assert loaded == len(df)
+            assert executed[0].startswith("CREATE TEMPORARY TABLE _stg_mnt_robots_task_")
+            assert "LIKE mnt_robots_task" in executed[0]
+            assert executed[1].startswith("LOAD DATA LOCAL INFILE")
+            assert "(robot_sn, task_name, start_time, progress)" in executed[1]
+            assert executed[2].startswith("INSERT INTO mnt_robots_task (robot_sn, task_name, start_time, progress) SELECT")
+            assert "ON DUPLICATE KEY UPDATE progress=s.progress" in executed[2]
+            assert executed[3].startswith("DROP TEMPORARY TABLE IF EXISTS _stg_mnt_robots_task_")
+            assert self.mock_cursor.connection.commit.called
+
+            # TSV content: escaped tabs, MySQL datetime literals and \N for NULL
+            assert len(loaded_lines) == len(df)
+            first_fields = loaded_lines[0].split('\t')
+            assert first_fields[1] == all_tasks[0]['task_name'] + "\\twith tab"
+            assert first_fields[2] == '2024-09-01 10:30:00'
+            assert first_fields[3] == '\\N'
+
+            print(f"    ✅ Bulk load staged {loaded} rows with {len(executed)} statements")
+
+    def test_bulk_load_falls_back_to_batch_insert(self):
+        """Test a rejected LOAD DATA LOCAL INFILE falls back to batch inserts for the rest of the run"""
+        print("  🔁 Testing bulk load fallback")
+
+        import pymysql
+        from pudu.app.main import App
+
+        class FakeTable:
+            database_name = "test_db"
+            table_name = "mnt_robots_task"
+            primary_keys = ["robot_sn", "task_name", "start_time"]
+            bulk_load = True
+            bulk_load_min_rows = 2
+
+            def __init__(self):
+                self.calls = []
+
+            def bulk_load_upsert_with_ids(self, records):
+                self.calls.append('bulk_load')
+                raise pymysql.err.OperationalError(3948, "Loading local data is disabled")
+
+            def batch_insert_with_ids(self, records):
+                self.calls.append('batch_insert')
+                return [(record, index) for index, record in enumerate(records)]
+
+        app = App.__new__(App)
+        app.bulk_load_available = True
+        table = FakeTable()
+        records = [{'robot_sn': f"SN{index}", 'task_name': "Task", 'start_time': "2024-09-01 10:00:00"}
+                   for index in range(3)]
+
+        assert app._write_changed_records(table, records) == [(record, index) for index, record in enumerate(records)]
+        assert app._write_changed_records(table, records)[0][1] == 0
+        assert table.calls == ['bulk_load', 'batch_insert', 'batch_insert']
+        assert not app.bulk_load_available
+        print("    ✅ Rejected bulk load retried with batch insert, later batches skip LOAD DATA")
+
 def run_batch_insert_tests():
     """Run all RDS integration tests"""
     print("=" * 80)
@@ -0,0 +1,120 @@
+"""
+Unit tests for the per-report computation context of the metrics calculator
+"""
+
+import sys
+sys.path.append('../../')
+
+import pandas as pd
+
+from pudu.reporting.calculators.computation_context import ComputationContext, dataframe_fingerprint
+from pudu.reporting.calculators.metrics_calculator import PerformanceMetricsCalculator
+from pudu.test.utils.test_helpers import TestDataLoader
+
+
+class TestComputationContext:
+    """Test content fingerprints, the bounded LRU and calculator memoization"""
+
+    def setup_method(self):
+        """Setup for each test"""
+        self.test_data = TestDataLoader()
+        self.tasks = pd.DataFrame(self.test_data.get_all_tasks_from_task_data())
+        self.tasks['status'] = ['Task Ended', 'Task Cancelled', 'Task Interrupted', 'Task Ended'][:len(self.tasks)] \
+            + ['Task Ended'] * max(0, len(self.tasks) - 4)
+        self.tasks['start_time'] = pd.date_range('2024-09-01 08:00:00', periods=len(self.tasks), freq='13h')
+        self.tasks['duration'] = [1800 * (index + 1) for index in range(len(self.tasks))]
+        self.calculator = PerformanceMetricsCalculator("2024-09-01 00:00:00", "2024-09-30 23:59:59")
+
+    def test_fingerprint_tracks_key_column_content(self):
+        """Test equal content shares a fingerprint and key column edits change it"""
+        print("  🧬 Testing fingerprints")
+
+        fingerprint = dataframe_fingerprint(self.tasks, ['status'])
+        assert dataframe_fingerprint(self.tasks.copy(), ['status']) == fingerprint
+
+        other_column = self.tasks.copy()
+        other_column['actual_area'] = 0
+        assert dataframe_fingerprint(other_column, ['status']) == fingerprint
+
+        edited = self.tasks.copy()
+        edited.loc[edited.index[0], 'status'] = 'Task Cancelled'
+        assert dataframe_fingerprint(edited, ['status']) != fingerprint
+        assert dataframe_fingerprint(self.tasks.iloc[1:], ['status']) != fingerprint
+
+        with_lists = pd.DataFrame({'status': ['a', 'b'], 'tags': [['x'], ['y']]})
+        assert dataframe_fingerprint(with_lists) != dataframe_fingerprint(with_lists.iloc[::-1])
+
+    def test_lru_is_bounded_and_counts(self):
+        """Test least recently used entries are evicted and counters add up"""
+        print("  📦 Testing bounded LRU")
+
+        context = ComputationContext(max_entries=2)
+        assert context.get_or_compute('a', lambda: 1) == 1
+        assert context.get_or_compute('b', lambda: 2) == 2
+        assert context.get_or_compute('a', lambda: -1) == 1
+        assert context.get_or_compute('c', lambda: 3) == 3
+        assert context.get_or_compute('b', lambda: 20) == 20
+        assert context.get_stats() == {'hits': 1, 'misses': 4, 'evictions': 2, 'size': 2, 'max_entries': 2}
+
+    def test_calculator_results_follow_content(self):
+        """Test memoized calculator methods reuse results for equal frames and never for changed ones"""
+        print("  🧮 Testing calculator memoization")
+
+        counts = self.calculator._count_tasks_by_status(self.tasks)
+        assert self.calculator._count_tasks_by_status(self.tasks.copy()) == counts
+        assert self.calculator.report_context.get_stats()['hits'] == 1
+
+        # In-place edits of the same object (same id) must not return the old result
+        self.tasks.loc[self.tasks.index[0], 'status'] = 'Task Cancelled'
+        updated = self.calculator._count_tasks_by_status(self.tasks)
+        assert updated['cancelled'] == counts['cancelled'] + 1
+
+        # Frames created after others were freed (possibly reusing their id) get their own results
+        for size in range(1, len(self.tasks) + 1):
+            assert self.calculator._sum_task_durations(self.tasks.head(size).copy()) == \
+                self.tasks['duration'].head(size).sum() / 3600
+        assert self.calculator.calculate_days_with_tasks(self.tasks) == self.tasks['start_time'].dt.date.nunique()
+
+    def test_report_context_lifetime(self):
+        """Test a new report starts with an empty context"""
+        print("  ♻️ Testing context lifetime")
+
+        self.calculator._count_tasks_by_status(self.tasks)
+        old_context = self.calculator.report_context
+        new_context = self.calculator.begin_report_context()
+        assert new_context is not old_context and new_context is self.calculator.report_context
+        assert old_context.get_stats()['size'] == 0
+        assert new_context.get_stats() == {'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0,
+                                           'max_entries': new_context.max_entries}
+
+
+def run_computation_context_tests():
+    """Run all computation context tests"""
+    print("=" * 70)
+    print("🧪 TESTING COMPUTATION CONTEXT")
+    print("=" * 70)
+
+    test_instance = TestComputationContext()
+    test_methods = [method for method in dir(test_instance) if method.startswith("test_")]
+
+    passed = 0
+    failed = 0
+
+    for method_name in test_methods:
+        try:
+            test_instance.setup_method()
+            method = getattr(test_instance, method_name)
+            method()
+            passed += 1
+            print(f"✅ {method_name} - PASSED")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {method_name} - FAILED: {e}")
+            import traceback
+            traceback.print_exc()
+
+    print(f"\n📊 Computation Context Tests: {passed} passed, {failed} failed")
+    return passed, failed
+
+if __name__ == "__main__":
+    run_computation_context_tests()
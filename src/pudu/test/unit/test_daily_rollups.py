@@ -0,0 +1,458 @@
+"""
+Unit tests for the daily rollup service and rollup-backed report operation metrics and totals
+"""
+
+import sys
+sys.path.append('../../')
+
+import json
+import re
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pandas as pd
+
+from pudu.services.daily_rollup_service import (
+    ROLLUP_TABLE, DailyRollupService, combine_rollups, compute_rollups_from_source, robot_day_windows,
+    split_rollup_range
+)
+from pudu.reporting.services.database_data_service import DatabaseDataService
+from pudu.test.utils.test_helpers import TestDataLoader
+
+SOH_VALUES = {'HEALTHY': 100, 'UNKNOWN': 100, 'GOOD': 80, 'FAIR': 70, 'POOR': 50}
+
+
+def soh_numeric(value):
+    text = str(value).strip()
+    if '%' in text:
+        return float(text.replace('%', '').replace('+', ''))
+    return SOH_VALUES.get(text.upper())
+
+
+class FakeProjectDatabase:
+    """Answers the rollup, operation history and task/charging/event source queries from in-memory frames"""
+
+    def __init__(self, operation_history, rollups=None, source_tables=None):
+        self.operation_history = operation_history
+        self.rollups = rollups
+        self.source_tables = source_tables or {}
+        self.raw_windows = []
+
+    @staticmethod
+    def _robots(query, data):
+        robots = re.search(r"robot_sn IN \('(.*?)'\)", query)
+        return data if robots is None else data[data['robot_sn'].isin(robots.group(1).split("', '"))]
+
+    def execute_query(self, query):
+        query = " ".join(query.split())
+        if f"FROM {ROLLUP_TABLE}" in query:
+            first, last = re.findall(r"rollup_date [<>]= '([\d-]+)'", query)
+            days = self.rollups['rollup_date'].astype(str)
+            return self._robots(query, self.rollups[(days >= first) & (days <= last)].copy())
+
+        source = re.search(r"SELECT (.+?) FROM (\w+) WHERE .*?(\w+) >= '(.+?)' AND \3 <= '(.+?)'", query)
+        if source and source.group(2) != 'mnt_robot_operation_history':
+            columns, table_name, day_column, start, end = source.groups()
+            self.raw_windows.append((table_name, start, end))
+            data = self._robots(query, self.source_tables.get(table_name, pd.DataFrame(columns=columns.split(', '))))
+            times = pd.to_datetime(data[day_column])
+            return data[(times >= pd.Timestamp(start)) & (times <= pd.Timestamp(end))][columns.split(', ')]
+
+        start, end = re.search(r"timestamp_utc >= '(.+?)' AND timestamp_utc <= '(.+?)'", query).groups()
+        self.raw_windows.append(('mnt_robot_operation_history', start, end))
+        data = self._robots(query, self.operation_history)
+        times = pd.to_datetime(data['timestamp_utc'])
+        return self._operation_rollup(data[(times >= pd.Timestamp(start)) & (times <= pd.Timestamp(end))])
+
+    @staticmethod
+    def _operation_rollup(rows):
+        """pandas equivalent of operation_rollup_query"""
+        if rows.empty:
+            return pd.DataFrame()
+        rows = rows.assign(rollup_date=pd.to_datetime(rows['timestamp_utc']).dt.date,
+                           soh=rows['battery_soh'].map(soh_numeric))
+        daily = []
+        for (robot_sn, day), group in rows.sort_values('timestamp_utc').groupby(['robot_sn', 'rollup_date']):
+            last = group.iloc[-1]
+            daily.append({
+                'robot_sn': robot_sn, 'rollup_date': day,
+                'status_samples': len(group),
+                'online_samples': int((group['status'].str.lower() == 'online').sum()),
+                'soh_sum': group['soh'].sum(), 'soh_samples': int(group['soh'].notna().sum()),
+                'latest_status': last['status'], 'latest_battery_soh': last['battery_soh'],
+                'latest_status_time': pd.Timestamp(last['timestamp_utc']),
+            })
+        return pd.DataFrame(daily)
+
+
+class FakeTable:
+    """Rollup/operation history table double"""
+
+    def __init__(self, database, rollup_table_exists=True):
+        self.database_name = "test_db"
+        self.table_name = ROLLUP_TABLE
+        self.database = database
+        self.rollup_table_exists = rollup_table_exists
+        self.inserted = []
+
+    def execute_query(self, query):
+        return self.database.execute_query(query)
+
+    def query_data(self, query):
+        if query.startswith("SHOW TABLES"):
+            return [(ROLLUP_TABLE,)] if self.rollup_table_exists else []
+        rollups = self.database.rollups
+        if rollups is None or rollups.empty:
+            return []
+        return list(rollups[['robot_sn', 'rollup_date', 'refreshed_at']].itertuples(index=False, name=None))
+
+    def batch_insert(self, data_list):
+        self.inserted.extend(data_list)
+
+    def close(self):
+        pass
+
+
+class TestDailyRollups:
+    """Test rollup aggregation, incremental refresh and whole-day/edge-day report reads"""
+
+    def setup_method(self):
+        """Setup for each test"""
+        self.test_data = TestDataLoader()
+        self.robots = [robot['robot_sn'] for robot in self.test_data.get_robot_status_data()['valid_robots']][:3]
+
+        # Ten days of operation history, a sample every 2 hours per robot
+        statuses = ['Online', 'Online', 'Offline', 'online']
+        sohs = ['98%', 'HEALTHY', 'GOOD', 'UNKNOWN', '+91%', 'unreadable']
+        rows = []
+        start = datetime(2024, 9, 1)
+        for robot_index, robot_sn in enumerate(self.robots):
+            for step in range(10 * 12):
+                rows.append({
+                    'robot_sn': robot_sn,
+                    'timestamp_utc': start + timedelta(hours=2 * step, minutes=robot_index),
+                    'status': statuses[(step + robot_index) % len(statuses)],
+                    'battery_soh': sohs[(step * (robot_index + 1)) % len(sohs)],
+                })
+        self.operation_history = pd.DataFrame(rows)
+
+        # Tasks every 3 hours, charging sessions every 8 hours and events every 5 hours per robot
+        durations = ['1h 5min', '45min', None, '0h 20min']
+        levels = ['Error', 'warning', 'error', None, 'Fatal']
+        self.source_tables = {
+            'mnt_robots_task': pd.DataFrame([{
+                'robot_sn': robot_sn, 'start_time': start + timedelta(hours=3 * step, minutes=robot_index),
+                'actual_area': 10.5 * (step % 4), 'plan_area': 12.0 * (step % 4),
+                'duration': None if step % 7 == 0 else 600 * (step % 5 + 1),
+                'consumption': 0.25 * (step % 3), 'water_consumption': float(step % 6), 'status': 'Task Ended',
+            } for robot_index, robot_sn in enumerate(self.robots) for step in range(10 * 8)]),
+            'mnt_robots_charging_sessions': pd.DataFrame([{
+                'robot_sn': robot_sn, 'start_time': (start + timedelta(hours=8 * step + robot_index)).strftime('%Y-%m-%d %H:%M:%S'),
+                'duration': durations[(step + robot_index) % len(durations)], 'power_gain': f"+{step % 40}%",
+            } for robot_index, robot_sn in enumerate(self.robots) for step in range(10 * 3)]),
+            'mnt_robot_events': pd.DataFrame([{
+                'robot_sn': robot_sn, 'task_time': start + timedelta(hours=5 * step, minutes=robot_index),
+                'event_level': levels[(step + robot_index) % len(levels)], 'event_type': f"type_{step % 3}",
+            } for robot_index, robot_sn in enumerate(self.robots) for step in range(10 * 24 // 5)]),
+        }
+
+    def _sealed_rollups(self, first_day, last_day):
+        """Rollups the pipeline would have written for whole days, refreshed well after they ended"""
+        database = FakeProjectDatabase(self.operation_history, source_tables=self.source_tables)
+        rollups = compute_rollups_from_source(database.execute_query, self.robots, f"{first_day} 00:00:00",
+                                              f"{last_day} 23:59:59")
+        rollups['refreshed_at'] = datetime(2024, 10, 1)
+        return rollups
+
+    def _data_service(self, database, rollup_table_exists=True):
+        service = DatabaseDataService(SimpleNamespace(config={}), "test_db", "2024-09-01 00:00:00", "2024-09-10 23:59:59")
+        service._create_table_with_retry = lambda **kwargs: FakeTable(database, rollup_table_exists)
+        service._execute_query_with_retry = lambda table, query, max_retries=3: table.execute_query(query)
+        return service
+
+    def _expected_operation_metrics(self, start, end):
+        times = self.operation_history['timestamp_utc']
+        rows = self.operation_history[(times >= pd.Timestamp(start)) & (times <= pd.Timestamp(end))]
+        expected = {}
+        for robot_sn, group in rows.sort_values('timestamp_utc').groupby('robot_sn'):
+            soh = group['battery_soh'].map(soh_numeric).dropna()
+            latest_soh = group.iloc[-1]['battery_soh']
+            expected[robot_sn] = {
+                'total_records': len(group),
+                'online_records': int((group['status'].str.lower() == 'online').sum()),
+                'avg_battery_soh_numeric': round(soh.mean(), 4),
+                'latest_status': group.iloc[-1]['status'],
+                'latest_battery_soh_raw': '100' if latest_soh.upper() == 'UNKNOWN' else latest_soh,
+            }
+        return expected
+
+    def test_split_rollup_range(self):
+        """Test report ranges split into whole days and partial edge windows"""
+        print("  📅 Testing range splitting")
+
+        whole, edges = split_rollup_range("2024-09-01 00:00:00", "2024-09-30 23:59:59")
+        assert whole == (date(2024, 9, 1), date(2024, 9, 30)) and edges == []
+
+        whole, edges = split_rollup_range("2024-09-01 08:30:00", "2024-09-05 12:00:00")
+        assert whole == (date(2024, 9, 2), date(2024, 9, 4))
+        assert edges == [("2024-09-01 08:30:00", "2024-09-01 23:59:59"), ("2024-09-05 00:00:00", "2024-09-05 12:00:00")]
+
+        whole, edges = split_rollup_range("2024-09-01 08:00:00", "2024-09-01 18:00:00")
+        assert whole is None and edges == [("2024-09-01 08:00:00", "2024-09-01 18:00:00")]
+
+    def test_operation_metrics_from_rollups_match_raw(self):
+        """Test rollup-backed operation metrics equal the raw history aggregates, reading raw rows only at the edges"""
+        print("  🔁 Testing rollup-backed operation metrics")
+
+        database = FakeProjectDatabase(self.operation_history, rollups=self._sealed_rollups(date(2024, 9, 1), date(2024, 9, 10)))
+        service = self._data_service(database)
+
+        start, end = "2024-09-02 07:00:00", "2024-09-08 15:30:00"
+        metrics = service.fetch_operation_metrics_aggregated(self.robots, "test_db", start, end)
+
+        expected = self._expected_operation_metrics(start, end)
+        assert sorted(metrics['robot_sn']) == sorted(expected)
+        for row in metrics.to_dict(orient='records'):
+            row['avg_battery_soh_numeric'] = round(row['avg_battery_soh_numeric'], 4)
+            assert {key: row[key] for key in expected[row['robot_sn']]} == expected[row['robot_sn']], row['robot_sn']
+
+        assert database.raw_windows == [
+            ('mnt_robot_operation_history', "2024-09-02 07:00:00", "2024-09-02 23:59:59"),
+            ('mnt_robot_operation_history', "2024-09-08 00:00:00", "2024-09-08 15:30:00"),
+        ]
+
+    def test_unsealed_and_uncovered_days_read_raw(self):
+        """Test days refreshed before they sealed, days before coverage and missing rollup tables use raw rows"""
+        print("  🧱 Testing raw fallback days")
+
+        rollups = self._sealed_rollups(date(2024, 9, 3), date(2024, 9, 10))
+        rollups.loc[rollups['rollup_date'] == date(2024, 9, 6), 'refreshed_at'] = datetime(2024, 9, 6, 20)
+        database = FakeProjectDatabase(self.operation_history, rollups=rollups)
+        service = self._data_service(database)
+
+        start, end = "2024-09-01 00:00:00", "2024-09-09 23:59:59"
+        metrics = service.fetch_operation_metrics_aggregated(self.robots, "test_db", start, end)
+        expected = self._expected_operation_metrics(start, end)
+        assert dict(zip(metrics['robot_sn'], metrics['total_records'])) == \
+            {robot_sn: values['total_records'] for robot_sn, values in expected.items()}
+        assert [window[1:] for window in database.raw_windows] == [
+            ("2024-09-01 00:00:00", "2024-09-02 23:59:59"), ("2024-09-06 00:00:00", "2024-09-06 23:59:59")
+        ]
+
+        database = FakeProjectDatabase(self.operation_history)
+        metrics = self._data_service(database, rollup_table_exists=False).fetch_operation_metrics_aggregated(
+            self.robots, "test_db", start, end)
+        assert dict(zip(metrics['robot_sn'], metrics['online_records'])) == \
+            {robot_sn: values['online_records'] for robot_sn, values in expected.items()}
+        assert [window[1:] for window in database.raw_windows] == [(start, end)]
+
+    def test_pipeline_refresh_recomputes_touched_days(self):
+        """Test tracked changes refresh exactly the touched robot-days (zero rows included) plus unsealed days"""
+        print("  🔄 Testing incremental refresh")
+
+        database = FakeProjectDatabase(self.operation_history, rollups=self._sealed_rollups(date(2024, 9, 1), date(2024, 9, 2)))
+        database.rollups.loc[0, 'refreshed_at'] = datetime(2024, 9, 1, 23)
+        table = FakeTable(database)
+
+        service = DailyRollupService()
+        service._open_rollup_table = lambda database_name: table
+        service.track_changes({("test_db", "mnt_robot_operation_history"): {
+            "a": {'robot_sn': self.robots[0], 'new_values': {'robot_sn': self.robots[0], 'timestamp_utc': '2024-09-05 10:00:00'}},
+            "b": {'robot_sn': self.robots[1], 'primary_key_values': {'robot_sn': self.robots[1], 'timestamp_utc': '2024-09-07 01:00:00'}},
+            "c": {'robot_sn': "UNKNOWN_ROBOT", 'new_values': {'robot_sn': "UNKNOWN_ROBOT", 'timestamp_utc': '2024-09-05 10:00:00'}},
+        }}, 'robot_status')
+        service.track_changes({("test_db", "pro_building_info"): {"x": {'robot_sn': self.robots[0]}}}, 'location')
+
+        written = service.refresh(now=datetime(2024, 9, 3, 6))
+        assert written == {"test_db": 4}
+        assert service.pending == {}
+
+        inserted = {(row['robot_sn'], row['rollup_date']): row for row in table.inserted}
+        assert {window[0] for window in database.raw_windows} == {
+            'mnt_robot_operation_history', 'mnt_robots_task', 'mnt_robots_charging_sessions', 'mnt_robot_events'
+        }, "Every rolled-up source is recomputed for the touched days"
+        assert set(inserted) == {(self.robots[0], date(2024, 9, 5)), (self.robots[1], date(2024, 9, 7)),
+                                 ("UNKNOWN_ROBOT", date(2024, 9, 5)),
+                                 (database.rollups.loc[0, 'robot_sn'], database.rollups.loc[0, 'rollup_date'])}
+        assert inserted[(self.robots[0], date(2024, 9, 5))]['status_samples'] == 12
+        assert inserted[("UNKNOWN_ROBOT", date(2024, 9, 5))]['status_samples'] == 0
+        assert all(row['refreshed_at'] == datetime(2024, 9, 3, 6) for row in table.inserted)
+
+    def test_combine_rollups_fills_missing_columns(self):
+        """Test partial rollup frames merge into complete rows"""
+        print("  🧩 Testing rollup merge")
+
+        combined = combine_rollups([
+            pd.DataFrame({'robot_sn': ['R1'], 'rollup_date': ['2024-09-01'], 'soh_samples': [2]}),
+            pd.DataFrame({'robot_sn': ['R2'], 'rollup_date': [date(2024, 9, 1)], 'status_samples': [5]}),
+        ])
+        assert combined[['robot_sn', 'soh_samples', 'status_samples']].values.tolist() == [['R1', 2, 0], ['R2', 0, 5]]
+        assert list(combined['rollup_date']) == [date(2024, 9, 1)] * 2
+
+    def test_robot_days_without_rollup_rows_read_raw(self):
+        """Test a robot missing rollup rows inside another robot's coverage is read raw for exactly those days"""
+        print("  🧮 Testing per-robot coverage")
+
+        rollups = self._sealed_rollups(date(2024, 9, 1), date(2024, 9, 10))
+        late_robot = self.robots[-1]
+        rollups = rollups[(rollups['robot_sn'] != late_robot) | (rollups['rollup_date'] >= date(2024, 9, 5))]
+        database = FakeProjectDatabase(self.operation_history, rollups=rollups)
+        service = self._data_service(database)
+
+        start, end = "2024-09-01 00:00:00", "2024-09-09 23:59:59"
+        metrics = service.fetch_operation_metrics_aggregated(self.robots, "test_db", start, end)
+        expected = self._expected_operation_metrics(start, end)
+        assert dict(zip(metrics['robot_sn'], metrics['total_records'])) == \
+            {robot_sn: values['total_records'] for robot_sn, values in expected.items()}
+        assert [window[1:] for window in database.raw_windows] == [("2024-09-01 00:00:00", "2024-09-04 23:59:59")]
+
+    def test_refresh_reads_only_touched_windows(self):
+        """Test touched keys are read per robot in contiguous day windows, not over the whole key span"""
+        print("  🪟 Testing refresh windows")
+
+        keys = {(self.robots[0], date(2024, 9, 1)), (self.robots[0], date(2024, 9, 2)),
+                (self.robots[1], date(2024, 9, 2)), (self.robots[1], date(2024, 9, 9))}
+        assert robot_day_windows(keys) == [
+            ({self.robots[0]}, "2024-09-01 00:00:00", "2024-09-02 23:59:59"),
+            ({self.robots[1]}, "2024-09-02 00:00:00", "2024-09-02 23:59:59"),
+            ({self.robots[1]}, "2024-09-09 00:00:00", "2024-09-09 23:59:59"),
+        ]
+
+        database = FakeProjectDatabase(self.operation_history)
+        service = DailyRollupService()
+        rollups = service.compute_day_rollups("test_db", keys, table=FakeTable(database))
+        assert sorted(zip(rollups['robot_sn'], rollups['rollup_date'])) == sorted(keys)
+        assert rollups['status_samples'].tolist() == [12] * 4
+        assert len(database.raw_windows) == 3 * 4, "Each window reads every source once"
+
+    def test_task_charging_and_event_rollups_match_rows(self):
+        """Test task, charging and event writes refresh rollup columns equal to the day's rows"""
+        print("  🧾 Testing task, charging and event rollups")
+
+        database = FakeProjectDatabase(self.operation_history, source_tables=self.source_tables)
+        table = FakeTable(database)
+        service = DailyRollupService()
+        service._open_rollup_table = lambda database_name: table
+        robot_sn = self.robots[1]
+        service.track_changes({("test_db", "mnt_robots_task"): {"t": {
+            'robot_sn': robot_sn, 'new_values': {'robot_sn': robot_sn, 'start_time': '2024-09-04 09:00:00'}
+        }}}, 'robot_task')
+
+        assert service.refresh(now=datetime(2024, 9, 6)) == {"test_db": 1}
+        row = table.inserted[0]
+
+        def day_rows(table_name, time_column):
+            rows = self.source_tables[table_name]
+            return rows[(rows['robot_sn'] == robot_sn)
+                        & (pd.to_datetime(rows[time_column]).dt.date == date(2024, 9, 4))]
+
+        tasks = day_rows('mnt_robots_task', 'start_time')
+        assert (row['task_count'], row['timed_task_count']) == (len(tasks), tasks['duration'].notna().sum())
+        assert row['task_duration'] == tasks['duration'].sum() and row['actual_area'] == tasks['actual_area'].sum()
+        assert row['water_consumption'] == tasks['water_consumption'].sum()
+
+        charging = day_rows('mnt_robots_charging_sessions', 'start_time')
+        assert row['charging_sessions'] == len(charging) == 3
+        minutes = charging['duration'].map({'1h 5min': 65.0, '45min': 45.0, '0h 20min': 20.0})
+        assert (row['timed_charging_sessions'], row['charging_minutes']) == (minutes.notna().sum(), minutes.sum())
+
+        events = day_rows('mnt_robot_events', 'task_time')
+        assert row['event_count'] == len(events)
+        assert json.loads(row['event_level_counts']) == events['event_level'].value_counts().to_dict()
+
+    def test_report_totals_read_sealed_days_from_rollups(self):
+        """Test fleet, charging, resource and event totals from rollups equal the totals of the rows"""
+        print("  📊 Testing rollup-backed report totals")
+
+        rollups = self._sealed_rollups(date(2024, 9, 1), date(2024, 9, 10))
+        rollups = rollups[rollups['rollup_date'] != date(2024, 9, 5)]
+        database = FakeProjectDatabase(self.operation_history, rollups=rollups, source_tables=self.source_tables)
+        service = self._data_service(database)
+
+        start, end = "2024-09-02 07:00:00", "2024-09-08 15:30:00"
+        report_data = {}
+        for key, table_name, time_column in [('cleaning_tasks', 'mnt_robots_task', 'start_time'),
+                                             ('charging_tasks', 'mnt_robots_charging_sessions', 'start_time'),
+                                             ('events', 'mnt_robot_events', 'task_time')]:
+            rows = self.source_tables[table_name]
+            times = pd.to_datetime(rows[time_column])
+            report_data[key] = rows[(times >= pd.Timestamp(start)) & (times <= pd.Timestamp(end))].reset_index(drop=True)
+
+        sealed = service.fetch_sealed_rollups(self.robots, "test_db", start, end)
+        assert sorted(set(sealed['rollup_date'])) == [date(2024, 9, day) for day in (3, 4, 6, 7)]
+        daily = service._report_daily_rollups(sealed, report_data, include_events=True)
+        assert len(daily) == len(self.robots) * 7
+
+        calculator = service.metrics_calculator
+        robot_status = pd.DataFrame({'robot_sn': self.robots, 'status': 'online'})
+        tasks, charging, events = report_data['cleaning_tasks'], report_data['charging_tasks'], report_data['events']
+        assert calculator.calculate_fleet_availability(robot_status, tasks, start, end, daily_rollups=daily) == \
+            calculator.calculate_fleet_availability(robot_status, tasks, start, end)
+        assert calculator.calculate_charging_performance_metrics(charging, daily_rollups=daily) == \
+            calculator.calculate_charging_performance_metrics(charging)
+        assert calculator.calculate_resource_utilization_metrics(tasks, daily_rollups=daily) == \
+            calculator.calculate_resource_utilization_metrics(tasks)
+        assert calculator.calculate_event_analysis_metrics(events, daily_rollups=daily) == \
+            calculator.calculate_event_analysis_metrics(events)
+
+        # Sealed days are taken as stored, not re-aggregated from the rows
+        sealed.loc[sealed['rollup_date'] == date(2024, 9, 3), 'water_consumption'] += 128.0
+        daily = service._report_daily_rollups(sealed, dict(report_data, events=pd.DataFrame()), include_events=False)
+        water = calculator.calculate_resource_utilization_metrics(tasks, daily_rollups=daily)['total_water_consumption_floz']
+        assert water == calculator.calculate_resource_utilization_metrics(tasks)['total_water_consumption_floz'] + 128.0 * len(self.robots)
+        assert daily['event_count'].sum() == 0, "Event counts are left out when events were not requested"
+
+    def test_failed_refresh_keeps_keys_pending(self):
+        """Test keys of a database whose upsert failed are refreshed by the next run"""
+        print("  ♻️ Testing refresh retry")
+
+        database = FakeProjectDatabase(self.operation_history)
+        table = FakeTable(database)
+        service = DailyRollupService()
+        service._open_rollup_table = lambda database_name: table
+        change = {'robot_sn': self.robots[0], 'new_values': {'robot_sn': self.robots[0], 'timestamp_utc': '2024-09-05 10:00:00'}}
+        service.track_changes({("test_db", "mnt_robot_operation_history"): {"a": change}}, 'robot_status')
+
+        def failing_insert(data_list):
+            raise ConnectionError("lost connection")
+
+        table.batch_insert = failing_insert
+        assert service.refresh(now=datetime(2024, 9, 6)) == {"test_db": 0}
+        assert service.pending == {"test_db": {(self.robots[0], date(2024, 9, 5))}}
+
+        del table.batch_insert
+        assert service.refresh(now=datetime(2024, 9, 6)) == {"test_db": 1}
+        assert service.pending == {}
+        assert table.inserted[0]['status_samples'] == 12
+
+
+def run_daily_rollup_tests():
+    """Run all daily rollup tests"""
+    print("=" * 70)
+    print("🧪 TESTING DAILY ROLLUPS")
+    print("=" * 70)
+
+    test_instance = TestDailyRollups()
+    test_methods = [method for method in dir(test_instance) if method.startswith("test_")]
+
+    passed = 0
+    failed = 0
+
+    for method_name in test_methods:
+        try:
+            test_instance.setup_method()
+            method = getattr(test_instance, method_name)
+            method()
+            passed += 1
+            print(f"✅ {method_name} - PASSED")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {method_name} - FAILED: {e}")
+            import traceback
+            traceback.print_exc()
+
+    print(f"\n📊 Daily Rollup Tests: {passed} passed, {failed} failed")
+    return passed, failed
+
+if __name__ == "__main__":
+    run_daily_rollup_tests()
@@ -0,0 +1,208 @@
+"""
+Unit tests for report metric families calculated in worker processes over shared report frames
+"""
+
+import sys
+sys.path.append('../../')
+
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from pudu.reporting.services import database_data_service
+from pudu.reporting.services.database_data_service import (
+    METRIC_FAMILIES, DatabaseDataService, shutdown_metrics_process_pool
+)
+from pudu.reporting.services.report_frames import normalize_report_data
+from pudu.reporting.services.shared_frames import SharedFrames, attach_frames
+from pudu.test.utils.test_helpers import TestDataLoader
+
+START_DATE = "2024-09-01 00:00:00"
+END_DATE = "2024-09-14 23:59:59"
+PROCESS_POOL_CONFIG = {'metrics_process_pool': {'enabled': True, 'max_workers': 2, 'min_task_rows': 0}}
+
+
+class TestMetricFamilies:
+    """Test pool and in-process metric families agree, shared frames round trip and the pool fallback"""
+
+    def setup_method(self):
+        """Setup for each test"""
+        self.test_data = TestDataLoader()
+        robots = [robot['robot_sn'] for robot in self.test_data.get_robot_status_data()['valid_robots']][:2]
+        self.robots = robots + ['NEW_ROBOT_048']
+        (self.report_data,) = normalize_report_data(self._report_data(np.random.default_rng(48)))
+
+    def _report_data(self, rng, task_count=120):
+        """Fetched report data for a small fleet over two weeks"""
+        def times(count):
+            return (pd.Timestamp(START_DATE) + pd.to_timedelta(rng.integers(0, 14 * 1440, count), unit='m')
+                    ).strftime('%Y-%m-%d %H:%M:%S')
+
+        tasks = pd.DataFrame({
+            'robot_sn': rng.choice(self.robots, task_count),
+            'map_name': rng.choice(['1F', '2F', 'Lobby'], task_count),
+            'mode': rng.choice(['Scrubbing', 'Sweeping'], task_count),
+            'start_time': times(task_count),
+            'status': rng.choice(['Task Ended', 'Task Cancelled', 'Task Interrupted'], task_count),
+            'duration': rng.integers(600, 7200, task_count).astype(float),
+            'actual_area': np.round(rng.random(task_count) * 300, 2),
+            'plan_area': np.round(rng.random(task_count) * 300 + 50, 2),
+            'efficiency': np.round(rng.random(task_count) * 400, 2),
+            'consumption': np.round(rng.random(task_count) * 2, 3),
+            'water_consumption': np.round(rng.random(task_count) * 40, 1),
+            'progress': rng.integers(0, 101, task_count),
+        })
+        charging = pd.DataFrame({
+            'robot_sn': rng.choice(self.robots, 30),
+            'start_time': times(30),
+            'duration': rng.choice(['1h 30min', '45min', '0h 12min'], 30),
+            'power_gain': rng.choice(['+30%', '+20%'], 30),
+        })
+        events = pd.DataFrame({
+            'robot_sn': rng.choice(self.robots, 20),
+            'event_level': rng.choice(['Error', 'warning', 'FATAL'], 20),
+            'event_type': rng.choice(['Lost Localization', 'Stuck'], 20),
+            'task_time': times(20),
+        })
+        robot_status = pd.DataFrame({
+            'robot_sn': self.robots,
+            'robot_name': [f"Robot {robot_sn}" for robot_sn in self.robots],
+            'battery_level': [80, 45, 100],
+            'status': ['Online', 'Offline', 'Online'],
+        })
+        return {
+            'robot_status': robot_status,
+            'robot_locations': pd.DataFrame({'robot_sn': self.robots, 'building_name': ['HQ', 'HQ', 'Plant']}),
+            'cleaning_tasks': tasks,
+            'charging_tasks': charging,
+            'events': events,
+            'operation_metrics': pd.DataFrame(),
+            'performance_targets': pd.DataFrame({
+                'map_name': ['1F', '2F'], 'target_efficiency': [250.0, 200.0], 'target_area_value': [100.0, np.nan],
+                'target_area_percentage': [np.nan, 90.0], 'area_storage_type': ['value', 'percentage'],
+                'target_duration': [4000.0, 3000.0],
+            }),
+        }
+
+    def _service(self, config):
+        return DatabaseDataService(SimpleNamespace(config=config), "test_db", START_DATE, END_DATE)
+
+    def test_pool_matches_in_process(self):
+        """Test metrics from worker processes equal in-process metrics, in the same key order"""
+        print("  🧮 Testing process pool metric parity")
+
+        try:
+            expected = self._service({}).calculate_comprehensive_metrics(self.report_data, START_DATE, END_DATE)
+            pooled_service = self._service(PROCESS_POOL_CONFIG)
+            pooled = pooled_service.calculate_comprehensive_metrics(self.report_data, START_DATE, END_DATE)
+        finally:
+            shutdown_metrics_process_pool()
+
+        assert list(pooled) == list(expected)
+        assert repr(pooled) == repr(expected)
+        assert pooled['individual_robots'] and pooled['facility_performance']['facilities']
+
+        timings = pooled_service.metric_family_seconds[(START_DATE, END_DATE)]
+        assert list(timings) == list(METRIC_FAMILIES)
+        assert all(seconds >= 0 for seconds in timings.values())
+
+    def test_shared_frames_round_trip(self):
+        """Test attached frames equal the originals, are read-only, and the blocks go on close"""
+        print("  🔗 Testing shared frame round trip")
+
+        frames = dict(self.report_data, empty=pd.DataFrame())
+        with SharedFrames(frames) as shared_frames:
+            names = [name for name, _, _ in shared_frames.handles.values() if name is not None]
+            attached = attach_frames(shared_frames.handles)
+            for key, frame in frames.items():
+                pd.testing.assert_frame_equal(attached[key], frame)
+
+            tasks = attached['cleaning_tasks']
+            try:
+                tasks.loc[tasks.index[0], 'duration'] = 0.0
+                raise AssertionError("in-place write to a shared frame did not raise")
+            except ValueError:
+                pass
+            del attached, tasks
+
+            # Attaching another report's frames releases this one's blocks
+            attach_frames({})
+
+        assert names
+        for name in names:
+            try:
+                shared_memory.SharedMemory(name=name).close()
+                raise AssertionError(f"shared frame block {name} still exists after close")
+            except FileNotFoundError:
+                pass
+
+    def test_pool_unavailable_falls_back(self):
+        """Test metrics are calculated in process when the pool or shared memory cannot be used"""
+        print("  🛟 Testing process pool fallback")
+
+        def unavailable_pool(max_workers):
+            raise OSError("no shared memory")
+
+        original_pool = database_data_service._metrics_process_pool
+        database_data_service._metrics_process_pool = unavailable_pool
+        try:
+            fallback_service = self._service(PROCESS_POOL_CONFIG)
+            metrics = fallback_service.calculate_comprehensive_metrics(self.report_data, START_DATE, END_DATE)
+        finally:
+            database_data_service._metrics_process_pool = original_pool
+
+        expected = self._service({}).calculate_comprehensive_metrics(self.report_data, START_DATE, END_DATE)
+        assert repr(metrics) == repr(expected)
+        assert list(fallback_service.metric_family_seconds[(START_DATE, END_DATE)]) == list(METRIC_FAMILIES)
+
+    def test_small_reports_stay_in_process(self):
+        """Test reports below min_task_rows and the default config never start the pool"""
+        print("  📏 Testing process pool threshold")
+
+        def unexpected_pool(max_workers):
+            raise AssertionError("process pool used for a small report")
+
+        original_pool = database_data_service._metrics_process_pool
+        database_data_service._metrics_process_pool = unexpected_pool
+        try:
+            threshold_config = {'metrics_process_pool': dict(PROCESS_POOL_CONFIG['metrics_process_pool'],
+                                                             min_task_rows=len(self.report_data['cleaning_tasks']) + 1)}
+            for config in ({}, threshold_config):
+                metrics = self._service(config).calculate_comprehensive_metrics(self.report_data, START_DATE, END_DATE)
+                assert metrics['task_performance']['total_tasks'] == len(self.report_data['cleaning_tasks'])
+        finally:
+            database_data_service._metrics_process_pool = original_pool
+
+
+def run_metric_families_tests():
+    """Run all metric families tests"""
+    print("=" * 70)
+    print("🧪 TESTING METRIC FAMILIES")
+    print("=" * 70)
+
+    test_instance = TestMetricFamilies()
+    test_methods = [method for method in dir(test_instance) if method.startswith("test_")]
+
+    passed = 0
+    failed = 0
+
+    for method_name in test_methods:
+        try:
+            test_instance.setup_method()
+            method = getattr(test_instance, method_name)
+            method()
+            passed += 1
+            print(f"✅ {method_name} - PASSED")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {method_name} - FAILED: {e}")
+            import traceback
+            traceback.print_exc()
+
+    print(f"\n📊 Metric Families Tests: {passed} passed, {failed} failed")
+    return passed, failed
+
+if __name__ == "__main__":
+    run_metric_families_tests()
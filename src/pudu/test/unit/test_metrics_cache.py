@@ -0,0 +1,236 @@
+"""
+Unit tests for the content-addressed report metrics cache
+"""
+
+import sys
+sys.path.append('../../')
+
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pandas as pd
+
+from pudu.reporting.calculators.computation_context import ComputationContext
+from pudu.reporting.core.report_generator import ReportGenerator
+from pudu.reporting.services.database_data_service import (
+    RAW_VERSION_TABLES, REPORT_METADATA_TABLES, DatabaseDataService
+)
+from pudu.reporting.services.metrics_cache import LocalMetricsCacheBackend, ReportMetricsCache
+from pudu.services.daily_rollup_service import ROLLUP_TABLE
+from pudu.test.utils.test_helpers import TestDataLoader
+
+
+class FakeRollupTable:
+    """Operation history table handle answering the data version queries"""
+
+    def __init__(self, rollups):
+        self.rollups = rollups
+        self.checksums = {table_name: 1000 + index for index, table_name in enumerate(REPORT_METADATA_TABLES)}
+        # Raw history table -> (row count, hash or latest timestamp) of the target robots in range
+        self.raw_versions = {
+            'mnt_robots_task': (40, 123456),
+            'mnt_robot_events': (7, 654321),
+            'mnt_robot_operation_history': (900, datetime(2024, 9, 30, 23, 59)),
+        }
+        self.queries = []
+
+    def query_data(self, query):
+        return [(ROLLUP_TABLE,)] if self.rollups is not None else []
+
+    def execute_query(self, query):
+        self.queries.append(query)
+        if query.startswith("CHECKSUM TABLE"):
+            table_names = query[len("CHECKSUM TABLE "):].split(', ')
+            return pd.DataFrame({'Table': table_names, 'Checksum': [self.checksums.get(name) for name in table_names]})
+        for table_name, (row_count, marker) in self.raw_versions.items():
+            if f"FROM {table_name}\n" in query:
+                return pd.DataFrame({'row_count': [row_count], 'marker': [marker]})
+        return pd.DataFrame({'refreshed_at': [self.rollups['refreshed_at'].max()], 'rollup_rows': [len(self.rollups)]})
+
+    def close(self):
+        pass
+
+
+class TestMetricsCache:
+    """Test cache keys, storage, expiry and report generation reuse"""
+
+    def setup_method(self):
+        """Setup for each test"""
+        self.test_data = TestDataLoader()
+        self.robots = [robot['robot_sn'] for robot in self.test_data.get_robot_status_data()['valid_robots']]
+        self.cache_dir = tempfile.mkdtemp(prefix="metrics_cache_test_")
+        self.current_period = ("2024-09-01 00:00:00", "2024-09-30 23:59:59")
+        self.previous_period = ("2024-08-02 00:00:00", "2024-08-31 23:59:59")
+
+    def _generator(self, data_version):
+        """ReportGenerator wired to stand-ins for the data service, templates and report config"""
+        generator = ReportGenerator.__new__(ReportGenerator)
+        generator.metrics_cache = ReportMetricsCache(LocalMetricsCacheBackend(self.cache_dir))
+        generator.computations = 0
+        generator.report_config = SimpleNamespace(
+            database_name="test_db", content_categories=['robot-status', 'cleaning-tasks'], output_format='html',
+            detail_level=SimpleNamespace(value='detailed'), validate=lambda: [],
+            get_comparison_periods=lambda: (self.current_period, self.previous_period),
+        )
+        generator.data_service = SimpleNamespace(
+            metrics_calculator=SimpleNamespace(begin_report_context=ComputationContext),
+            fetch_data_version=lambda robots, database_name, start_date, end_date: data_version,
+        )
+        generator.html_template = SimpleNamespace(
+            generate_comprehensive_report=lambda content, config: f"<html>{content['total_tasks']}</html>"
+        )
+        generator._resolve_target_robots = lambda: list(self.robots)
+        generator._generate_comprehensive_report_content = lambda metrics, start, end, robots: {
+            'total_tasks': metrics['task_performance']['total_tasks']
+        }
+
+        def fetch_and_calculate(target_robots, current_period, previous_period, start_time):
+            generator.computations += 1
+            return {
+                'comprehensive_metrics': {'task_performance': {'total_tasks': 42},
+                                          'comparison_metadata': {'comparison_available': True}},
+                'combine_periods': True, 'total_records_processed': 100, 'comparison_records_processed': 80,
+                'fetch_seconds': 1.0, 'calc_seconds': 2.0,
+            }
+        generator._fetch_and_calculate_metrics = fetch_and_calculate
+        return generator
+
+    def test_key_is_content_addressed(self):
+        """Test keys ignore robot/category order and change with any input or the data version"""
+        print("  🔑 Testing cache keys")
+
+        key = ReportMetricsCache.make_key("db", ["B", "A"], self.current_period, self.previous_period, ["x", "y"], "v1")
+        assert key == ReportMetricsCache.make_key("db", ["A", "B", "A"], self.current_period, self.previous_period,
+                                                  ["y", "x"], "v1")
+        assert key.startswith("report-metrics-cache/db/")
+        for changed in [
+            ReportMetricsCache.make_key("db", ["A"], self.current_period, self.previous_period, ["x", "y"], "v1"),
+            ReportMetricsCache.make_key("db", ["A", "B"], self.previous_period, self.previous_period, ["x", "y"], "v1"),
+            ReportMetricsCache.make_key("db", ["A", "B"], self.current_period, self.previous_period, ["x"], "v1"),
+            ReportMetricsCache.make_key("db", ["A", "B"], self.current_period, self.previous_period, ["x", "y"], "v2"),
+            ReportMetricsCache.make_key("db2", ["A", "B"], self.current_period, self.previous_period, ["x", "y"], "v1"),
+        ]:
+            assert changed != key
+
+    def test_store_expire_and_corrupt_entries(self):
+        """Test round trip, TTL expiry and unreadable entries"""
+        print("  ⏳ Testing storage and expiry")
+
+        cache = ReportMetricsCache(LocalMetricsCacheBackend(self.cache_dir), ttl_seconds=60)
+        value = {'metrics': {'roi': 12.5, 'series': pd.DataFrame({'a': [1, 2]})}}
+        assert cache.get("report-metrics-cache/db/missing.pkl.gz") is None
+        assert cache.put("report-metrics-cache/db/entry.pkl.gz", value)
+        cached = cache.get("report-metrics-cache/db/entry.pkl.gz")
+        assert cached['metrics']['roi'] == 12.5 and cached['metrics']['series'].equals(value['metrics']['series'])
+
+        cache.ttl_seconds = 0
+        time.sleep(0.01)
+        assert cache.get("report-metrics-cache/db/entry.pkl.gz") is None
+
+        with open(os.path.join(self.cache_dir, "report-metrics-cache/db/bad.pkl.gz"), 'wb') as file:
+            file.write(b"not a cache entry")
+        assert cache.get("report-metrics-cache/db/bad.pkl.gz") is None
+        assert cache.stats == {'hits': 1, 'misses': 1, 'expired': 1, 'errors': 1, 'stores': 1}
+
+    def test_repeat_report_skips_fetch_and_calculation(self):
+        """Test an identical report re-renders from cached metrics, and new data recomputes"""
+        print("  ♻️ Testing report reuse")
+
+        generator = self._generator("2024-10-01T06:00:00/120")
+        first = generator.generate_report()
+        assert first['success'] and first['metadata']['metrics_cache'] == 'miss'
+
+        second = generator.generate_report()
+        assert second['success'] and second['metadata']['metrics_cache'] == 'hit'
+        assert second['report_html'] == first['report_html'] == "<html>42</html>"
+        assert second['metadata']['total_records_processed'] == 100
+        assert generator.computations == 1
+
+        changed = self._generator("2024-10-02T06:00:00/121")
+        assert changed.generate_report()['metadata']['metrics_cache'] == 'miss'
+        assert changed.computations == 1
+
+    def test_uncacheable_reports(self):
+        """Test unknown data versions and unsealed periods bypass the cache"""
+        print("  🚫 Testing uncacheable reports")
+
+        generator = self._generator(None)
+        generator.generate_report()
+        assert generator.generate_report()['metadata']['metrics_cache'] == 'disabled'
+        assert generator.computations == 2
+
+        now = datetime.utcnow()
+        self.current_period = ((now - timedelta(days=7)).strftime('%Y-%m-%d %H:%M:%S'), now.strftime('%Y-%m-%d %H:%M:%S'))
+        generator = self._generator("2024-10-01T06:00:00/120")
+        generator.generate_report()
+        assert generator.generate_report()['metadata']['metrics_cache'] == 'disabled'
+
+    def test_data_version_from_rollups(self):
+        """Test the data version watermark moves with rollup refreshes, metadata and direct history writes"""
+        print("  🏷️ Testing data version watermark")
+
+        rollups = pd.DataFrame({'robot_sn': self.robots, 'refreshed_at': [datetime(2024, 10, 1, 6), datetime(2024, 10, 2, 6)]})
+        table = FakeRollupTable(rollups)
+        service = DatabaseDataService(SimpleNamespace(config={}), "test_db", *self.current_period)
+        service._create_table_with_retry = lambda **kwargs: table
+
+        def data_version():
+            return service.fetch_data_version(self.robots, "test_db", self.previous_period[0], self.current_period[1])
+
+        assert data_version() == "2024-10-02T06:00:00/2/1000.1001.1002/40-123456.7-654321.900-20240930235900"
+        assert "rollup_date <= '2024-09-30'" in table.queries[0]
+        raw_queries = [query for query in table.queries if 'row_count' in query]
+        assert len(raw_queries) == len(RAW_VERSION_TABLES)
+        assert all(f">= '{self.previous_period[0]}'" in query and f"<= '{self.current_period[1]}'" in query
+                   for query in raw_queries)
+        assert "CRC32" in raw_queries[0] and "consumption" in raw_queries[0] and "CRC32" not in raw_queries[2]
+
+        # A renamed robot or re-assigned location changes the version without any rollup refresh
+        table.checksums['mnt_robots_management'] = 2000
+        table.checksums['mnt_robot_performance_targets_setting'] = None
+        assert data_version() == "2024-10-02T06:00:00/2/2000.1001.none/40-123456.7-654321.900-20240930235900"
+
+        # So do task and event rows the webhook API upserts directly (same count, changed content)
+        # and status samples it appends
+        table.raw_versions['mnt_robots_task'] = (40, 777)
+        table.raw_versions['mnt_robot_events'] = (8, None)
+        table.raw_versions['mnt_robot_operation_history'] = (901, datetime(2024, 9, 30, 23, 59))
+        assert data_version() == "2024-10-02T06:00:00/2/2000.1001.none/40-777.8-none.901-20240930235900"
+
+        table.rollups = None
+        assert data_version() is None
+
+
+def run_metrics_cache_tests():
+    """Run all metrics cache tests"""
+    print("=" * 70)
+    print("🧪 TESTING REPORT METRICS CACHE")
+    print("=" * 70)
+
+    test_instance = TestMetricsCache()
+    test_methods = [method for method in dir(test_instance) if method.startswith("test_")]
+
+    passed = 0
+    failed = 0
+
+    for method_name in test_methods:
+        try:
+            test_instance.setup_method()
+            method = getattr(test_instance, method_name)
+            method()
+            passed += 1
+            print(f"✅ {method_name} - PASSED")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {method_name} - FAILED: {e}")
+            import traceback
+            traceback.print_exc()
+
+    print(f"\n📊 Metrics Cache Tests: {passed} passed, {failed} failed")
+    return passed, failed
+
+if __name__ == "__main__":
+    run_metrics_cache_tests()
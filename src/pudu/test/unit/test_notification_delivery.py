@@ -0,0 +1,317 @@
+"""
+Unit tests for notification delivery (NotificationDispatcher, NotificationCoalescer)
+"""
+
+import sys
+import json
+import time
+sys.path.append('../../')
+
+from pudu.notifications.notification_dispatcher import NotificationDispatcher
+from pudu.notifications.notification_coalescer import NotificationCoalescer
+from pudu.notifications.notification_service import NotificationService
+from pudu.test.utils.test_helpers import TestDataLoader
+
+
+class FakeResponse:
+    def __init__(self, status):
+        self.status = status
+
+    def read(self):
+        return b'{}'
+
+
+class FakeConnection:
+    """Records requests and replays scripted HTTP statuses (200 once the script runs out)"""
+
+    def __init__(self, owner):
+        self.owner = owner
+        self.closed = False
+
+    def request(self, method, endpoint, body, headers):
+        self.owner.requests.append((endpoint, json.loads(body)))
+
+    def getresponse(self):
+        status = self.owner.statuses.pop(0) if self.owner.statuses else 200
+        return FakeResponse(status)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeNotificationService:
+    """Stands in for NotificationService without touching the network"""
+
+    def __init__(self, statuses=None, batch_endpoint=''):
+        self.endpoint = "/notification-api/robot/notification/send"
+        self.batch_endpoint = batch_endpoint
+        self.headers = {'Content-Type': 'application/json'}
+        self.statuses = list(statuses or [])
+        self.requests = []
+        self.connections = []
+
+    def build_notification_data(self, *args):
+        return NotificationService.build_notification_data(*args)
+
+    def create_connection(self):
+        conn = FakeConnection(self)
+        self.connections.append(conn)
+        return conn
+
+
+class TestNotificationDelivery:
+    """Test queued delivery, connection reuse, retries and batching"""
+
+    def setup_method(self):
+        """Setup test data loader"""
+        self.test_data = TestDataLoader()
+        robots = self.test_data.get_all_robots_from_status_data()
+        self.robot_sns = [robot['robot_sn'] for robot in robots][:3] or ['TEST_ROBOT_001']
+
+    def _send(self, dispatcher, robot_sn, title="Robot status"):
+        return dispatcher.send_notification(robot_sn, "robot_status", title, "content", "event", "normal", {})
+
+    def test_single_worker_reuses_keep_alive_connection(self):
+        """Test one worker delivers every queued notification over one connection"""
+        print("  🔌 Testing keep-alive connection reuse")
+
+        service = FakeNotificationService()
+        dispatcher = NotificationDispatcher(service, max_workers=1)
+
+        for robot_sn in self.robot_sns * 3:
+            assert self._send(dispatcher, robot_sn), "Notification should be queued"
+        assert dispatcher.flush(timeout=5), "Queue should drain"
+
+        stats = dispatcher.get_stats()
+        assert stats['sent'] == len(self.robot_sns) * 3, f"Unexpected stats {stats}"
+        assert stats['pending'] == 0
+        assert len(service.connections) == 1, "Worker should hold a single keep-alive connection"
+        assert service.requests[0][1]['robotId'] == self.robot_sns[0]
+        dispatcher.close()
+
+    def test_retryable_status_is_retried_with_backoff(self):
+        """Test 503 responses are retried and a 400 is not"""
+        print("  🔁 Testing retry on transient failures")
+
+        service = FakeNotificationService(statuses=[503, 503, 200, 400])
+        dispatcher = NotificationDispatcher(service, max_workers=1, backoff_base=0.001)
+
+        self._send(dispatcher, self.robot_sns[0], "retried")
+        dispatcher.flush(timeout=5)
+        self._send(dispatcher, self.robot_sns[0], "rejected")
+        dispatcher.flush(timeout=5)
+
+        stats = dispatcher.get_stats()
+        assert stats['sent'] == 1 and stats['failed'] == 1, f"Unexpected stats {stats}"
+        assert stats['retried'] == 2, f"Expected two retries, got {stats['retried']}"
+        assert len(service.requests) == 4
+        dispatcher.close()
+
+    def test_batch_endpoint_groups_queued_notifications(self):
+        """Test queued notifications are posted as JSON arrays to the batch endpoint"""
+        print("  📦 Testing batched delivery")
+
+        service = FakeNotificationService(batch_endpoint="/notification-api/robot/notification/send-batch")
+        dispatcher = NotificationDispatcher(service, max_workers=1, batch_size=50)
+
+        # Enqueue before the worker starts so it drains everything in one batch
+        dispatcher._ensure_workers = lambda: None
+        for index in range(5):
+            self._send(dispatcher, self.robot_sns[0], f"event {index}")
+        del dispatcher._ensure_workers
+        dispatcher._ensure_workers()
+        dispatcher.flush(timeout=5)
+
+        assert len(service.requests) == 1, f"Expected one batch request, got {len(service.requests)}"
+        endpoint, body = service.requests[0]
+        assert endpoint == service.batch_endpoint
+        assert [item['title'] for item in body] == [f"event {index}" for index in range(5)]
+        assert dispatcher.get_stats()['sent'] == 5
+        dispatcher.close()
+
+    def test_close_delivers_queued_and_stops_workers(self):
+        """Test close() delivers what is queued and stops the worker threads (App.run closes its dispatcher)"""
+        print("  🧹 Testing dispatcher close")
+
+        service = FakeNotificationService()
+        dispatcher = NotificationDispatcher(service, max_workers=2)
+        for robot_sn in self.robot_sns:
+            assert self._send(dispatcher, robot_sn)
+        dispatcher.close()
+
+        assert len(service.requests) == len(self.robot_sns)
+        assert not any(worker.is_alive() for worker in dispatcher._workers)
+        assert all(conn.closed for conn in service.connections)
+
+    def test_close_timeout_drops_backlog(self):
+        """Test close() returns near its timeout when the API keeps failing, dropping the queued backlog"""
+        print("  ⏱️ Testing dispatcher close timeout")
+
+        service = FakeNotificationService(statuses=[503] * 1000)
+        dispatcher = NotificationDispatcher(service, max_workers=1, max_queue_size=2, max_retries=5, backoff_base=5.0)
+        for robot_sn in self.robot_sns * 3:
+            self._send(dispatcher, robot_sn)
+            time.sleep(0.05)
+
+        started = time.monotonic()
+        dispatcher.close(timeout=0.3)
+        assert time.monotonic() - started < 2.0
+        assert not any(worker.is_alive() for worker in dispatcher._workers)
+
+        stats = dispatcher.get_stats()
+        assert stats['sent'] == 0 and stats['dropped'] >= 1 and stats['pending'] == 0, stats
+
+    def test_closed_dispatcher_drops_notifications(self):
+        """Test send_notification returns False once the dispatcher is closed"""
+        print("  🛑 Testing closed dispatcher")
+
+        service = FakeNotificationService()
+        dispatcher = NotificationDispatcher(service, max_workers=1)
+        dispatcher.close()
+
+        assert not self._send(dispatcher, self.robot_sns[0])
+        assert dispatcher.get_stats()['dropped'] == 1
+        assert service.requests == []
+
+
+class RecordingSender:
+    """Records forwarded notifications in place of a dispatcher"""
+
+    def __init__(self):
+        self.sent = []
+
+    def send_notification(self, **notification):
+        self.sent.append(notification)
+        return True
+
+
+class TestNotificationCoalescing:
+    """Test coalescing, superseded status updates and rate limiting"""
+
+    def setup_method(self):
+        """Setup test data loader"""
+        self.test_data = TestDataLoader()
+        robots = self.test_data.get_all_robots_from_status_data()
+        self.robot_sns = [robot['robot_sn'] for robot in robots][:2]
+        while len(self.robot_sns) < 2:
+            self.robot_sns.append(f"TEST_ROBOT_{len(self.robot_sns)}")
+
+    def _send(self, coalescer, robot_sn, title, severity="event", biz_type="robot_status",
+              change_type="update", notification_type="robot_status"):
+        payload = {"related_biz_type": biz_type, "change_type": change_type, "related_biz_id": title}
+        return coalescer.send_notification(robot_sn, notification_type, title, f"{title} content",
+                                           severity, "normal", payload)
+
+    def test_newer_status_update_supersedes_pending_one(self):
+        """Test battery ticks within the window collapse to the latest status update"""
+        print("  🔋 Testing superseded status updates")
+
+        sender = RecordingSender()
+        coalescer = NotificationCoalescer(sender, window_seconds=60, per_robot_limit=0, global_limit=0)
+        for level in (80, 75, 70):
+            assert self._send(coalescer, self.robot_sns[0], f"Battery {level}%")
+        self._send(coalescer, self.robot_sns[1], "Battery 50%")
+        assert sender.sent == [], "Nothing should be sent before the window closes"
+
+        coalescer.flush()
+        titles = sorted(notification['title'] for notification in sender.sent)
+        assert titles == ["Battery 50%", "Battery 70%"], f"Unexpected titles {titles}"
+        stats = coalescer.get_stats()
+        assert stats['superseded'] == 2 and stats['sent'] == 2 and stats['suppressed'] == 2, stats
+        coalescer.close()
+
+    def test_events_are_merged_with_highest_severity_leading(self):
+        """Test distinct events are merged and identical repeats are dropped"""
+        print("  🧩 Testing event merging")
+
+        sender = RecordingSender()
+        coalescer = NotificationCoalescer(sender, window_seconds=60, per_robot_limit=0, global_limit=0)
+        robot_sn = self.robot_sns[0]
+        self._send(coalescer, robot_sn, "Lidar warning", "warning", "robot_events", "new_record")
+        self._send(coalescer, robot_sn, "Lidar warning", "warning", "robot_events", "new_record")
+        self._send(coalescer, robot_sn, "Motor error", "error", "robot_events", "new_record")
+        coalescer.flush()
+
+        assert len(sender.sent) == 1, f"Expected one merged notification, got {len(sender.sent)}"
+        merged = sender.sent[0]
+        assert merged['severity'] == 'error'
+        assert merged['title'] == "Motor error (+1 more)"
+        assert "Lidar warning content" in merged['content'] and "Motor error content" in merged['content']
+        assert len(merged['payload']['coalesced_records']) == 2
+        assert coalescer.get_stats()['coalesced'] == 2
+        coalescer.close()
+
+    def test_close_emits_buffered_and_stops_flusher(self):
+        """Test close() emits notifications still in their window and stops the flusher thread"""
+        print("  🧹 Testing coalescer close")
+
+        sender = RecordingSender()
+        coalescer = NotificationCoalescer(sender, window_seconds=60, per_robot_limit=0, global_limit=0)
+        self._send(coalescer, self.robot_sns[0], "Battery 80%")
+        assert sender.sent == [] and coalescer._flusher.is_alive()
+
+        coalescer.close()
+        assert [notification['title'] for notification in sender.sent] == ["Battery 80%"]
+        assert not coalescer._flusher.is_alive()
+
+    def test_per_robot_and_global_rate_limits(self):
+        """Test rate limits suppress excess notifications but never fatal ones"""
+        print("  🚦 Testing rate limits")
+
+        sender = RecordingSender()
+        coalescer = NotificationCoalescer(sender, window_seconds=0, per_robot_limit=2, global_limit=3)
+        robot_a, robot_b = self.robot_sns
+        results = [self._send(coalescer, robot_a, f"Task {index}", biz_type="robot_task") for index in range(3)]
+        assert results == [True, True, False], f"Unexpected per-robot results {results}"
+
+        assert self._send(coalescer, robot_b, "Task B1", biz_type="robot_task")
+        assert not self._send(coalescer, robot_b, "Task B2", biz_type="robot_task"), "Global limit should apply"
+        assert self._send(coalescer, robot_a, "Robot down", "fatal", "robot_events"), "Fatal bypasses limits"
+
+        stats = coalescer.get_stats()
+        assert stats['sent'] == 4 and stats['rate_limited'] == 2, stats
+        coalescer.close()
+
+
+def _run_test_class(test_class):
+    """Run every test_ method of a test class, returning (passed, failed)"""
+    test_instance = test_class()
+    test_methods = [method for method in dir(test_instance) if method.startswith("test_")]
+
+    passed = 0
+    failed = 0
+
+    for method_name in test_methods:
+        try:
+            test_instance.setup_method()
+            method = getattr(test_instance, method_name)
+            method()
+            passed += 1
+            print(f"✅ {method_name} - PASSED")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {method_name} - FAILED: {e}")
+            import traceback
+            traceback.print_exc()
+
+    return passed, failed
+
+
+def run_notification_delivery_tests():
+    """Run all notification delivery tests"""
+    print("=" * 70)
+    print("🧪 TESTING NOTIFICATION DELIVERY")
+    print("=" * 70)
+
+    passed = 0
+    failed = 0
+    for test_class in (TestNotificationDelivery, TestNotificationCoalescing):
+        class_passed, class_failed = _run_test_class(test_class)
+        passed += class_passed
+        failed += class_failed
+
+    print(f"\n📊 Notification Delivery Tests: {passed} passed, {failed} failed")
+    return passed, failed
+
+if __name__ == "__main__":
+    run_notification_delivery_tests()
@@ -0,0 +1,227 @@
+"""
+Unit tests for the persistent PDF browser pool (page reuse, recycling, bounded concurrency, queue)
+"""
+
+import sys
+sys.path.append('../../')
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pudu.reporting.services.pdf_browser_pool import PDF_OPTIONS, PdfBrowserPool, PdfRenderQueueFull
+
+
+class FakePage:
+    """Page rendering the HTML itself as the PDF bytes"""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.content = None
+
+    async def set_content(self, html_content, wait_until=None):
+        assert wait_until == 'networkidle'
+        with self.browser.lock:
+            self.browser.active += 1
+            self.browser.max_active = max(self.browser.max_active, self.browser.active)
+        try:
+            await asyncio.sleep(self.browser.render_seconds)
+            if html_content == 'broken':
+                raise RuntimeError("render failed")
+            self.content = html_content
+        finally:
+            with self.browser.lock:
+                self.browser.active -= 1
+
+    async def pdf(self, **options):
+        assert options == PDF_OPTIONS
+        return f"%PDF {self.content}".encode()
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.pages = []
+        self.closed = False
+
+    async def new_page(self):
+        page = FakePage(self.browser)
+        self.pages.append(page)
+        return page
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    """Browser that counts contexts and concurrent renders"""
+
+    def __init__(self, render_seconds=0.0):
+        self.render_seconds = render_seconds
+        self.contexts = []
+        self.connected = True
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self):
+        context = FakeContext(self)
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.connected = False
+
+
+class FakeBrowserPool(PdfBrowserPool):
+    """Pool launching FakeBrowsers instead of Chromium"""
+
+    def __init__(self, render_seconds=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.render_seconds = render_seconds
+        self.browsers = []
+
+    async def _launch_browser(self):
+        browser = FakeBrowser(self.render_seconds)
+        self.browsers.append(browser)
+        return browser
+
+
+class TestPdfBrowserPool:
+    """Test warm page reuse, context recycling, the concurrency bound and queue, and recovery"""
+
+    def setup_method(self):
+        """Setup for each test"""
+        self.pools = []
+
+    def teardown_method(self):
+        for pool in self.pools:
+            pool.close()
+
+    def _pool(self, **kwargs):
+        pool = FakeBrowserPool(**kwargs)
+        self.pools.append(pool)
+        return pool
+
+    def test_pages_are_reused(self):
+        """Test renders share one browser launch and one warm page"""
+        print("  ♻️ Testing page reuse")
+
+        pool = self._pool(max_pages=1)
+        results = [pool.render_pdf(f"report {index}") for index in range(5)]
+
+        assert results == [f"%PDF report {index}".encode() for index in range(5)]
+        assert len(pool.browsers) == 1 and len(pool.browsers[0].contexts) == 1
+        assert len(pool.browsers[0].contexts[0].pages) == 1
+        assert pool.stats['renders'] == 5 and pool.stats['browser_launches'] == 1
+
+    def test_contexts_recycled_after_renders(self):
+        """Test a context is replaced after renders_per_context renders"""
+        print("  🔄 Testing context recycling")
+
+        pool = self._pool(max_pages=1, renders_per_context=2)
+        for index in range(5):
+            pool.render_pdf(f"report {index}")
+
+        contexts = pool.browsers[0].contexts
+        assert len(contexts) == 3 and pool.stats['context_recycles'] == 2
+        assert all(context.closed for context in contexts[:2]) and not contexts[2].closed
+
+    def test_concurrency_bounded_and_queued(self):
+        """Test concurrent renders never exceed max_pages and waiting renders all complete"""
+        print("  🚦 Testing bounded concurrency and queue")
+
+        pool = self._pool(max_pages=2, render_seconds=0.05)
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            results = list(executor.map(pool.render_pdf, [f"report {index}" for index in range(6)]))
+
+        assert results == [f"%PDF report {index}".encode() for index in range(6)]
+        assert pool.browsers[0].max_active == 2
+        assert len(pool.browsers[0].contexts) == 2
+        assert pool.stats['max_queue_wait_seconds'] > 0
+
+        # With no room in the queue, renders beyond the free pages are rejected
+        full_pool = self._pool(max_pages=1, max_queue=0, render_seconds=0.2)
+        full_pool.render_pdf("warm up")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            busy = executor.submit(full_pool.render_pdf, "slow report")
+            time.sleep(0.05)
+            try:
+                full_pool.render_pdf("rejected report")
+                raise AssertionError("render beyond max_queue was not rejected")
+            except PdfRenderQueueFull:
+                pass
+            assert busy.result() == b"%PDF slow report"
+        assert full_pool.stats['queue_rejections'] == 1
+
+    def test_failures_and_crashes_recover(self):
+        """Test a failed render replaces its context and a disconnected browser is relaunched"""
+        print("  🩹 Testing render failure and browser crash recovery")
+
+        pool = self._pool(max_pages=1)
+        try:
+            pool.render_pdf("broken")
+            raise AssertionError("failed render did not raise")
+        except RuntimeError:
+            pass
+        assert pool.render_pdf("after failure") == b"%PDF after failure"
+        assert len(pool.browsers[0].contexts) == 2 and pool.browsers[0].contexts[0].closed
+
+        pool.browsers[0].connected = False
+        assert pool.render_pdf("after crash") == b"%PDF after crash"
+        assert len(pool.browsers) == 2 and pool.stats['browser_launches'] == 2
+        assert pool.stats['failures'] == 1
+
+    def test_async_callers_from_other_loops(self):
+        """Test renders awaited from separate event loops share the pool's browser"""
+        print("  🔀 Testing async renders from other event loops")
+
+        pool = self._pool(max_pages=2)
+
+        async def render_reports():
+            return await asyncio.gather(*[pool.render_pdf_async(f"report {index}") for index in range(4)])
+
+        assert asyncio.run(render_reports()) == [f"%PDF report {index}".encode() for index in range(4)]
+        assert asyncio.run(render_reports())[0] == b"%PDF report 0"
+        assert len(pool.browsers) == 1 and pool.stats['renders'] == 8
+
+        pool.close()
+        assert not pool.browsers[0].connected and all(context.closed for context in pool.browsers[0].contexts)
+
+
+def run_pdf_browser_pool_tests():
+    """Run all PDF browser pool tests"""
+    print("=" * 70)
+    print("🧪 TESTING PDF BROWSER POOL")
+    print("=" * 70)
+
+    test_instance = TestPdfBrowserPool()
+    test_methods = [method for method in dir(test_instance) if method.startswith("test_")]
+
+    passed = 0
+    failed = 0
+
+    for method_name in test_methods:
+        try:
+            test_instance.setup_method()
+            method = getattr(test_instance, method_name)
+            method()
+            passed += 1
+            print(f"✅ {method_name} - PASSED")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {method_name} - FAILED: {e}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            test_instance.teardown_method()
+
+    print(f"\n📊 PDF Browser Pool Tests: {passed} passed, {failed} failed")
+    return passed, failed
+
+if __name__ == "__main__":
+    run_pdf_browser_pool_tests()
@@ -0,0 +1,217 @@
+"""
+Unit tests for PDF chart images: chart specs, Figure/Agg drawing, image cache and process pool
+"""
+
+import sys
+sys.path.append('../../')
+
+import base64
+import importlib.util
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from pudu.reporting.calculators import pdf_chart_renderer
+from pudu.reporting.calculators.chart_data_formatter import ChartDataFormatter
+from pudu.reporting.calculators.pdf_chart_renderer import (
+    ChartImageCache, chart_image_key, render_pdf_charts, shutdown_chart_process_pool
+)
+from pudu.reporting.services import database_data_service
+from pudu.reporting.services.worker_context import REPORT_WORKER_PRELOAD, report_worker_context
+
+# Drawing needs matplotlib (a report_api dependency); spec and cache key tests run without it
+MATPLOTLIB_AVAILABLE = importlib.util.find_spec('matplotlib') is not None
+
+
+def report_content(locations=('HQ Building', 'Plant')):
+    """Report content with every PDF chart: task status and modes, weekly trends and per-location efficiency"""
+    dates = [date.strftime('%Y-%m-%d') for date in pd.date_range('2024-09-02', periods=14)]
+    return {
+        'task_performance': {'completed_tasks': 120, 'cancelled_tasks': 0, 'interrupted_tasks': 6},
+        'facility_task_metrics': {
+            'HQ Building': {'primary_mode': 'Scrubbing', 'total_tasks': 80},
+            'Plant': {'primary_mode': 'Sweeping', 'total_tasks': 46},
+        },
+        'trend_data': {
+            'dates': dates,
+            'charging_sessions_trend': [index % 5 for index in range(14)],
+            'charging_duration_trend': [30.0 + index for index in range(14)],
+            'energy_consumption_trend': [1.5 * index for index in range(14)],
+            'water_usage_trend': [100.0 + 3 * index for index in range(14)],
+        },
+        'financial_trend_data': {
+            'hours_saved_trend': [2.0 + index for index in range(14)],
+            'savings_trend': [50.0 * index for index in range(14)],
+        },
+        'daily_location_efficiency': {
+            location: {'dates': dates, 'running_hours': [4.0] * 14, 'coverage_percentages': [80.0] * 14}
+            for location in locations
+        },
+    }
+
+
+class TestPdfCharts:
+    """Test chart specs, drawn images, the image cache, concurrent drawing and the process pool"""
+
+    def setup_method(self):
+        """Setup for each test"""
+        self.content = report_content()
+        self.formatter = ChartDataFormatter(cache_entries=0)
+
+    def test_chart_specs(self):
+        """Test specs cover every chart in report order and are plain, picklable data"""
+        print("  📐 Testing PDF chart specs")
+
+        specs = self.formatter.pdf_chart_specs(self.content)
+        assert list(specs) == ['task_status_chart', 'task_mode_chart', 'charging_chart', 'resource_chart',
+                               'financial_chart', 'taskEfficiencyChart_HQ_Building', 'taskEfficiencyChart_Plant']
+
+        # Zero slices are left out of the task status pie
+        assert specs['task_status_chart']['labels'] == ['Completed', 'Interrupted']
+        assert specs['task_status_chart']['sizes'] == [120, 6]
+        assert specs['task_mode_chart']['sizes'] == [80, 46]
+        assert specs['charging_chart']['labels'][0] == 'Monday' and len(specs['charging_chart']['bars']['data']) == 7
+        assert specs['taskEfficiencyChart_Plant']['ylim_zero'] is True
+        assert pickle.loads(pickle.dumps(specs)) == specs
+
+        assert self.formatter.pdf_chart_specs({}) == {}
+        assert list(self.formatter.pdf_chart_specs(dict(self.content, trend_data={}))) == [
+            'task_status_chart', 'task_mode_chart', 'taskEfficiencyChart_HQ_Building', 'taskEfficiencyChart_Plant']
+
+    def test_cache_keys_follow_chart_data(self):
+        """Test cache keys are stable for equal data and change with the data or image format"""
+        print("  🔑 Testing chart image cache keys")
+
+        specs = self.formatter.pdf_chart_specs(self.content)
+        same = self.formatter.pdf_chart_specs(report_content())
+        changed_content = report_content()
+        changed_content['trend_data']['water_usage_trend'][3] += 1
+        changed = self.formatter.pdf_chart_specs(changed_content)
+
+        for name, spec in specs.items():
+            assert chart_image_key(spec, 'png') == chart_image_key(same[name], 'png')
+        assert chart_image_key(specs['resource_chart'], 'png') != chart_image_key(changed['resource_chart'], 'png')
+        assert chart_image_key(specs['charging_chart'], 'png') == chart_image_key(changed['charging_chart'], 'png')
+        assert chart_image_key(specs['charging_chart'], 'png') != chart_image_key(specs['charging_chart'], 'svg')
+
+    def test_images_png_and_svg(self):
+        """Test charts are drawn as reproducible PNG and SVG data URIs"""
+        print("  🖼️ Testing PNG and SVG chart images")
+        if not MATPLOTLIB_AVAILABLE:
+            print("    matplotlib not installed, drawing not tested")
+            return
+
+        images = self.formatter.generate_pdf_chart_images(self.content)
+        assert list(images) == list(self.formatter.pdf_chart_specs(self.content))
+        for image in images.values():
+            assert image.startswith("data:image/png;base64,")
+            assert base64.b64decode(image.split(',', 1)[1]).startswith(b'\x89PNG')
+        specs = self.formatter.pdf_chart_specs(self.content)
+        assert render_pdf_charts({'charging_chart': specs['charging_chart']})['charging_chart'] == images['charging_chart']
+
+        svg_specs = {'charging_chart': specs['charging_chart']}
+        svg_image = render_pdf_charts(svg_specs, 'svg')['charging_chart']
+        svg = base64.b64decode(svg_image.split(',', 1)[1]).decode()
+        assert svg_image.startswith("data:image/svg+xml;base64,") and '<svg' in svg
+        assert 'Weekly Charging Performance' in svg  # text kept as text
+        assert render_pdf_charts(svg_specs, 'svg')['charging_chart'] == svg_image
+        assert len(svg_image) < len(images['charging_chart'])
+
+    def test_cache_and_concurrent_reports(self):
+        """Test repeat charts come from the cache and concurrent reports get their own images"""
+        print("  🗃️ Testing chart image cache and concurrent drawing")
+        if not MATPLOTLIB_AVAILABLE:
+            print("    matplotlib not installed, drawing not tested")
+            return
+
+        cache = ChartImageCache(max_entries=64)
+        specs = self.formatter.pdf_chart_specs(self.content)
+        images = render_pdf_charts(specs, cache=cache)
+        assert cache.stats == {'hits': 0, 'misses': len(specs)}
+        assert render_pdf_charts(specs, cache=cache) == images
+        assert cache.stats['hits'] == len(specs)
+
+        # Different reports drawn from several threads at once match their sequential images
+        contents = [dict(report_content(locations=(f"Site {index}",)), trend_data={}) for index in range(4)]
+        expected = [ChartDataFormatter(cache_entries=0).generate_pdf_chart_images(content) for content in contents]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(ChartDataFormatter(cache_entries=0).generate_pdf_chart_images, contents))
+        assert results == expected
+
+    def test_process_pool_and_fallback(self):
+        """Test pool-drawn images equal in-process images, and drawing falls back when the pool fails"""
+        print("  🏭 Testing chart process pool and fallback")
+        if not MATPLOTLIB_AVAILABLE:
+            print("    matplotlib not installed, drawing not tested")
+            return
+
+        content = dict(self.content, trend_data={})
+        expected = self.formatter.generate_pdf_chart_images(content)
+        try:
+            pooled = ChartDataFormatter(render_workers=2, cache_entries=0).generate_pdf_chart_images(content)
+        finally:
+            shutdown_chart_process_pool()
+        assert pooled == expected
+
+        def unavailable_pool(max_workers):
+            raise OSError("no shared memory")
+
+        original_pool = pdf_chart_renderer._chart_process_pool
+        pdf_chart_renderer._chart_process_pool = unavailable_pool
+        try:
+            fallback = ChartDataFormatter(render_workers=2, cache_entries=0).generate_pdf_chart_images(content)
+        finally:
+            pdf_chart_renderer._chart_process_pool = original_pool
+        assert fallback == expected
+
+    def test_pools_share_worker_context(self):
+        """Test the chart pool started after the metrics pool shares its context and still draws charts"""
+        print("  🤝 Testing shared worker context")
+
+        assert pdf_chart_renderer.__name__ in REPORT_WORKER_PRELOAD
+        assert database_data_service.__name__ in REPORT_WORKER_PRELOAD
+        try:
+            metrics_pool = database_data_service._metrics_process_pool(1)
+            chart_pool = pdf_chart_renderer._chart_process_pool(1)
+            assert metrics_pool._mp_context is chart_pool._mp_context is report_worker_context()
+
+            if MATPLOTLIB_AVAILABLE:
+                content = dict(self.content, trend_data={})
+                expected = self.formatter.generate_pdf_chart_images(content)
+                assert ChartDataFormatter(render_workers=1, cache_entries=0).generate_pdf_chart_images(content) == expected
+        finally:
+            shutdown_chart_process_pool()
+            database_data_service.shutdown_metrics_process_pool()
+
+
+def run_pdf_charts_tests():
+    """Run all PDF chart tests"""
+    print("=" * 70)
+    print("🧪 TESTING PDF CHARTS")
+    print("=" * 70)
+
+    test_instance = TestPdfCharts()
+    test_methods = [method for method in dir(test_instance) if method.startswith("test_")]
+
+    passed = 0
+    failed = 0
+
+    for method_name in test_methods:
+        try:
+            test_instance.setup_method()
+            method = getattr(test_instance, method_name)
+            method()
+            passed += 1
+            print(f"✅ {method_name} - PASSED")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {method_name} - FAILED: {e}")
+            import traceback
+            traceback.print_exc()
+
+    print(f"\n📊 PDF Charts Tests: {passed} passed, {failed} failed")
+    return passed, failed
+
+if __name__ == "__main__":
+    run_pdf_charts_tests()
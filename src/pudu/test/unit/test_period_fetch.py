@@ -0,0 +1,151 @@
+"""
+Unit tests for the combined current/comparison period report fetch
+"""
+
+import sys
+sys.path.append('../../')
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pandas as pd
+
+from pudu.reporting.services.database_data_service import DatabaseDataService
+from pudu.test.utils.test_helpers import TestDataLoader
+
+
+class TestPeriodFetch:
+    """Test one-pass period fetching matches separate per-period fetches"""
+
+    def setup_method(self):
+        """Setup for each test"""
+        self.test_data = TestDataLoader()
+        self.robots = [robot['robot_sn'] for robot in self.test_data.get_robot_status_data()['valid_robots']][:2] + ['NEW_ROBOT_001']
+
+        self.current_period = ("2024-09-01 00:00:00", "2024-09-30 23:59:59")
+        self.previous_period = ("2024-08-02 00:00:00", "2024-08-31 23:59:59")
+
+        # Rows every 7 hours from mid-July to mid-October, including ones exactly on the period bounds
+        times = [datetime(2024, 7, 15) + timedelta(hours=7 * step) for step in range(300)]
+        times += [datetime(2024, 8, 2), datetime(2024, 8, 31, 23, 59, 59), datetime(2024, 9, 1), datetime(2024, 9, 30, 23, 59, 59)]
+        self.tables = {
+            'cleaning_tasks': pd.DataFrame({
+                'robot_sn': [self.robots[index % 3] for index in range(len(times))],
+                'start_time': times, 'actual_area': [float(index) for index in range(len(times))],
+            }),
+            'charging_tasks': pd.DataFrame({
+                'robot_sn': [self.robots[index % 2] for index in range(len(times))],
+                'start_time': [time.strftime('%Y-%m-%d %H:%M:%S') for time in times], 'duration': '1h 5min',
+            }),
+            'events': pd.DataFrame({
+                'robot_sn': [self.robots[0]] * len(times), 'task_time': times, 'event_level': 'error',
+            }),
+        }
+
+    def _data_service(self):
+        service = DatabaseDataService(SimpleNamespace(config={}), "test_db", *self.current_period)
+        service.calls = []
+
+        def range_fetch(key, time_column):
+            def fetch(target_robots, database_name, start_date, end_date):
+                service.calls.append((key, start_date, end_date))
+                data = self.tables[key]
+                times = pd.to_datetime(data[time_column])
+                rows = data[(times >= pd.Timestamp(start_date)) & (times <= pd.Timestamp(end_date))]
+                return rows.sort_values(time_column, ascending=False).reset_index(drop=True)
+            return fetch
+
+        def lookup(key, frame):
+            def fetch(*args):
+                service.calls.append((key,) + tuple(arg for arg in args[2:] if isinstance(arg, str)))
+                return frame
+            return fetch
+
+        service.fetch_cleaning_tasks_data = range_fetch('cleaning_tasks', 'start_time')
+        service.fetch_charging_data = range_fetch('charging_tasks', 'start_time')
+        service.fetch_events_data = range_fetch('events', 'task_time')
+        service.fetch_robot_status_data = lookup('robot_status', pd.DataFrame({'robot_sn': self.robots}))
+        service.fetch_location_data = lookup('robot_locations', pd.DataFrame({'robot_sn': self.robots, 'building_name': 'HQ'}))
+        service.fetch_performance_targets = lookup('performance_targets', pd.DataFrame({'map_name': ['1F']}))
+        service.fetch_operation_metrics_aggregated = lambda robots, database_name, start, end: (
+            service.calls.append(('operation_metrics', start, end)) or pd.DataFrame({'window': [f"{start}/{end}"]})
+        )
+        service.fetch_sealed_rollups = lambda robots, database_name, start, end: (
+            service.calls.append(('sealed_rollups', start, end)) or pd.DataFrame()
+        )
+        return service
+
+    def test_combined_fetch_matches_separate_fetches(self):
+        """Test split period frames equal what per-period range queries return"""
+        print("  🔀 Testing combined period fetch")
+
+        categories = ['event-analysis']
+        current, previous = self._data_service().fetch_report_data_for_periods(
+            self.robots, self.current_period, self.previous_period, categories)
+        separate = self._data_service()
+        expected_current = separate.fetch_all_report_data(self.robots, *self.current_period, categories)
+        expected_previous = separate.fetch_all_report_data(self.robots, *self.previous_period, categories)
+
+        for actual, expected in [(current, expected_current), (previous, expected_previous)]:
+            assert set(actual) == set(expected)
+            for key in ['cleaning_tasks', 'charging_tasks', 'events', 'operation_metrics', 'daily_rollups']:
+                assert not expected[key].empty, key
+                pd.testing.assert_frame_equal(actual[key], expected[key])
+
+    def test_combined_fetch_queries_each_table_once(self):
+        """Test row tables are read once over the union range and lookups are shared"""
+        print("  📉 Testing combined fetch query count")
+
+        service = self._data_service()
+        current, previous = service.fetch_report_data_for_periods(
+            self.robots, self.current_period, self.previous_period, [])
+
+        union = ("2024-08-02 00:00:00", "2024-09-30 23:59:59")
+        assert sorted(service.calls) == sorted([
+            ('cleaning_tasks',) + union, ('charging_tasks',) + union,
+            ('robot_status', "2024-09-30 23:59:59"), ('robot_locations',), ('performance_targets',),
+            ('operation_metrics',) + self.current_period, ('operation_metrics',) + self.previous_period,
+            ('sealed_rollups',) + self.current_period, ('sealed_rollups',) + self.previous_period,
+        ])
+        assert current['robot_locations'] is previous['robot_locations']
+        assert current['events'].empty and previous['events'].empty
+
+    def test_split_by_periods_handles_empty_and_missing_columns(self):
+        """Test splitting frames without rows or without the time column"""
+        print("  🧩 Testing period split edge cases")
+
+        periods = [self.current_period, self.previous_period]
+        for frame in [pd.DataFrame(), pd.DataFrame({'robot_sn': ['R1']})]:
+            assert [part.empty for part in DatabaseDataService._split_by_periods(frame, 'start_time', periods)] == [True, True]
+
+
+def run_period_fetch_tests():
+    """Run all period fetch tests"""
+    print("=" * 70)
+    print("🧪 TESTING COMBINED PERIOD FETCH")
+    print("=" * 70)
+
+    test_instance = TestPeriodFetch()
+    test_methods = [method for method in dir(test_instance) if method.startswith("test_")]
+
+    passed = 0
+    failed = 0
+
+    for method_name in test_methods:
+        try:
+            test_instance.setup_method()
+            method = getattr(test_instance, method_name)
+            method()
+            passed += 1
+            print(f"✅ {method_name} - PASSED")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {method_name} - FAILED: {e}")
+            import traceback
+            traceback.print_exc()
+
+    print(f"\n📊 Period Fetch Tests: {passed} passed, {failed} failed")
+    return passed, failed
+
+if __name__ == "__main__":
+    run_period_fetch_tests()
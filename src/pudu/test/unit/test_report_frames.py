@@ -0,0 +1,212 @@
+"""
+Unit tests for the typed, read-only report frames built at fetch time
+"""
+
+import sys
+sys.path.append('../../')
+
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from pudu.reporting.calculators.metrics_calculator import (
+    CHARGING_HOURS_COLUMN, CHARGING_MINUTES_COLUMN, PerformanceMetricsCalculator
+)
+from pudu.reporting.services.database_data_service import DatabaseDataService
+from pudu.reporting.services.report_frames import freeze_frame, normalize_report_data, normalize_report_frame
+from pudu.test.utils.test_helpers import TestDataLoader
+
+START_DATE = "2024-09-01 00:00:00"
+END_DATE = "2024-09-14 23:59:59"
+MAPS = ['1F', '2F', 'B1', 'Lobby', None]
+
+
+class TestReportFrames:
+    """Test schema conversion, read-only frames and that metrics are unchanged on normalized data"""
+
+    def setup_method(self):
+        """Setup for each test"""
+        self.test_data = TestDataLoader()
+        robots = [robot['robot_sn'] for robot in self.test_data.get_robot_status_data()['valid_robots']][:2]
+        self.robots = robots + ['NEW_ROBOT_001']
+        self.report_data = self._report_data(np.random.default_rng(47))
+
+    def _report_data(self, rng, tasks_per_robot=30):
+        """Report data shaped like the fetch methods return it (times as text, Decimal targets)"""
+        task_count = len(self.robots) * tasks_per_robot
+        start_times = pd.Timestamp(START_DATE) + pd.to_timedelta(rng.integers(0, 14 * 1440, task_count), unit='m')
+        duration = rng.integers(600, 7200, task_count).astype(float)
+        duration[::17] = np.nan
+        robot_sns = rng.choice(self.robots, task_count)
+        map_names = rng.choice(MAPS, task_count)
+        # The Lobby map belongs to the Plant robot only, so per-building map groups differ
+        map_names[(map_names == 'Lobby') & (robot_sns != self.robots[2])] = '1F'
+        tasks = pd.DataFrame({
+            'robot_sn': robot_sns,
+            'map_name': map_names,
+            'mode': rng.choice(['Scrubbing', 'Sweeping'], task_count),
+            'start_time': start_times.strftime('%Y-%m-%d %H:%M:%S'),
+            'status': rng.choice(['Task Ended', 'Task Cancelled', 'Task Interrupted', None], task_count),
+            'duration': duration,
+            'actual_area': np.round(rng.random(task_count) * 300, 2),
+            'plan_area': np.round(rng.random(task_count) * 300 + 50, 2),
+            'efficiency': np.round(rng.random(task_count) * 400, 2),
+            'consumption': np.round(rng.random(task_count) * 2, 3),
+            'water_consumption': np.round(rng.random(task_count) * 40, 1),
+            'battery_usage': rng.integers(1, 60, task_count),
+            'progress': rng.integers(0, 101, task_count),
+        })
+        charging_count = len(self.robots) * 10
+        charging = pd.DataFrame({
+            'robot_sn': rng.choice(self.robots, charging_count),
+            'start_time': (pd.Timestamp(START_DATE) + pd.to_timedelta(
+                rng.integers(0, 14 * 1440, charging_count), unit='m')).strftime('%Y-%m-%d %H:%M:%S'),
+            'duration': rng.choice(['1h 30min', '45min', '0h 12min', 'bad', None], charging_count),
+            'power_gain': rng.choice(['+30%', '+20%', None], charging_count),
+            'status': 'Finished',
+        })
+        events = pd.DataFrame({
+            'robot_sn': rng.choice(self.robots, 20),
+            'event_level': rng.choice(['Error', 'warning', 'FATAL', None], 20),
+            'event_type': rng.choice(['Lost Localization', 'Stuck', None], 20),
+            'task_time': (pd.Timestamp(START_DATE) + pd.to_timedelta(
+                rng.integers(0, 14 * 1440, 20), unit='m')).strftime('%Y-%m-%d %H:%M:%S'),
+        })
+        robot_status = pd.DataFrame({
+            'robot_sn': self.robots,
+            'robot_name': [f"Robot {robot_sn}" for robot_sn in self.robots],
+            'battery_level': [80, 45, 100],
+            'water_level': [50, 20, 75],
+            'sewage_level': [10, 0, 5],
+            'status': ['Online', 'Offline', 'Online'],
+        })
+        return {
+            'robot_status': robot_status,
+            'robot_locations': pd.DataFrame({'robot_sn': self.robots, 'building_name': ['HQ', 'HQ', 'Plant']}),
+            'cleaning_tasks': tasks,
+            'charging_tasks': charging,
+            'events': events,
+            'operation_metrics': pd.DataFrame({
+                'robot_sn': self.robots[:2], 'total_records': [4032, 4032], 'online_records': [3900, 2100],
+                'avg_battery_soh_numeric': [Decimal('97.50'), Decimal('88.25')],
+            }),
+            'performance_targets': pd.DataFrame({
+                'map_name': ['1F', '2F', 'B1'],
+                'target_efficiency': [Decimal('250.0'), Decimal('200.0'), None],
+                'target_area_value': [100.0, np.nan, 10.0],
+                'target_area_percentage': [np.nan, 90.0, np.nan],
+                'area_storage_type': ['value', 'percentage', 'value'],
+                'target_duration': [4000, 3000, np.nan],
+            }),
+        }
+
+    def _metrics(self, data):
+        """Comprehensive metrics of one report period from a fresh service"""
+        service = DatabaseDataService(SimpleNamespace(config={}), "test_db", START_DATE, END_DATE)
+        return service.calculate_comprehensive_metrics(data, START_DATE, END_DATE)
+
+    def test_tables_follow_schema(self):
+        """Test time, numeric, level and label columns get their report types"""
+        print("  🧾 Testing report frame schema")
+
+        (normalized,) = normalize_report_data(self.report_data)
+        tasks, charging = normalized['cleaning_tasks'], normalized['charging_tasks']
+
+        assert pd.api.types.is_datetime64_any_dtype(tasks['start_time'])
+        assert pd.api.types.is_datetime64_any_dtype(normalized['events']['task_time'])
+        for column in ['robot_sn', 'status', 'map_name']:
+            assert isinstance(tasks[column].dtype, pd.CategoricalDtype)
+        assert tasks['progress'].dtype == np.int32 and tasks['actual_area'].dtype == np.float64
+        assert normalized['robot_status']['battery_level'].dtype == np.int32
+        assert normalized['operation_metrics']['avg_battery_soh_numeric'].tolist() == [97.5, 88.25]
+        assert normalized['performance_targets']['target_efficiency'].dtype == np.float64
+
+        calculator = PerformanceMetricsCalculator(START_DATE, END_DATE)
+        raw_charging = self.report_data['charging_tasks']
+        assert charging[CHARGING_MINUTES_COLUMN].equals(calculator._parse_duration_series_to_minutes(raw_charging['duration']))
+        assert charging[CHARGING_HOURS_COLUMN].equals(calculator._parse_charging_series_to_hours(raw_charging['duration']))
+
+        # Fractional or missing levels keep their float values
+        levels = normalize_report_frame('robot_status', pd.DataFrame({'battery_level': [80.5, np.nan]}))
+        assert levels['battery_level'].dtype == np.float64 and levels['battery_level'].iloc[0] == 80.5
+
+    def test_frames_are_read_only(self):
+        """Test in-place writes raise while new columns on shallow copies leave the frame untouched"""
+        print("  🔒 Testing read-only frames")
+
+        (normalized,) = normalize_report_data(self.report_data)
+        tasks = normalized['cleaning_tasks']
+        try:
+            tasks.loc[tasks.index[0], 'duration'] = 0.0
+            raise AssertionError("in-place write to a report frame did not raise")
+        except ValueError:
+            pass
+
+        extended = tasks.copy(deep=False)
+        extended['facility'] = 'HQ'
+        extended['duration'] = 0.0
+        assert 'facility' not in tasks.columns and tasks['duration'].max() > 0
+
+        # Freezing copies: the fetched frame stays writable and independent
+        raw = self.report_data['cleaning_tasks']
+        frozen = freeze_frame(raw)
+        raw.loc[raw.index[0], 'duration'] = 12345.0
+        assert frozen['duration'].iloc[0] != 12345.0
+
+    def test_metrics_unchanged_on_normalized_frames(self):
+        """Test every report metric is identical (values and types) on normalized and fetched frames"""
+        print("  ⚖️ Testing metric parity")
+
+        for seed in (47, 7):
+            data = self._report_data(np.random.default_rng(seed))
+            (normalized,) = normalize_report_data(data)
+            assert repr(self._metrics(normalized)) == repr(self._metrics(data))
+
+    def test_periods_share_frames_and_flag(self):
+        """Test frames shared by both periods stay shared, and the config flag turns normalization off"""
+        print("  🚩 Testing shared frames and config flag")
+
+        previous = dict(self.report_data, cleaning_tasks=self.report_data['cleaning_tasks'].head(10))
+        current, previous_normalized = normalize_report_data(self.report_data, previous)
+        assert current['robot_status'] is previous_normalized['robot_status']
+        assert current['cleaning_tasks'] is not previous_normalized['cleaning_tasks']
+        assert len(previous_normalized['cleaning_tasks']) == 10
+
+        service = DatabaseDataService(SimpleNamespace(config={'report_fetch': {'normalize_frames': False}}),
+                                      "test_db", START_DATE, END_DATE)
+        (unchanged,) = service._normalize_report_data(self.report_data)
+        assert unchanged is self.report_data
+
+
+def run_report_frames_tests():
+    """Run all report frames tests"""
+    print("=" * 70)
+    print("🧪 TESTING REPORT FRAMES")
+    print("=" * 70)
+
+    test_instance = TestReportFrames()
+    test_methods = [method for method in dir(test_instance) if method.startswith("test_")]
+
+    passed = 0
+    failed = 0
+
+    for method_name in test_methods:
+        try:
+            test_instance.setup_method()
+            method = getattr(test_instance, method_name)
+            method()
+            passed += 1
+            print(f"✅ {method_name} - PASSED")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {method_name} - FAILED: {e}")
+            import traceback
+            traceback.print_exc()
+
+    print(f"\n📊 Report Frames Tests: {passed} passed, {failed} failed")
+    return passed, failed
+
+if __name__ == "__main__":
+    run_report_frames_tests()
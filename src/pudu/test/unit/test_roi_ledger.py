@@ -0,0 +1,261 @@
+"""
+Unit tests for the ROI ledger and ledger-backed all-time ROI task reads
+"""
+
+import sys
+sys.path.append('../../')
+
+import re
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pandas as pd
+
+from pudu.reporting.calculators.metrics_calculator import PerformanceMetricsCalculator
+from pudu.reporting.services.database_data_service import DatabaseDataService
+from pudu.reporting.services.roi_ledger_service import ROI_LEDGER_TABLE, RoiLedgerService, checkpoint_for
+from pudu.services.daily_rollup_service import DailyRollupService, combine_rollups
+from pudu.test.utils.test_helpers import TestDataLoader
+
+
+class FakeTaskDatabase:
+    """Answers the ledger, monthly total and task queries of a project database from in-memory frames"""
+
+    def __init__(self, tasks):
+        self.tasks = tasks
+        self.ledger = []
+        self.queries = []
+
+    def execute_query(self, query):
+        query = " ".join(query.split())
+        robots = re.search(r"robot_sn IN \('(.*?)'\)", query).group(1).split("', '")
+
+        if f"FROM {ROI_LEDGER_TABLE}" in query:
+            self.queries.append(('ledger',))
+            checkpoint = date.fromisoformat(re.search(r"checkpoint_month <= '([\d-]+)'", query).group(1))
+            ledger = pd.DataFrame(self.ledger)
+            if ledger.empty:
+                return pd.DataFrame()
+            ledger = ledger[ledger['robot_sn'].isin(robots) & (ledger['checkpoint_month'] <= checkpoint)]
+            return ledger.sort_values('checkpoint_month').groupby('robot_sn').tail(1)
+
+        tasks = self.tasks[self.tasks['robot_sn'].isin(robots)]
+        times = pd.to_datetime(tasks['start_time'])
+        since = re.search(r"start_time >= '(.+?)'", query)
+        if since:
+            tasks, times = tasks[times >= pd.Timestamp(since.group(1))], times[times >= pd.Timestamp(since.group(1))]
+
+        if "task_month" in query:
+            self.queries.append(('monthly', since.group(1) if since else None, tuple(robots)))
+            before = pd.Timestamp(re.search(r"start_time < '(.+?)'", query).group(1))
+            tasks, times = tasks[times < before], times[times < before]
+            tasks = tasks.assign(task_month=times.dt.to_period('M').dt.start_time.dt.date, start_time=times)
+            return tasks.groupby(['robot_sn', 'task_month']).agg(
+                area=('actual_area', 'sum'), task_count=('actual_area', 'size'), first_task_time=('start_time', 'min')
+            ).reset_index()
+
+        self.queries.append(('tasks', since.group(1) if since else None))
+        end = pd.Timestamp(re.search(r"start_time <= '(.+?)'", query).group(1))
+        return tasks[times <= end].sort_values(['robot_sn', 'start_time']).reset_index(drop=True)
+
+    def write_rows(self, rows):
+        existing = {(row['robot_sn'], row['checkpoint_month']): row for row in self.ledger}
+        existing.update({(row['robot_sn'], row['checkpoint_month']): row for row in rows})
+        self.ledger = list(existing.values())
+
+    def query_data(self, query):
+        """Rollup table handle queries of a pipeline refresh (ledger lookup and invalidation)"""
+        if query.startswith("SHOW TABLES"):
+            return [(ROI_LEDGER_TABLE,)]
+        if query.startswith(f"DELETE FROM {ROI_LEDGER_TABLE}"):
+            stale = re.findall(r"robot_sn = '(.*?)' AND checkpoint_month > '([\d-]+)'", query)
+            self.ledger = [row for row in self.ledger
+                           if not any(row['robot_sn'] == robot_sn and row['checkpoint_month'] > date.fromisoformat(month)
+                                      for robot_sn, month in stale)]
+        return []
+
+
+class TestRoiLedger:
+    """Test ledger checkpoints and ROI parity with the full task history"""
+
+    def setup_method(self):
+        """Setup for each test"""
+        self.test_data = TestDataLoader()
+        self.robots = [robot['robot_sn'] for robot in self.test_data.get_robot_status_data()['valid_robots']][:2] + ['NEW_ROBOT_001']
+
+        # Robots starting at different times, the last one mid-way through the report period
+        first_days = [datetime(2023, 1, 10, 8), datetime(2024, 2, 29, 22), datetime(2024, 9, 12, 9)]
+        rows = []
+        for robot_index, (robot_sn, first_day) in enumerate(zip(self.robots, first_days)):
+            day = first_day
+            step = 0
+            while day <= datetime(2024, 10, 3):
+                rows.append({
+                    'robot_sn': robot_sn,
+                    'actual_area': 50 + (step * 37 + robot_index * 11) % 400 + 0.25 * (step % 4),
+                    'consumption': 1.5, 'water_consumption': 10, 'start_time': day.strftime('%Y-%m-%d %H:%M:%S'),
+                    'status': 'Task Ended', 'efficiency': 300,
+                })
+                step += 1
+                day += timedelta(days=2 + robot_index, hours=5)
+        self.tasks = pd.DataFrame(rows)
+
+        self.current_start, self.current_end = "2024-09-01 00:00:00", "2024-09-30 23:59:59"
+        self.previous_start, self.previous_end = "2024-08-02 00:00:00", "2024-08-31 23:59:59"
+        self.calculator = PerformanceMetricsCalculator(self.current_start, self.current_end)
+
+    def _full_history(self, end_date):
+        return self.tasks[self.tasks['start_time'] <= end_date].sort_values(['robot_sn', 'start_time'])
+
+    def _assert_roi_equal(self, expected, actual):
+        for key in ['total_roi_percent', 'total_investment', 'total_savings']:
+            assert abs(expected[key] - actual[key]) < 0.011, (key, expected[key], actual[key])
+        assert expected['payback_period'] == actual['payback_period']
+        for robot_sn, breakdown in expected['robot_breakdown'].items():
+            assert breakdown['months_elapsed'] == actual['robot_breakdown'][robot_sn]['months_elapsed']
+            assert abs(breakdown['savings'] - actual['robot_breakdown'][robot_sn]['savings']) < 0.011
+
+    def test_checkpoint_for(self):
+        """Test checkpoints are month starts no later than the cutoff and settled"""
+        print("  📅 Testing checkpoint selection")
+
+        assert checkpoint_for(date(2024, 8, 31), today=date(2024, 10, 5)) == date(2024, 8, 1)
+        assert checkpoint_for(date(2024, 9, 1), today=date(2024, 10, 5)) == date(2024, 8, 1)
+        assert checkpoint_for(date(2024, 6, 15), today=date(2024, 10, 5)) == date(2024, 6, 1)
+
+    def test_ledger_roi_matches_full_history(self):
+        """Test ROI at both period ends and the daily ROI trend are unchanged by the ledger"""
+        print("  💰 Testing ROI parity")
+
+        database = FakeTaskDatabase(self.tasks)
+        ledger = RoiLedgerService(database.execute_query, database.write_rows)
+        roi_tasks = ledger.fetch_roi_tasks(self.robots, self.current_end,
+                                           date(2024, 8, 31), today=date(2024, 10, 5))
+        full_history = self._full_history(self.current_end)
+
+        assert len(roi_tasks) < len(full_history) / 4
+        for end_date in [self.current_end, self.previous_end]:
+            self._assert_roi_equal(
+                self.calculator.calculate_roi_metrics(full_history, self.robots, end_date),
+                self.calculator.calculate_roi_metrics(roi_tasks, self.robots, end_date)
+            )
+
+        period_tasks = full_history[full_history['start_time'] >= self.current_start]
+        expected = self.calculator.calculate_daily_roi_trends(period_tasks, full_history, self.robots,
+                                                              self.current_start, self.current_end)
+        actual = self.calculator.calculate_daily_roi_trends(period_tasks, roi_tasks, self.robots,
+                                                            self.current_start, self.current_end)
+        assert expected['dates'] and expected == actual
+
+    def test_ledger_is_reused_and_extended(self):
+        """Test later reports read stored checkpoints and only scan the months since"""
+        print("  📒 Testing ledger reuse")
+
+        database = FakeTaskDatabase(self.tasks)
+        ledger = RoiLedgerService(database.execute_query, database.write_rows)
+
+        ledger.fetch_roi_tasks(self.robots, "2024-07-31 23:59:59", date(2024, 6, 30), today=date(2024, 8, 10))
+        assert ('monthly', None, tuple(self.robots)) in database.queries
+        built = len(database.ledger)
+        assert built > 0
+
+        # Only the robot without tasks before the checkpoint (so without ledger rows) is looked up again
+        database.queries = []
+        ledger.fetch_roi_tasks(self.robots, "2024-07-31 23:59:59", date(2024, 6, 30), today=date(2024, 8, 10))
+        assert database.queries == [('ledger',), ('monthly', None, ('NEW_ROBOT_001',)), ('tasks', '2024-06-01 00:00:00')]
+        assert len(database.ledger) == built
+
+        database.queries = []
+        roi_tasks = ledger.fetch_roi_tasks(self.robots, self.current_end, date(2024, 8, 31), today=date(2024, 10, 5))
+        assert ('monthly', '2024-06-01 00:00:00', tuple(self.robots[:2])) in database.queries
+        self._assert_roi_equal(
+            self.calculator.calculate_roi_metrics(self._full_history(self.current_end), self.robots, self.current_end),
+            self.calculator.calculate_roi_metrics(roi_tasks, self.robots, self.current_end)
+        )
+
+    def test_backdated_task_invalidates_checkpoints(self):
+        """Test a task the pipeline writes for an already checkpointed month changes ROI"""
+        print("  ⏪ Testing ledger invalidation")
+
+        database = FakeTaskDatabase(self.tasks)
+        ledger = RoiLedgerService(database.execute_query, database.write_rows)
+        ledger.fetch_roi_tasks(self.robots, self.current_end, date(2024, 8, 31), today=date(2024, 10, 5))
+        before = self.calculator.calculate_roi_metrics(self._full_history(self.current_end), self.robots, self.current_end)
+        checkpoints = {(row['robot_sn'], row['checkpoint_month']) for row in database.ledger}
+
+        # A corrected task from May arrives after the June to August checkpoints were taken
+        backdated = {'robot_sn': self.robots[0], 'actual_area': 5000.0, 'consumption': 1.5, 'water_consumption': 10,
+                     'start_time': '2024-05-20 09:00:00', 'status': 'Task Ended', 'efficiency': 300}
+        database.tasks = pd.concat([database.tasks, pd.DataFrame([backdated])], ignore_index=True)
+        self.tasks = database.tasks
+
+        service = DailyRollupService()
+        service._open_rollup_table = lambda database_name: SimpleNamespace(
+            query_data=database.query_data, batch_insert=lambda data_list: None, close=lambda: None
+        )
+        service.compute_day_rollups = lambda database_name, keys, table=None: combine_rollups([])
+        service.track_changes({("test_db", "mnt_robots_task"): {
+            "a": {'robot_sn': self.robots[0], 'new_values': backdated},
+        }}, 'robot_task')
+        service.refresh(now=datetime(2024, 10, 5))
+
+        remaining = {(row['robot_sn'], row['checkpoint_month']) for row in database.ledger}
+        assert remaining == {(robot_sn, month) for robot_sn, month in checkpoints
+                             if robot_sn != self.robots[0] or month <= date(2024, 5, 1)}
+        assert service.pending_task_days == {}
+
+        roi_tasks = ledger.fetch_roi_tasks(self.robots, self.current_end, date(2024, 8, 31), today=date(2024, 10, 5))
+        expected = self.calculator.calculate_roi_metrics(self._full_history(self.current_end), self.robots, self.current_end)
+        assert expected['total_savings'] > before['total_savings']
+        self._assert_roi_equal(expected, self.calculator.calculate_roi_metrics(roi_tasks, self.robots, self.current_end))
+
+    def test_data_service_falls_back_to_full_history(self):
+        """Test ROI tasks come from the full history when the ledger can't be read"""
+        print("  🧯 Testing ledger fallback")
+
+        database = FakeTaskDatabase(self.tasks)
+        table = SimpleNamespace(table_name='mnt_robots_task', execute_query=database.execute_query, close=lambda: None)
+        service = DatabaseDataService(SimpleNamespace(config={}), "test_db", self.current_start, self.current_end)
+        service._create_table_with_retry = lambda **kwargs: table
+        service._execute_query_with_retry = lambda table, query, max_retries=3: table.execute_query(query)
+
+        def unavailable(*args):
+            raise RuntimeError("ledger table unavailable")
+        service._fetch_roi_tasks_from_ledger = unavailable
+
+        roi_tasks = service.fetch_all_time_tasks_for_roi(self.robots, "test_db", self.current_end,
+                                                         since_date=self.previous_end)
+        assert len(roi_tasks) == len(self._full_history(self.current_end))
+        assert database.queries == [('tasks', None)]
+
+
+def run_roi_ledger_tests():
+    """Run all ROI ledger tests"""
+    print("=" * 70)
+    print("🧪 TESTING ROI LEDGER")
+    print("=" * 70)
+
+    test_instance = TestRoiLedger()
+    test_methods = [method for method in dir(test_instance) if method.startswith("test_")]
+
+    passed = 0
+    failed = 0
+
+    for method_name in test_methods:
+        try:
+            test_instance.setup_method()
+            method = getattr(test_instance, method_name)
+            method()
+            passed += 1
+            print(f"✅ {method_name} - PASSED")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {method_name} - FAILED: {e}")
+            import traceback
+            traceback.print_exc()
+
+    print(f"\n📊 ROI Ledger Tests: {passed} passed, {failed} failed")
+    return passed, failed
+
+if __name__ == "__main__":
+    run_roi_ledger_tests()
@@ -0,0 +1,184 @@
+"""
+Unit tests for set-based ongoing task reconciliation in TaskManagementService
+"""
+
+import sys
+sys.path.append('../../')
+
+from pudu.services.task_management_service import TaskManagementService
+from pudu.test.utils.test_helpers import TestDataLoader
+
+
+class RecordingTable:
+    """Minimal table double: returns canned is_report = 0 rows and records every statement"""
+
+    def __init__(self, ongoing_rows, first_insert_id=900):
+        self.table_name = "mnt_robots_task"
+        self.primary_keys = ["robot_sn", "task_name", "start_time"]
+        self.ongoing_rows = ongoing_rows
+        self.first_insert_id = first_insert_id
+        self.queries = []
+        self.inserted = []
+
+    def query_data(self, query: str = None):
+        self.queries.append(" ".join(query.split()))
+        if query.strip().startswith("SELECT"):
+            return self.ongoing_rows
+        return []
+
+    def batch_insert_with_ids(self, data_list):
+        self.inserted.extend(data_list)
+        return [(data, self.first_insert_id + i) for i, data in enumerate(data_list)]
+
+    def statements(self, verb):
+        return [query for query in self.queries if query.startswith(verb)]
+
+
+class TestTaskManagement:
+    """Test batch reconciliation of ongoing tasks with JSON task data"""
+
+    def setup_method(self):
+        """Setup test data loader"""
+        self.test_data = TestDataLoader()
+        tasks = self.test_data.get_all_tasks_from_task_data()
+        self.robot_sns = sorted({task['robot_sn'] for task in tasks})[:2]
+        while len(self.robot_sns) < 2:
+            self.robot_sns.append(f"TEST_ROBOT_{len(self.robot_sns)}")
+
+    def _ongoing_task(self, robot_sn, task_id, task_name, progress=50, status='In Progress'):
+        return {
+            'robot_sn': robot_sn,
+            'task_id': task_id,
+            'task_name': task_name,
+            'start_time': '2024-09-01 10:00:00',
+            'end_time': '2024-09-01 11:00:00',
+            'progress': progress,
+            'status': status,
+        }
+
+    def test_upsert_and_cleanup_use_bulk_statements(self):
+        """Test progress updates, task switches, inserts and cleanup run as a handful of statements"""
+        print("  📋 Testing set-based upsert and cleanup of ongoing tasks")
+
+        same_robot, switched_robot = self.robot_sns
+        table = RecordingTable([
+            (1, same_robot, 'T1', 'Lobby', 'In Progress', '2024-09-01 10:00:00', '2024-09-01 11:00:00'),
+            (2, switched_robot, 'T2', 'Hallway', 'In Progress', '2024-09-01 09:00:00', '2024-09-01 10:00:00'),
+            (3, 'CLEANUP_ROBOT', 'T3', 'Kitchen', 'In Progress', '2024-09-01 08:00:00', '2024-09-01 09:00:00'),
+        ])
+
+        ongoing_tasks = [
+            self._ongoing_task(same_robot, 'T1', 'Lobby', progress=80, status='Task Ended'),
+            self._ongoing_task(switched_robot, 'T9', 'Office'),
+            self._ongoing_task('NEW_ROBOT', 'T7', 'Garage'),
+        ]
+
+        changes = TaskManagementService.manage_ongoing_tasks_complete(table, ongoing_tasks, ['CLEANUP_ROBOT'])
+
+        # One SELECT for every robot involved
+        selects = table.statements("SELECT")
+        assert len(selects) == 1
+        assert "is_report = 0" in selects[0]
+
+        # One UPDATE ... JOIN for the progress update, two DELETEs (cleanup + switched task)
+        updates = table.statements("UPDATE")
+        assert len(updates) == 1
+        assert "JOIN (SELECT 1 AS id" in updates[0]
+        assert "t.end_time = COALESCE(u.end_time, t.end_time)" in updates[0]
+        deletes = table.statements("DELETE")
+        assert len(deletes) == 2
+        assert "robot_sn IN ('CLEANUP_ROBOT')" in deletes[0]
+        assert f"(robot_sn, task_name) IN (('{switched_robot}', 'Hallway'))" in deletes[1]
+
+        # Switched and first-seen tasks inserted in one batch
+        assert [task['robot_sn'] for task in table.inserted] == [switched_robot, 'NEW_ROBOT']
+        assert all(task['is_report'] == 0 for task in table.inserted)
+
+        change_types = {change['robot_sn']: (change['change_type'], change['database_key']) for change in changes.values()}
+        assert change_types[same_robot] == ('update', 1)
+        assert change_types[switched_robot] == ('new_record', 900)
+        assert change_types['NEW_ROBOT'] == ('new_record', 901)
+        print(f"    ✅ Reconciled {len(changes)} ongoing tasks with {len(table.queries)} statements")
+
+    def test_completed_matching_by_interval_overlap(self):
+        """Test completed reports match the ongoing row with the largest overlap, task_id first then task_name"""
+        print("  ⏱️ Testing vectorized overlap matching of completed tasks")
+
+        robot_sn = self.robot_sns[0]
+        table = RecordingTable([
+            (10, robot_sn, 'T1', 'Lobby', 'In Progress', '2024-09-01 10:00:00', '2024-09-01 10:20:00'),
+            (11, robot_sn, 'T1', 'Lobby', 'In Progress', '2024-09-01 10:10:00', '2024-09-01 11:00:00'),
+            # Only reachable through the task_name match with 15 minute tolerance
+            (12, robot_sn, 'T5', 'Office', 'In Progress', '2024-09-01 12:20:00', '2024-09-01 12:50:00'),
+        ])
+
+        completed_tasks = [
+            {'robot_sn': robot_sn, 'task_id': 'T1', 'task_name': 'Lobby', 'status': 'Task Ended',
+             'start_time': '2024-09-01 10:05:00', 'end_time': '2024-09-01 10:55:00',
+             'actual_area': 120.5, 'efficiency': 300.0},
+            {'robot_sn': robot_sn, 'task_id': 'T8', 'task_name': 'Office', 'status': 'Task Ended',
+             'start_time': '2024-09-01 12:55:00', 'end_time': '2024-09-01 13:30:00',
+             'actual_area': 80.0, 'efficiency': 250.0},
+        ]
+
+        matches = TaskManagementService._match_completed_to_ongoing(
+            TaskManagementService._fetch_ongoing_rows(table, [robot_sn]), completed_tasks
+        )
+        assert matches == {0: 11, 1: 12}
+
+        table.queries.clear()
+        TaskManagementService.update_ongoing_tasks_to_completed(table, completed_tasks)
+        updates = table.statements("UPDATE")
+        assert len(updates) == 1
+        assert "SELECT 11 AS id, 1 AS is_report" in updates[0]
+        assert "SELECT 12 AS id, 1 AS is_report" in updates[0]
+        print("    ✅ Completed tasks matched and updated in one statement")
+
+    def test_batch_failure_falls_back_to_individual_processing(self):
+        """Test the per-robot path still runs if the set-based path fails"""
+        print("  🔁 Testing fallback to per-robot processing")
+
+        table = RecordingTable([])
+        original = TaskManagementService.reconcile_ongoing_tasks
+        TaskManagementService.reconcile_ongoing_tasks = staticmethod(lambda *args, **kwargs: 1 / 0)
+        try:
+            changes = TaskManagementService.manage_ongoing_tasks_complete(
+                table, [self._ongoing_task('NEW_ROBOT', 'T7', 'Garage')], []
+            )
+        finally:
+            TaskManagementService.reconcile_ongoing_tasks = original
+
+        assert len(changes) == 1
+        assert "ORDER BY start_time DESC LIMIT 1" in table.statements("SELECT")[0]
+        print("    ✅ Fallback path produced the same change record")
+
+
+def run_task_management_tests():
+    """Run all task management tests"""
+    print("=" * 60)
+    print("🧪 TESTING ONGOING TASK RECONCILIATION")
+    print("=" * 60)
+
+    test_instance = TestTaskManagement()
+    test_methods = [method for method in dir(test_instance) if method.startswith("test_")]
+
+    passed = 0
+    failed = 0
+
+    for method_name in test_methods:
+        try:
+            test_instance.setup_method()
+            method = getattr(test_instance, method_name)
+            method()
+            passed += 1
+            print(f"✅ {method_name} - PASSED")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {method_name} - FAILED: {e}")
+
+    print(f"\n📊 Task Management Tests: {passed} passed, {failed} failed")
+    return passed, failed
+
+
+if __name__ == "__main__":
+    run_task_management_tests()
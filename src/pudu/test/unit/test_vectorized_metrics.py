@@ -0,0 +1,257 @@
+"""
+Unit tests for the vectorized per-robot, per-map and per-day metric calculations
+"""
+
+import sys
+sys.path.append('../../')
+
+import numpy as np
+import pandas as pd
+
+from pudu.reporting.calculators.metrics_calculator import (
+    PerformanceMetricsCalculator, _charging_duration_to_hours, _segment_sums
+)
+from pudu.test.utils.test_helpers import TestDataLoader
+
+START_DATE = "2024-09-01 00:00:00"
+END_DATE = "2024-09-04 23:59:59"
+
+
+class TestVectorizedMetrics:
+    """Test the one-pass calculations return exactly what the former per-robot/per-task loops returned"""
+
+    def setup_method(self):
+        """Setup for each test"""
+        self.test_data = TestDataLoader()
+        robots = [robot['robot_sn'] for robot in self.test_data.get_robot_status_data()['valid_robots']][:2]
+        self.robots = robots + ['NEW_ROBOT_001']
+        self.calculator = PerformanceMetricsCalculator(START_DATE, END_DATE)
+
+        r1, r2, r3 = self.robots
+        self.tasks = pd.DataFrame({
+            'robot_sn': [r1, r1, r2, r2, r2, r3, r1, r3],
+            'map_name': ['1F', '1F', '1F', '2F', '2F', '', 'B1', '2F'],
+            'start_time': ['2024-09-01 08:00:00', '2024-09-01 14:00:00', '2024-09-02 09:30:00', '2024-09-02 23:10:00',
+                           '2024-09-03 07:00:00', '2024-09-03 12:00:00', 'not a date', '2024-09-04 10:00:00'],
+            'status': ['Task Ended', 'Task Cancelled', 'Task Ended', None, 'finished', 'Task Ended', 'Task Ended',
+                       'Task Interrupted'],
+            'efficiency': [210.0, 320.0, np.nan, 150.0, 400.0, 90.0, 100.0, 260.0],
+            'actual_area': [120.0, 80.0, 60.0, np.nan, 200.0, 10.0, 5.0, 90.0],
+            'plan_area': [150.0, 100.0, 0.0, 100.0, 220.0, 40.0, np.nan, 100.0],
+            'duration': [3600, 5400, 1200, 4000, 1800, 600, 300, 2400],
+            'consumption': [1.2, 0.8, 0.5, 1.0, 2.0, 0.1, 0.2, 0.9],
+            'water_consumption': [30.0, 20.0, 10.0, 25.0, 40.0, 5.0, 2.0, 18.0],
+        })
+        self.charging = pd.DataFrame({
+            'robot_sn': [r1, r2, r2, r1],
+            'start_time': ['2024-09-01 20:00:00', '2024-09-02 20:00:00', '2024-09-02 22:00:00', '2024-09-04 06:00:00'],
+            'duration': ['1h 30min', '45min', 'bad', '0h 12min'],
+            'power_gain': ['+30%', '+20%', None, '+5%'],
+        })
+        self.targets = pd.DataFrame({
+            'map_name': ['1F', '2F', '1F', 'B1'],
+            'target_efficiency': [250.0, 200.0, 10.0, np.nan],
+            'target_area_value': [100.0, np.nan, 1.0, 10.0],
+            'target_area_percentage': [np.nan, 90.0, 1.0, np.nan],
+            'area_storage_type': ['value', 'percentage', 'value', 'value'],
+            'target_duration': [4000, 3000, 1, np.nan],
+        })
+        self.locations = pd.DataFrame({'robot_sn': self.robots, 'building_name': ['HQ', 'HQ', 'Plant']})
+
+    def _per_robot_reference(self, tasks, charging, robot_status, operation_metrics, period_length):
+        """The former per-robot loop: slice each robot's frames and call the scalar helpers"""
+        expected = []
+        for _, robot in robot_status.iterrows():
+            robot_sn = robot['robot_sn']
+            if pd.isna(robot_sn):
+                continue
+            robot_tasks = tasks[tasks['robot_sn'] == robot_sn]
+            robot_charging = charging[charging['robot_sn'] == robot_sn]
+            uptime = self.calculator.calculate_uptime_downtime_metrics(
+                operation_metrics, robot_tasks, robot_charging, robot_sn, period_length)
+
+            total_tasks = len(robot_tasks)
+            completed = self.calculator._count_completed_tasks(robot_tasks) if total_tasks else 0
+            area = robot_tasks['actual_area'].fillna(0).sum() * 10.764
+            planned = robot_tasks['plan_area'].fillna(0).sum() * 10.764
+            expected.append({
+                'robot_id': robot_sn,
+                'robot_name': robot['robot_name'],
+                'location': self.calculator._get_robot_location_name(robot),
+                'total_tasks': total_tasks,
+                'tasks_completed': completed,
+                'total_area_cleaned': round(area, 0),
+                'average_coverage': round(area / planned * 100 if planned > 0 else 0, 1),
+                'days_with_tasks': self.calculator.get_cached_days_with_tasks(robot_tasks),
+                'completion_rate': round(completed / total_tasks * 100 if total_tasks else 0, 1),
+                'running_hours': round(self.calculator._sum_task_durations(robot_tasks), 1),
+                'avg_efficiency': round(robot_tasks['efficiency'].fillna(0).mean() if total_tasks else 0, 1),
+                'charging_sessions': len(robot_charging),
+                'battery_level': robot['battery_level'],
+                'water_level': robot['water_level'],
+                'sewage_level': robot['sewage_level'],
+                **{key: uptime[key] for key in ['uptime_hours', 'downtime_hours', 'idle_hours', 'working_hours',
+                                                'charging_hours', 'charging_ratio', 'uptime_ratio', 'working_ratio',
+                                                'idle_ratio', 'utilization_score']},
+            })
+        expected.sort(key=lambda x: x['running_hours'], reverse=True)
+        return expected
+
+    def test_robot_performance_matches_per_robot_calculation(self):
+        """Test the grouped robot metrics equal the per-robot scalar calculations, on random fleets too"""
+        print("  🤖 Testing individual robot performance parity")
+
+        rng = np.random.default_rng(46)
+        fleets = [(self.tasks, self.charging, self.robots)]
+        robots = [f"SN{index:03d}" for index in range(40)]
+        size = 2000
+        fleets.append((
+            pd.DataFrame({
+                'robot_sn': rng.choice(robots[:-4], size),
+                'start_time': (pd.Timestamp('2024-09-01') + pd.to_timedelta(rng.integers(0, 4 * 1440, size), unit='m')
+                               ).strftime('%Y-%m-%d %H:%M:%S'),
+                'status': rng.choice(['Task Ended', 'Task Cancelled', None], size),
+                'duration': np.where(rng.random(size) < 0.05, np.nan, rng.integers(0, 7200, size)),
+                'actual_area': np.where(rng.random(size) < 0.05, np.nan, rng.random(size) * 300),
+                'plan_area': rng.random(size) * 400,
+                'efficiency': np.where(rng.random(size) < 0.05, np.nan, rng.random(size) * 500),
+            }),
+            pd.DataFrame({
+                'robot_sn': rng.choice(robots[2:], size // 2),
+                'start_time': '2024-09-02 10:00:00',
+                'duration': rng.choice(['1h 5min', '0h 45min', '33min', '2h', 'bad', None, '3h 07min'], size // 2),
+            }),
+            robots,
+        ))
+
+        for tasks, charging, fleet in fleets:
+            robot_status = pd.DataFrame({
+                'robot_sn': fleet + [None],
+                'robot_name': [f"Robot {robot_sn}" for robot_sn in fleet] + ['Unnamed'],
+                'building_name': (['HQ', None] * len(fleet))[:len(fleet)] + ['HQ'],
+                'city': 'Austin',
+                'battery_level': list(range(len(fleet) + 1)),
+                'water_level': 50.0,
+                'sewage_level': 10,
+            })
+            operation_metrics = pd.DataFrame({
+                'robot_sn': fleet[1:],
+                'total_records': [1000 + 37 * index for index in range(len(fleet) - 1)],
+                'online_records': [900 - 11 * index for index in range(len(fleet) - 1)],
+            })
+
+            for metrics in [operation_metrics, pd.DataFrame()]:
+                actual = self.calculator.calculate_individual_robot_performance(
+                    tasks, charging, robot_status, metrics, 4)
+                expected = self._per_robot_reference(tasks, charging, robot_status, metrics, 4)
+                assert len(actual) == len(fleet)
+                assert actual == expected
+
+    def test_target_analysis_matches_former_outputs(self):
+        """Test per-map target compliance counts equal what the per-task loops produced"""
+        print("  🎯 Testing target analysis parity")
+
+        analysis = self.calculator._analyze_tasks_against_targets(self.tasks, self.targets)
+        assert list(analysis) == ['1F', '2F', 'B1']
+        counts = {map_name: (result['total_tasks'], result['tasks_below_efficiency_target'],
+                             result['tasks_below_area_target'], result['tasks_exceeding_duration_target'])
+                  for map_name, result in analysis.items()}
+        assert counts == {'1F': (3, 1, 2, 1), '2F': (3, 1, 0, 1), 'B1': (1, 0, 1, 0)}
+        assert analysis['1F']['area_compliance_rate'] == 33.3 and analysis['2F']['duration_compliance_rate'] == 66.7
+        assert analysis['2F']['targets'] == {'efficiency': 200.0, 'area_value': None, 'area_percentage': 90.0,
+                                             'area_type': 'percentage', 'duration_seconds': 3000}
+
+        # The public variant compares 'value' targets in sqft and keeps the unlabelled map
+        public = self.calculator.analyze_tasks_against_targets(self.tasks, self.targets)
+        assert list(public) == ['1F', '2F', 'B1']
+        assert {map_name: (result['tasks_below_efficiency_target'], result['tasks_below_area_target'],
+                           result['tasks_exceeding_duration_target'])
+                for map_name, result in public.items()} == {'1F': (1, 0, 1), '2F': (1, 0, 1), 'B1': (0, 0, 0)}
+        assert public['1F']['targets']['area_value'] == 100.0
+
+    def test_daily_series_match_former_outputs(self):
+        """Test per-facility and fleet daily series equal the per-day loop outputs"""
+        print("  📅 Testing daily series parity")
+
+        efficiency = self.calculator.calculate_daily_task_efficiency_by_location(
+            self.tasks, self.locations, START_DATE, END_DATE)
+        assert efficiency == {
+            'HQ': {'dates': ['09/01', '09/02', '09/03', '09/04'],
+                   'running_hours': [2.5, 1.44, 0.5, 0], 'coverage_percentages': [80.0, 60.0, 90.9, 0]},
+            'Plant': {'dates': ['09/01', '09/02', '09/03', '09/04'],
+                      'running_hours': [0, 0, 0.17, 0.67], 'coverage_percentages': [0, 0, 25.0, 90.0]},
+        }
+
+        trends = self.calculator.calculate_daily_trends(self.tasks, self.charging, START_DATE, END_DATE)
+        assert trends == {
+            'dates': ['09/01', '09/02', '09/03', '09/04'],
+            'charging_sessions_trend': [1, 2, 0, 1],
+            'charging_duration_trend': [90.0, 45.0, 0, 12.0],
+            'energy_consumption_trend': [2.0, 1.5, 2.1, 0.9],
+            'water_usage_trend': [50.0, 35.0, 45.0, 18.0],
+            'cost_savings_trend': [6.73, 2.02, 7.06, 3.03],
+            'roi_improvement_trend': [0, 0, 0, 0],
+        }
+        assert all(type(sessions) is int for sessions in trends['charging_sessions_trend'])
+
+    def test_duration_parsers_match_scalar_parsers(self):
+        """Test the distinct-value duration parsers agree with the scalar parsers row by row"""
+        print("  ⏱️ Testing duration parsers")
+
+        durations = pd.Series(['1h 30min', '45min', '2h', '0h 04min', 'bad', None, np.nan, '', 3600, 5400.0,
+                               '1800', '1h 30min'], dtype=object)
+        minutes = self.calculator._parse_duration_series_to_minutes(durations)
+        assert minutes.tolist() == [self.calculator._parse_duration_str_to_minutes(value) for value in durations]
+
+        hours = self.calculator._parse_charging_series_to_hours(durations)
+        assert hours.tolist() == [_charging_duration_to_hours(value) for value in durations]
+
+        seconds = pd.Series([3600, np.nan, 90.0])
+        assert self.calculator._parse_charging_series_to_hours(seconds).tolist() == [1.0, 0.0, 0.025]
+        assert self.calculator._parse_duration_series_to_minutes(seconds).tolist() == [60.0, 0.0, 1.5]
+
+    def test_segment_sums_are_bit_identical(self):
+        """Test per-key segment sums equal summing each key's own rows, and skip missing keys"""
+        print("  ➕ Testing segment sums")
+
+        rng = np.random.default_rng(7)
+        keys = pd.Series(rng.choice(['A', 'B', 'C', None], 5000))
+        values = pd.Series(rng.random(5000) * 1000)
+        sums = _segment_sums(keys, {'value': values})
+
+        assert list(sums.index) == ['A', 'B', 'C']
+        for key in ['A', 'B', 'C']:
+            assert sums.at[key, 'value'] == values[keys == key].sum()
+            assert sums.at[key, 'count'] == (keys == key).sum()
+
+
+def run_vectorized_metrics_tests():
+    """Run all vectorized metrics tests"""
+    print("=" * 70)
+    print("🧪 TESTING VECTORIZED METRICS")
+    print("=" * 70)
+
+    test_instance = TestVectorizedMetrics()
+    test_methods = [method for method in dir(test_instance) if method.startswith("test_")]
+
+    passed = 0
+    failed = 0
+
+    for method_name in test_methods:
+        try:
+            test_instance.setup_method()
+            method = getattr(test_instance, method_name)
+            method()
+            passed += 1
+            print(f"✅ {method_name} - PASSED")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {method_name} - FAILED: {e}")
+            import traceback
+            traceback.print_exc()
+
+    print(f"\n📊 Vectorized Metrics Tests: {passed} passed, {failed} failed")
+    return passed, failed
+
+if __name__ == "__main__":
+    run_vectorized_metrics_tests()
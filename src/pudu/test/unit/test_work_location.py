@@ -0,0 +1,358 @@
+"""
+Unit tests for batched idle-robot heartbeat updates, set-based archival and the Parquet archive writer
+"""
+
+import sys
+sys.path.append('../../')
+
+import io
+import tempfile
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from pudu.services.s3_service import S3TransformService
+from pudu.services.work_location_service import WorkLocationService
+from pudu.services.work_location_archive import LocalArchiveBackend, WorkLocationArchiveWriter
+from pudu.test.utils.test_helpers import TestDataLoader
+
+
+class RecordingWorkLocationTable:
+    """Minimal table double: answers the grouped latest-idle query and records every statement"""
+
+    def __init__(self, latest_idle_rows, fail_updates=False):
+        self.table_name = "mnt_robots_work_location"
+        self.latest_idle_rows = latest_idle_rows
+        self.fail_updates = fail_updates
+        self.queries = []
+        self.inserted = []
+        self.field_updates = []
+
+    def query_data(self, query: str = None):
+        query = " ".join(query.split())
+        self.queries.append(query)
+        if query.startswith("UPDATE") and self.fail_updates:
+            raise Exception("Duplicate entry for key 'PRIMARY'")
+        if query.startswith("SELECT") and "GROUP BY" in query:
+            return [row for row in self.latest_idle_rows if f"'{row[0]}'" in query]
+        if query.startswith("SELECT"):
+            return [(row[1],) for row in self.latest_idle_rows if f"'{row[0]}'" in query]
+        return []
+
+    def batch_insert(self, data_list):
+        self.inserted.extend(data_list)
+
+    def insert_data(self, data):
+        self.inserted.append(data)
+
+    def update_field_by_filters(self, field_name, new_value, filters):
+        self.field_updates.append((field_name, new_value, filters))
+
+    def statements(self, verb):
+        return [query for query in self.queries if query.startswith(verb)]
+
+
+class RecordingCursor:
+    """Cursor double for DELETE statements issued through table.cursor"""
+
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+        self.connection = SimpleNamespace(commit=self._commit)
+
+    def _commit(self):
+        self.commits += 1
+
+    def execute(self, query):
+        self.statements.append(" ".join(query.split()))
+        return query.count(" OR ") + 1
+
+
+class ArchiveTable:
+    """Table double for the archival planner: GROUP BY stats via query_data, rows via execute_query"""
+
+    def __init__(self, stats_rows, archive_rows):
+        self.database_name = "test_db"
+        self.table_name = "mnt_robots_work_location"
+        self.stats_rows = stats_rows
+        self.archive_rows = archive_rows
+        self.queries = []
+        self.fetches = []
+        self.cursor = RecordingCursor()
+
+    def query_data(self, query: str = None):
+        self.queries.append(" ".join(query.split()))
+        return self.stats_rows
+
+    def execute_query(self, query: str):
+        self.fetches.append(" ".join(query.split()))
+        rows = [row for row in self.archive_rows if f"'{row['robot_sn']}'" in query]
+        return pd.DataFrame([dict(row, archive_rank=index + 1) for index, row in enumerate(rows)])
+
+
+class RecordingS3Service:
+    def __init__(self):
+        self.partitions = []
+
+    def upload_work_location_partition(self, hour_data, database_name, partition_hour):
+        self.partitions.append((database_name, partition_hour, sorted(hour_data['robot_sn'].unique()), len(hour_data)))
+        return True
+
+
+class TestWorkLocation:
+    """Test idle heartbeat updates and archival with JSON robot data"""
+
+    def setup_method(self):
+        """Setup test data loader and a service without database/S3 dependencies"""
+        self.test_data = TestDataLoader()
+        robots = self.test_data.get_all_robots_from_status_data()
+        self.robot_sns = sorted({robot['robot_sn'] for robot in robots})[:3]
+        while len(self.robot_sns) < 3:
+            self.robot_sns.append(f"TEST_ROBOT_{len(self.robot_sns)}")
+
+        self.service = WorkLocationService.__new__(WorkLocationService)
+        self.service.IDLE_BATCH_CHUNK_SIZE = 500
+        self.service.MAX_RETENTION_HOURS = 24 * 31
+        self.service.ARCHIVE_BATCH_SIZE = 500
+        self.service.MIN_ARCHIVE_THRESHOLD = 100
+        self.service.ARCHIVE_ROBOTS_PER_QUERY = 200
+        self.service.ARCHIVE_DELETE_CHUNK_ROWS = 5000
+        self.service.ARCHIVE_COMPACTION_SETTLE_HOURS = 6
+        self.service.config = SimpleNamespace(close=lambda: None)
+        self.service.transform_service = SimpleNamespace(s3_service=RecordingS3Service())
+
+    def _idle_frame(self, rows):
+        return pd.DataFrame([
+            {'robot_sn': robot_sn, 'map_name': None, 'x': None, 'y': None, 'z': None,
+             'status': 'idle', 'update_time': update_time}
+            for robot_sn, update_time in rows
+        ])
+
+    def test_idle_heartbeats_use_grouped_query_and_single_update(self):
+        """Test known robots are updated in one statement and first-seen robots bulk inserted"""
+        print("  💤 Testing batched idle heartbeat updates")
+
+        known_a, known_b, first_seen = self.robot_sns
+        table = RecordingWorkLocationTable([
+            (known_a, '2024-09-01 09:55:00'),
+            (known_b, '2024-09-01 09:50:00'),
+        ])
+        idle_data = self._idle_frame([
+            (known_a, '2024-09-01 09:58:00'),
+            (known_a, '2024-09-01 10:00:00'),
+            (known_b, '2024-09-01 10:00:00'),
+            (first_seen, '2024-09-01 10:00:00'),
+        ])
+
+        self.service._update_idle_robots_efficiently(table, idle_data)
+
+        selects = table.statements("SELECT")
+        updates = table.statements("UPDATE")
+        assert len(selects) == 1 and "GROUP BY robot_sn" in selects[0], f"Expected one grouped query, got {selects}"
+        assert len(updates) == 1, f"Expected one multi-row UPDATE, got {len(updates)}"
+        assert updates[0].count("SELECT") == 2, "Both known robots should be in the derived table"
+        assert f"'{known_a}' AS robot_sn, '2024-09-01 09:55:00' AS old_time, '2024-09-01 10:00:00' AS new_time" in updates[0]
+        assert [record['robot_sn'] for record in table.inserted] == [first_seen]
+        assert table.field_updates == [], "Batch path should not issue per-robot updates"
+
+    def test_batch_failure_falls_back_to_individual_updates(self):
+        """Test a failing multi-row UPDATE falls back to per-robot processing"""
+        print("  🔁 Testing idle heartbeat fallback")
+
+        known_a = self.robot_sns[0]
+        table = RecordingWorkLocationTable([(known_a, '2024-09-01 09:55:00')], fail_updates=True)
+        idle_data = self._idle_frame([(known_a, '2024-09-01 10:00:00')])
+
+        self.service._update_idle_robots_efficiently(table, idle_data)
+
+        assert table.field_updates == [
+            ('update_time', '2024-09-01 10:00:00', {'robot_sn': known_a, 'update_time': '2024-09-01 09:55:00'})
+        ], f"Unexpected fallback updates {table.field_updates}"
+
+    def test_archival_planner_uses_one_grouped_query(self):
+        """Test robots below the threshold or without expired rows are not planned"""
+        print("  🗂️ Testing set-based archival planner")
+
+        robot_a, robot_b, robot_c = self.robot_sns
+        old_time = datetime.now() - timedelta(days=40)
+        table = ArchiveTable([
+            (robot_a, 300, old_time, datetime.now(), 120),
+            (robot_b, 50, old_time, datetime.now(), 50),
+            (robot_c, 900, datetime.now() - timedelta(days=2), datetime.now(), 0),
+        ], [])
+
+        plan = self.service._check_robots_needing_archive(table)
+
+        assert len(table.queries) == 1 and "GROUP BY robot_sn" in table.queries[0]
+        assert list(plan) == [robot_a], f"Unexpected plan {plan}"
+        assert plan[robot_a]['archive_count'] == 120
+
+    def test_batch_archival_writes_hourly_partitions_and_range_deletes(self):
+        """Test archivable rows for all robots are fetched once, uploaded per hour and deleted by ranges"""
+        print("  📦 Testing hourly partitioned archival")
+
+        robot_a, robot_b, _ = self.robot_sns
+        base_hour = (datetime.now() - timedelta(days=40)).replace(minute=0, second=0, microsecond=0)
+        archive_rows = [
+            {'robot_sn': robot_sn, 'status': 'normal', 'update_time': base_hour + timedelta(minutes=minutes)}
+            for robot_sn in (robot_a, robot_b) for minutes in (5, 35, 65)
+        ]
+        table = ArchiveTable([
+            (robot_a, 300, base_hour, datetime.now(), 3),
+            (robot_b, 300, base_hour, datetime.now(), 3),
+        ], archive_rows)
+
+        self.service._run_archival_for_table(table)
+
+        partitions = self.service.transform_service.s3_service.partitions
+        assert len(table.fetches) == 1, f"Expected one range-scan fetch, got {len(table.fetches)}"
+        assert [(hour, robots, count) for _, hour, robots, count in partitions] == [
+            (base_hour, sorted([robot_a, robot_b]), 4),
+            (base_hour + timedelta(hours=1), sorted([robot_a, robot_b]), 2),
+        ], f"Unexpected partitions {partitions}"
+
+        deletes = table.cursor.statements
+        assert len(deletes) == 1 and deletes[0].count("BETWEEN") == 4, f"Unexpected deletes {deletes}"
+        assert table.cursor.commits == 1
+
+    def _archive_rows(self, partition_hour, robot_sns, minutes):
+        return pd.DataFrame([
+            {'robot_sn': robot_sn, 'map_name': '1F', 'status': 'normal', 'x': 1.5, 'y': 2.5, 'z': 0,
+             'update_time': (partition_hour + timedelta(minutes=minute)).strftime('%Y-%m-%d %H:%M:%S')}
+            for robot_sn in robot_sns for minute in minutes
+        ])
+
+    def test_archive_writer_buffers_robots_into_hourly_zstd_files(self):
+        """Test rows buffered across robots are written as one typed, zstd-compressed file per hour"""
+        print("  🧱 Testing partitioned Parquet archive writer")
+
+        partition_hour = datetime(2024, 8, 1, 14)
+        with tempfile.TemporaryDirectory() as root_dir:
+            backend = LocalArchiveBackend(root_dir)
+            writer = WorkLocationArchiveWriter(backend)
+            for robot_sn in self.robot_sns:
+                writer.add(self._archive_rows(partition_hour, [robot_sn], [5, 50, 65]), "test_db")
+            assert writer.pending_rows() == 9
+
+            results = writer.flush()
+            assert results == {("test_db", partition_hour): True, ("test_db", partition_hour + timedelta(hours=1)): True}
+
+            objects = backend.list("test_db", "robot-work-location-archive/")
+            assert len(objects) == 2, f"Expected one file per hour, got {objects}"
+            assert objects[0][0].startswith("robot-work-location-archive/database=test_db/year=2024/month=08/day=01/hour=14/")
+
+            parquet_file = pq.ParquetFile(io.BytesIO(backend.get("test_db", objects[0][0])))
+            column = parquet_file.metadata.row_group(0).column(0)
+            assert parquet_file.metadata.num_rows == 6
+            assert column.compression == 'ZSTD'
+            assert any('DICTIONARY' in str(encoding) for encoding in column.encodings)
+            assert str(parquet_file.schema_arrow.field('update_time').type) == 'timestamp[ms]'
+            assert str(parquet_file.schema_arrow.field('new_x').type) == 'double', "Missing columns keep their schema type"
+
+    def test_archive_compaction_merges_small_files_per_partition(self):
+        """Test compaction merges closed partitions, leaves open ones alone and lists only recent days"""
+        print("  🗜️ Testing archive compaction")
+
+        open_hour = datetime.now().replace(minute=0, second=0, microsecond=0)
+        closed_hour = open_hour - timedelta(hours=30)
+        old_hour = datetime(2024, 8, 1, 14)
+        with tempfile.TemporaryDirectory() as root_dir:
+            backend = LocalArchiveBackend(root_dir)
+            writer = WorkLocationArchiveWriter(backend)
+            for hour in (old_hour, closed_hour, open_hour):
+                for robot_sn in reversed(self.robot_sns):
+                    writer.write_partition(self._archive_rows(hour, [robot_sn], [1, 2]), "test_db", hour)
+
+            listed_prefixes = []
+            backend_list = backend.list
+            backend.list = lambda database_name, prefix: listed_prefixes.append(prefix) or backend_list(database_name, prefix)
+            assert writer.compact("test_db") == 1
+            assert len(listed_prefixes) <= 4 and all("/day=" in prefix for prefix in listed_prefixes), listed_prefixes
+            backend.list = backend_list
+
+            old_files = backend.list("test_db", writer.partition_prefix("test_db", old_hour))
+            assert len(old_files) == len(self.robot_sns), "Partitions before the lookback window are not listed"
+            assert writer.compact("test_db", since=old_hour) == 1
+
+            closed_files = backend.list("test_db", writer.partition_prefix("test_db", closed_hour))
+            open_files = backend.list("test_db", writer.partition_prefix("test_db", open_hour))
+            assert len(closed_files) == 1 and "/compacted-" in closed_files[0][0], closed_files
+            assert len(open_files) == len(self.robot_sns), "Open partition should not be compacted"
+
+            merged = pq.read_table(io.BytesIO(backend.get("test_db", closed_files[0][0]))).to_pandas()
+            assert len(merged) == 2 * len(self.robot_sns)
+            assert merged['robot_sn'].tolist() == sorted(merged['robot_sn'].tolist()), "Compacted rows are sorted"
+
+    def test_default_compaction_merges_partitions_written_by_archival(self):
+        """Test the default compaction job reaches the hour partitions archival writes past retention"""
+        print("  🗄️ Testing archival followed by default compaction")
+
+        robot_a, robot_b, _ = self.robot_sns
+        retention_edge = (datetime.now() - timedelta(hours=self.service.MAX_RETENTION_HOURS)).replace(
+            minute=0, second=0, microsecond=0)
+        settled_hour = retention_edge - timedelta(hours=12)
+        settling_hour = retention_edge - timedelta(hours=2)
+
+        with tempfile.TemporaryDirectory() as root_dir:
+            s3_service = S3TransformService.__new__(S3TransformService)
+            s3_service.bucket_mapping = {"test_db": "test-bucket"}
+            s3_service.work_location_archive = WorkLocationArchiveWriter(LocalArchiveBackend(root_dir))
+            self.service.transform_service = SimpleNamespace(s3_service=s3_service)
+
+            # Each archival run moves one batch per robot, so an hour partition collects one file per run
+            for hour in (settled_hour, settling_hour):
+                for minutes in ((5, 10), (40, 45)):
+                    archive_rows = [
+                        {'robot_sn': robot_sn, 'status': 'normal', 'update_time': hour + timedelta(minutes=minute)}
+                        for robot_sn in (robot_a, robot_b) for minute in minutes
+                    ]
+                    self.service._run_archival_for_table(ArchiveTable([
+                        (robot_a, 300, hour, datetime.now(), 2),
+                        (robot_b, 300, hour, datetime.now(), 2),
+                    ], archive_rows))
+
+            writer = s3_service.work_location_archive
+            assert len(writer.backend.list("test_db", writer.partition_prefix("test_db", settled_hour))) == 2
+
+            assert self.service.compact_archive() == 1
+
+            settled_files = writer.backend.list("test_db", writer.partition_prefix("test_db", settled_hour))
+            settling_files = writer.backend.list("test_db", writer.partition_prefix("test_db", settling_hour))
+            assert len(settled_files) == 1 and "/compacted-" in settled_files[0][0], settled_files
+            assert len(settling_files) == 2, "Partitions archival may still write to are not compacted"
+            merged = pq.read_table(io.BytesIO(writer.backend.get("test_db", settled_files[0][0]))).to_pandas()
+            assert len(merged) == 8
+
+
+def run_work_location_tests():
+    """Run all work location tests"""
+    print("=" * 70)
+    print("🧪 TESTING WORK LOCATION SERVICE")
+    print("=" * 70)
+
+    test_instance = TestWorkLocation()
+    test_methods = [method for method in dir(test_instance) if method.startswith("test_")]
+
+    passed = 0
+    failed = 0
+
+    for method_name in test_methods:
+        try:
+            test_instance.setup_method()
+            method = getattr(test_instance, method_name)
+            method()
+            passed += 1
+            print(f"✅ {method_name} - PASSED")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {method_name} - FAILED: {e}")
+            import traceback
+            traceback.print_exc()
+
+    print(f"\n📊 Work Location Tests: {passed} passed, {failed} failed")
+    return passed, failed
+
+if __name__ == "__main__":
+    run_work_location_tests()